@@ -22,6 +22,7 @@ from cmk.utils.caching import cache_manager
 
 from cmk.base import config
 from cmk.base.automations import AutomationExitCode
+from cmk.base.checkers import PARSED_SECTIONS_CACHE
 
 from ._cache import Cache
 from ._log import LOGGER, temporary_log_level
@@ -48,6 +49,7 @@ class HealthCheckResponse(BaseModel, frozen=True):
 
 def reload_automation_config() -> None:
     cache_manager.clear()
+    PARSED_SECTIONS_CACHE.clear()
     config.load(validate_hosts=False)
 
 
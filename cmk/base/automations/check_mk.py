@@ -166,6 +166,7 @@ from cmk.base.checkers import (
     CMKSummarizer,
     DiscoveryPluginMapper,
     HostLabelPluginMapper,
+    PARSED_SECTIONS_CACHE,
     SectionPluginMapper,
     SpecialAgentFetcher,
 )
@@ -350,6 +351,7 @@ class AutomationDiscovery(DiscoveryAutomation):
                 section_plugins=SectionPluginMapper(
                     {**plugins.agent_sections, **plugins.snmp_sections}
                 ),
+                parsed_sections_cache=PARSED_SECTIONS_CACHE,
                 section_error_handling=section_error_handling,
                 host_label_plugins=HostLabelPluginMapper(
                     ruleset_matcher=ruleset_matcher,
@@ -649,6 +651,7 @@ def _execute_discovery(
             section_plugins=SectionPluginMapper(
                 {**plugins.agent_sections, **plugins.snmp_sections}
             ),
+            parsed_sections_cache=PARSED_SECTIONS_CACHE,
             section_error_handling=lambda section_name, raw_data: create_section_crash_dump(
                 operation="parsing",
                 section_name=section_name,
@@ -827,6 +830,7 @@ def _execute_autodiscovery() -> tuple[Mapping[HostName, DiscoveryResult], bool]:
                             override_non_ok_state=None,
                         ),
                         section_plugins=section_plugins,
+                        parsed_sections_cache=PARSED_SECTIONS_CACHE,
                         section_error_handling=section_error_handling,
                         host_label_plugins=host_label_plugins,
                         plugins=plugins,
@@ -1611,6 +1615,7 @@ class ABCDeleteHosts:
     def _execute(self, args: list[str]) -> None:
         for hostname_str in args:
             self._delete_host_files(HostName(hostname_str))
+            PARSED_SECTIONS_CACHE.invalidate(HostName(hostname_str))
 
     @abc.abstractmethod
     def _single_file_paths(self, hostname: HostName) -> Iterable[str]:
@@ -10,6 +10,8 @@ from __future__ import annotations
 import functools
 import itertools
 import logging
+import posix
+import threading
 import time
 from collections.abc import Callable, Container, Iterable, Iterator, Mapping, Sequence
 from dataclasses import dataclass
@@ -64,7 +66,13 @@ from cmk.checkengine.fetcher import HostKey, SourceInfo, SourceType
 from cmk.checkengine.inventory import InventoryPlugin, InventoryPluginName
 from cmk.checkengine.parameters import Parameters
 from cmk.checkengine.parser import HostSections, NO_SELECTION, parse_raw_data, SectionNameCollection
-from cmk.checkengine.sectionparser import ParsedSectionName, Provider, ResolvedResult, SectionPlugin
+from cmk.checkengine.sectionparser import (
+    ParsedSectionName,
+    ParsedSectionsCache,
+    Provider,
+    ResolvedResult,
+    SectionPlugin,
+)
 from cmk.checkengine.sectionparserutils import (
     get_cache_info,
     get_section_cluster_kwargs,
@@ -116,10 +124,15 @@ __all__ = [
     "get_aggregated_result",
     "HostLabelPluginMapper",
     "InventoryPluginMapper",
+    "PARSED_SECTIONS_CACHE",
     "SectionPluginMapper",
     "SpecialAgentFetcher",
 ]
 
+# The discovery, the discovery preview and the inventory executed by the same (long running)
+# process reuse the parsed sections if the raw data did not change.
+PARSED_SECTIONS_CACHE: Final = ParsedSectionsCache(max_size=64 * 1024 * 1024)
+
 
 def _fetch_all(
     sources: Iterable[Source], *, simulation: bool, file_cache_options: FileCacheOptions, mode: Mode
@@ -131,8 +144,8 @@ def _fetch_all(
     ]
 ]:
     console.verbose(f"{tty.yellow}+{tty.normal} FETCHING DATA")
-    return [
-        _do_fetch(
+    fetch_threads = [
+        _FetchThread(
             source.source_info(),
             source.file_cache(simulation=simulation, file_cache_options=file_cache_options),
             source.fetcher(),
@@ -140,6 +153,93 @@ def _fetch_all(
         )
         for source in sources
     ]
+    if len(fetch_threads) < 2:
+        return [fetch_thread.fetch() for fetch_thread in fetch_threads]
+
+    # The fetchers mostly wait for sockets and subprocesses, so the sources are fetched
+    # concurrently. The results are collected in the order of the sources.
+    with CPUTracker(console.debug) as tracker:
+        for fetch_thread in fetch_threads:
+            fetch_thread.start()
+        try:
+            for fetch_thread in fetch_threads:
+                fetch_thread.join()
+        except BaseException:
+            # We have been interrupted, e.g. by MKTimeout, which is only raised in the main
+            # thread. Stop the fetchers still running, for example hanging special agents.
+            # The threads are daemon threads, so the exit of the process does not wait for
+            # them in any case.
+            for fetch_thread in fetch_threads:
+                fetch_thread.fetcher.cancel()
+            raise
+
+    return _apportion_durations(
+        [fetch_thread.result() for fetch_thread in fetch_threads], tracker.duration
+    )
+
+
+class _FetchThread(threading.Thread):
+    def __init__(
+        self, source_info: SourceInfo, file_cache: FileCache, fetcher: Fetcher, *, mode: Mode
+    ) -> None:
+        super().__init__(name=f"fetcher-{source_info.ident}", daemon=True)
+        self.source_info: Final = source_info
+        self.file_cache: Final = file_cache
+        self.fetcher: Final = fetcher
+        self.mode: Final = mode
+        self._result: (
+            tuple[SourceInfo, result.Result[AgentRawData | SNMPRawData, Exception], Snapshot]
+            | BaseException
+            | None
+        ) = None
+
+    def fetch(
+        self,
+    ) -> tuple[SourceInfo, result.Result[AgentRawData | SNMPRawData, Exception], Snapshot]:
+        return _do_fetch(self.source_info, self.file_cache, self.fetcher, mode=self.mode)
+
+    def run(self) -> None:
+        try:
+            self._result = self.fetch()
+        except BaseException as exc:
+            self._result = exc
+
+    def result(
+        self,
+    ) -> tuple[SourceInfo, result.Result[AgentRawData | SNMPRawData, Exception], Snapshot]:
+        if self._result is None:
+            raise RuntimeError(f"{self.name} has not finished")
+        if isinstance(self._result, BaseException):
+            raise self._result
+        return self._result
+
+
+def _apportion_durations(
+    fetched: Sequence[
+        tuple[SourceInfo, result.Result[AgentRawData | SNMPRawData, Exception], Snapshot]
+    ],
+    total: Snapshot,
+) -> Sequence[tuple[SourceInfo, result.Result[AgentRawData | SNMPRawData, Exception], Snapshot]]:
+    """Scale the overlapping durations of concurrent fetches to the total duration
+
+    The snapshots of the sources are added up to the execution time of the host,
+    so they must not account for the same time more than once.
+
+    Note: The split is only approximate. The CPU times are those of the whole
+    process (including all fetcher threads and their child processes) while a
+    source was fetched, so a source fetched in parallel to an expensive one is
+    charged part of its CPU time. Only the total is exact.
+    """
+    summed = sum((duration for _info, _raw_data, duration in fetched), Snapshot.null())
+    factors = [t / s if s > 0 else 0.0 for t, s in zip(total.process, summed.process)]
+    return [
+        (
+            source_info,
+            raw_data,
+            Snapshot(posix.times_result(v * f for v, f in zip(duration.process, factors))),
+        )
+        for source_info, raw_data, duration in fetched
+    ]
 
 
 def _do_fetch(
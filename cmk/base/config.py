@@ -641,7 +641,10 @@ class SetFolderPathDict(SetFolderPathAbstract, dict):
 
 
 def _load_config_file(file_to_load: Path, into_dict: dict[str, Any]) -> None:
-    exec(compile(file_to_load.read_text(), file_to_load, "exec"), into_dict, into_dict)  # nosec B102 # BNS:aee528
+    code = store.load_code_from_compiled_files_cache(
+        file_to_load, temp_dir=cmk.utils.paths.tmp_dir, root_dir=cmk.utils.paths.omd_root
+    )
+    exec(code, into_dict, into_dict)  # nosec B102 # BNS:aee528
 
 
 def _load_config(with_conf_d: bool) -> set[str]:
@@ -706,6 +709,12 @@ def _load_config(with_conf_d: bool) -> set[str]:
                 console.error(f"Cannot read in configuration file {path}: {e}", file=sys.stderr)
             sys.exit(1)
 
+    if with_conf_d:
+        # The cached code of removed files, e.g. of deleted folders, would be left behind otherwise
+        store.prune_compiled_files_cache(
+            temp_dir=cmk.utils.paths.tmp_dir, root_dir=cmk.utils.paths.omd_root
+        )
+
     # Cleanup global helper vars
     for helper_var in helper_vars:
         del global_dict[helper_var]
@@ -3385,6 +3394,9 @@ class ConfigCache:
         except KeyError:
             return {}
 
+    def preload_autochecks(self, autochecks: Mapping[HostName, Sequence[AutocheckEntry]]) -> None:
+        self._autochecks_manager.preload(autochecks)
+
     def get_discovered_services(self, hostname: HostName) -> Sequence[ConfiguredService]:
         return self._service_configurer.configure_autochecks(
             hostname, self._autochecks_manager.get_autochecks(hostname)
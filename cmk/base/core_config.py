@@ -17,13 +17,14 @@ from typing import Literal
 
 import cmk.ccc.debug
 from cmk.ccc.exceptions import MKGeneralException
+from cmk.ccc import store
 from cmk.ccc.store import lock_checkmk_configuration
 
 import cmk.utils.config_path
 import cmk.utils.password_store
 import cmk.utils.paths
 from cmk.utils import config_warnings, ip_lookup
-from cmk.utils.config_path import VersionedConfigPath
+from cmk.utils.config_path import ConfigPath, LATEST_CONFIG, VersionedConfigPath
 from cmk.utils.hostaddress import HostAddress, HostName
 from cmk.utils.labels import Labels
 from cmk.utils.licensing.handler import LicensingHandler
@@ -33,6 +34,7 @@ from cmk.utils.servicename import Item, ServiceName
 from cmk.utils.tags import TagGroupID, TagID
 
 from cmk.checkengine.checking import ConfiguredService, ServiceID
+from cmk.checkengine.discovery import AutochecksIndex
 
 import cmk.base.api.agent_based.register as agent_based_register
 from cmk.base import config
@@ -398,6 +400,10 @@ def _create_core_config(
     passwords = config_cache.collect_passwords()
     cmk.utils.password_store.save(passwords, cmk.utils.password_store.pending_password_store_path())
 
+    autochecks_generation = None
+    if config.use_autochecks_index:
+        autochecks_generation, hosts_to_update = _preload_autochecks(config_cache, hosts_to_update)
+
     config_path = next(VersionedConfigPath.current())
     with config_path.create(is_cmc=core.is_cmc()), _backup_objects_file(core):
         core.create_config(
@@ -408,12 +414,42 @@ def _create_core_config(
             hosts_to_update=hosts_to_update,
             passwords=passwords,
         )
+        if autochecks_generation is not None:
+            store.save_object_to_file(
+                _autochecks_generation_path(config_path), autochecks_generation
+            )
 
     cmk.utils.password_store.save(
         passwords, cmk.utils.password_store.core_password_store_path(config_path)
     )
 
 
+def _autochecks_generation_path(config_path: ConfigPath) -> Path:
+    return Path(config_path, "autochecks_generation.mk")
+
+
+def _preload_autochecks(
+    config_cache: ConfigCache, hosts_to_update: set[HostName] | None
+) -> tuple[int, set[HostName] | None]:
+    """Load the autochecks of all hosts from the index in one read
+
+    The autochecks files are only re-read for the hosts whose autochecks have been changed
+    since the latest core config, for example by a discovery that has not been activated
+    yet. An incremental activation has to update these hosts as well.
+    """
+    index = AutochecksIndex.default()
+    generation, autochecks = index.load_all()
+    config_cache.preload_autochecks(autochecks)
+    if hosts_to_update is None:
+        return generation, None
+
+    latest_generation: int = store.load_object_from_file(
+        _autochecks_generation_path(LATEST_CONFIG), default=0
+    )
+    _generation, changed = index.changed_since(latest_generation)
+    return generation, hosts_to_update | changed
+
+
 def _verify_non_deprecated_checkgroups(check_plugins: Iterable[CheckPlugin]) -> None:
     """Verify that the user has no deprecated check groups configured."""
     # 'check_plugin.check_ruleset_name' is of type RuleSetName, which is an PluginName (good),
@@ -147,6 +147,8 @@ inventory_check_autotrigger = True  # Automatically trigger inv-check after auto
 inv_retention_intervals: list[RuleSpec[Sequence[RawIntervalFromConfig]]] = []
 # TODO: Remove this already deprecated option
 always_cleanup_autochecks = None  # For compatiblity with old configuration
+# Load the autochecks of all hosts from one consolidated index when creating the core config
+use_autochecks_index = False
 
 
 class _PeriodicDiscovery(TypedDict):
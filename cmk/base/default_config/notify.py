@@ -35,6 +35,9 @@ notification_parameter: NotificationParameterSpecs = {}
 # Check every 10 seconds for ripe bulks
 notification_bulk_interval = 10
 notification_plugin_timeout = 60
+# Number of notification plug-ins executed concurrently by the keepalive notification helper
+notification_plugin_workers = 1
+notification_plugin_concurrency: dict[NotificationPluginNameStr, int] = {}
 
 # Notification Spooling.
 
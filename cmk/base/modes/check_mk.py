@@ -122,6 +122,7 @@ from cmk.base.checkers import (
     DiscoveryPluginMapper,
     HostLabelPluginMapper,
     InventoryPluginMapper,
+    PARSED_SECTIONS_CACHE,
     SectionPluginMapper,
 )
 from cmk.base.config import (
@@ -1782,6 +1783,8 @@ def mode_notify(options: dict, args: list[str]) -> int | None:
         ensure_nagios=ensure_nagios,
         bulk_interval=config.notification_bulk_interval,
         plugin_timeout=config.notification_plugin_timeout,
+        plugin_workers=config.notification_plugin_workers,
+        plugin_concurrency=config.notification_plugin_concurrency,
         config_contacts=config.contacts,
         fallback_email=config.notification_fallback_email,
         fallback_format=config.notification_fallback_format,
@@ -1897,12 +1900,13 @@ def mode_check_discovery(
                 is_cluster=hostname in config_cache.hosts_config.clusters,
                 cluster_nodes=config_cache.nodes(hostname),
                 params=config_cache.discovery_check_parameters(hostname),
-                fetched=((f[0], f[1]) for f in fetched),
+                fetched=[(f[0], f[1]) for f in fetched],
                 parser=parser,
                 summarizer=summarizer,
                 section_plugins=SectionPluginMapper(
                     {**plugins.agent_sections, **plugins.snmp_sections}
                 ),
+                parsed_sections_cache=PARSED_SECTIONS_CACHE,
                 section_error_handling=lambda section_name, raw_data: create_section_crash_dump(
                     operation="parsing",
                     section_name=section_name,
@@ -2222,6 +2226,7 @@ def mode_discover(options: _DiscoveryOptions, args: list[str]) -> None:
             section_plugins=SectionPluginMapper(
                 {**plugins.agent_sections, **plugins.snmp_sections}
             ),
+            parsed_sections_cache=PARSED_SECTIONS_CACHE,
             section_error_handling=section_error_handling,
             host_label_plugins=HostLabelPluginMapper(
                 ruleset_matcher=config_cache.ruleset_matcher,
@@ -2657,6 +2662,7 @@ def mode_inventory(options: _InventoryOptions, args: list[str]) -> None:
                     summarizer=summarizer,
                     inventory_parameters=config_cache.inventory_parameters,
                     section_plugins=section_plugins,
+                    parsed_sections_cache=PARSED_SECTIONS_CACHE,
                     section_error_handling=section_error_handling,
                     inventory_plugins=inventory_plugins,
                     run_plugin_names=run_plugin_names,
@@ -2753,6 +2759,7 @@ def _execute_active_check_inventory(
             summarizer=summarizer,
             inventory_parameters=inventory_parameters,
             section_plugins=section_plugins,
+            parsed_sections_cache=PARSED_SECTIONS_CACHE,
             section_error_handling=lambda section_name, raw_data: create_section_crash_dump(
                 operation="parsing",
                 section_name=section_name,
@@ -23,10 +23,13 @@ import os
 import re
 import subprocess
 import sys
+import threading
 import time
 import traceback
 import uuid
-from collections.abc import Callable, Iterable, Mapping, Sequence
+from collections import Counter, deque
+from collections.abc import Callable, Hashable, Iterable, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import suppress
 from functools import partial
 from pathlib import Path
@@ -37,7 +40,7 @@ from cmk.ccc import store
 from cmk.ccc.exceptions import MKGeneralException
 
 import cmk.utils.paths
-from cmk.utils import log
+from cmk.utils import log, notification_backlog
 from cmk.utils.hostaddress import HostName
 from cmk.utils.http_proxy_config import HTTPProxyConfig
 from cmk.utils.log import console
@@ -224,6 +227,8 @@ def do_notify(
     logging_level: int,
     keepalive: bool,
     all_timeperiods: TimeperiodSpecs,
+    plugin_workers: int = 1,
+    plugin_concurrency: Mapping[NotificationPluginNameStr, int] | None = None,
 ) -> int | None:
     # pylint: disable=too-many-branches
     global _log_to_stdout, notify_mode
@@ -283,6 +288,8 @@ def do_notify(
                 fallback_email=fallback_email,
                 fallback_format=fallback_format,
                 plugin_timeout=plugin_timeout,
+                plugin_workers=plugin_workers,
+                plugin_concurrency=plugin_concurrency or {},
                 config_contacts=config_contacts,
                 spooling=spooling,
                 backlog_size=backlog_size,
@@ -401,6 +408,7 @@ def notify_notify(
     all_timeperiods: TimeperiodSpecs,
     analyse: bool = False,
     dispatch: str = "",
+    plugin_pool: "NotificationPluginPool | None" = None,
 ) -> NotifyAnalysisInfo | None:
     """
     This function processes one raw notification and decides wether it should be spooled or not.
@@ -466,6 +474,7 @@ def notify_notify(
             all_timeperiods=all_timeperiods,
             analyse=analyse,
             dispatch=dispatch,
+            plugin_pool=plugin_pool,
         )
     return None
 
@@ -486,6 +495,7 @@ def locally_deliver_raw_context(
     all_timeperiods: TimeperiodSpecs,
     analyse: bool = False,
     dispatch: str = "",
+    plugin_pool: "NotificationPluginPool | None" = None,
 ) -> NotifyAnalysisInfo | None:
     try:
         logger.debug("Preparing rule based notifications")
@@ -504,6 +514,7 @@ def locally_deliver_raw_context(
             all_timeperiods=all_timeperiods,
             analyse=analyse,
             dispatch=dispatch,
+            plugin_pool=plugin_pool,
         )
 
     except Exception:
@@ -673,12 +684,18 @@ def notify_keepalive(
     fallback_format: _FallbackFormat,
     config_contacts: ConfigContacts,
     plugin_timeout: int,
+    plugin_workers: int,
+    plugin_concurrency: Mapping[NotificationPluginNameStr, int],
     bulk_interval: int,
     spooling: Literal["local", "remote", "both", "off"],
     backlog_size: int,
     logging_level: int,
     all_timeperiods: TimeperiodSpecs,
 ) -> None:
+    # Without workers to spare, plug-ins are executed synchronously as before.
+    plugin_pool = (
+        NotificationPluginPool(plugin_workers, plugin_concurrency) if plugin_workers > 1 else None
+    )
     events.event_keepalive(
         event_function=partial(
             notify_notify,
@@ -696,6 +713,7 @@ def notify_keepalive(
             backlog_size=backlog_size,
             logging_level=logging_level,
             all_timeperiods=all_timeperiods,
+            plugin_pool=plugin_pool,
         ),
         call_every_loop=partial(
             send_ripe_bulks,
@@ -704,6 +722,7 @@ def notify_keepalive(
             plugin_timeout=plugin_timeout,
         ),
         loop_interval=bulk_interval,
+        shutdown_function=None if plugin_pool is None else plugin_pool.shutdown,
     )
 
 
@@ -736,6 +755,7 @@ def notify_rulebased(
     all_timeperiods: TimeperiodSpecs,
     analyse: bool = False,
     dispatch: str = "",
+    plugin_pool: "NotificationPluginPool | None" = None,
 ) -> NotifyAnalysisInfo:
     # First step: go through all rules and construct our table of
     # notification plugins to call. This is a dict from (users, plugin) to
@@ -796,6 +816,7 @@ def notify_rulebased(
         spooling=spooling,
         analyse=analyse,
         dispatch=dispatch,
+        plugin_pool=plugin_pool,
     )
 
     return rule_info, plugin_info
@@ -913,6 +934,7 @@ def _process_notifications(
     spooling: Literal["local", "remote", "both", "off"],
     analyse: bool,
     dispatch: str = "",
+    plugin_pool: "NotificationPluginPool | None" = None,
 ) -> list[NotifyPluginInfo]:
     # pylint: disable=too-many-branches
     plugin_info: list[NotifyPluginInfo] = []
@@ -946,7 +968,9 @@ def _process_notifications(
                     else rbn_split_plugin_context(plugin_context)
                 )
                 for context in plugin_contexts:
-                    call_notification_script(plugin_name, context, plugin_timeout=plugin_timeout)
+                    _execute_notification_script(
+                        plugin_name, context, plugin_timeout=plugin_timeout, plugin_pool=plugin_pool
+                    )
             else:
                 logger.info("No rule matched, would notify fallback contacts, but none configured")
     else:
@@ -1002,8 +1026,11 @@ def _process_notifications(
                     else:
                         if dispatch and plugin_name != dispatch:
                             continue
-                        call_notification_script(
-                            plugin_name, context, plugin_timeout=plugin_timeout
+                        _execute_notification_script(
+                            plugin_name,
+                            context,
+                            plugin_timeout=plugin_timeout,
+                            plugin_pool=plugin_pool,
                         )
 
             except Exception as e:
@@ -1802,10 +1829,14 @@ def call_notification_script(
         output_lines: list[str] = []
         assert p.stdout is not None
 
-        with Timeout(
-            plugin_timeout,
-            message="Notification plug-in timed out",
-        ) as timeout_guard:
+        # SIGALRM can only be handled by the main thread. Plug-ins executed by the
+        # NotificationPluginPool are killed by a timer instead.
+        timeout_guard: Timeout | _KillOnTimeout = (
+            Timeout(plugin_timeout, message="Notification plug-in timed out")
+            if threading.current_thread() is threading.main_thread()
+            else _KillOnTimeout(plugin_timeout, p)
+        )
+        with timeout_guard:
             try:
                 while True:
                     # read and output stdout linewise to ensure we don't force python to produce
@@ -1820,12 +1851,14 @@ def call_notification_script(
                             sys.stdout.write(line)
                             sys.stdout.flush()
             except MKTimeout:
-                plugin_log(
-                    "Notification plug-in did not finish within %d seconds. Terminating."
-                    % plugin_timeout
-                )
                 p.kill()
 
+        if timeout_guard.signaled:
+            plugin_log(
+                "Notification plug-in did not finish within %d seconds. Terminating."
+                % plugin_timeout
+            )
+
     if exitcode := 1 if timeout_guard.signaled else p.returncode:
         plugin_log("Plug-in exited with code %d" % exitcode)
 
@@ -1844,6 +1877,159 @@ def call_notification_script(
     return exitcode
 
 
+class _KillOnTimeout:
+    def __init__(self, timeout: int, process: subprocess.Popen) -> None:
+        self._signaled = False
+        self._process = process
+        self._timer = threading.Timer(timeout, self._kill)
+
+    @property
+    def signaled(self) -> bool:
+        return self._signaled
+
+    def _kill(self) -> None:
+        self._signaled = True
+        self._process.kill()
+
+    def __enter__(self) -> "_KillOnTimeout":
+        self._timer.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._timer.cancel()
+
+
+class NotificationPluginPool:
+    """Executes notification plug-ins concurrently in keepalive mode
+
+    Calls with the same ordering key (contact and host/service) are executed one
+    after another in the order they have been submitted. The number of concurrent
+    calls of a plug-in can be limited per plug-in name.
+    """
+
+    def __init__(
+        self, max_workers: int, plugin_concurrency: Mapping[NotificationPluginNameStr, int]
+    ) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="notification-plugin"
+        )
+        self._plugin_concurrency = plugin_concurrency
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        # The first job of each key is running or waiting for a plug-in slot
+        self._pending: dict[
+            Hashable, deque[tuple[NotificationPluginNameStr, Callable[[], object]]]
+        ] = {}
+        self._running: Counter[NotificationPluginNameStr] = Counter()
+        # Keys waiting for a slot of a plug-in at its concurrency limit. They are kept
+        # here instead of blocking a worker, which could run the jobs of other plug-ins.
+        self._waiting: dict[NotificationPluginNameStr, deque[Hashable]] = {}
+
+    def submit(
+        self, key: Hashable, plugin_name: NotificationPluginNameStr, job: Callable[[], object]
+    ) -> None:
+        with self._lock:
+            if (pending := self._pending.get(key)) is not None:
+                # The job running before will start this one when it is done
+                pending.append((plugin_name, job))
+                return
+            self._pending[key] = deque([(plugin_name, job)])
+            if not self._take_plugin_slot(key):
+                return
+        self._executor.submit(self._run_first, key)
+
+    def _take_plugin_slot(self, key: Hashable) -> bool:
+        """Take a slot for the first job of the key, or queue the key for one
+
+        Must be called with the lock held.
+        """
+        plugin_name = self._pending[key][0][0]
+        limit = self._plugin_concurrency.get(plugin_name)
+        if limit is not None and self._running[plugin_name] >= limit:
+            self._waiting.setdefault(plugin_name, deque()).append(key)
+            return False
+        self._running[plugin_name] += 1
+        return True
+
+    def _run_first(self, key: Hashable) -> None:
+        with self._lock:
+            plugin_name, job = self._pending[key][0]
+
+        try:
+            job()
+        except Exception:
+            logger.exception("ERROR:")
+
+        startable = []
+        with self._lock:
+            self._running[plugin_name] -= 1
+            if waiting := self._waiting.get(plugin_name):
+                # Hand our slot over to the key waiting the longest
+                self._running[plugin_name] += 1
+                startable.append(waiting.popleft())
+
+            pending = self._pending[key]
+            pending.popleft()
+            if not pending:
+                del self._pending[key]
+                if not self._pending:
+                    self._idle.notify_all()
+            elif self._take_plugin_slot(key):
+                startable.append(key)
+
+        for next_key in startable:
+            self._executor.submit(self._run_first, next_key)
+
+    def shutdown(self) -> None:
+        """Wait for all submitted plug-in calls"""
+        with self._idle:
+            self._idle.wait_for(lambda: not self._pending)
+        self._executor.shutdown(wait=True)
+
+
+def _execute_notification_script(
+    plugin_name: NotificationPluginNameStr,
+    plugin_context: NotificationContext,
+    *,
+    plugin_timeout: int,
+    plugin_pool: NotificationPluginPool | None,
+) -> None:
+    if plugin_pool is None:
+        call_notification_script(plugin_name, plugin_context, plugin_timeout=plugin_timeout)
+        return
+
+    plugin_pool.submit(
+        (
+            plugin_context.get("CONTACTNAME"),
+            plugin_context.get("HOSTNAME"),
+            plugin_context.get("SERVICEDESC"),
+        ),
+        plugin_name,
+        partial(
+            _call_notification_script_logging_errors, plugin_name, plugin_context, plugin_timeout
+        ),
+    )
+
+
+def _call_notification_script_logging_errors(
+    plugin_name: NotificationPluginNameStr,
+    plugin_context: NotificationContext,
+    plugin_timeout: int,
+) -> None:
+    try:
+        call_notification_script(plugin_name, plugin_context, plugin_timeout=plugin_timeout)
+    except Exception as e:
+        logger.exception("    ERROR:")
+        log_to_history(
+            notification_result_message(
+                plugin=NotificationPluginName(plugin_name),
+                context=plugin_context,
+                exit_code=NotificationResultCode(2),
+                output=[str(e)],
+            )
+        )
+
+
 # Construct the environment for the notification script
 def notification_script_env(plugin_context: NotificationContext) -> PluginNotificationContext:
     # Use half of the maximum allowed string length MAX_ARG_STRLEN
@@ -2443,29 +2629,21 @@ def call_bulk_notification_script(
 
 
 def store_notification_backlog(raw_context: EventContext, *, backlog_size: int) -> None:
-    path = notification_logdir + "/backlog.mk"
-    if not backlog_size:
-        if os.path.exists(path):
-            os.remove(path)
-        return
-
-    backlog = store.load_object_from_file(
-        path,
-        default=[],
-        lock=True,
-    )[: backlog_size - 1]
-    store.save_object_to_file(path, [raw_context] + backlog, pretty=False)
+    notification_backlog.store_notification_backlog(
+        Path(notification_logdir), raw_context, backlog_size=backlog_size
+    )
 
 
 def raw_context_from_backlog(nr: int) -> EventContext:
-    backlog = store.load_object_from_file(notification_logdir + "/backlog.mk", default=[])
-
-    if nr < 0 or nr >= len(backlog):
+    raw_context = notification_backlog.load_notification_backlog_entry(
+        Path(notification_logdir), nr
+    )
+    if raw_context is None:
         console.error(f"No notification number {nr} in backlog.", file=sys.stderr)
         sys.exit(2)
 
     logger.info("Replaying notification %d from backlog...\n", nr)
-    return backlog[nr]
+    return raw_context
 
 
 def raw_context_from_env(environ: Mapping[str, str]) -> EventContext:
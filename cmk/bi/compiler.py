@@ -6,11 +6,13 @@
 from __future__ import annotations
 
 import ast
+import hashlib
 import os
 import pickle
 import time
+from collections.abc import Iterator, Mapping, MutableMapping
 from pathlib import Path
-from typing import TypedDict
+from typing import NamedTuple, TypedDict
 
 from redis import Redis
 
@@ -24,9 +26,9 @@ from cmk.utils.redis import get_redis_client
 
 from cmk.bi.aggregation import BIAggregation
 from cmk.bi.data_fetcher import BIStructureFetcher, get_cache_dir, SiteProgramStart
-from cmk.bi.lib import SitesCallback
+from cmk.bi.lib import BIHostData, SitesCallback
 from cmk.bi.packs import BIAggregationPacks
-from cmk.bi.searcher import BISearcher
+from cmk.bi.searcher import BISearchDependencies, BISearcher
 from cmk.bi.trees import BICompiledAggregation, BICompiledRule, FrozenBIInfo
 from cmk.bi.type_defs import frozen_aggregations_dir
 
@@ -38,6 +40,98 @@ class ConfigStatus(TypedDict):
 
 
 path_compiled_aggregations = Path(get_cache_dir(), "compiled_aggregations")
+# Summary of the compiled aggregations, allows to load them on demand
+path_compiled_aggregations_info = Path(get_cache_dir(), "compiled_aggregations.info")
+# What the compiled aggregations depend on, allows to compile only the affected ones
+path_compilation_dependencies = Path(get_cache_dir(), "compilation_dependencies")
+
+
+class CompiledAggregationInfo(NamedTuple):
+    freeze_aggregations: bool
+    branch_titles: frozenset[str]
+
+
+class CompilationDependencies(TypedDict):
+    configfile_timestamp: float
+    host_digests: dict[str, bytes]
+    aggregations: dict[str, BISearchDependencies]
+
+
+def _host_digest(host: BIHostData) -> bytes:
+    # Sets and dicts need a stable order, otherwise the digests would differ between processes
+    return hashlib.sha256(
+        repr(
+            (
+                host.site_id,
+                sorted(host.tags),
+                sorted(host.labels.items()),
+                host.folder,
+                sorted(
+                    (description, sorted(service.tags), sorted(service.labels.items()))
+                    for description, service in host.services.items()
+                ),
+                host.children,
+                host.parents,
+                host.alias,
+                host.name,
+            )
+        ).encode()
+    ).digest()
+
+
+class CompiledAggregations(MutableMapping[str, BICompiledAggregation]):
+    """The compiled aggregations, each one is read from disk when it is accessed first"""
+
+    def __init__(self) -> None:
+        self._loaded: dict[str, BICompiledAggregation] = {}
+        self._on_disk: dict[str, None] = {}
+        self._info: Mapping[str, CompiledAggregationInfo] = {}
+
+    def set_on_disk(self, aggr_ids: list[str], info: Mapping[str, CompiledAggregationInfo]) -> None:
+        self._on_disk = dict.fromkeys(aggr_ids)
+        self._info = info
+
+    def is_loaded(self, aggr_id: str) -> bool:
+        return aggr_id in self._loaded
+
+    def info(self, aggr_id: str) -> CompiledAggregationInfo | None:
+        """Return the summary of an aggregation that has not been loaded yet"""
+        return None if aggr_id in self._loaded else self._info.get(aggr_id)
+
+    def __getitem__(self, aggr_id: str) -> BICompiledAggregation:
+        try:
+            return self._loaded[aggr_id]
+        except KeyError:
+            if aggr_id not in self._on_disk:
+                raise
+        logger.debug("Loading cached aggregation results %s" % aggr_id)
+        aggregation = self._loaded[aggr_id] = BIAggregation.create_trees_from_schema(
+            store.load_object_from_pickle_file(path_compiled_aggregations / aggr_id, default={})
+        )
+        return aggregation
+
+    def __setitem__(self, aggr_id: str, aggregation: BICompiledAggregation) -> None:
+        self._loaded[aggr_id] = aggregation
+
+    def __delitem__(self, aggr_id: str) -> None:
+        if aggr_id not in self:
+            raise KeyError(aggr_id)
+        self._loaded.pop(aggr_id, None)
+        self._on_disk.pop(aggr_id, None)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from list(self._loaded)
+        yield from [aggr_id for aggr_id in self._on_disk if aggr_id not in self._loaded]
+
+    def __len__(self) -> int:
+        return len(self._loaded.keys() | self._on_disk.keys())
+
+    def __contains__(self, aggr_id: object) -> bool:
+        return aggr_id in self._loaded or aggr_id in self._on_disk
+
+    def clear(self) -> None:
+        self._loaded.clear()
+        self._on_disk.clear()
 
 
 class BICompiler:
@@ -46,7 +140,7 @@ class BICompiler:
         self._bi_configuration_file = bi_configuration_file
 
         self._logger = logger.getChild("bi.compiler")
-        self._compiled_aggregations: dict[str, BICompiledAggregation] = {}
+        self._compiled_aggregations = CompiledAggregations()
         self._path_compilation_lock = Path(get_cache_dir(), "compilation.LOCK")
         self._path_compilation_timestamp = Path(get_cache_dir(), "last_compilation")
         path_compiled_aggregations.mkdir(parents=True, exist_ok=True)
@@ -60,13 +154,19 @@ class BICompiler:
         self.bi_searcher = BISearcher()
 
     @property
-    def compiled_aggregations(self) -> dict[str, BICompiledAggregation]:
+    def compiled_aggregations(self) -> CompiledAggregations:
         return self._compiled_aggregations
 
     def get_aggregation_by_name(
         self, aggr_name: str
     ) -> tuple[BICompiledAggregation, BICompiledRule] | None:
-        for _name, compiled_aggregation in self._compiled_aggregations.items():
+        for aggr_id in self._compiled_aggregations:
+            if (
+                info := self._compiled_aggregations.info(aggr_id)
+            ) is not None and aggr_name not in info.branch_titles:
+                # Avoid loading aggregations without this branch
+                continue
+            compiled_aggregation = self._compiled_aggregations[aggr_id]
             for branch in compiled_aggregation.branches:
                 if branch.properties.title == aggr_name:
                     return compiled_aggregation, branch
@@ -144,14 +244,18 @@ class BICompiler:
         aggr_hint_path.rmdir()
 
     def _manage_frozen_branches(
-        self, compiled_aggregations: dict[str, BICompiledAggregation]
-    ) -> dict[str, BICompiledAggregation]:
-        updated_aggregations = {}
-
+        self, compiled_aggregations: CompiledAggregations
+    ) -> CompiledAggregations:
         frozen_aggregations_dir.mkdir(exist_ok=True)
         computed_new_frozen_branch = False
-        for aggr_id, compiled_aggregation in compiled_aggregations.items():
-            updated_aggregations[aggr_id] = compiled_aggregation
+        for aggr_id in list(compiled_aggregations):
+            if (info := compiled_aggregations.info(aggr_id)) is not None:
+                # Not loaded yet, so the branches have not been frozen in this process
+                if not info.freeze_aggregations:
+                    self._unfreeze_all_branches(aggr_id)
+                    continue
+
+            compiled_aggregation = compiled_aggregations[aggr_id]
             if compiled_aggregation.frozen_info is not None:
                 # Already frozen
                 continue
@@ -177,7 +281,7 @@ class BICompiler:
                     frozen_aggregation.frozen_info = FrozenBIInfo(
                         compiled_aggregation.id, branch.properties.title
                     )
-                    updated_aggregations[
+                    compiled_aggregations[
                         self.get_frozen_aggr_id(frozen_aggregation.frozen_info)
                     ] = frozen_aggregation
 
@@ -185,23 +289,20 @@ class BICompiler:
             compiled_aggregation.branches = []
 
         if computed_new_frozen_branch:
-            self._generate_part_of_aggregation_lookup(updated_aggregations)
+            self._generate_part_of_aggregation_lookup(compiled_aggregations)
 
-        return updated_aggregations
+        return compiled_aggregations
 
     def _load_compiled_aggregations(self) -> None:
-        for path_object in path_compiled_aggregations.iterdir():
-            if path_object.is_dir():
-                continue
-            aggr_id = path_object.name
-            if aggr_id.endswith(".new") or aggr_id in self._compiled_aggregations:
-                continue
-
-            self._logger.debug("Loading cached aggregation results %s" % aggr_id)
-            self._compiled_aggregations[aggr_id] = BIAggregation.create_trees_from_schema(
-                store.load_object_from_pickle_file(path_object, default={})
-            )
-
+        # The aggregations are only loaded when they are actually used
+        self._compiled_aggregations.set_on_disk(
+            [
+                path_object.name
+                for path_object in path_compiled_aggregations.iterdir()
+                if not path_object.is_dir() and not path_object.name.endswith(".new")
+            ],
+            store.load_object_from_pickle_file(path_compiled_aggregations_info, default={}),
+        )
         self._compiled_aggregations = self._manage_frozen_branches(self._compiled_aggregations)
 
     def _check_compilation_status(self) -> None:
@@ -224,13 +325,47 @@ class BICompiler:
             all_aggregations_by_id: dict[str, BIAggregation] = {
                 x.id: x for x in self._bi_packs.get_all_aggregations()
             }
+            host_digests = {
+                host_name: _host_digest(host)
+                for host_name, host in self._bi_structure_fetcher.hosts.items()
+            }
+            dependencies = store.load_object_from_pickle_file(
+                path_compilation_dependencies, default=None
+            )
+            aggr_ids_to_compile = self._aggregations_to_compile(
+                all_aggregations_by_id, dependencies, current_configstatus, host_digests
+            )
+            self._logger.debug(
+                "Compiling %d of %d aggregations"
+                % (len(aggr_ids_to_compile), len(all_aggregations_by_id))
+            )
+
+            # The other aggregations are still valid, they are read from disk when needed
+            self._compiled_aggregations.clear()
+            self._compiled_aggregations.set_on_disk(
+                [x for x in all_aggregations_by_id if x not in aggr_ids_to_compile], {}
+            )
+            aggregation_dependencies = {
+                aggr_id: aggr_dependencies
+                for aggr_id, aggr_dependencies in (
+                    {} if dependencies is None else dependencies["aggregations"]
+                ).items()
+                if aggr_id in all_aggregations_by_id and aggr_id not in aggr_ids_to_compile
+            }
             for aggregation in all_aggregations_by_id.values():
+                if aggregation.id not in aggr_ids_to_compile:
+                    continue
                 start = time.time()
-                self._compiled_aggregations[aggregation.id] = aggregation.compile(self.bi_searcher)
+                with self.bi_searcher.record_dependencies() as aggr_dependencies:
+                    self._compiled_aggregations[aggregation.id] = aggregation.compile(
+                        self.bi_searcher
+                    )
+                aggregation_dependencies[aggregation.id] = aggr_dependencies
                 self._logger.debug(f"Compilation of {aggregation.id} took {time.time() - start:f}")
             self._verify_aggregation_title_uniqueness(self._compiled_aggregations)
 
-            for aggr_id, compiled_aggr in self._compiled_aggregations.items():
+            for aggr_id in aggr_ids_to_compile:
+                compiled_aggr = self._compiled_aggregations[aggr_id]
                 start = time.time()
                 result = compiled_aggr.serialize()
                 self._logger.debug(
@@ -239,6 +374,25 @@ class BICompiler:
                 )
                 self._save_data(path_compiled_aggregations.joinpath(aggr_id), result)
 
+            store.save_object_to_pickle_file(
+                path_compiled_aggregations_info,
+                {
+                    aggr_id: CompiledAggregationInfo(
+                        bool(compiled_aggr.computation_options.freeze_aggregations),
+                        frozenset(branch.properties.title for branch in compiled_aggr.branches),
+                    )
+                    for aggr_id, compiled_aggr in self._compiled_aggregations.items()
+                },
+            )
+            store.save_object_to_pickle_file(
+                path_compilation_dependencies,
+                CompilationDependencies(
+                    configfile_timestamp=current_configstatus["configfile_timestamp"],
+                    host_digests=host_digests,
+                    aggregations=aggregation_dependencies,
+                ),
+            )
+
             self._compiled_aggregations = self._manage_frozen_branches(self._compiled_aggregations)
             self._generate_part_of_aggregation_lookup(self._compiled_aggregations)
 
@@ -249,6 +403,55 @@ class BICompiler:
             str(self._path_compilation_timestamp), str(current_configstatus["configfile_timestamp"])
         )
 
+    def _aggregations_to_compile(
+        self,
+        all_aggregations_by_id: Mapping[str, BIAggregation],
+        dependencies: CompilationDependencies | None,
+        current_configstatus: ConfigStatus,
+        host_digests: Mapping[str, bytes],
+    ) -> set[str]:
+        """Determine the aggregations affected by the changes since the last compilation
+
+        A changed configuration requires a complete compilation. Otherwise only the
+        aggregations are compiled whose searches are affected by changed hosts.
+        """
+        if (
+            dependencies is None
+            or dependencies["configfile_timestamp"] != current_configstatus["configfile_timestamp"]
+        ):
+            return set(all_aggregations_by_id)
+
+        aggr_ids_to_compile = {
+            aggr_id
+            for aggr_id in all_aggregations_by_id
+            if aggr_id not in dependencies["aggregations"]
+            or not path_compiled_aggregations.joinpath(aggr_id).exists()
+        }
+
+        previous_digests = dependencies["host_digests"]
+        changed_hosts = {
+            host_name
+            for host_name in previous_digests.keys() | host_digests.keys()
+            if previous_digests.get(host_name) != host_digests.get(host_name)
+        }
+        if not changed_hosts:
+            return aggr_ids_to_compile
+
+        changed_hosts_searcher = BISearcher()
+        changed_hosts_searcher.set_hosts(
+            {
+                host_name: host
+                for host_name, host in self._bi_structure_fetcher.hosts.items()
+                if host_name in changed_hosts
+            }
+        )
+        return aggr_ids_to_compile | {
+            aggr_id
+            for aggr_id, aggr_dependencies in dependencies["aggregations"].items()
+            if aggr_id in all_aggregations_by_id
+            and aggr_dependencies.affected_by(changed_hosts, changed_hosts_searcher)
+        }
+
     def _cleanup_vanished_aggregations(self) -> None:
         valid_aggregations = list(self._compiled_aggregations.keys())
         for path_object in path_compiled_aggregations.iterdir():
@@ -259,7 +462,7 @@ class BICompiler:
                 self._unfreeze_all_branches(path_object.name)
 
     def _verify_aggregation_title_uniqueness(
-        self, compiled_aggregations: dict[str, BICompiledAggregation]
+        self, compiled_aggregations: Mapping[str, BICompiledAggregation]
     ) -> None:
         used_titles: dict[str, str] = {}
         for aggr_id, bi_aggregation in compiled_aggregations.items():
@@ -4,7 +4,7 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import copy
-from collections.abc import Iterator
+from collections.abc import Iterator, Mapping
 from typing import NamedTuple
 
 from cmk.ccc.plugin_registry import Registry
@@ -57,7 +57,7 @@ bi_computer_postprocessing_registry = BIComputerPostprocessingRegistry()
 class BIComputer:
     def __init__(
         self,
-        compiled_aggregations: dict[str, BICompiledAggregation],
+        compiled_aggregations: Mapping[str, BICompiledAggregation],
         bi_status_fetcher: BIStatusFetcher,
     ) -> None:
         self._compiled_aggregations = compiled_aggregations
@@ -418,7 +418,8 @@ class ABCBISearcher(ABC):
         # The key may be a pattern / regex, so `str` is the correct type for the key.
         self.hosts: dict[str, BIHostData] = {}
         self._host_regex_match_cache: dict[str, dict] = {}
-        self._host_regex_miss_cache: dict[str, dict] = {}
+        self._host_alias_regex_match_cache: dict[str, dict] = {}
+        self._service_regex_match_cache: dict[str, dict] = {}
 
     @abstractmethod
     def search_hosts(self, conditions: dict) -> list[BIHostSearchMatch]:
@@ -3,8 +3,15 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
-from collections.abc import Iterable, Mapping
-from typing import Any
+from __future__ import annotations
+
+import ast
+import itertools
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Final
 
 from cmk.utils.labels import LabelGroups
 from cmk.utils.regex import regex
@@ -24,6 +31,81 @@ from cmk.bi.lib import ABCBISearcher, BIHostData, BIHostSearchMatch, BIServiceSe
 
 # Search data used by bi_searcher
 
+_REGEX_SPECIAL_CHARS: Final = frozenset(".^$*+?{}[]\\|()")
+
+
+def _literal_prefix(pattern: str) -> str:
+    """Return the text all strings matched by the (not anchored) pattern start with"""
+    if "|" in pattern:
+        return ""
+    for index, char in enumerate(pattern):
+        if char in _REGEX_SPECIAL_CHARS:
+            # The character in front of a quantifier may be missing
+            return pattern[: index - 1] if char in "*?{" and index else pattern[:index]
+    return pattern
+
+
+class _SortedNames:
+    """Find the names starting with a given prefix without looking at all of them"""
+
+    def __init__(self, names: Iterable[str]) -> None:
+        self._names = sorted(set(names))
+
+    def starting_with(self, prefix: str) -> Sequence[str]:
+        if not prefix:
+            return self._names
+        return list(
+            itertools.takewhile(
+                lambda name: name.startswith(prefix),
+                itertools.islice(self._names, bisect_left(self._names, prefix), None),
+            )
+        )
+
+
+def _regex_matches(pattern: str, names: _SortedNames) -> dict[str, tuple]:
+    regex_pattern = regex(pattern)
+    return {
+        name: match.groups()
+        for name in names.starting_with(_literal_prefix(pattern))
+        if (match := regex_pattern.match(name))
+    }
+
+
+@dataclass
+class BISearchDependencies:
+    """The searches done while compiling an aggregation
+
+    All searches filter the hosts one by one. So the compiled aggregation only changes
+    if one of the hosts it used changes, or if one of the searches matches a new or
+    changed host.
+    """
+
+    host_conditions: set[str] = field(default_factory=set)
+    host_name_patterns: set[str] = field(default_factory=set)
+    hosts: set[str] = field(default_factory=set)
+
+    def add_hosts(self, hosts: Iterable[BIHostData]) -> None:
+        for host in hosts:
+            self.hosts.add(host.name)
+            self.hosts.update(host.children)
+            self.hosts.update(host.parents)
+
+    def affected_by(self, changed_hosts: set[str], searcher: BISearcher) -> bool:
+        """Tell whether the changed hosts, given with their current data, affect the searches"""
+        if not changed_hosts.isdisjoint(self.hosts):
+            return True
+        if not searcher.hosts:
+            return False
+        candidates = list(searcher.hosts.values())
+        return any(
+            searcher.get_host_name_matches(candidates, pattern)[0]
+            for pattern in self.host_name_patterns
+        ) or any(
+            searcher.search_hosts(ast.literal_eval(conditions))
+            for conditions in self.host_conditions
+        )
+
+
 #   .--BISearcher----------------------------------------------------------.
 #   |         ____ ___ ____                      _                         |
 #   |        | __ )_ _/ ___|  ___  __ _ _ __ ___| |__   ___ _ __           |
@@ -35,6 +117,26 @@ from cmk.bi.lib import ABCBISearcher, BIHostData, BIHostSearchMatch, BIServiceSe
 
 
 class BISearcher(ABCBISearcher):
+    """Search the hosts and services of one compilation run
+
+    The hosts given to the search methods are taken from the hosts set with set_hosts().
+    The regex matches are computed once per pattern and kept until the hosts are replaced.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._host_names: _SortedNames | None = None
+        self._host_aliases: _SortedNames | None = None
+        self._dependencies: BISearchDependencies | None = None
+
+    @contextmanager
+    def record_dependencies(self) -> Iterator[BISearchDependencies]:
+        dependencies = self._dependencies = BISearchDependencies()
+        try:
+            yield dependencies
+        finally:
+            self._dependencies = None
+
     def set_hosts(self, hosts: dict[str, BIHostData]) -> None:
         self.cleanup()
         # The key may be a pattern / regex, so `str` is the correct type for the key.
@@ -44,8 +146,11 @@ class BISearcher(ABCBISearcher):
         # Note: Do not call clear() on hosts
         #       This would clear the reference we've got on set_hosts
         self.hosts = {}
+        self._host_names = None
+        self._host_aliases = None
         self._host_regex_match_cache.clear()
-        self._host_regex_miss_cache.clear()
+        self._host_alias_regex_match_cache.clear()
+        self._service_regex_match_cache.clear()
 
     def search_hosts(self, conditions: dict) -> list[BIHostSearchMatch]:
         hosts, matched_re_groups = self.filter_host_choice(
@@ -54,7 +159,11 @@ class BISearcher(ABCBISearcher):
         matched_hosts = self.filter_host_folder(hosts, conditions["host_folder"])
         matched_hosts = self.filter_host_tags(matched_hosts, conditions["host_tags"])
         matched_hosts = self.filter_host_labels(matched_hosts, conditions["host_label_groups"])
-        return [BIHostSearchMatch(x, matched_re_groups[x.name]) for x in matched_hosts]
+        search_matches = [BIHostSearchMatch(x, matched_re_groups[x.name]) for x in matched_hosts]
+        if self._dependencies is not None:
+            self._dependencies.host_conditions.add(repr(conditions))
+            self._dependencies.add_hosts(x.host for x in search_matches)
+        return search_matches
 
     def filter_host_choice(
         self,
@@ -79,6 +188,17 @@ class BISearcher(ABCBISearcher):
         self,
         hosts: list[BIHostData],
         pattern: str,
+    ) -> tuple[list[BIHostData], dict]:
+        matched_hosts, matched_re_groups = self._get_host_name_matches(hosts, pattern)
+        if self._dependencies is not None:
+            self._dependencies.host_name_patterns.add(pattern)
+            self._dependencies.add_hosts(matched_hosts)
+        return matched_hosts, matched_re_groups
+
+    def _get_host_name_matches(
+        self,
+        hosts: list[BIHostData],
+        pattern: str,
     ) -> tuple[list[BIHostData], dict]:
         if pattern == "(.*)":
             return hosts, self._host_match_groups(hosts)
@@ -95,30 +215,15 @@ class BISearcher(ABCBISearcher):
         if not pattern_with_anchor.endswith("$"):
             pattern_with_anchor += "$"
 
-        matched_hosts = []
-        matched_re_groups = {}
-        regex_pattern = regex(pattern_with_anchor)
-        pattern_match_cache = self._host_regex_match_cache.setdefault(pattern_with_anchor, {})
-        pattern_miss_cache = self._host_regex_miss_cache.setdefault(pattern_with_anchor, {})
-        for host in hosts:
-            if host.name in pattern_miss_cache:
-                continue
-
-            cached_match = pattern_match_cache.get(host.name)
-            if cached_match:
-                matched_hosts.append(host)
-                matched_re_groups[host.name] = cached_match
-                continue
-
-            match = regex_pattern.match(host.name)
-            if match is None:
-                pattern_miss_cache[host.name] = True
-                continue
-            pattern_match_cache[host.name] = match.groups()
-            matched_hosts.append(host)
-            matched_re_groups[host.name] = pattern_match_cache[host.name]
+        if (pattern_matches := self._host_regex_match_cache.get(pattern_with_anchor)) is None:
+            if self._host_names is None:
+                self._host_names = _SortedNames(self.hosts)
+            pattern_matches = self._host_regex_match_cache[pattern_with_anchor] = _regex_matches(
+                pattern_with_anchor, self._host_names
+            )
 
-        return matched_hosts, matched_re_groups
+        matched_hosts = [host for host in hosts if host.name in pattern_matches]
+        return matched_hosts, {host.name: pattern_matches[host.name] for host in matched_hosts}
 
     def get_host_alias_matches(
         self,
@@ -128,31 +233,42 @@ class BISearcher(ABCBISearcher):
         if pattern == "(.*)":
             return hosts, self._host_match_groups(hosts, "alias")
 
-        # TODO: alias matches currently costs way more performance than the host matches
-        #       requires alias lookup cache to fix
-        matched_hosts = []
-        matched_re_groups = {}
-        regex_pattern = regex(pattern)
-        for host in hosts:
-            match = regex_pattern.match(host.alias)
-            if match is None:
-                continue
-            matched_hosts.append(host)
-            matched_re_groups[host.name] = tuple(match.groups())
-        return matched_hosts, matched_re_groups
+        if (pattern_matches := self._host_alias_regex_match_cache.get(pattern)) is None:
+            if self._host_aliases is None:
+                self._host_aliases = _SortedNames(host.alias for host in self.hosts.values())
+            pattern_matches = self._host_alias_regex_match_cache[pattern] = _regex_matches(
+                pattern, self._host_aliases
+            )
+
+        matched_hosts = [host for host in hosts if host.alias in pattern_matches]
+        return matched_hosts, {host.name: pattern_matches[host.alias] for host in matched_hosts}
 
     def get_service_description_matches(
         self,
         host_matches: list[BIHostSearchMatch],
         pattern: str,
     ) -> list[BIServiceSearchMatch]:
-        matched_services = []
+        # Most hosts share their service descriptions, match each of them only once
+        pattern_matches = self._service_regex_match_cache.setdefault(pattern, {})
+        prefix = _literal_prefix(pattern)
         regex_pattern = regex(pattern)
+        matched_services = []
         for host_match in host_matches:
             for service_description in host_match.host.services.keys():
-                if match := regex_pattern.match(service_description):
+                try:
+                    match_groups = pattern_matches[service_description]
+                except KeyError:
+                    match = (
+                        regex_pattern.match(service_description)
+                        if service_description.startswith(prefix)
+                        else None
+                    )
+                    match_groups = pattern_matches[service_description] = (
+                        None if match is None else match.groups()
+                    )
+                if match_groups is not None:
                     matched_services.append(
-                        BIServiceSearchMatch(host_match, service_description, tuple(match.groups()))
+                        BIServiceSearchMatch(host_match, service_description, match_groups)
                     )
         return matched_services
 
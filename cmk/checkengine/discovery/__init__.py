@@ -7,6 +7,7 @@ from ._active_check import execute_check_discovery
 from ._autochecks import (
     AutocheckEntry,
     AutocheckServiceWithNodes,
+    AutochecksIndex,
     AutochecksManager,
     AutochecksStore,
     DiscoveredLabelsCache,
@@ -36,6 +37,7 @@ __all__ = [
     "analyse_services",
     "AutocheckServiceWithNodes",
     "AutocheckEntry",
+    "AutochecksIndex",
     "AutochecksManager",
     "AutochecksStore",
     "autodiscovery",
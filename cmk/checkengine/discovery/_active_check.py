@@ -26,7 +26,12 @@ from cmk.checkengine.checking import CheckPluginName, ServiceID
 from cmk.checkengine.checkresults import ActiveCheckResult
 from cmk.checkengine.fetcher import HostKey, SourceInfo
 from cmk.checkengine.parser import group_by_host, ParserFunction
-from cmk.checkengine.sectionparser import make_providers, SectionPlugin, store_piggybacked_sections
+from cmk.checkengine.sectionparser import (
+    make_providers,
+    ParsedSectionsCache,
+    SectionPlugin,
+    store_piggybacked_sections,
+)
 from cmk.checkengine.sectionparserutils import check_parsing_errors
 from cmk.checkengine.summarize import SummarizerFunction
 
@@ -85,7 +90,7 @@ def execute_check_discovery(
     is_cluster: bool,
     cluster_nodes: Sequence[HostName],
     params: DiscoveryCheckParameters,
-    fetched: Iterable[tuple[SourceInfo, result.Result[AgentRawData | SNMPRawData, Exception]]],
+    fetched: Sequence[tuple[SourceInfo, result.Result[AgentRawData | SNMPRawData, Exception]]],
     parser: ParserFunction,
     summarizer: SummarizerFunction,
     section_plugins: SectionMap[SectionPlugin],
@@ -93,6 +98,7 @@ def execute_check_discovery(
     plugins: Mapping[CheckPluginName, DiscoveryPlugin],
     autochecks_config: AutochecksConfig,
     section_error_handling: Callable[[SectionName, Sequence[object]], str],
+    parsed_sections_cache: ParsedSectionsCache | None,
     enforced_services: Container[ServiceID],
 ) -> Sequence[ActiveCheckResult]:
     # Note: '--cache' is set in core_cmc, nagios template or even on CL and means:
@@ -113,6 +119,9 @@ def execute_check_discovery(
         host_sections_by_host,
         section_plugins,
         error_handling=section_error_handling,
+        cache=(
+            None if parsed_sections_cache is None else parsed_sections_cache.for_sources(fetched)
+        ),
     )
 
     if is_cluster:
@@ -5,8 +5,12 @@
 from __future__ import annotations
 
 import ast
+import os
+import pickle
+import sqlite3
 from collections import defaultdict
 from collections.abc import Callable, Iterable, Mapping, Sequence
+from contextlib import closing
 from pathlib import Path
 from typing import NamedTuple, Protocol, TypedDict
 
@@ -25,6 +29,7 @@ __all__ = [
     "AutocheckServiceWithNodes",
     "AutocheckEntry",
     "AutochecksStore",
+    "AutochecksIndex",
     "AutochecksManager",
     "AutochecksConfig",
     "remove_autochecks_of_host",
@@ -138,6 +143,110 @@ class AutochecksStore:
             pass
 
 
+class AutochecksIndex:
+    """The autochecks of all hosts in one SQLite database
+
+    The autochecks files of the hosts (see AutochecksStore) remain the authoritative
+    source, they are also touched by other means (renaming or removing hosts, backups).
+    The index keeps a copy of their contents along with the files' stat data, stale
+    entries are refreshed from the files when the index is synchronized.
+
+    Every host carries the generation in which its autochecks have been changed (or
+    removed) last, so the hosts changed since a former synchronization can be told.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    @classmethod
+    def default(cls) -> AutochecksIndex:
+        return cls(Path(cmk.utils.paths.autochecks_dir, ".index.sqlite"))
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=60)
+        connection.execute(
+            """CREATE TABLE IF NOT EXISTS autochecks (
+                host TEXT PRIMARY KEY,
+                stat BLOB,
+                generation INTEGER NOT NULL,
+                entries BLOB
+            )"""
+        )
+        return connection
+
+    def load_all(self) -> tuple[int, Mapping[HostName, Sequence[AutocheckEntry]]]:
+        """Synchronize the index and return the current generation along with all autochecks
+
+        Hosts with unreadable autochecks files are left out.
+        """
+        with closing(self._connect()) as connection, connection:
+            # Take the write lock right away, we don't want to synchronize concurrently
+            connection.execute("BEGIN IMMEDIATE")
+            generation = self._sync(connection)
+            return generation, {
+                HostName(host): [AutocheckEntry.load(d) for d in pickle.loads(entries)]
+                for host, entries in connection.execute(
+                    "SELECT host, entries FROM autochecks WHERE entries IS NOT NULL"
+                )
+            }
+
+    def changed_since(self, generation: int) -> tuple[int, set[HostName]]:
+        """Synchronize the index and return the current generation along with the hosts
+        whose autochecks have been changed or removed after the given generation
+        """
+        with closing(self._connect()) as connection, connection:
+            connection.execute("BEGIN IMMEDIATE")
+            current_generation = self._sync(connection)
+            return current_generation, {
+                HostName(host)
+                for (host,) in connection.execute(
+                    "SELECT host FROM autochecks WHERE generation > ?", (generation,)
+                )
+            }
+
+    def _sync(self, connection: sqlite3.Connection) -> int:
+        indexed: dict[str, bytes] = dict(
+            connection.execute("SELECT host, stat FROM autochecks WHERE stat IS NOT NULL")
+        )
+        generation = (
+            connection.execute("SELECT MAX(generation) FROM autochecks").fetchone()[0] or 0
+        ) + 1
+
+        current: dict[str, bytes] = {}
+        with os.scandir(self.path.parent) as entries:
+            for entry in entries:
+                if (
+                    entry.name.startswith(".")  # eg. temporary files of the ObjectStore
+                    or not entry.name.endswith(".mk")
+                    or not entry.is_file()
+                ):
+                    continue
+                st = entry.stat()
+                current[entry.name[:-3]] = repr((st.st_ino, st.st_size, st.st_mtime_ns)).encode()
+
+        # Unreadable files and removed hosts are recorded without entries
+        updates: list[tuple[str, bytes | None, int, bytes | None]] = []
+        for host, stat in current.items():
+            if indexed.get(host) == stat:
+                continue
+            try:
+                autochecks = AutochecksStore(HostName(host)).read()
+            except MKGeneralException:
+                updates.append((host, stat, generation, None))
+                continue
+            updates.append((host, stat, generation, pickle.dumps([e.dump() for e in autochecks])))
+        updates.extend((host, None, generation, None) for host in indexed.keys() - current.keys())
+
+        if not updates:
+            return generation - 1
+        connection.executemany(
+            "INSERT OR REPLACE INTO autochecks (host, stat, generation, entries)"
+            " VALUES (?, ?, ?, ?)",
+            updates,
+        )
+        return generation
+
+
 def merge_cluster_autochecks(
     autochecks: Mapping[HostName, Sequence[AutocheckEntry]],
     appears_on_cluster: Callable[[HostName, AutocheckEntry], bool],
@@ -181,6 +290,10 @@ class AutochecksManager:
         self._configured_services_cache: dict[HostName, Sequence[ConfiguredService]] = {}
         self._raw_autochecks_cache: dict[HostName, Sequence[AutocheckEntry]] = {}
 
+    def preload(self, autochecks: Mapping[HostName, Sequence[AutocheckEntry]]) -> None:
+        """Fill the cache in one go, eg. from the AutochecksIndex"""
+        self._raw_autochecks_cache.update(autochecks)
+
     def get_autochecks(
         self,
         hostname: HostName,
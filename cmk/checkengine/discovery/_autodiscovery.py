@@ -30,6 +30,7 @@ from cmk.checkengine.fetcher import FetcherFunction, HostKey
 from cmk.checkengine.parser import group_by_host, ParserFunction
 from cmk.checkengine.sectionparser import (
     make_providers,
+    ParsedSectionsCache,
     Provider,
     SectionPlugin,
     store_piggybacked_sections,
@@ -127,6 +128,7 @@ def automation_discovery(
     enforced_services: Container[ServiceID],
     on_error: OnError,
     section_error_handling: Callable[[SectionName, Sequence[object]], str],
+    parsed_sections_cache: ParsedSectionsCache | None,
 ) -> DiscoveryResult:
     console.verbose("  Doing discovery with '{settings!r}'...")
     results = {
@@ -164,6 +166,11 @@ def automation_discovery(
             host_sections_by_host,
             section_plugins,
             error_handling=section_error_handling,
+            cache=(
+                None
+                if parsed_sections_cache is None
+                else parsed_sections_cache.for_sources((f[0], f[1]) for f in fetched)
+            ),
         )
 
         if settings.update_host_labels:
@@ -429,6 +436,7 @@ def autodiscovery(
     summarizer: SummarizerFunction,
     section_plugins: SectionMap[SectionPlugin],
     section_error_handling: Callable[[SectionName, Sequence[object]], str],
+    parsed_sections_cache: ParsedSectionsCache | None,
     host_label_plugins: SectionMap[HostLabelPlugin],
     plugins: Mapping[CheckPluginName, DiscoveryPlugin],
     autochecks_config: AutochecksConfig,
@@ -461,6 +469,7 @@ def autodiscovery(
         summarizer=summarizer,
         section_plugins=section_plugins,
         section_error_handling=section_error_handling,
+        parsed_sections_cache=parsed_sections_cache,
         host_label_plugins=host_label_plugins,
         plugins=plugins,
         autochecks_config=autochecks_config,
@@ -24,6 +24,7 @@ from cmk.checkengine.fetcher import FetcherFunction, HostKey
 from cmk.checkengine.parser import group_by_host, ParserFunction
 from cmk.checkengine.sectionparser import (
     make_providers,
+    ParsedSectionsCache,
     Provider,
     SectionPlugin,
     store_piggybacked_sections,
@@ -47,6 +48,7 @@ def commandline_discovery(
     ruleset_matcher: RulesetMatcher,
     section_plugins: SectionMap[SectionPlugin],
     section_error_handling: Callable[[SectionName, Sequence[object]], str],
+    parsed_sections_cache: ParsedSectionsCache | None,
     host_label_plugins: SectionMap[HostLabelPlugin],
     plugins: Mapping[CheckPluginName, DiscoveryPlugin],
     run_plugin_names: Container[CheckPluginName],
@@ -74,6 +76,11 @@ def commandline_discovery(
             host_sections_by_host,
             section_plugins,
             error_handling=section_error_handling,
+            cache=(
+                None
+                if parsed_sections_cache is None
+                else parsed_sections_cache.for_sources((f[0], f[1]) for f in fetched)
+            ),
         )
         _commandline_discovery_on_host(
             real_host_name=host_name,
@@ -31,6 +31,7 @@ from cmk.checkengine.parameters import TimespecificParameters, TimespecificParam
 from cmk.checkengine.parser import group_by_host, ParserFunction
 from cmk.checkengine.sectionparser import (
     make_providers,
+    ParsedSectionsCache,
     Provider,
     SectionPlugin,
     store_piggybacked_sections,
@@ -89,6 +90,7 @@ def get_check_preview(
     summarizer: SummarizerFunction,
     section_plugins: SectionMap[SectionPlugin],
     section_error_handling: Callable[[SectionName, Sequence[object]], str],
+    parsed_sections_cache: ParsedSectionsCache | None,
     host_label_plugins: SectionMap[HostLabelPlugin],
     discovery_plugins: Mapping[CheckPluginName, DiscoveryPlugin],
     check_plugins: Mapping[CheckPluginName, CheckPlugin],
@@ -114,6 +116,11 @@ def get_check_preview(
         host_sections_by_host,
         section_plugins,
         error_handling=section_error_handling,
+        cache=(
+            None
+            if parsed_sections_cache is None
+            else parsed_sections_cache.for_sources((f[0], f[1]) for f in fetched)
+        ),
     )
 
     if is_cluster:
@@ -43,6 +43,7 @@ from .parser import group_by_host, HostSections, ParserFunction
 from .sectionparser import (
     make_providers,
     ParsedSectionName,
+    ParsedSectionsCache,
     Provider,
     ResolvedResult,
     SectionPlugin,
@@ -140,6 +141,7 @@ def inventorize_host(
     raw_intervals_from_config: Sequence[RawIntervalFromConfig],
     previous_tree: ImmutableTree,
     section_error_handling: Callable[[SectionName, Sequence[object]], str],
+    parsed_sections_cache: ParsedSectionsCache | None,
 ) -> CheckInventoryTreeResult:
     fetched = fetcher(host_name, ip_address=None)
     host_sections = parser((f[0], f[1]) for f in fetched)
@@ -153,6 +155,11 @@ def inventorize_host(
         host_sections_by_host,
         section_plugins,
         error_handling=section_error_handling,
+        cache=(
+            None
+            if parsed_sections_cache is None
+            else parsed_sections_cache.for_sources((f[0], f[1]) for f in fetched)
+        ),
     )
 
     trees, update_result = _inventorize_real_host(
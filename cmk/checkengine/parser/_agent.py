@@ -7,8 +7,9 @@ from __future__ import annotations
 
 import abc
 import logging
+import re
 import time
-from collections.abc import Iterator, Mapping, MutableMapping, Sequence
+from collections.abc import Iterable, Iterator, Mapping, MutableMapping, Sequence
 from typing import Final, final, NamedTuple
 
 import cmk.ccc.debug
@@ -32,6 +33,7 @@ from ._sectionstore import SectionStore
 
 class SectionWithHeader(NamedTuple):
     header: SectionMarker
+    # Blocks of raw lines, they are only split up if the section is needed.
     section: list[AgentRawData]
 
 
@@ -102,6 +104,7 @@ class ParserState(abc.ABC):
 
     @abc.abstractmethod
     def do_action(self, line: bytes) -> ParserState:
+        """Handle data, that is one or more lines not containing any marker"""
         raise NotImplementedError()
 
     @abc.abstractmethod
@@ -469,9 +472,7 @@ class HostSectionParser(ParserState):
         self.current_section: Final = current_section
 
     def do_action(self, line: bytes) -> ParserState:
-        self.sections[-1].section.append(
-            AgentRawData(line if self.current_section.nostrip else line.strip())
-        )
+        self.sections[-1].section.append(AgentRawData(line))
         return self
 
     def on_piggyback_header(self, piggyback_header: PiggybackMarker) -> ParserState:
@@ -534,10 +535,17 @@ class AgentParser(Parser[AgentRawData, AgentRawDataSection]):
 
         def decode_sections(
             sections: ImmutableSection,
+            *,
+            selection: SectionNameCollection,
         ) -> MutableSectionMap[list[AgentRawDataSectionElem]]:
             out: MutableSectionMap[list[AgentRawDataSectionElem]] = {}
             for header, content in sections:
-                out.setdefault(header.name, []).extend(header.parse_line(line) for line in content)
+                if not (selection is NO_SELECTION or header.name in selection):
+                    continue
+                out.setdefault(header.name, []).extend(
+                    header.parse_line(line)
+                    for line in _split_lines(content, strip=not header.nostrip)
+                )
             return out
 
         def flatten_piggyback_section(
@@ -565,13 +573,9 @@ class AgentParser(Parser[AgentRawData, AgentRawDataSection]):
                             header.separator,
                         )
                     ).encode(header.encoding)
-                yield from (bytes(line) for line in content)
+                yield from _split_lines(content, strip=False)
 
-        sections = {
-            name: content
-            for name, content in decode_sections(raw_sections).items()
-            if selection is NO_SELECTION or name in selection
-        }
+        sections = decode_sections(raw_sections, selection=selection)
         piggybacked_raw_data = {
             header.hostname: list(
                 flatten_piggyback_section(
@@ -614,7 +618,11 @@ class AgentParser(Parser[AgentRawData, AgentRawDataSection]):
         self,
         raw_data: AgentRawData,
     ) -> tuple[ImmutableSection, Mapping[PiggybackMarker, ImmutableSection]]:
-        """Split agent output in chunks, splits lines by whitespaces."""
+        """Split agent output in chunks
+
+        Only the marker lines are handled one by one. The lines in between are passed to
+        the parser as one block and are split up later on and only if needed.
+        """
         parser: ParserState = NOOPParser(
             self.hostname,
             [],
@@ -623,7 +631,24 @@ class AgentParser(Parser[AgentRawData, AgentRawDataSection]):
             encoding_fallback=self.encoding_fallback,
             logger=self._logger,
         )
-        for line in raw_data.split(b"\n"):
-            parser = parser(line.rstrip(b"\r"))
+        data_start = 0
+        for marker in _MARKER_LINE.finditer(raw_data):
+            if marker.start() > data_start:
+                parser = parser.do_action(raw_data[data_start : marker.start()])
+            parser = parser(marker.group().rstrip(b"\r"))
+            data_start = marker.end()
+        if len(raw_data) > data_start:
+            parser = parser.do_action(raw_data[data_start:])
 
         return parser.sections, parser.piggyback_sections
+
+
+# Section and piggyback headers and footers, see ParserState.__call__()
+_MARKER_LINE: Final = re.compile(rb"^<<<.*>>>\r*$", re.MULTILINE)
+
+
+def _split_lines(content: Iterable[bytes], *, strip: bool) -> Iterator[AgentRawData]:
+    for data in content:
+        for line in data.split(b"\n"):
+            if stripped := line.strip():
+                yield AgentRawData(stripped if strip else line.rstrip(b"\r"))
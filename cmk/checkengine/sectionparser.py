@@ -5,7 +5,10 @@
 
 from __future__ import annotations
 
+import hashlib
+import pickle
 import time
+from collections import OrderedDict
 from collections.abc import Callable, Iterable, Mapping, Sequence, Set
 from dataclasses import dataclass
 from pathlib import Path
@@ -13,13 +16,17 @@ from typing import Any, Final, Generic, NamedTuple, Self, TypeVar
 
 from cmk.ccc import debug
 
+import cmk.utils.resulttype as result
+from cmk.utils.agentdatatype import AgentRawData
 from cmk.utils.hostaddress import HostName
 from cmk.utils.sectionname import SectionMap, SectionName
 from cmk.utils.validatedstr import ValidatedString
 
+from cmk.snmplib import SNMPRawData
+
 from cmk.piggyback.backend import store_piggyback_raw_data
 
-from .fetcher import HostKey, SourceType
+from .fetcher import HostKey, SourceInfo, SourceType
 from .parser import HostSections
 
 _CacheInfo = tuple[int, int]
@@ -55,6 +62,183 @@ class _ParsingResult(NamedTuple):
     cache_info: _CacheInfo | None
 
 
+class _CachedParsingResult(NamedTuple):
+    parse_function: Callable[..., object]
+    cache_info: _CacheInfo | None
+    pickled: bytes
+
+
+class _CachedHost(NamedTuple):
+    fingerprint: bytes
+    sections: dict[SectionName, _CachedParsingResult]
+
+
+class ParsedSectionsCache:
+    """Keep the parsed sections of the most recently parsed hosts
+
+    Parsing the same raw data again (for example for the discovery, the discovery
+    preview and the inventory of a host based on the same cached agent output) returns
+    the previous result instead of calling the parse function again. The raw data of a
+    host is identified by a fingerprint of the data fetched from its sources (see
+    `for_sources`). A result is only reused for the same fingerprint, the same cache
+    info and the very same parse function, so reloaded plugins do not hit stale entries.
+
+    The results are stored pickled: Every run gets its own copy and may modify it. The
+    size of the pickled results is bounded, the least recently used hosts are evicted.
+    Results that can not be pickled are not cached.
+    """
+
+    def __init__(self, *, max_size: int) -> None:
+        self._max_size: Final = max_size
+        self._size = 0
+        self._hosts: OrderedDict[HostKey, _CachedHost] = OrderedDict()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(max_size={self._max_size!r})"
+
+    def __len__(self) -> int:
+        return len(self._hosts)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def for_sources(
+        self,
+        fetched: Iterable[tuple[SourceInfo, result.Result[AgentRawData | SNMPRawData, Exception]]],
+    ) -> Mapping[HostKey, _HostCache]:
+        """Return the cache of the hosts with the fetched raw data
+
+        Only the agent data (including the piggybacked data) is fingerprinted, the
+        hosts with SNMP sources are not cached.
+        """
+        digests: dict[HostKey, hashlib.blake2b | None] = {}
+        for source, raw_data in fetched:
+            host_key = HostKey(source.hostname, source.source_type)
+            if (digest := digests.setdefault(host_key, hashlib.blake2b(digest_size=16))) is None:
+                continue
+            digest.update(source.ident.encode("utf-8") + b"\0")
+            if raw_data.is_error():
+                digest.update(b"\1")
+            elif isinstance(raw_data.ok, bytes):
+                digest.update(b"%d\0" % len(raw_data.ok))
+                digest.update(raw_data.ok)
+            else:
+                digests[host_key] = None
+        return {
+            host_key: _HostCache(self, host_key, digest.digest())
+            for host_key, digest in digests.items()
+            if digest is not None
+        }
+
+    def load(
+        self,
+        host_key: HostKey,
+        fingerprint: bytes,
+        section_name: SectionName,
+        *,
+        parse_function: Callable[..., object],
+        cache_info: _CacheInfo | None,
+    ) -> ParsedSectionContent:
+        """Return a copy of the cached result or raise a KeyError"""
+        host = self._hosts.get(host_key)
+        if host is None or host.fingerprint != fingerprint:
+            raise KeyError(section_name)
+        cached = host.sections[section_name]
+        if cached.parse_function is not parse_function or cached.cache_info != cache_info:
+            raise KeyError(section_name)
+        self._hosts.move_to_end(host_key)
+        return pickle.loads(cached.pickled)
+
+    def store(
+        self,
+        host_key: HostKey,
+        fingerprint: bytes,
+        section_name: SectionName,
+        parsed: ParsedSectionContent,
+        *,
+        parse_function: Callable[..., object],
+        cache_info: _CacheInfo | None,
+    ) -> None:
+        try:
+            pickled = pickle.dumps(parsed, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            # The parse functions may return *anything*
+            return
+        if len(pickled) > self._max_size:
+            return
+
+        host = self._hosts.get(host_key)
+        if host is None or host.fingerprint != fingerprint:
+            self.invalidate_host(host_key)
+            host = self._hosts[host_key] = _CachedHost(fingerprint, {})
+        self._hosts.move_to_end(host_key)
+        if (replaced := host.sections.get(section_name)) is not None:
+            self._size -= len(replaced.pickled)
+        host.sections[section_name] = _CachedParsingResult(parse_function, cache_info, pickled)
+        self._size += len(pickled)
+
+        while self._size > self._max_size:
+            _host_key, evicted = self._hosts.popitem(last=False)
+            self._size -= sum(len(cached.pickled) for cached in evicted.sections.values())
+
+    def invalidate_host(self, host_key: HostKey) -> None:
+        if (host := self._hosts.pop(host_key, None)) is not None:
+            self._size -= sum(len(cached.pickled) for cached in host.sections.values())
+
+    def invalidate(self, host_name: HostName) -> None:
+        for host_key in [hk for hk in self._hosts if hk.hostname == host_name]:
+            self.invalidate_host(host_key)
+
+    def clear(self) -> None:
+        self._hosts.clear()
+        self._size = 0
+
+
+class _HostCache:
+    """The cached results of a single host for the raw data with the given fingerprint"""
+
+    def __init__(self, cache: ParsedSectionsCache, host_key: HostKey, fingerprint: bytes) -> None:
+        self._cache: Final = cache
+        self._host_key: Final = host_key
+        self._fingerprint: Final = fingerprint
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._cache!r}, {self._host_key!r}, {self._fingerprint!r})"
+
+    def load(
+        self,
+        section_name: SectionName,
+        *,
+        parse_function: Callable[..., object],
+        cache_info: _CacheInfo | None,
+    ) -> ParsedSectionContent:
+        return self._cache.load(
+            self._host_key,
+            self._fingerprint,
+            section_name,
+            parse_function=parse_function,
+            cache_info=cache_info,
+        )
+
+    def store(
+        self,
+        section_name: SectionName,
+        parsed: ParsedSectionContent,
+        *,
+        parse_function: Callable[..., object],
+        cache_info: _CacheInfo | None,
+    ) -> None:
+        self._cache.store(
+            self._host_key,
+            self._fingerprint,
+            section_name,
+            parsed,
+            parse_function=parse_function,
+            cache_info=cache_info,
+        )
+
+
 class ResolvedResult(NamedTuple):
     section_name: SectionName
     parsed_data: ParsedSectionContent
@@ -76,6 +260,7 @@ class SectionsParser(Generic[_TSeq]):
         #       See `cmk.base.checkers.CheckPluginMapper.__getitem__`.
         #
         error_handling: Callable[[SectionName, _TSeq], str],
+        cache: _HostCache | None = None,
     ) -> None:
         super().__init__()
         self._host_sections: HostSections[SectionMap[_TSeq]] = host_sections
@@ -83,6 +268,7 @@ class SectionsParser(Generic[_TSeq]):
         self._memoized_results: dict[SectionName, _ParsingResult | None] = {}
         self._host_name = host_name
         self.error_handling: Final = error_handling
+        self._cache: Final = cache
 
     def __repr__(self) -> str:
         return f"{type(self).__name__}(host_sections={self._host_sections!r}, host_name={self._host_name!r})"
@@ -117,14 +303,29 @@ class SectionsParser(Generic[_TSeq]):
         except KeyError:
             return None
 
+        cache_info = self._host_sections.cache_info.get(section_name)
+        if self._cache is not None:
+            try:
+                return self._cache.load(
+                    section_name, parse_function=parse_function, cache_info=cache_info
+                )
+            except KeyError:
+                pass
+
         try:
-            return parse_function(list(raw_data))
+            parsed = parse_function(list(raw_data))
         except Exception:
             if debug.enabled():
                 raise
             self.parsing_errors.append(self.error_handling(section_name, raw_data))
             return None
 
+        if self._cache is not None:
+            self._cache.store(
+                section_name, parsed, parse_function=parse_function, cache_info=cache_info
+            )
+        return parsed
+
 
 class ParsedSectionsResolver:
     """Find the desired parsed data by ParsedSectionName
@@ -227,6 +428,7 @@ def make_providers(
     section_plugins: SectionMap[SectionPlugin],
     *,
     error_handling: Callable[[SectionName, _TSeq], str],
+    cache: Mapping[HostKey, _HostCache] | None = None,
 ) -> Mapping[HostKey, Provider]:
     return {
         host_key: ParsedSectionsResolver(
@@ -234,6 +436,7 @@ def make_providers(
                 host_sections=host_sections,
                 host_name=host_key.hostname,
                 error_handling=error_handling,
+                cache=None if cache is None else cache.get(host_key),
             ),
             section_plugins={
                 section_name: section_plugins[section_name]
@@ -157,6 +157,7 @@ class Rule(TypedDict, total=False):
     contact_groups: ContactGroups
     count: Count
     customer: str  # TODO: This is a GUI-only feature, which doesn't belong here at all.
+    delay: int
     description: str
     docu_url: str
     disabled: bool
@@ -345,9 +346,10 @@ class ConfigFromWATO(TypedDict):
 
 class Config(ConfigFromWATO):
     """
-    After loading, we add two fields: 'action' for more efficient access to actions plus a timestamp
-    used for replication.
+    After loading, we add three fields: 'action' for more efficient access to actions plus a timestamp
+    and a generation used for replication.
     """
 
     action: Mapping[str, Action]
     last_reload: int
+    config_generation: str
@@ -3,17 +3,24 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import bisect
 import itertools
-import shlex
-import subprocess
+import math
+import mmap
+import re
+import struct
 import threading
 import time
-from collections.abc import Callable, Iterable, Sequence
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from logging import Logger
 from pathlib import Path
-from typing import Any
+from typing import Any, Final
+
+from cmk.ccc.exceptions import MKGeneralException
 
 from cmk.utils.log import VERBOSE
+from cmk.utils.regex import regex
 from cmk.utils.render import date_and_time
 
 from .config import Config
@@ -39,6 +46,7 @@ class FileHistory(History):
         self._history_columns = history_columns
         self._lock = threading.Lock()
         self._active_history_period = ActiveHistoryPeriod()
+        self._indexes: dict[Path, _HistoryFileIndex] = {}
 
     def flush(self) -> None:
         _expire_logfiles(self._settings, self._config, self._logger, self._lock, True)
@@ -66,12 +74,16 @@ class FileHistory(History):
                 for colname, defval in self._event_columns
             ]
 
-            with get_logfile(
+            line = b"\t".join(columns) + b"\n"
+            path = get_logfile(
                 self._config,
                 self._settings.paths.history_dir.value,
                 self._active_history_period,
-            ).open(mode="ab") as f:
-                f.write(b"\t".join(columns) + b"\n")
+            )
+            with path.open(mode="ab") as f:
+                offset = f.tell()
+                f.write(line)
+            _append_to_index(path, offset, line)
 
     def get(self, query: QueryGET) -> Iterable[Sequence[object]]:
         if not self._settings.paths.history_dir.value.exists():
@@ -82,8 +94,6 @@ class FileHistory(History):
         limit = query.limit
         self._logger.debug("Limit: %r", limit)
 
-        grep_pipeline = _grep_pipeline(filters)
-
         time_filters = [
             (f.operator_name, f.argument) for f in filters if f.column_name.split("_")[-1] == "time"
         ]
@@ -92,6 +102,8 @@ class FileHistory(History):
             _least_upper_bound_for_filters(time_filters),
         )
         self._logger.debug("time range: %r", time_range)
+        history_time_range = _history_time_range(filters)
+        line_filter = _LineFilter.from_query_filters(filters)
 
         # We do not want to open all files. So our strategy is:
         # look for "time" filters and first apply the filter to
@@ -107,22 +119,33 @@ class FileHistory(History):
         # this # will lead into some lines of a single file to be limited in
         # wrong order. But this should be better than before.
         history_entries: list[Any] = []
-        for path in sorted(self._settings.paths.history_dir.value.glob("*.log"), reverse=True):
+        paths = sorted(self._settings.paths.history_dir.value.glob("*.log"), reverse=True)
+        for path in paths:
             if limit is not None and limit <= 0:
                 self._logger.debug("query limit reached")
                 break
             if not _intersects(time_range, _get_logfile_timespan(path)):
                 self._logger.debug("skipping history file %s because of time filters", path)
                 continue
-            tac = f"nl -b a {shlex.quote(str(path))} | tac"  # Process younger lines first
-            cmd = " | ".join([tac] + grep_pipeline)
-            self._logger.debug("preprocessing history file with command [%s]", cmd)
+            with self._lock:
+                index = self._indexes.setdefault(path, _HistoryFileIndex(path))
+                index.update()
             new_entries = parse_history_file(
-                self._history_columns, path, query.filter_row, cmd, limit, self._logger
+                self._history_columns,
+                path,
+                index,
+                line_filter,
+                query.filter_row,
+                limit,
+                self._logger,
+                history_time_range,
             )
             history_entries += new_entries
             if limit is not None:
                 limit -= len(new_entries)
+
+        for path in self._indexes.keys() - set(paths):
+            del self._indexes[path]
         return history_entries
 
     def housekeeping(self) -> None:
@@ -152,12 +175,253 @@ def _expire_logfiles(
                         "Deleting log file %s (age %s)", path, date_and_time(path.stat().st_mtime)
                     )
                     path.unlink()
+                    _index_path(path).unlink(missing_ok=True)
         except Exception as e:
             if settings.options.debug:
                 raise
             logger.warning("Error expiring log files: %s", e)
 
 
+# Positions of the indexed columns within a line of a history file
+_TIME_COLUMN: Final = 0
+_HOST_COLUMN: Final = 11
+_RULE_ID_COLUMN: Final = 17
+
+# Offset, length and time of a line, length of host name and rule ID following the record
+_INDEX_RECORD: Final = struct.Struct("<QIdII")
+
+
+def _index_path(path: Path) -> Path:
+    return path.with_suffix(".idx")
+
+
+def _index_record(offset: int, line: bytes) -> bytes:
+    columns = line.rstrip(b"\n").split(b"\t")
+    try:
+        timestamp = float(columns[_TIME_COLUMN])
+    except ValueError:
+        timestamp = math.nan
+    host = columns[_HOST_COLUMN] if len(columns) > _HOST_COLUMN else b""
+    rule_id = columns[_RULE_ID_COLUMN] if len(columns) > _RULE_ID_COLUMN else b""
+    return (
+        _INDEX_RECORD.pack(offset, len(line), timestamp, len(host), len(rule_id)) + host + rule_id
+    )
+
+
+def _append_to_index(path: Path, offset: int, line: bytes) -> None:
+    """Add the line written to the log file at the given offset to the sidecar index
+
+    The index must describe the log file from its beginning. An index for log files
+    written by previous versions is created with the first query of the file.
+    """
+    index_path = _index_path(path)
+    if offset and not index_path.exists():
+        return
+    with index_path.open(mode="ab") as f:
+        f.write(_index_record(offset, line))
+
+
+class _HistoryFileIndex:
+    """Line offsets of a history file, its timestamps and postings of hosts and rule IDs
+
+    The index is read from a sidecar file (<period>.idx) that is appended to whenever
+    a line is added to the history file. Lines missing in the sidecar (e.g. in files
+    of previous versions) are indexed on the next update.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path: Final = path
+        self._index_path: Final = _index_path(path)
+        self._clear()
+
+    def _clear(self) -> None:
+        self._index_size = 0
+        self.offsets = array("Q")
+        self.lengths = array("I")
+        self.times = array("d")
+        # Are the times sorted, so that we can search them?
+        self.times_sorted = True
+        self.lines_by_host: dict[bytes, array[int]] = {}
+        self.lines_by_rule_id: dict[bytes, array[int]] = {}
+
+    @property
+    def end(self) -> int:
+        return self.offsets[-1] + self.lengths[-1] if self.offsets else 0
+
+    def update(self) -> None:
+        try:
+            with self._index_path.open(mode="rb") as f:
+                f.seek(self._index_size)
+                raw = f.read()
+        except FileNotFoundError:
+            raw = b""
+        consumed = self._add_records(raw)
+        self._index_size += consumed
+        if consumed != len(raw) or self.end > self.path.stat().st_size:
+            # Damaged or not matching the log file (e.g. after a crash). Start from scratch.
+            self._clear()
+            self._index_path.unlink(missing_ok=True)
+        self._add_missing_lines()
+
+    def _add_records(self, raw: bytes) -> int:
+        position = 0
+        while position + _INDEX_RECORD.size <= len(raw):
+            offset, length, timestamp, host_length, rule_id_length = _INDEX_RECORD.unpack_from(
+                raw, position
+            )
+            start = position + _INDEX_RECORD.size
+            if start + host_length + rule_id_length > len(raw):
+                break
+            if offset != self.end:
+                break
+            host = raw[start : start + host_length]
+            rule_id = raw[start + host_length : start + host_length + rule_id_length]
+            self._add(offset, length, timestamp, host, rule_id)
+            position = start + host_length + rule_id_length
+        return position
+
+    def _add(self, offset: int, length: int, timestamp: float, host: bytes, rule_id: bytes) -> None:
+        line_index = len(self.offsets)
+        if self.times and not timestamp >= self.times[-1]:
+            self.times_sorted = False
+        self.offsets.append(offset)
+        self.lengths.append(length)
+        self.times.append(timestamp)
+        self.lines_by_host.setdefault(host, array("I")).append(line_index)
+        self.lines_by_rule_id.setdefault(rule_id, array("I")).append(line_index)
+
+    def _add_missing_lines(self) -> None:
+        records = []
+        with self.path.open(mode="rb") as f:
+            f.seek(offset := self.end)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # still being written
+                records.append(_index_record(offset, line))
+                offset += len(line)
+        if records:
+            raw = b"".join(records)
+            self._add_records(raw)
+            with self._index_path.open(mode="ab") as f:
+                f.write(raw)
+            self._index_size += len(raw)
+
+    def candidates(
+        self, time_range: tuple[float | None, float | None], line_filter: "_LineFilter"
+    ) -> Iterator[int]:
+        """Indices of the lines possibly matching the filters, younger lines first"""
+        begin, end = 0, len(self.offsets)
+        if self.times_sorted:
+            lower, upper = time_range
+            if lower is not None:
+                begin = bisect.bisect_left(self.times, lower)
+            if upper is not None:
+                end = bisect.bisect_right(self.times, upper)
+
+        postings = [self.lines_by_host.get(host, array("I")) for host in line_filter.hosts] + [
+            self.lines_by_rule_id.get(rule_id, array("I")) for rule_id in line_filter.rule_ids
+        ]
+        if not postings:
+            yield from range(end - 1, begin - 1, -1)
+            return
+
+        shortest = min(postings, key=len)
+        others = [set(p) for p in postings if p is not shortest]
+        for position in range(
+            bisect.bisect_left(shortest, end) - 1, bisect.bisect_left(shortest, begin) - 1, -1
+        ):
+            line_index = shortest[position]
+            if all(line_index in other for other in others):
+                yield line_index
+
+
+class _LineFilter:
+    """Cheap prefiltering of history lines based on frequently used filters
+
+    It's OK if the filters don't match 100% accurately on the right lines. If in doubt,
+    more lines than necessary are passed, the query filters are applied afterwards.
+    """
+
+    def __init__(
+        self,
+        hosts: Sequence[bytes],
+        rule_ids: Sequence[bytes],
+        substrings: Sequence[bytes],
+        folded_substrings: Sequence[str] = (),
+        patterns: Sequence[re.Pattern[str]] = (),
+        folded_patterns: Sequence[re.Pattern[str]] = (),
+    ) -> None:
+        self.hosts: Final = hosts
+        self.rule_ids: Final = rule_ids
+        self.substrings: Final = substrings
+        # Applied to the lower-cased line, like the "=~" and "~~" operators do it
+        self.folded_substrings: Final = folded_substrings
+        # Applied to the fields of the line, so anchors work like for the column values
+        self.patterns: Final = patterns
+        self.folded_patterns: Final = folded_patterns
+
+    @classmethod
+    def from_query_filters(cls, filters: Iterable[QueryFilter]) -> "_LineFilter":
+        hosts: list[bytes] = []
+        rule_ids: list[bytes] = []
+        substrings: list[bytes] = []
+        folded_substrings: list[str] = []
+        patterns: list[re.Pattern[str]] = []
+        folded_patterns: list[re.Pattern[str]] = []
+        for f in filters:
+            if f.column_name not in _GREPABLE_COLUMNS:
+                continue
+            if f.operator_name == "=":
+                if f.column_name == "event_host":
+                    hosts.append(quote_tab(f.argument))
+                elif f.column_name == "event_rule_id":
+                    rule_ids.append(quote_tab(f.argument))
+                else:
+                    substrings.append(quote_tab(str(f.argument)))
+            elif not isinstance(f.argument, str):
+                continue
+            elif f.operator_name == "=~":
+                folded_substrings.append(f.argument.lower())
+            elif f.operator_name == "~":
+                if (pattern := _field_pattern(f.argument)) is not None:
+                    patterns.append(pattern)
+            elif f.operator_name == "~~":
+                if (pattern := _field_pattern(f.argument.lower())) is not None:
+                    folded_patterns.append(pattern)
+        return cls(hosts, rule_ids, substrings, folded_substrings, patterns, folded_patterns)
+
+    def accepts(self, line: bytes) -> bool:
+        if not all(substring in line for substring in self.substrings):
+            return False
+        if not (self.folded_substrings or self.patterns or self.folded_patterns):
+            return True
+        try:
+            text = line.decode("utf-8").rstrip("\n")
+        except UnicodeDecodeError:
+            return True  # reported when parsing the line
+        folded_text = text.lower()
+        if not all(substring in folded_text for substring in self.folded_substrings):
+            return False
+        fields = text.split("\t")
+        if not all(any(p.search(field) for field in fields) for p in self.patterns):
+            return False
+        folded_fields = folded_text.split("\t")
+        return all(any(p.search(field) for field in folded_fields) for p in self.folded_patterns)
+
+
+def _field_pattern(pattern: str) -> re.Pattern[str] | None:
+    """The compiled pattern if it is usable for prefiltering the fields of a line
+
+    Invalid patterns are left to the query filters. Patterns matching the empty string
+    would also match the columns missing in lines written by older versions.
+    """
+    try:
+        compiled = regex(pattern)
+    except MKGeneralException:
+        return None
+    return None if compiled.search("") else compiled
+
+
 # Please note: Keep this in sync with packages/neb/src/TableEventConsole.cc.
 _GREPABLE_COLUMNS = {
     "event_id",
@@ -173,42 +437,18 @@ _GREPABLE_COLUMNS = {
 }
 
 
-def _grep_pipeline(filters: Iterable[QueryFilter]) -> list[str]:
-    """
-    Optimization: use grep in order to reduce amount of read lines based on some frequently used
-    filters. It's OK if the filters don't match 100% accurately on the right lines. If in doubt, you
-    can output more lines than necessary. This is only a kind of prefiltering.
-
-    >>> _grep_pipeline([])
-    []
-
-    >>> _grep_pipeline([QueryFilter("event_core_host", '=', lambda x: True, '|| ping')])
-    ["grep -F -e '|| ping'"]
-
-    """
-    return [
-        command
-        for f in filters
-        if f.column_name in _GREPABLE_COLUMNS
-        for command in [_grep_command(f.operator_name, str(f.argument))]
-        if command is not None
-    ]
-
-
-def _grep_command(operator_name: OperatorName, argument: str) -> str | None:
-    if operator_name == "=":
-        return f"grep -F {_grep_pattern(argument)}"
-    if operator_name == "=~":
-        return f"grep -F -i {_grep_pattern(argument)}"
-    if operator_name == "~":
-        return f"grep -E {_grep_pattern(argument)}"
-    if operator_name == "~~":
-        return f"grep -E -i {_grep_pattern(argument)}"
-    return None
-
-
-def _grep_pattern(argument: str) -> str:
-    return f"-e {shlex.quote(argument)}"
+def _history_time_range(filters: Iterable[QueryFilter]) -> tuple[float | None, float | None]:
+    """Inclusive bounds of the entry times accepted by the filters"""
+    lower: float | None = None
+    upper: float | None = None
+    for f in filters:
+        if f.column_name != "history_time":
+            continue
+        if f.operator_name in ("=", ">", ">="):
+            lower = f.argument if lower is None else max(lower, f.argument)
+        if f.operator_name in ("=", "<", "<="):
+            upper = f.argument if upper is None else min(upper, f.argument)
+    return lower, upper
 
 
 def _greatest_lower_bound_for_filters(
@@ -263,31 +503,33 @@ def _intersects(
 def parse_history_file(
     history_columns: Sequence[tuple[str, Any]],
     path: Path,
+    index: _HistoryFileIndex,
+    line_filter: _LineFilter,
     filter_row: Callable[[Sequence[Any]], bool],
-    cmd: str,
     limit: int | None,
     logger: Logger,
+    time_range: tuple[float | None, float | None] = (None, None),
 ) -> list[Any]:
     entries: list[Any] = []
-    with subprocess.Popen(
-        cmd,
-        shell=True,  # nosec B602 # BNS:67522a
-        close_fds=True,
-        stdout=subprocess.PIPE,
-    ) as grep:
-        if grep.stdout is None:
-            raise Exception("Huh? stdout vanished...")
-
-        for line in grep.stdout:
+    if not index.offsets:
+        return entries
+
+    with path.open(mode="rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as log:
+        for line_index in index.candidates(time_range, line_filter):
             if limit is not None and len(entries) > limit:
                 break
+            offset = index.offsets[line_index]
+            line = log[offset : offset + index.lengths[line_index]]
+            if not line_filter.accepts(line):
+                continue
             try:
                 parts: list[Any] = line.decode("utf-8").rstrip("\n").split("\t")
+                parts.insert(0, line_index + 1)  # add line number
                 convert_history_line(history_columns, parts)
                 if filter_row(parts):
                     entries.append(parts)
             except Exception:
-                logger.exception("Invalid line '%s' in history file %s", line, path)
+                logger.exception("Invalid line '%r' in history file %s", line, path)
 
     return entries
 
@@ -300,8 +542,8 @@ def parse_history_file_python(
     """Pure python reader for history files. Used for update config, where filtering is not needed.
 
     To avoid slurping the whole file in memory this generator yields chunks of entries.
-    This is not faster than the grep approach(parse_history_file()), but it's more memory efficient
-    and does not need to fork a subprocess and other cmk specific stuff.
+    This is slower than the indexed approach (parse_history_file()), but it's more memory
+    efficient and does not need the sidecar index and other cmk specific stuff.
     """
     with open(path, "rb") as f:
         for chunk in itertools.batched(f, 100_000):
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Receiving of messages for the event server
+
+All message sources (event pipe, UNIX event socket, builtin syslog server via
+UDP/TCP, builtin SNMP trap receiver and the spool directory) are multiplexed
+with a single epoll instance. Ready sources are drained in batches into a
+bounded queue, which is consumed by the rule processing.
+
+Datagrams are always read from the kernel, even if the queue is full. This way
+we drop (and count) them ourselves, instead of the kernel silently dropping them
+because its receive buffer overflows. Stream sources are simply not read while
+the queue is full, the senders will block until there is room again.
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import os
+import select
+import socket
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from logging import Logger
+from pathlib import Path
+from types import TracebackType
+from typing import Final, NamedTuple
+
+from cmk.utils.inotify import INotify, Masks
+
+from .helpers import parse_bytes_into_syslog_messages
+
+MAX_QUEUED_MESSAGES: Final = 50000
+# Maximum number of datagrams read from a single socket per wakeup
+DATAGRAM_BATCH_SIZE: Final = 1000
+# Maximum number of queued messages processed before looking at the sources again
+PROCESSING_BATCH_SIZE: Final = 1000
+STREAM_READ_SIZE: Final = 64 * 1024
+
+
+class SyslogMessage(NamedTuple):
+    data: bytes
+    address: tuple[str, int] | None  # host/port
+
+
+class SNMPTrap(NamedTuple):
+    data: bytes
+    address: tuple[str, int]  # host/port
+
+
+ReceivedMessage = SyslogMessage | SNMPTrap
+
+
+def unmap_ipv4_address(ip_address: str) -> str:
+    """
+    Accepts addresses with ipv4_mapped hosts and
+    returns unmapped ipv4.
+
+    >>> unmap_ipv4_address('::FFFF:192.0.2.128')
+    '192.0.2.128'
+    """
+    try:
+        host = ipaddress.ip_address(ip_address)
+    except ValueError:
+        # in case address[0] is a hostname
+        return ip_address
+
+    if host.version == 4:
+        return ip_address
+
+    # If IPv6 is mapped to IPv4
+    if host.version == 6 and host.ipv4_mapped:
+        return str(host.ipv4_mapped)
+
+    return ip_address
+
+
+def parse_address(what: str, address: object) -> tuple[str, int]:
+    # We always have an AF_INET or AF_INET6 socket, so the remote address we're dealing with is a
+    # pair (host: str, port: int), where host can be the domain name or an IPv4/IPv6 address.
+    if not (
+        isinstance(address, tuple) and isinstance(address[0], str) and isinstance(address[1], int)
+    ):
+        raise ValueError(f"Invalid remote address '{address!r}' for {what}")
+    return unmap_ipv4_address(address[0]), address[1]
+
+
+class MessageQueue:
+    """Bounded FIFO of received messages waiting for being processed"""
+
+    def __init__(self, max_length: int) -> None:
+        self._max_length = max_length
+        self._messages: deque[ReceivedMessage] = deque()
+        self._drops = 0
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def full(self) -> bool:
+        return len(self._messages) >= self._max_length
+
+    def put(self, message: ReceivedMessage) -> bool:
+        """Add the message, or drop it if the queue is full"""
+        if self.full():
+            self._drops += 1
+            return False
+        self._messages.append(message)
+        return True
+
+    def extend(self, messages: Iterable[ReceivedMessage]) -> None:
+        """Add already read messages, regardless of the limit
+
+        This is meant for data that we only read when the queue was not full,
+        so the limit is exceeded by at most one read.
+        """
+        self._messages.extend(messages)
+
+    def take(self, max_count: int) -> Sequence[ReceivedMessage]:
+        return [self._messages.popleft() for _ in range(min(max_count, len(self._messages)))]
+
+    def take_drops(self) -> int:
+        """Return the number of messages dropped since the last call"""
+        drops, self._drops = self._drops, 0
+        return drops
+
+
+def drain_datagrams(
+    sock: socket.socket, bufsize: int, max_count: int
+) -> Iterator[tuple[bytes, object]]:
+    """Read up to max_count datagrams from the non-blocking socket, stop when it is empty"""
+    for _ in range(max_count):
+        try:
+            yield sock.recvfrom(bufsize)
+        except BlockingIOError:
+            return
+
+
+class _StreamClient(NamedTuple):
+    sock: socket.socket
+    address: tuple[str, int] | None  # host/port
+
+
+class _SpoolDirectory:
+    """Files with messages, one per line, put into the spool directory by other processes
+
+    The directory is watched via inotify, so we only look into it when something
+    has been written to it. If this is not possible, we fall back to looking into
+    the directory in every iteration.
+    """
+
+    def __init__(self, path: Path, logger: Logger) -> None:
+        self._path = path
+        self.pending = True  # Files might have been left from before we started
+        self._inotify: INotify | None = None
+        try:
+            path.mkdir(parents=True, exist_ok=True)
+            self._inotify = INotify()
+            self._inotify.add_watch(path, Masks.CLOSE_WRITE | Masks.MOVED_TO)
+        except OSError as e:
+            logger.warning("Cannot watch spool directory %s (%s), polling it instead", path, e)
+            self.close()
+            self._inotify = None
+
+    def fileno(self) -> int | None:
+        return None if self._inotify is None else self._inotify.fileno()
+
+    def handle_events(self) -> None:
+        if self._inotify is not None and self._inotify.read(timeout=0):
+            self.pending = True
+
+    def next_file(self) -> Path | None:
+        """Return the oldest file in the directory, if there may be any"""
+        if self._inotify is None:
+            self.pending = True
+        if not self.pending:
+            return None
+        if spool_files := sorted(self._path.glob("[!.]*"), key=lambda x: x.stat().st_mtime):
+            return spool_files[0]
+        self.pending = False
+        return None
+
+    def close(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+
+
+class Receiver:
+    """Puts the messages of all our sources into the queue"""
+
+    def __init__(
+        self,
+        *,
+        queue: MessageQueue,
+        pipe: int,
+        event_socket: socket.socket | None,
+        syslog_udp: socket.socket | None,
+        syslog_tcp: socket.socket | None,
+        snmp_trap_socket: socket.socket | None,
+        spool_dir: Path,
+        logger: Logger,
+    ) -> None:
+        self._queue = queue
+        self._logger = logger
+        self._epoll = select.epoll()
+        self._handlers: dict[int, Callable[[], None]] = {}
+        self._clients: dict[int, _StreamClient] = {}
+        self._unprocessed_stream_data: dict[int, bytes] = {}
+
+        self._pipe = pipe
+        self._register(pipe, self._read_pipe)
+        self._unprocessed_stream_data[pipe] = b""
+        if event_socket is not None:
+            self._register(event_socket.fileno(), lambda: self._accept_event_socket(event_socket))
+        if syslog_tcp is not None:
+            self._register(syslog_tcp.fileno(), lambda: self._accept_syslog_tcp(syslog_tcp))
+        if syslog_udp is not None:
+            syslog_udp.setblocking(False)
+            self._register(syslog_udp.fileno(), lambda: self._read_syslog_udp(syslog_udp))
+        if snmp_trap_socket is not None:
+            snmp_trap_socket.setblocking(False)
+            self._register(
+                snmp_trap_socket.fileno(), lambda: self._read_snmp_traps(snmp_trap_socket)
+            )
+        self._spool = _SpoolDirectory(spool_dir, logger)
+        if (spool_fd := self._spool.fileno()) is not None:
+            self._register(spool_fd, self._spool.handle_events)
+
+    def __enter__(self) -> Receiver:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for fd in list(self._clients):
+            self._close_client(fd)
+        self._epoll.close()
+        self._spool.close()
+        os.close(self._pipe)
+
+    def _register(self, fd: int, handler: Callable[[], None]) -> None:
+        self._epoll.register(fd, select.EPOLLIN)
+        self._handlers[fd] = handler
+
+    def receive(self) -> None:
+        """Wait for messages and put all of them into the queue
+
+        We only wait (up to one second) if there is nothing left to do.
+        """
+        timeout = 0 if self._queue or self._spool.pending else 1
+        for fd, _events in self._epoll.poll(timeout):
+            if (handler := self._handlers.get(fd)) is not None:
+                handler()
+
+        # The spool files are a persistent buffer on their own, so they are only taken
+        # when everything else has been processed.
+        if not self._queue and (spool_file := self._spool.next_file()) is not None:
+            self._queue.extend(
+                SyslogMessage(line, None) for line in spool_file.read_bytes().splitlines()
+            )
+            spool_file.unlink()
+
+    def _accept_event_socket(self, event_socket: socket.socket) -> None:
+        client_socket, remote_address = event_socket.accept()
+        # We have a AF_UNIX socket, so the remote address is a str, which is always ''.
+        if not (isinstance(remote_address, str) and remote_address == ""):
+            raise ValueError(f"Invalid remote address '{remote_address!r}' for event socket")
+        self._add_client(_StreamClient(client_socket, None))
+
+    def _accept_syslog_tcp(self, syslog_tcp: socket.socket) -> None:
+        client_socket, address = syslog_tcp.accept()
+        self._add_client(
+            _StreamClient(client_socket, parse_address("syslog socket (TCP)", address))
+        )
+
+    def _add_client(self, client: _StreamClient) -> None:
+        fd = client.sock.fileno()
+        self._clients[fd] = client
+        self._unprocessed_stream_data[fd] = b""
+        self._register(fd, lambda: self._read_client(fd))
+
+    def _close_client(self, fd: int) -> None:
+        client = self._clients.pop(fd)
+        del self._unprocessed_stream_data[fd]  # discarding it is OK, it's incomplete
+        del self._handlers[fd]
+        self._epoll.unregister(fd)
+        client.sock.close()  # do this *after* the bookkeeping above, close() can throw
+
+    def _read_client(self, fd: int) -> None:
+        if self._queue.full():
+            return  # We will be woken up again as long as there is data
+        client = self._clients[fd]
+        try:
+            new_data = client.sock.recv(STREAM_READ_SIZE)
+        except Exception:
+            new_data = b""
+            self._logger.exception("Exception during syslog socket_tcp recv")
+        if not new_data:  # the other side is gone, no more data will ever come
+            self._close_client(fd)
+            return
+        self._queue_stream_data(fd, new_data, client.address)
+
+    def _read_pipe(self) -> None:
+        if self._queue.full():
+            return
+        try:
+            new_data = os.read(self._pipe, STREAM_READ_SIZE)
+        except Exception:
+            new_data = b""
+            self._logger.exception("General exception during pipe os.read")
+        self._queue_stream_data(self._pipe, new_data, None)
+
+    def _queue_stream_data(self, fd: int, data: bytes, address: tuple[str, int] | None) -> None:
+        messages, self._unprocessed_stream_data[fd] = parse_bytes_into_syslog_messages(
+            self._unprocessed_stream_data[fd] + data
+        )
+        self._queue.extend(SyslogMessage(message, address) for message in messages)
+
+    def _read_syslog_udp(self, syslog_udp: socket.socket) -> None:
+        for message, address in drain_datagrams(syslog_udp, 4096, DATAGRAM_BATCH_SIZE):
+            self._queue.put(SyslogMessage(message, parse_address("syslog socket (UDP)", address)))
+
+    def _read_snmp_traps(self, snmp_trap_socket: socket.socket) -> None:
+        for message, address in drain_datagrams(snmp_trap_socket, 65535, DATAGRAM_BATCH_SIZE):
+            self._queue.put(SNMPTrap(message, parse_address("SNMP trap", address)))
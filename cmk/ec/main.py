@@ -28,11 +28,13 @@ import sys
 import threading
 import time
 import traceback
-from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+import uuid
+from collections import deque
+from collections.abc import Callable, Collection, Iterable, Iterator, Mapping, Sequence
 from logging import DEBUG, getLogger, Logger
 from pathlib import Path
 from types import FrameType
-from typing import Any, assert_never, IO, Literal, TypedDict
+from typing import Any, assert_never, IO, Literal, NamedTuple, NotRequired, overload, TypedDict
 
 from setproctitle import setthreadtitle
 
@@ -59,21 +61,29 @@ from .config import (
     Expect,
     ExpectInterval,
     MatchGroups,
+    ReplicationBase,
     Rule,
 )
 from .core_queries import HostInfo, query_hosts_scheduled_downtime_depth
 from .crash_reporting import CrashReportStore, ECCrashReport
 from .event import create_events_from_syslog_messages, Event, scrub_string
-from .helpers import ECLock, parse_bytes_into_syslog_messages
+from .helpers import ECLock
 from .history import ActiveHistoryPeriod, get_logfile, History, HistoryWhat, quote_tab, TimedHistory
 from .history_file import FileHistory
 from .history_mongo import MongoDBHistory
 from .history_sqlite import SQLiteHistory, SQLiteSettings
 from .host_config import HostConfig
+from .ingestion import (
+    MAX_QUEUED_MESSAGES,
+    MessageQueue,
+    PROCESSING_BATCH_SIZE,
+    ReceivedMessage,
+    Receiver,
+    SNMPTrap,
+)
 from .perfcounters import Perfcounters
 from .query import (
     Columns,
-    filter_operator_in,
     MKClientError,
     Query,
     QueryCOMMAND,
@@ -83,8 +93,10 @@ from .query import (
 )
 from .rule_matcher import compile_rule, match, MatchFailure, MatchResult, MatchSuccess, RuleMatcher
 from .rule_packs import load_active_config
+from .rule_prefilter import RulePrefilter
 from .settings import create_settings, FileDescriptor, PortNumber, Settings
 from .snmp import SNMPTrapParser
+from .status_store import EventStatusStore, JournalRecord, PackedEventStatus
 from .syslog import SyslogFacility, SyslogPriority
 from .timeperiod import TimePeriods
 
@@ -98,18 +110,31 @@ def open_log(log_file_path: Path) -> None:
     log.setup_logging_handler(logfile)
 
 
-class PackedEventStatus(TypedDict):
-    next_event_id: int
-    events: list[Event]
-    rule_stats: dict[str, int]
-    interval_starts: dict[str, int]
-
-
 class SlaveStatus(TypedDict):
     last_master_down: float | None
     last_sync: float
     mode: Literal["master", "sync", "takeover"]
     success: bool
+    config_generation: NotRequired[str]  # of the last rules received from the master
+
+
+class ReplicationVersion(NamedTuple):
+    """Identifies the event status of the master a slave has received"""
+
+    epoch: str
+    sequence: int
+
+
+class PackedEventStatusDelta(TypedDict):
+    next_event_id: int
+    events: list[Event]  # new or changed ones
+    removed_event_ids: list[int]
+    rule_stats: dict[str, int]
+    interval_starts: dict[str, int]
+
+
+# Number of event removals the master remembers for slaves which are behind
+MAX_REPLICATED_REMOVALS = 100000
 
 
 FileDescr = int  # mypy calls this FileDescriptor, but this clashes with our definition
@@ -238,40 +263,6 @@ def allowed_ip(
     return False
 
 
-def unmap_ipv4_address(ip_address: str) -> str:
-    """
-    Accepts addresses with ipv4_mapped hosts and
-    returns unmapped ipv4.
-
-    >>> unmap_ipv4_address('::FFFF:192.0.2.128')
-    '192.0.2.128'
-    """
-    try:
-        host = ipaddress.ip_address(ip_address)
-    except ValueError:
-        # in case address[0] is a hostname
-        return ip_address
-
-    if host.version == 4:
-        return ip_address
-
-    # If IPv6 is mapped to IPv4
-    if host.version == 6 and host.ipv4_mapped:
-        return str(host.ipv4_mapped)
-
-    return ip_address
-
-
-def parse_address(what: str, address: object) -> tuple[str, int]:
-    # We always have an AF_INET or AF_INET6 socket, so the remote address we're dealing with is a
-    # pair (host: str, port: int), where host can be the domain name or an IPv4/IPv6 address.
-    if not (
-        isinstance(address, tuple) and isinstance(address[0], str) and isinstance(address[1], int)
-    ):
-        raise ValueError(f"Invalid remote address '{address!r}' for {what}")
-    return unmap_ipv4_address(address[0]), address[1]
-
-
 def terminate(
     terminate_main_event: threading.Event,
     event_server: EventServer,
@@ -390,6 +381,7 @@ class EventServer(ECServerThread):
         self._rules: list[Rule] = []
         self._rule_by_id: dict[str | None, Rule] = {}
         self._rule_hash: dict[int, dict[int, Any]] = {}
+        self._rule_prefilter = RulePrefilter([])
         self._hash_stats: list[list[int]] = []  # facility/priority
         for _unused_facility in range(32):
             self._hash_stats.append([0] * 8)
@@ -656,106 +648,32 @@ class EventServer(ECServerThread):
         # http://www.outflux.net/blog/archives/2008/03/09/using-select-on-a-fifo/
         return os.open(str(self.settings.paths.event_pipe.value), os.O_RDWR | os.O_NONBLOCK)
 
-    def serve(self) -> None:  # pylint: disable=too-many-branches
-        pipe = self.open_pipe()
-        listen_list = [
-            f
-            for f in (
-                pipe,
-                self._syslog_udp,
-                self._syslog_tcp,
-                self._eventsocket,
-                self._snmp_trap_socket,
-            )
-            if f is not None
-        ]
-        client_sockets: dict[FileDescr, tuple[socket.socket, tuple[str, int] | None, bytes]] = {}
-        select_timeout = 1
-        unprocessed_pipe_data = b""
-        while not self._terminate_event.is_set():
-            try:
-                readable: list[FileDescr | socket.socket] = select.select(
-                    listen_list + list(client_sockets.keys()), [], [], select_timeout
-                )[0]
-            except OSError as e:
-                if e.args[0] != errno.EINTR:
-                    raise
-                continue
-            address: tuple[str, int] | None  # host/port
-
-            # Accept new connection on event unix socket
-            if self._eventsocket in readable:
-                client_socket, remote_address = self._eventsocket.accept()
-                # We have a AF_UNIX socket, so the remote address is a str, which is always ''.
-                if not (isinstance(remote_address, str) and remote_address == ""):
-                    raise ValueError(
-                        f"Invalid remote address '{remote_address!r}' for event socket"
-                    )
-                client_sockets[client_socket.fileno()] = (client_socket, None, b"")
-
-            # Same for the TCP syslog socket
-            if self._syslog_tcp is not None and self._syslog_tcp in readable:
-                client_socket, address = self._syslog_tcp.accept()
-                client_sockets[client_socket.fileno()] = (
-                    client_socket,
-                    parse_address("syslog socket (TCP)", address),
-                    b"",
-                )
-
-            # Read data from existing event unix socket connections
-            # NOTE: We modify client_socket in the loop, so we need to copy below!
-            for fd, (cs, address, previous_data) in list(client_sockets.items()):
-                if fd in readable:
-                    try:
-                        new_data = cs.recv(4096)
-                    except Exception:
-                        new_data = b""
-                        self._logger.exception("Exception during syslog socket_tcp recv")
-
-                    if new_data:
-                        messages, unprocessed = parse_bytes_into_syslog_messages(
-                            previous_data + new_data
-                        )
-                        self.process_syslog_messages(messages, address)
-                        client_sockets[fd] = (cs, address, unprocessed)
-                    else:  # the other side is gone, no more data will ever come
-                        del client_sockets[fd]  # discarding previous_data is OK, it's incomplete
-                        cs.close()  # do this *after* the bookkeeping above, close() can throw
-
-            # Read data from pipe
-            if pipe in readable:
-                try:
-                    unprocessed_pipe_data += os.read(pipe, 4096)
-                except Exception:
-                    self._logger.exception("General exception during pipe os.read")
-
-                messages, unprocessed_pipe_data = parse_bytes_into_syslog_messages(
-                    unprocessed_pipe_data
-                )
-                self.process_syslog_messages(messages, None)
-
-            # Read events from builtin syslog server
-            if self._syslog_udp is not None and self._syslog_udp in readable:
-                message, address = self._syslog_udp.recvfrom(4096)
-                self.process_syslog_messages(
-                    [message], parse_address("syslog socket (UDP)", address)
-                )
-
-            # Read events from builtin snmptrap server
-            if self._snmp_trap_socket is not None and self._snmp_trap_socket in readable:
-                message, address = self._snmp_trap_socket.recvfrom(65535)
+    def serve(self) -> None:
+        queue = MessageQueue(MAX_QUEUED_MESSAGES)
+        with Receiver(
+            queue=queue,
+            pipe=self.open_pipe(),
+            event_socket=self._eventsocket,
+            syslog_udp=self._syslog_udp,
+            syslog_tcp=self._syslog_tcp,
+            snmp_trap_socket=self._snmp_trap_socket,
+            spool_dir=self.settings.paths.spool_dir.value,
+            logger=self._logger,
+        ) as receiver:
+            while not self._terminate_event.is_set():
+                receiver.receive()
+                self._perfcounters.count("ingestion_drops", queue.take_drops())
+                self._perfcounters.set_gauge("ingestion_queue_length", len(queue))
+                self.process_received_messages(queue.take(PROCESSING_BATCH_SIZE))
+
+    def process_received_messages(self, messages: Iterable[ReceivedMessage]) -> None:
+        for message in messages:
+            if isinstance(message, SNMPTrap):
                 self.process_potential_event_instrumented(
-                    self.create_events_from_trap(message, parse_address("SNMP trap", address))
+                    self.create_events_from_trap(message.data, message.address)
                 )
-
-            if spool_files := sorted(
-                self.settings.paths.spool_dir.value.glob("[!.]*"), key=lambda x: x.stat().st_mtime
-            ):
-                self.process_syslog_messages(spool_files[0].read_bytes().splitlines(), None)
-                spool_files[0].unlink()
-                select_timeout = 0  # enable fast processing to process further files
             else:
-                select_timeout = 1  # restore default select timeout
+                self.process_syslog_messages([message.data], message.address)
 
     def create_events_from_trap(self, data: bytes, address: tuple[str, int]) -> Iterator[Event]:
         try:
@@ -884,6 +802,7 @@ class EventServer(ECServerThread):
                             event["last_token"] = (
                                 last_token + new_tokens * secs_per_token
                             )  # not now! would be unfair
+                            self._event_status.event_changed(event)
                             if event["count"] == 0:
                                 self._logger.info(
                                     "Rule %s/%s, event %d: again without allowed rate, dropping event",
@@ -917,6 +836,7 @@ class EventServer(ECServerThread):
                         event["rule_id"],
                     )
                     event["phase"] = "open"
+                    self._event_status.event_changed(event)
                     self._history.add(event, "DELAYOVER")
                     if rule:
                         event_has_opened(
@@ -1070,6 +990,7 @@ class EventServer(ECServerThread):
             # Better rewrite (again). Rule might have changed. Also we have changed
             # the text and the user might have his own text added via set_text.
             self.rewrite_event(rule, merge_event, MatchGroups(), set_first=False)
+            self._event_status.event_changed(merge_event)
             self._history.add(merge_event, "COUNTFAILED")
         else:
             # Create artificial event from scratch. Make sure that all important
@@ -1181,12 +1102,18 @@ class EventServer(ECServerThread):
             "Compiled %d active rules (ignoring %d disabled rules)", count_rules, count_disabled
         )
         if self._config["rule_optimizer"]:
+            self._rule_prefilter = RulePrefilter(self._rules)
             self._logger.info(
                 "Rule hash: %d rules - %d hashed, %d unspecific",
                 len(self._rules),
                 len(self._rules) - count_unspecific,
                 count_unspecific,
             )
+            self._logger.info(
+                "Rule prefilter: %d rules need literal text in the message, %d are always tried",
+                len(self._rules) - self._rule_prefilter.num_unfiltered,
+                self._rule_prefilter.num_unfiltered,
+            )
             for facility in list(range(23)) + [31]:
                 if facility in self._rule_hash:
                     stats = [
@@ -1260,7 +1187,10 @@ class EventServer(ECServerThread):
         # Rule optimizer
         if self._config["rule_optimizer"]:
             self._hash_stats[event["facility"]][event["priority"]] += 1
-            rule_candidates = self._rule_hash.get(event["facility"], {}).get(event["priority"], [])
+            rule_candidates = self._rule_prefilter.candidates(
+                self._rule_hash.get(event["facility"], {}).get(event["priority"], []),
+                event["text"],
+            )
         else:
             rule_candidates = self._rules
 
@@ -1367,6 +1297,8 @@ class EventServer(ECServerThread):
                                 rule,
                                 existing_event,
                             )
+                        if self._event_status.has_event(existing_event):
+                            self._event_status.event_changed(existing_event)
 
                         self._history.add(existing_event, "COUNTREACHED")
 
@@ -1868,18 +1800,45 @@ class StatusTableEvents(StatusTable):
     def __init__(self, logger: Logger, event_status: EventStatus) -> None:
         super().__init__(logger)
         self._event_status = event_status
-        # NOTE: We depend on the dict insertion order below, but this is guaranteed for Python >= 3.7.
-        self._columns_dict = dict(self.columns)
+        self._fields = [(column_name[6:], default) for column_name, default in self.columns]
 
     def _enumerate(self, query: QueryGET) -> Iterable[Sequence[object]]:
-        for event in self._event_status.get_events():
-            # Optimize filters that are set by the check_mkevents active check. Since users
-            # may have a lot of those checks running, it is a good idea to optimize this.
-            if not query.only_host or filter_operator_in(event["host"], query.only_host):
-                yield [
-                    event.get(column_name[6:], default)
-                    for column_name, default in self._columns_dict.items()
-                ]
+        # Use the indexes for the filters set by the check_mkevents active check. Since users
+        # may have a lot of those checks running, each one looking for the events of a single
+        # host, it is a good idea to avoid looking at all events.
+        for event in self._event_status.find_events(
+            {
+                field: values
+                for field in _QUERY_INDEXED_FIELDS
+                if (values := query.column_values(f"event_{field}")) is not None
+            }
+        ):
+            yield _EventRow(event, self._fields)
+
+
+class _EventRow(Sequence[object]):
+    """A row of the events table, the values are only looked up when needed"""
+
+    __slots__ = ("_event", "_fields")
+
+    def __init__(self, event: Event, fields: Sequence[tuple[str, object]]) -> None:
+        self._event = event
+        self._fields = fields
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    @overload
+    def __getitem__(self, index: int) -> object: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[object]: ...
+
+    def __getitem__(self, index: int | slice) -> object:
+        if isinstance(index, slice):
+            return [self[nr] for nr in range(*index.indices(len(self._fields)))]
+        field, default = self._fields[index]
+        return self._event.get(field, default)
 
 
 class StatusTableHistory(StatusTable):
@@ -2279,6 +2238,7 @@ class StatusServer(ECServerThread):
                 event["contact"] = contact
             if user:
                 event["owner"] = user
+            self._event_status.event_changed(event)
             self._history.add(event, "UPDATE", user)
 
     def handle_command_create(self, arguments: list[str]) -> None:
@@ -2297,6 +2257,7 @@ class StatusServer(ECServerThread):
             event["state"] = int(newstate)
             if user:
                 event["owner"] = user
+            self._event_status.event_changed(event)
             self._history.add(event, "CHANGESTATE", user)
 
     def handle_command_reload(self) -> None:
@@ -2345,6 +2306,7 @@ class StatusServer(ECServerThread):
             event: Event | None = self._event_status.event(int(event_id))
             if user and event is not None:
                 event["owner"] = user
+                self._event_status.event_changed(event)
 
             # TODO: De-duplicate code from do_event_actions()
             if action_id == "@NOTIFY" and event is not None:
@@ -2389,20 +2351,21 @@ class StatusServer(ECServerThread):
         self._logger.info("Switched replication mode to '%s' by external command.", new_mode)
 
     def handle_replicate(self, argument: str, client_ip: str) -> Response:
-        # Last time our slave got a config update
+        # Last time our slave got a config update, optionally followed by what it already has
         try:
-            last_update = int(argument)
+            last_update, request = parse_replication_request(argument)
             if self.settings.options.debug:
                 self._logger.info(
-                    "Replication: sync request from %s, last update %d seconds ago",
+                    "Replication: sync request from %s, last update %d seconds ago, has %r",
                     client_ip,
                     time.time() - last_update,
+                    request,
                 )
 
         except (ValueError, OverflowError) as e:
             raise MKClientError("Invalid arguments to command REPLICATE") from e
         return replication_send(
-            self._config, self._lock_configuration, self._event_status, last_update
+            self._config, self._lock_configuration, self._event_status, last_update, request
         )
 
 
@@ -2528,6 +2491,42 @@ def run_eventd(  # pylint: disable=too-many-branches
 #   '----------------------------------------------------------------------'
 
 
+class _EventIndexKeys(NamedTuple):
+    rule: str | None
+    rule_and_host: tuple[str | None, HostName]
+    host: tuple[HostName, HostName | None]
+    # Only used for status queries, compared case-insensitively
+    query_host: str
+    query_application: str
+    query_phase: str
+
+    @classmethod
+    def of(cls, event: Event) -> _EventIndexKeys:
+        return cls(
+            rule=event["rule_id"],
+            rule_and_host=(event["rule_id"], event["host"]),
+            host=(event["host"], event["core_host"]),
+            query_host=event["host"].lower(),
+            query_application=event.get("application", "").lower(),
+            query_phase=event.get("phase", "").lower(),
+        )
+
+
+QueryIndexedField = Literal["host", "application", "phase"]
+_QUERY_INDEXED_FIELDS: Sequence[QueryIndexedField] = ["host", "application", "phase"]
+
+
+def _remove_from_index[K](index: dict[K, dict[int, Event]], key: K, eid: int) -> None:
+    bucket = index[key]
+    del bucket[eid]
+    if not bucket:
+        del index[key]
+
+
+def _sort_index_bucket[K](index: dict[K, dict[int, Event]], key: K) -> None:
+    index[key] = dict(sorted(index[key].items()))
+
+
 class EventStatus:
     """
     Keeps the current Event-Status.
@@ -2548,6 +2547,9 @@ class EventStatus:
         self.lock = threading.Lock()
         self._history = history
         self._logger = logger
+        self._store = EventStatusStore(
+            settings.paths.status_file.value, settings.paths.status_journal_file.value, logger
+        )
         self.flush()
 
     def reload_configuration(self, config: Config, history: History) -> None:
@@ -2556,12 +2558,21 @@ class EventStatus:
 
     def flush(self) -> None:
         # TODO: Improve types!
-        self._events: list[Event] = []
+        self._indexed_keys: dict[int, _EventIndexKeys] = {}
+        # All events, ordered by their ID, i.e. the first entry is always the oldest event
+        self._events_by_id: dict[int, Event] = {}
+        self._events_by_rule: dict[str | None, dict[int, Event]] = {}
+        self._events_by_rule_and_host: dict[tuple[str | None, HostName], dict[int, Event]] = {}
+        self._events_by_host: dict[tuple[HostName, HostName | None], dict[int, Event]] = {}
+        # The buckets of these are not ordered, they are used for status queries only.
+        self._events_by_query_field: dict[QueryIndexedField, dict[str, dict[int, Event]]] = {}
         self._next_event_id = 1
         self._rule_stats: dict[str, int] = {}
         # needed for expecting rules
         self._interval_starts: dict[str, int] = {}
-        self._initialize_event_limit_status()
+        self._initialize_event_limit_status([])
+        self._reset_changes(snapshot_needed=True)
+        self._reset_replication()
 
         # TODO: might introduce some performance counters, like:
         # - number of received messages
@@ -2569,14 +2580,67 @@ class EventStatus:
         # - number of rule misses
 
     def events(self) -> list[Event]:
+        """Return all events, the oldest one first
+
+        This is a copy, so the caller may remove events while iterating over it.
+        """
         # TODO: Improve type!
-        return self._events
+        return list(self._events_by_id.values())
+
+    def _reset_changes(self, *, snapshot_needed: bool) -> None:
+        """Forget about the changes since the last save"""
+        self._changed_event_ids: set[int] = set()
+        self._removed_event_ids: set[int] = set()
+        self._snapshot_needed = snapshot_needed
+
+    def _reset_replication(self) -> None:
+        """Start a new replication epoch, slaves will need a full sync
+
+        On the master, every change of an event gets a new sequence number of the
+        current epoch, so the changes a slave has not yet seen can be sent to it.
+        On the slave, we remember up to which version of the master we are in sync.
+        """
+        self._replication_epoch = uuid.uuid4().hex
+        self._sequence = 0
+        # Sequence number of the last change of each event, ordered by it
+        self._event_sequences: dict[int, int] = dict.fromkeys(self._events_by_id, 0)
+        self._removals: deque[tuple[int, int]] = deque()  # sequence number, event id
+        # Removals up to this sequence number have been forgotten
+        self._removals_forgotten_until = 0
+        self._replicated_version: ReplicationVersion | None = None
+        self._replicated_at_sequence = 0
+
+    def _note_change(self, eid: int) -> None:
+        self._changed_event_ids.add(eid)
+        self._sequence += 1
+        self._event_sequences.pop(eid, None)
+        self._event_sequences[eid] = self._sequence
+
+    def _note_removal(self, eid: int) -> None:
+        self._changed_event_ids.discard(eid)
+        self._removed_event_ids.add(eid)
+        self._sequence += 1
+        self._event_sequences.pop(eid, None)
+        self._removals.append((self._sequence, eid))
+        if len(self._removals) > MAX_REPLICATED_REMOVALS:
+            self._removals_forgotten_until = self._removals.popleft()[0]
+
+    def event_changed(self, event: Event) -> None:
+        """Needs to be called when an existing event has been modified
+
+        This keeps the indexes up to date. Only the events changed since the last
+        save are written to the journal, and only the events changed since the last
+        sync are sent to slaves.
+        """
+        self._reindex_event(event)
+        self._note_change(event["id"])
 
     def event(self, eid: int) -> Event | None:
-        for event in self._events:
-            if event["id"] == eid:
-                return event
-        return None
+        return self._events_by_id.get(eid)
+
+    def has_event(self, event: Event) -> bool:
+        """Tell whether the event is one of ours, e.g. not rejected by an event limit"""
+        return "id" in event and self._events_by_id.get(event["id"]) is event
 
     def interval_start(self, rule_id: str, interval: ExpectInterval) -> int:
         """
@@ -2621,30 +2685,101 @@ class EventStatus:
     def pack_status(self) -> PackedEventStatus:
         return PackedEventStatus(
             next_event_id=self._next_event_id,
-            events=self._events,
+            events=list(self._events_by_id.values()),
             rule_stats=self._rule_stats,
             interval_starts=self._interval_starts,
         )
 
     def unpack_status(self, status: PackedEventStatus) -> None:
         self._next_event_id = status["next_event_id"]
-        self._events = status["events"]
         self._rule_stats = status["rule_stats"]
         self._interval_starts = status["interval_starts"]
+        self._initialize_event_limit_status(status["events"])
+        self._reset_changes(snapshot_needed=True)
+        self._reset_replication()
+
+    def replication_version(self) -> ReplicationVersion:
+        return ReplicationVersion(self._replication_epoch, self._sequence)
+
+    def pack_status_delta(self, since: ReplicationVersion) -> PackedEventStatusDelta | None:
+        """Return the changes after the given version, None if a full sync is needed"""
+        if since.epoch != self._replication_epoch or not (
+            self._removals_forgotten_until <= since.sequence <= self._sequence
+        ):
+            return None
+        changed_event_ids = []
+        for eid, sequence in reversed(self._event_sequences.items()):
+            if sequence <= since.sequence:
+                break
+            changed_event_ids.append(eid)
+        removed_event_ids = []
+        for sequence, eid in reversed(self._removals):
+            if sequence <= since.sequence:
+                break
+            removed_event_ids.append(eid)
+        return PackedEventStatusDelta(
+            next_event_id=self._next_event_id,
+            events=[self._events_by_id[eid] for eid in sorted(changed_event_ids)],
+            removed_event_ids=sorted(removed_event_ids),
+            rule_stats=self._rule_stats,
+            interval_starts=self._interval_starts,
+        )
+
+    def unpack_status_delta(self, delta: PackedEventStatusDelta) -> None:
+        self._next_event_id = delta["next_event_id"]
+        self._rule_stats = delta["rule_stats"]
+        self._interval_starts = delta["interval_starts"]
+        for eid in set(delta["removed_event_ids"]).intersection(self._events_by_id):
+            self._unindex_event(self._events_by_id[eid])
+            self.num_existing_events -= 1
+            self._note_removal(eid)
+        for event in delta["events"]:
+            if (existing := self._events_by_id.get(event["id"])) is None:
+                self.num_existing_events += 1
+                self._index_event(event)
+                self._note_change(event["id"])
+            else:
+                existing.update(event)  # events never lose fields
+                self.event_changed(existing)
+
+    def replicated_version(self) -> ReplicationVersion | None:
+        """Return the version of the master we are in sync with
+
+        None means that a full sync is needed, e.g. because we have changed
+        events on our own in the meantime.
+        """
+        if self._sequence != self._replicated_at_sequence:
+            return None
+        return self._replicated_version
+
+    def set_replicated_version(self, version: ReplicationVersion | None) -> None:
+        self._replicated_version = version
+        self._replicated_at_sequence = self._sequence
 
     def save_status(self) -> None:
         now = time.time()
-        status = self.pack_status()
-        path = self.settings.paths.status_file.value
-        path_new = path.parent / (path.name + ".new")
-        # Believe it or not: cPickle is more than two times slower than repr()
-        with path_new.open(mode="wb") as f:
-            f.write((repr(status) + "\n").encode("utf-8"))
-            f.flush()
-            os.fsync(f.fileno())
-        path_new.rename(path)
+        changed_event_ids, removed_event_ids = self._changed_event_ids, self._removed_event_ids
+        if self._snapshot_needed or self._store.needs_snapshot():
+            self._store.write_snapshot(self.pack_status())
+            what = "snapshot"
+        else:
+            self._store.append(
+                JournalRecord(
+                    next_event_id=self._next_event_id,
+                    rule_stats=self._rule_stats,
+                    interval_starts=self._interval_starts,
+                    changed_events=[
+                        self._events_by_id[eid]
+                        for eid in sorted(changed_event_ids)
+                        if eid in self._events_by_id
+                    ],
+                    removed_event_ids=sorted(removed_event_ids),
+                )
+            )
+            what = f"{len(changed_event_ids)} changed and {len(removed_event_ids)} removed events"
+        self._reset_changes(snapshot_needed=False)
         elapsed = time.time() - now
-        self._logger.log(VERBOSE, "Saved event state to %s in %.3fms.", path, elapsed * 1000)
+        self._logger.log(VERBOSE, "Saved event state (%s) in %.3fms.", what, elapsed * 1000)
 
     def reset_counters(self, rule_id: str | None) -> None:
         if rule_id:
@@ -2656,20 +2791,21 @@ class EventStatus:
 
     def load_status(self, event_server: EventServer) -> None:
         path = self.settings.paths.status_file.value
-        if path.exists():
-            try:
-                status = ast.literal_eval(path.read_text(encoding="utf-8"))
-                self._next_event_id = status["next_event_id"]
-                self._events = status["events"]
-                self._rule_stats = status["rule_stats"]
-                self._interval_starts = status.get("interval_starts", {})
-                self._logger.info("Loaded event state from %s.", path)
-            except Exception:
-                self._logger.exception("Error loading event state from %s", path)
-                raise
+        try:
+            status = self._store.load()
+        except Exception:
+            self._logger.exception("Error loading event state from %s", path)
+            raise
+        events = self.events()
+        if status is not None:
+            self._next_event_id = status["next_event_id"]
+            events = status["events"]
+            self._rule_stats = status["rule_stats"]
+            self._interval_starts = status["interval_starts"]
+            self._logger.info("Loaded event state from %s.", path)
 
         # Add new columns and fix broken events
-        for event in self._events:
+        for event in events:
             event.setdefault("ipaddress", "")
             event.setdefault("host", HostName(""))
             event.setdefault("application", "")
@@ -2680,47 +2816,112 @@ class EventStatus:
                 event["host_in_downtime"] = False
 
         # core_host is needed to initialize the status
-        self._initialize_event_limit_status()
+        self._initialize_event_limit_status(events)
+        # Start with a compacted state, this also converts status files of former versions.
+        self._reset_changes(snapshot_needed=True)
+        self._reset_replication()
 
-    def _initialize_event_limit_status(self) -> None:
+    def _initialize_event_limit_status(self, events: Iterable[Event]) -> None:
         """
         Called on Event Console initialization from status file to initialize
-        the current event limit state -> Sets internal counters which are
-        updated during runtime.
+        the current event limit state -> Sets internal counters and the event
+        indexes which are updated during runtime.
         """
-        self.num_existing_events = len(self._events)
-
         self.num_existing_events_by_host: dict[tuple[str, HostName | None], int] = {}
         self.num_existing_events_by_rule: dict[Any, int] = {}
-        for event in self._events:
-            self._count_event_add(event)
+        self._indexed_keys = {}
+        self._events_by_id = {}
+        self._events_by_rule = {}
+        self._events_by_rule_and_host = {}
+        self._events_by_host = {}
+        self._events_by_query_field = {field: {} for field in _QUERY_INDEXED_FIELDS}
+        for event in events:
+            self._index_event(event)
+        self.num_existing_events = len(self._events_by_id)
 
-    def _count_event_add(self, event: Event) -> None:
-        host_key = (event["host"], event["core_host"])
-        if host_key not in self.num_existing_events_by_host:
-            self.num_existing_events_by_host[host_key] = 1
-        else:
-            self.num_existing_events_by_host[host_key] += 1
+    def _index_event(self, event: Event) -> None:
+        self._events_by_id[event["id"]] = event
+        self._add_to_indexes(event)
 
-        if event["rule_id"] not in self.num_existing_events_by_rule:
-            self.num_existing_events_by_rule[event["rule_id"]] = 1
-        else:
-            self.num_existing_events_by_rule[event["rule_id"]] += 1
+    def _unindex_event(self, event: Event) -> None:
+        eid = event["id"]
+        del self._events_by_id[eid]
+        self._remove_from_indexes(eid)
 
-    def _count_event_remove(self, event: Event) -> None:
-        host_key = (event["host"], event["core_host"])
+    def _add_to_indexes(self, event: Event) -> None:
+        """Add the event to the counters and the secondary indexes
 
-        self.num_existing_events -= 1
-        self.num_existing_events_by_host[host_key] -= 1
-        self.num_existing_events_by_rule[event["rule_id"]] -= 1
+        The indexes map to dicts keyed by the event id. As events are only ever
+        appended, these dicts keep the order of the event IDs, i.e. the first
+        entry is always the oldest event.
+        """
+        keys = _EventIndexKeys.of(event)
+        eid = event["id"]
+        self._indexed_keys[eid] = keys
+        self._events_by_rule.setdefault(keys.rule, {})[eid] = event
+        self._events_by_rule_and_host.setdefault(keys.rule_and_host, {})[eid] = event
+        self._events_by_host.setdefault(keys.host, {})[eid] = event
+        for field, key in self._query_keys(keys):
+            self._events_by_query_field[field].setdefault(key, {})[eid] = event
+
+        self.num_existing_events_by_host[keys.host] = (
+            self.num_existing_events_by_host.get(keys.host, 0) + 1
+        )
+        self.num_existing_events_by_rule[keys.rule] = (
+            self.num_existing_events_by_rule.get(keys.rule, 0) + 1
+        )
+
+    def _remove_from_indexes(self, eid: int) -> None:
+        # Use the keys the event has been indexed with, the event itself may have changed meanwhile.
+        keys = self._indexed_keys.pop(eid)
+        _remove_from_index(self._events_by_rule, keys.rule, eid)
+        _remove_from_index(self._events_by_rule_and_host, keys.rule_and_host, eid)
+        _remove_from_index(self._events_by_host, keys.host, eid)
+        for field, key in self._query_keys(keys):
+            _remove_from_index(self._events_by_query_field[field], key, eid)
+
+        self.num_existing_events_by_host[keys.host] -= 1
+        self.num_existing_events_by_rule[keys.rule] -= 1
+
+    @staticmethod
+    def _query_keys(keys: _EventIndexKeys) -> Iterator[tuple[QueryIndexedField, str]]:
+        yield "host", keys.query_host
+        yield "application", keys.query_application
+        yield "phase", keys.query_phase
+
+    def _reindex_event(self, event: Event) -> None:
+        """Move an event to other index buckets in case its indexed fields have been changed"""
+        eid = event["id"]
+        keys = self._indexed_keys[eid]
+        new_keys = _EventIndexKeys.of(event)
+        if new_keys == keys:
+            return
+        if new_keys.rule_and_host == keys.rule_and_host and new_keys.host == keys.host:
+            # Only fields used by status queries have changed, e.g. the phase. The buckets
+            # of these need not be ordered, so we avoid sorting them.
+            for (field, key), (_field, new_key) in zip(
+                self._query_keys(keys), self._query_keys(new_keys)
+            ):
+                if key != new_key:
+                    _remove_from_index(self._events_by_query_field[field], key, eid)
+                    self._events_by_query_field[field].setdefault(new_key, {})[eid] = event
+            self._indexed_keys[eid] = new_keys
+            return
+        self._remove_from_indexes(eid)
+        self._add_to_indexes(event)
+        # Restore the order of the buckets the event has been appended to.
+        keys = self._indexed_keys[event["id"]]
+        _sort_index_bucket(self._events_by_rule, keys.rule)
+        _sort_index_bucket(self._events_by_rule_and_host, keys.rule_and_host)
+        _sort_index_bucket(self._events_by_host, keys.host)
 
     def new_event(self, event: Event) -> None:
         self._perfcounters.count("events")
         event["id"] = self._next_event_id
         self._next_event_id += 1
-        self._events.append(event)
         self.num_existing_events += 1
-        self._count_event_add(event)
+        self._index_event(event)
+        self._note_change(event["id"])
         self._history.add(event, "NEW")
 
     def archive_event(self, event: Event) -> None:
@@ -2731,39 +2932,37 @@ class EventStatus:
         self._history.add(event, "ARCHIVED")
 
     def remove_event(self, event: Event, delete_reason: HistoryWhat, user: str = "") -> None:
-        try:
-            self._events.remove(event)
-            self._history.add(event, delete_reason, user)
-            self._count_event_remove(event)
-        except ValueError:
-            self._logger.exception("Cannot remove event %d: not present", event["id"])
+        if not self.has_event(event):
+            self._logger.error("Cannot remove event %s: not present", event.get("id"))
+            return
+        self._history.add(event, delete_reason, user)
+        self.num_existing_events -= 1
+        self._unindex_event(event)
+        self._note_removal(event["id"])
 
     # protected by self.lock
     def remove_oldest_event(self, ty: LimitKind, event: Event) -> None:
         if ty == "overall":
             self._logger.log(VERBOSE, "  Removing oldest event")
-            oldest_event = self._events[0]
+            oldest_event = next(iter(self._events_by_id.values()))
             self.remove_event(oldest_event, "AUTODELETE")
         elif ty == "by_rule" and event["rule_id"] is not None:
             self._logger.log(VERBOSE, '  Removing oldest event of rule "%s"', event["rule_id"])
             self._remove_oldest_event_of_rule(event["rule_id"])
         elif ty == "by_host" and event["host"] is not None:
             self._logger.log(VERBOSE, '  Removing oldest event of host "%s"', event["host"])
-            self._remove_oldest_event_of_host(event["host"])
+            self._remove_oldest_event_of_host(event["host"], event["core_host"])
 
     # protected by self.lock
     def _remove_oldest_event_of_rule(self, rule_id: str) -> None:
-        for event in self._events:
-            if event["rule_id"] == rule_id:
-                self.remove_event(event, "AUTODELETE")
-                return
+        if events := self._events_by_rule.get(rule_id):
+            self.remove_event(next(iter(events.values())), "AUTODELETE")
 
     # protected by self.lock
-    def _remove_oldest_event_of_host(self, hostname: str) -> None:
-        for event in self._events:
-            if event["host"] == hostname:
-                self.remove_event(event, "AUTODELETE")
-                return
+    def _remove_oldest_event_of_host(self, hostname: HostName, core_host: HostName | None) -> None:
+        # The event limit is counted per (host, core_host), so remove the oldest one of those.
+        if events := self._events_by_host.get((hostname, core_host)):
+            self.remove_event(next(iter(events.values())), "AUTODELETE")
 
     # protected by self.lock
     def get_num_existing_events_by(self, ty: LimitKind, event: Event) -> int:
@@ -2791,10 +2990,8 @@ class EventStatus:
         """
         with self.lock:
             to_delete = []
-            for event in self._events:
-                if event["rule_id"] == rule["id"] and self.cancelling_match(
-                    match_groups, new_event, event, rule
-                ):
+            for event in list(self._events_by_rule.get(rule["id"], {}).values()):
+                if self.cancelling_match(match_groups, new_event, event, rule):
                     # Fill a few fields of the cancelled event with data from
                     # the cancelling event so that action scripts have useful
                     # values and the logfile entry if more relevant.
@@ -2967,10 +3164,11 @@ class EventStatus:
                 preserve["contact"] = found["contact"]
         found.update(event)
         found.update(preserve)
+        self.event_changed(found)
 
     def count_expected_event(self, event_server: EventServer, event: Event) -> None:
-        for ev in self._events:
-            if ev["rule_id"] == event["rule_id"] and ev["phase"] == "counting":
+        for ev in self._events_by_rule.get(event["rule_id"], {}).values():
+            if ev["phase"] == "counting":
                 self.count_event_up(ev, event)
                 return
 
@@ -2987,31 +3185,33 @@ class EventStatus:
         since the event has been created because the count was too
         low in the specified period of time.
         """
-        for ev in self._events:
-            if ev["rule_id"] == event["rule_id"]:
-                if ev["phase"] == "ack" and not count["count_ack"]:
-                    continue  # skip acknowledged events
-
-                if count["separate_host"] and ev["host"] != event["host"]:
-                    continue  # treat events with separated hosts separately
+        # treat events with separated hosts separately
+        candidates = (
+            self._events_by_rule_and_host.get((event["rule_id"], event["host"]), {})
+            if count["separate_host"]
+            else self._events_by_rule.get(event["rule_id"], {})
+        )
+        for ev in candidates.values():
+            if ev["phase"] == "ack" and not count["count_ack"]:
+                continue  # skip acknowledged events
 
-                if count["separate_application"] and ev["application"] != event["application"]:
-                    continue  # same for application
+            if count["separate_application"] and ev["application"] != event["application"]:
+                continue  # same for application
 
-                if count["separate_match_groups"] and ev["match_groups"] != event["match_groups"]:
-                    continue
+            if count["separate_match_groups"] and ev["match_groups"] != event["match_groups"]:
+                continue
 
-                count_duration = count.get("count_duration")
-                if count_duration is not None and ev["first"] + count_duration < event["time"]:
-                    # Counting has been discontinued on this event after a certain time
-                    continue
+            count_duration = count.get("count_duration")
+            if count_duration is not None and ev["first"] + count_duration < event["time"]:
+                # Counting has been discontinued on this event after a certain time
+                continue
 
-                if ev["host_in_downtime"] != event["host_in_downtime"]:
-                    continue  # treat events with different downtime states separately
+            if ev["host_in_downtime"] != event["host_in_downtime"]:
+                continue  # treat events with different downtime states separately
 
-                found = ev
-                self.count_event_up(found, event)
-                break
+            found = ev
+            self.count_event_up(found, event)
+            break
         else:
             event["count"] = 1
             event["phase"] = "counting"
@@ -3021,11 +3221,13 @@ class EventStatus:
         # Did we just count the event that was just one too much?
         if found["phase"] == "counting" and found["count"] >= count["count"]:
             found["phase"] = "open"
+            if self.has_event(found):  # it has not been created in case of a reached limit
+                self.event_changed(found)
             return found  # do event action, return found copy of event
         return None  # do not do event action
 
     def delete_events_by(self, predicate: Callable[[Event], bool], user: str) -> None:
-        for event in self._events[:]:
+        for event in self.events():
             if predicate(event):
                 event["phase"] = "closed"
                 if user:
@@ -3033,7 +3235,27 @@ class EventStatus:
                 self.remove_event(event, "DELETE", user)
 
     def get_events(self) -> Iterable[Event]:
-        return self._events
+        return self._events_by_id.values()
+
+    def find_events(
+        self, restrictions: Mapping[QueryIndexedField, Collection[str]]
+    ) -> Iterable[Event]:
+        """Return the events which may have one of the given values in each of the fields
+
+        The values are given in lower case, the events are returned in their order. Only
+        the most selective index is used, the caller has to check the events themselves.
+        """
+        candidates: list[dict[int, Event]] | None = None
+        for field, values in restrictions.items():
+            index = self._events_by_query_field[field]
+            buckets = [bucket for value in values if (bucket := index.get(value))]
+            if candidates is None or sum(map(len, buckets)) < sum(map(len, candidates)):
+                candidates = buckets
+        if candidates is None:
+            return self._events_by_id.values()
+        return [
+            self._events_by_id[eid] for eid in sorted(itertools.chain.from_iterable(candidates))
+        ]
 
     def get_rule_stats(self) -> Iterable[tuple[str, int]]:
         return sorted(self._rule_stats.items(), key=lambda x: x[0])
@@ -3068,13 +3290,64 @@ def replication_allow_command(config: Config, command: str, slave_status: SlaveS
         )
 
 
+class ReplicationRequest(NamedTuple):
+    """What a slave already has from the master"""
+
+    config_generation: str | None
+    status_version: ReplicationVersion | None
+
+
+def parse_replication_request(argument: str) -> tuple[int, ReplicationRequest | None]:
+    """Parse the arguments of REPLICATE
+
+    Slaves of former versions only send the time of their last sync, we send
+    them everything. Current ones send the config generation and the status
+    version they have, '-' meaning nothing.
+
+    >>> parse_replication_request("1700000000")
+    (1700000000, None)
+    >>> parse_replication_request("1700000000 - - 0")
+    (1700000000, ReplicationRequest(config_generation=None, status_version=None))
+    >>> parse_replication_request("1700000000 abc def 42")[1]
+    ReplicationRequest(config_generation='abc', status_version=ReplicationVersion(epoch='def', sequence=42))
+    """
+    match argument.split():
+        case [last_update]:
+            return int(last_update), None
+        case [last_update, config_generation, epoch, sequence]:
+            return int(last_update), ReplicationRequest(
+                config_generation=None if config_generation == "-" else config_generation,
+                status_version=None if epoch == "-" else ReplicationVersion(epoch, int(sequence)),
+            )
+    raise ValueError(argument)
+
+
 def replication_send(
-    config: Config, lock_configuration: ECLock, event_status: EventStatus, last_update: int
+    config: Config,
+    lock_configuration: ECLock,
+    event_status: EventStatus,
+    last_update: int,
+    request: ReplicationRequest | None = None,
 ) -> Mapping[str, object]:
     response: dict[str, object] = {}
     with lock_configuration:
-        response["status"] = event_status.pack_status()
-        if last_update < config["last_reload"]:
+        if request is None:
+            send_rules = last_update < config["last_reload"]
+            response["status"] = event_status.pack_status()
+        else:
+            send_rules = request.config_generation != config["config_generation"]
+            response["config_generation"] = config["config_generation"]
+            response["status_version"] = tuple(event_status.replication_version())
+            delta = (
+                None
+                if request.status_version is None
+                else event_status.pack_status_delta(request.status_version)
+            )
+            if delta is None:
+                response["status"] = event_status.pack_status()
+            else:
+                response["status_delta"] = delta
+        if send_rules:
             response["rules"] = config[
                 "rules"
             ]  # Remove one bright day, where legacy rules are not needed anymore
@@ -3121,8 +3394,10 @@ def replication_pull(  # pylint: disable=too-many-branches
     if need_sync:
         with event_status.lock, lock_configuration:
             try:
-                new_state = get_state_from_master(config, slave_status)
-                replication_update_state(settings, config, event_status, event_server, new_state)
+                new_state = get_state_from_master(config, slave_status, event_status)
+                replication_update_state(
+                    settings, config, event_status, event_server, new_state, slave_status
+                )
                 if repl_settings.get("logging"):
                     logger.info("Successfully synchronized with master")
                 slave_status["last_sync"] = now
@@ -3184,15 +3459,24 @@ def replication_update_state(
     event_status: EventStatus,
     event_server: EventServer,
     new_state: dict[str, Any],
+    slave_status: SlaveStatus,
 ) -> None:
     # Keep a copy of the masters' rules and actions and also prepare using them
     if "rules" in new_state:
         save_master_config(settings, new_state)
         event_server.compile_rules(new_state.get("rule_packs", []))
         config["actions"] = new_state["actions"]
+    if "config_generation" in new_state:
+        slave_status["config_generation"] = new_state["config_generation"]
 
     # Update to the masters' event state
-    event_status.unpack_status(new_state["status"])
+    if "status_delta" in new_state:
+        event_status.unpack_status_delta(new_state["status_delta"])
+    else:
+        event_status.unpack_status(new_state["status"])
+    event_status.set_replicated_version(
+        ReplicationVersion(*new_state["status_version"]) if "status_version" in new_state else None
+    )
 
 
 def save_master_config(settings: Settings, new_state: Mapping[str, object]) -> None:
@@ -3230,25 +3514,32 @@ def load_master_config(settings: Settings, config: ConfigFromWATO, logger: Logge
             logger.error("Replication: no previously saved master state available")
 
 
-def get_state_from_master(config: Config, slave_status: SlaveStatus) -> Any:
+def get_state_from_master(
+    config: Config, slave_status: SlaveStatus, event_status: EventStatus
+) -> Any:
     repl_settings = config["replication"]
     if repl_settings is None:
         raise ValueError("no replication settings")
+    last_sync = slave_status["last_sync"] if slave_status["last_sync"] else 0
+    # After a takeover our events differ from the ones of the master, so we need all of them.
+    status_version = event_status.replicated_version() if slave_status["mode"] == "sync" else None
+    epoch, sequence = ("-", 0) if status_version is None else status_version
     response_text = b""
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(repl_settings["connect_timeout"])
-        sock.connect(repl_settings["master"])
-        sock.sendall(
-            b"REPLICATE %d\n" % (slave_status["last_sync"] if slave_status["last_sync"] else 0)
+        response_text = _query_master(
+            repl_settings,
+            b"REPLICATE %d %s %s %d\n"
+            % (
+                last_sync,
+                slave_status.get("config_generation", "-").encode("ascii"),
+                epoch.encode("ascii"),
+                sequence,
+            ),
         )
-        sock.shutdown(socket.SHUT_WR)
-
-        while True:
-            chunk = sock.recv(8192)
-            response_text += chunk
-            if not chunk:
-                break
+        if not response_text:
+            # Masters of former versions only understand the time of the last sync, they
+            # close the connection without an answer. They always send the full status.
+            response_text = _query_master(repl_settings, b"REPLICATE %d\n" % last_sync)
 
         return ast.literal_eval(response_text.decode("utf-8"))
     except SyntaxError as e:
@@ -3263,6 +3554,22 @@ def get_state_from_master(config: Config, slave_status: SlaveStatus) -> Any:
         raise Exception("Cannot connect to event daemon") from e
 
 
+def _query_master(repl_settings: ReplicationBase, request: bytes) -> bytes:
+    response_text = b""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.settimeout(repl_settings["connect_timeout"])
+        sock.connect(repl_settings["master"])
+        sock.sendall(request)
+        sock.shutdown(socket.SHUT_WR)
+
+        while True:
+            chunk = sock.recv(8192)
+            response_text += chunk
+            if not chunk:
+                break
+    return response_text
+
+
 def save_slave_status(settings: Settings, slave_status: SlaveStatus) -> None:
     settings.paths.slave_status_file.value.write_text(repr(slave_status) + "\n", encoding="utf-8")
 
@@ -3319,6 +3626,7 @@ def make_config(config: ConfigFromWATO) -> Config:
         **config,
         action={action["id"]: action for action in config["actions"]},
         last_reload=int(time.time()),
+        config_generation=uuid.uuid4().hex,
     )
 
 
@@ -28,6 +28,12 @@ class Perfcounters:
         "overflows",
         "events",
         "connects",
+        "ingestion_drops",  # messages dropped because the ingestion queue was full
+    ]
+
+    # Current values, no rates are computed for them
+    _gauge_names: Sequence[str] = [
+        "ingestion_queue_length",
     ]
 
     # Average processing times
@@ -43,6 +49,7 @@ class Perfcounters:
 
         # Initialize counters
         self._counters = {n: 0 for n in self._counter_names}
+        self._gauges = {n: 0 for n in self._gauge_names}
         self._old_counters: dict[str, int] = {}
         self._rates: dict[str, float] = {}
         self._average_rates: dict[str, float] = {}
@@ -51,9 +58,13 @@ class Perfcounters:
 
         self._logger = logger.getChild("Perfcounters")
 
-    def count(self, counter: str) -> None:
+    def count(self, counter: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[counter] += value
+
+    def set_gauge(self, gauge: str, value: int) -> None:
         with self._lock:
-            self._counters[counter] += 1
+            self._gauges[gauge] = value
 
     def count_time(self, counter: str, ptime: float) -> None:
         with self._lock:
@@ -93,6 +104,9 @@ class Perfcounters:
                 ]
             )
 
+        for name in cls._gauge_names:
+            columns.append((f"status_{name}", 0))
+
         for name in cls._weights:
             columns.append((f"status_average_{name}_time", 0.0))
 
@@ -111,6 +125,9 @@ class Perfcounters:
                     ]
                 )
 
+            for name in self._gauge_names:
+                row.append(self._gauges[name])
+
             for name in self._weights:
                 row.append(self._times.get(name, 0.0))
 
@@ -60,8 +60,9 @@ class StatusTable:
     @abc.abstractmethod
     def _enumerate(self, query: QueryGET) -> Iterable[Sequence[object]]:
         """
-        Must return a enumerable type containing fully populated lists (rows) matching the
-        columns of the table.
+        Must return a enumerable type containing fully populated rows matching the columns
+        of the table. The rows may compute their values lazily, only the requested columns
+        and the ones needed for filtering are accessed.
         """
         raise NotImplementedError
 
@@ -72,6 +73,10 @@ class StatusTable:
         self.column_indices = {name: index for index, name in enumerate(self.column_names)}
 
     def query(self, query: QueryGET) -> Iterable[Sequence[object]]:
+        if query.stats:
+            yield from self._query_stats(query)
+            return
+
         requested_column_indexes = query.requested_column_indexes()
 
         # Output the column headers
@@ -88,6 +93,32 @@ class StatusTable:
                 yield self._build_result_row(row, requested_column_indexes)
                 num_rows += 1
 
+    def _query_stats(self, query: QueryGET) -> Iterable[Sequence[object]]:
+        """Count the rows matching the Stats filters, grouped by the requested columns"""
+        requested_column_indexes = query.requested_column_indexes()
+        stats_column_indexes = [self.column_indices[f.column_name] for f in query.stats]
+
+        yield [*query.requested_columns, *(f"stats_{nr}" for nr in range(1, len(query.stats) + 1))]
+
+        groups: dict[str, tuple[list[object], list[int]]] = {}
+        if not query.requested_columns:
+            groups[repr([])] = [], [0] * len(query.stats)  # Always answer with a single row
+        num_rows = 0
+        for row in self._enumerate(query):
+            if query.limit is not None and num_rows >= query.limit:
+                break  # The maximum number of rows has been reached
+            if query.table.name == "history" or query.filter_row(row):
+                num_rows += 1
+                group = self._build_result_row(row, requested_column_indexes)
+                # The values of some columns are lists, so we can't use them as keys directly.
+                counts = groups.setdefault(repr(group), (group, [0] * len(query.stats)))[1]
+                for nr, (stats_filter, index) in enumerate(zip(query.stats, stats_column_indexes)):
+                    if stats_filter.predicate(row[index]):
+                        counts[nr] += 1
+
+        for group, counts in groups.values():
+            yield [*group, *counts]
+
     def _build_result_row(
         self, row: Sequence[object], requested_column_indexes: list[int | None]
     ) -> list[object]:
@@ -123,10 +154,7 @@ class Query:
 
 
 def filter_operator_in(a: str, b: Iterable[str]) -> bool:
-    """Implemented as a named function, as it is used in a second filter
-    cmk.ec.main: StatusTableEvents._enumerate
-    not implemented as regex/IGNORECASE due to performance.
-    """
+    """Not implemented as regex/IGNORECASE due to performance."""
     return a.lower() in {e.lower() for e in b}
 
 
@@ -173,18 +201,22 @@ class QueryGET(Query):
         self.requested_columns = self.table.column_names
         # NOTE: history's _get_mongodb and _get_files access filters and limits directly.
         self.filters: list[QueryFilter] = []
+        self.stats: list[QueryFilter] = []
         self.limit: int | None = None
-        # NOTE: StatusTableEvents uses only_host for optimization.
-        self.only_host: set[Any] | None = None
         self._parse_header_lines(raw_query, logger)
 
     def _parse_header_lines(self, raw_query: list[str], logger: Logger) -> None:
+        has_columns = False
         for line in raw_query[1:]:
             try:
                 header, argument = line.rstrip("\n").split(":", 1)
                 self._parse_header_line(header, argument.lstrip(" "), logger)
             except Exception as e:
                 raise MKClientError(f"Invalid header line '{line.rstrip()}'") from e
+            has_columns |= header == "Columns"
+        # Like in livestatus, the columns of a Stats query are the ones to group by.
+        if self.stats and not has_columns:
+            self.requested_columns = []
 
     def _parse_header_line(self, header: str, argument: str, logger: Logger) -> None:
         if header == "OutputFormat":
@@ -196,11 +228,9 @@ class QueryGET(Query):
         elif header == "Columns":
             self.requested_columns = argument.split(" ")
         elif header == "Filter":
-            f = self._parse_filter(argument)
-            # Needed for later optimization (check_mkevents)
-            if f.column_name == "event_host" and f.operator_name == "in":
-                self.only_host = set(f.argument)
-            self.filters.append(f)
+            self.filters.append(self._parse_filter(argument))
+        elif header == "Stats":
+            self.stats.append(self._parse_filter(argument))
         elif header == "Limit":
             self.limit = int(argument)
         else:
@@ -254,6 +284,26 @@ class QueryGET(Query):
     def filter_row(self, row: Sequence[object]) -> bool:
         return all(f.predicate(row[self.table.column_indices[f.column_name]]) for f in self.filters)
 
+    def column_values(self, column_name: str) -> set[str] | None:
+        """Return the values a str column is restricted to by equality filters, in lower case
+
+        This is meant for looking up rows in indexes. As all values are compared
+        case-insensitively here, the filters still have to be applied afterwards.
+        None means that the column is not restricted.
+        """
+        values: set[str] | None = None
+        for f in self.filters:
+            if f.column_name != column_name:
+                continue
+            if f.operator_name in {"=", "=~"}:
+                filter_values = {str(f.argument).lower()}
+            elif f.operator_name == "in":
+                filter_values = {str(value).lower() for value in f.argument}
+            else:
+                continue
+            values = filter_values if values is None else values & filter_values
+        return values
+
 
 class QueryREPLICATE(Query):
     pass
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Narrowing down the rules which may match a message by literal substrings
+
+Most message patterns of rules contain literal text, e.g. 'Out of memory: Kill
+process' or 'session (opened|closed) for user'. A rule can only match a message
+text containing one of the literals required by its pattern, so instead of
+trying the regexes of all rules, we scan the message once for all literals of
+all rules (Aho-Corasick) and only try the rules whose literals have been found,
+plus the ones we can't say anything about.
+
+This never drops a rule which could match: Patterns are matched ignoring case,
+so literals are compared in case folded form (see _fold). Rules with inverted
+matching or patterns we don't understand are always tried. The order of the
+rules is kept, so skipping of rule packs works like before.
+"""
+
+from __future__ import annotations
+
+import itertools
+import re
+from collections.abc import Iterable, Sequence
+
+# These are no public APIs, but there is no other way to look into a regex. If they change,
+# we simply find no literals and try all rules like before.
+from re import _constants as _sre_constants  # type: ignore[attr-defined]
+from re import _parser as _sre_parser  # type: ignore[attr-defined]
+from typing import Final
+
+from .config import Rule, TextPattern
+
+# Literals shorter than this are not worth scanning for, they are in most texts anyway.
+MIN_LITERAL_LENGTH: Final = 3
+
+# With re.IGNORECASE, 'i' also matches 'ı' (U+0131) and 'İ' (U+0130), whose case folded forms
+# are 'ı' and 'i' plus a combining dot (U+0307). All other ASCII characters only match characters
+# with the same case folded form.
+_FOLD_FIXES: Final = {0x131: "i", 0x307: None}
+
+
+def _fold(text: str) -> str:
+    return text.casefold().translate(_FOLD_FIXES)
+
+
+def pattern_literals(pattern: TextPattern) -> frozenset[str] | None:
+    """Return literals of which at least one is in every text the pattern matches
+
+    None means that we don't know any such literals.
+
+    >>> sorted(pattern_literals("Out of memory"))
+    ['out of memory']
+    >>> sorted(pattern_literals(re.compile("session (opened|closed) for user [a-z]+", re.I)))
+    [' for user ']
+    >>> sorted(pattern_literals(re.compile("^(Disk failure|RAID degraded)", re.I)))
+    ['disk failure', 'raid degraded']
+    >>> pattern_literals(re.compile("^.+ [0-9]+$", re.I)) is None
+    True
+    """
+    if isinstance(pattern, str):
+        literal = _fold(pattern)
+        return frozenset([literal]) if len(literal) >= MIN_LITERAL_LENGTH else None
+    try:
+        return _required_literals(_sre_parser.parse(pattern.pattern, pattern.flags))
+    except Exception:
+        return None
+
+
+def _required_literals(items: Iterable[tuple[object, object]]) -> frozenset[str] | None:
+    """Find the most selective literals of which one is in each match of the parsed regex"""
+    best: frozenset[str] | None = None
+
+    def consider(literals: frozenset[str] | None) -> None:
+        nonlocal best
+        if literals is None or min(map(len, literals)) < MIN_LITERAL_LENGTH:
+            return
+        if best is None or min(map(len, literals)) > min(map(len, best)):
+            best = literals
+
+    run: list[str] = []
+    for op, av in items:
+        # Only ASCII, see _FOLD_FIXES. Everything else ends the current run of literal characters.
+        if op is _sre_constants.LITERAL and isinstance(av, int) and av < 128:
+            run.append(chr(av))
+            continue
+        consider(frozenset([_fold("".join(run))]) if run else None)
+        run = []
+        if op is _sre_constants.SUBPATTERN and isinstance(av, tuple):
+            consider(_required_literals(av[-1]))
+        elif op is _sre_constants.ATOMIC_GROUP:
+            consider(_required_literals(av))  # type: ignore[arg-type]
+        elif (
+            op
+            in {
+                _sre_constants.MAX_REPEAT,
+                _sre_constants.MIN_REPEAT,
+                _sre_constants.POSSESSIVE_REPEAT,
+            }
+            and isinstance(av, tuple)
+            and av[0] >= 1
+        ):
+            consider(_required_literals(av[2]))
+        elif op is _sre_constants.BRANCH and isinstance(av, tuple):
+            alternatives = [_required_literals(alternative) for alternative in av[1]]
+            consider(
+                None
+                if any(literals is None for literals in alternatives)
+                else frozenset(itertools.chain.from_iterable(alternatives))  # type: ignore[arg-type]
+            )
+    consider(frozenset([_fold("".join(run))]) if run else None)
+    return best
+
+
+def rule_literals(rule: Rule) -> frozenset[str] | None:
+    """Return literals of which at least one is in every message text the rule matches
+
+    A rule matches (or cancels) only if its message pattern or its cancelling message
+    pattern matches. None means that the rule needs to be tried for all messages.
+    """
+    if rule.get("invert_matching") or "match" not in rule:
+        return None
+    literals = pattern_literals(rule["match"])
+    if literals is None or "match_ok" not in rule:
+        return literals
+    literals_ok = pattern_literals(rule["match_ok"])
+    return None if literals_ok is None else literals | literals_ok
+
+
+class LiteralScanner:
+    """Find the literals contained in a text in a single pass (Aho-Corasick automaton)"""
+
+    def __init__(self, literals: Iterable[str]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        outputs: list[set[str]] = [set()]
+        for literal in literals:
+            state = 0
+            for char in literal:
+                if (next_state := self._goto[state].get(char)) is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    outputs.append(set())
+                state = next_state
+            outputs[state].add(literal)
+
+        # Breadth first, so the failure state of the parent is always known.
+        self._fail = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                outputs[next_state] |= outputs[self._fail[next_state]]
+                queue.append(next_state)
+        self._outputs = [frozenset(output) if output else None for output in outputs]
+
+    def scan(self, text: str) -> set[str]:
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found: set[str] = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if (output := outputs[state]) is not None:
+                found |= output
+        return found
+
+
+class _CandidateIndex:
+    def __init__(
+        self, rules: Sequence[Rule], literals_by_rule: dict[int, frozenset[str] | None]
+    ) -> None:
+        self._rules = rules
+        self._unfiltered: list[int] = []
+        self._positions_by_literal: dict[str, list[int]] = {}
+        for position, rule in enumerate(rules):
+            if (literals := literals_by_rule[id(rule)]) is None:
+                self._unfiltered.append(position)
+            else:
+                for literal in literals:
+                    self._positions_by_literal.setdefault(literal, []).append(position)
+
+    def candidates(self, found: Iterable[str]) -> list[Rule]:
+        positions = set(self._unfiltered)
+        for literal in found:
+            positions.update(self._positions_by_literal.get(literal, ()))
+        return [self._rules[position] for position in sorted(positions)]
+
+
+class RulePrefilter:
+    """Narrow down the rules to try for a message text by their literals"""
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        self._literals_by_rule = {id(rule): rule_literals(rule) for rule in rules}
+        self.num_unfiltered = sum(literals is None for literals in self._literals_by_rule.values())
+        self._scanner = LiteralScanner(
+            set(
+                itertools.chain.from_iterable(
+                    literals for literals in self._literals_by_rule.values() if literals
+                )
+            )
+        )
+        # The candidate indexes are built on first use, keyed by the identity of the rule list.
+        self._indexes: dict[int, tuple[Sequence[Rule], _CandidateIndex]] = {}
+
+    def candidates(self, rules: Sequence[Rule], text: str) -> Sequence[Rule]:
+        """Return the rules which may match the text, in their order
+
+        The given rules need to be a subsequence of the rules the prefilter has been
+        created with. They must not be modified afterwards.
+        """
+        if not rules:
+            return rules
+        entry = self._indexes.get(id(rules))
+        if entry is None or entry[0] is not rules:
+            entry = self._indexes[id(rules)] = rules, _CandidateIndex(rules, self._literals_by_rule)
+        return entry[1].candidates(self._scanner.scan(_fold(text)))
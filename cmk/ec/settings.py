@@ -36,6 +36,7 @@ class Paths(NamedTuple):
     slave_status_file: AnnotatedPath
     spool_dir: AnnotatedPath
     status_file: AnnotatedPath
+    status_journal_file: AnnotatedPath
     status_server_profile: AnnotatedPath
     event_server_profile: AnnotatedPath
     compiled_mibs_dir: AnnotatedPath
@@ -61,6 +62,7 @@ def create_paths(omd_root: Path) -> Paths:
         slave_status_file=AnnotatedPath("slave status", state_dir / "slave_status"),
         spool_dir=AnnotatedPath("spool directory", state_dir / "spool"),
         status_file=AnnotatedPath("status file", state_dir / "status"),
+        status_journal_file=AnnotatedPath("status journal", state_dir / "status.journal"),
         status_server_profile=AnnotatedPath(
             "status server profile", state_dir / "StatusServer.profile"
         ),
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Persistence of the event status as snapshot plus journal
+
+    snapshot: magic, generation, pickled PackedEventStatus
+    journal:  magic, generation, records
+    record:   payload length, CRC32 of the payload, pickled JournalRecord
+
+Saving the status appends a single record to the journal, holding the events
+changed or removed since the last save, so saving is O(changes). When the journal
+has grown larger than the snapshot, a new snapshot is written and the journal is
+restarted, so loading is bounded by about twice the size of the current status.
+
+Crash consistency:
+
+* Each record is fsynced after being appended. A torn or corrupted record at the
+  end of the journal is ignored when loading, i.e. the status of the previous
+  save is restored. No record is ever appended after such a record.
+* A snapshot is written to a temporary file, fsynced and renamed. Only then a new
+  journal is created with the generation of the new snapshot. A journal with
+  another generation is left over from a crash in between and ignored, its
+  changes are already contained in the snapshot.
+"""
+
+from __future__ import annotations
+
+import ast
+import os
+import pickle
+import struct
+import zlib
+from collections.abc import Iterator, Sequence
+from logging import Logger
+from pathlib import Path
+from typing import Final, NamedTuple, TypedDict
+
+from .event import Event
+
+_SNAPSHOT_MAGIC: Final = b"CMKECS01"
+_JOURNAL_MAGIC: Final = b"CMKECJ01"
+_HEADER: Final = struct.Struct("<8sQ")  # magic, generation
+_RECORD_HEADER: Final = struct.Struct("<II")  # payload length, CRC32 of payload
+_PICKLE_PROTOCOL: Final = 5
+# Don't write snapshots over and over again for small states
+MIN_COMPACTION_SIZE: Final = 1024 * 1024
+
+
+class PackedEventStatus(TypedDict):
+    next_event_id: int
+    events: list[Event]
+    rule_stats: dict[str, int]
+    interval_starts: dict[str, int]
+
+
+class JournalRecord(NamedTuple):
+    next_event_id: int
+    rule_stats: dict[str, int]
+    interval_starts: dict[str, int]
+    changed_events: Sequence[Event]
+    removed_event_ids: Sequence[int]
+
+
+class EventStatusStore:
+    def __init__(self, snapshot_path: Path, journal_path: Path, logger: Logger) -> None:
+        self._snapshot_path = snapshot_path
+        self._journal_path = journal_path
+        self._logger = logger
+        self._generation = 0
+        self._snapshot_size = 0
+        # None: There is no journal we could append to, the next save needs a snapshot.
+        self._journal_size: int | None = None
+
+    def needs_snapshot(self) -> bool:
+        return self._journal_size is None or self._journal_size > max(
+            self._snapshot_size, MIN_COMPACTION_SIZE
+        )
+
+    def load(self) -> PackedEventStatus | None:
+        """Return the last saved status, None if nothing has been saved yet"""
+        try:
+            data = self._snapshot_path.read_bytes()
+        except FileNotFoundError:
+            return None
+        self._snapshot_size = len(data)
+        self._journal_size = None
+
+        if not data.startswith(_SNAPSHOT_MAGIC):
+            # Status files of former versions contain the repr() of the status.
+            legacy = ast.literal_eval(data.decode("utf-8"))
+            self._generation = 0
+            return PackedEventStatus(
+                next_event_id=legacy["next_event_id"],
+                events=legacy["events"],
+                rule_stats=legacy["rule_stats"],
+                interval_starts=legacy.get("interval_starts", {}),
+            )
+
+        _magic, self._generation = _HEADER.unpack_from(data)
+        status: PackedEventStatus = pickle.loads(memoryview(data)[_HEADER.size :])
+        events = {event["id"]: event for event in status["events"]}
+        for record in self._read_journal():
+            status["next_event_id"] = record.next_event_id
+            status["rule_stats"] = record.rule_stats
+            status["interval_starts"] = record.interval_starts
+            for event_id in record.removed_event_ids:
+                events.pop(event_id, None)
+            for event in record.changed_events:
+                events[event["id"]] = event
+        status["events"] = list(events.values())
+        return status
+
+    def _read_journal(self) -> Iterator[JournalRecord]:
+        try:
+            data = self._journal_path.read_bytes()
+        except FileNotFoundError:
+            return
+        if len(data) < _HEADER.size:
+            return
+        magic, generation = _HEADER.unpack_from(data)
+        if magic != _JOURNAL_MAGIC or generation != self._generation:
+            self._logger.info("Ignoring outdated journal %s", self._journal_path)
+            return
+
+        offset = _HEADER.size
+        while offset + _RECORD_HEADER.size <= len(data):
+            length, crc = _RECORD_HEADER.unpack_from(data, offset)
+            payload = memoryview(data)[
+                offset + _RECORD_HEADER.size : offset + _RECORD_HEADER.size + length
+            ]
+            if len(payload) != length or zlib.crc32(payload) != crc:
+                break
+            yield JournalRecord(*pickle.loads(payload))
+            offset += _RECORD_HEADER.size + length
+
+        if offset != len(data):
+            self._logger.warning(
+                "Ignoring incomplete journal record at offset %d of %s", offset, self._journal_path
+            )
+            return
+        self._journal_size = offset
+
+    def append(self, record: JournalRecord) -> None:
+        if self._journal_size is None:
+            raise RuntimeError("No journal to append to, a snapshot needs to be written first")
+        payload = pickle.dumps(tuple(record), protocol=_PICKLE_PROTOCOL)
+        data = _RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        journal_size, self._journal_size = self._journal_size, None
+        with self._journal_path.open("r+b") as f:
+            f.seek(journal_size)  # don't rely on O_APPEND, the size is what we have validated
+            f.write(data)
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_size = journal_size + len(data)
+
+    def write_snapshot(self, status: PackedEventStatus) -> None:
+        self._journal_size = None
+        generation = self._generation + 1
+        self._snapshot_size = _write_atomically(
+            self._snapshot_path,
+            _HEADER.pack(_SNAPSHOT_MAGIC, generation)
+            + pickle.dumps(status, protocol=_PICKLE_PROTOCOL),
+        )
+        self._generation = generation
+        self._journal_size = _write_atomically(
+            self._journal_path, _HEADER.pack(_JOURNAL_MAGIC, generation)
+        )
+
+
+def _write_atomically(path: Path, data: bytes) -> int:
+    path_new = path.parent / (path.name + ".new")
+    with path_new.open(mode="wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    path_new.rename(path)
+    dir_fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+    return len(data)
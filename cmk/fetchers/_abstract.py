@@ -51,6 +51,13 @@ class Fetcher(Generic[_TRawData], abc.ABC):
     def close(self) -> None:
         raise NotImplementedError()
 
+    def cancel(self) -> None:
+        """Make a fetch running in another thread return soon.
+
+        This may be called from any thread. Fetchers that cannot block
+        for longer than their own timeouts need not override it.
+        """
+
     @final
     def fetch(self, mode: Mode) -> result.Result[_TRawData, Exception]:
         """Return the data from the source, either cached or from IO."""
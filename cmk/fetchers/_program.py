@@ -126,6 +126,17 @@ class ProgramFetcher(Fetcher[AgentRawData]):
         self._process.stderr.close()
         self._process = None
 
+    def cancel(self) -> None:
+        # Without a dedicated process group (Nagios) we can only kill the program itself,
+        # the monitoring core takes care of its remaining child processes.
+        if (process := self._process) is None:
+            return
+        with suppress(OSError):
+            if self.is_cmc:
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+
     def _fetch_from_io(self, mode: Mode) -> AgentRawData:
         self._logger.log(VERBOSE, "Get data from program")
         if self._process is None:
@@ -4,7 +4,12 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 """Abstract classes and types."""
 
+import array
+import bisect
 import logging
+import mmap
+import re
+import threading
 from collections.abc import Sequence
 from pathlib import Path
 from typing import Final
@@ -57,64 +62,38 @@ class StoredWalkSNMPBackend(SNMPBackend):
             dot_star = False
 
         self._logger.debug(f"  Loading {oid}")
-        lines = self.read_walk_data()
-
-        begin = 0
-        end = len(lines)
-        hit = None
-        while end - begin > 0:
-            current = (begin + end) // 2
-            parts = lines[current].split(None, 1)
-            comp = parts[0]
-            hit = StoredWalkSNMPBackend._compare_oids(oid_prefix, comp)
-            if hit == 0:
-                break
-            if hit == 1:  # we are too low
-                begin = current + 1
-            else:
-                end = current
-
-        if hit != 0:
-            return []  # not found
-
-        rowinfo = StoredWalkSNMPBackend._collect_until(oid, oid_prefix, lines, current, -1)
-        rowinfo.reverse()
-        rowinfo += StoredWalkSNMPBackend._collect_until(oid, oid_prefix, lines, current + 1, 1)
-
+        index = self._get_index()
+        begin, end = index.find_range(StoredWalkSNMPBackend._to_bin_string(oid_prefix))
         if dot_star:
-            return [rowinfo[0]]
+            end = min(end, begin + 1)
 
-        return rowinfo
+        return [index.row(n) for n in range(begin, end)]
 
-    @staticmethod
-    def read_walk_from_path(path: Path, logger: logging.Logger) -> Sequence[str]:
-        logger.debug(f"  Opening {path}")
-        lines = []
-        with path.open() as f:
-            # Sometimes there are newlines in the data of snmpwalks.
-            # Append the data to the last OID rather than throwing it away/skipping it.
-            for line in f.readlines():
-                if line.startswith("."):
-                    lines.append(line)
-                elif lines:
-                    lines[-1] += line
-        return lines
-
-    def read_walk_data(self) -> Sequence[str]:
+    def _get_index(self) -> "_WalkIndex":
         try:
-            return self.read_walk_from_path(self.path, self._logger)
+            stat = self.path.stat()
         except OSError:
             raise MKSNMPError(f"No snmpwalk file {self.path}")
 
-    @staticmethod
-    def _compare_oids(a: OID, b: OID) -> int:
-        aa = StoredWalkSNMPBackend._to_bin_string(a)
-        bb = StoredWalkSNMPBackend._to_bin_string(b)
-        if len(aa) <= len(bb) and bb[: len(aa)] == aa:
-            result = 0
-        else:
-            result = (aa > bb) - (aa < bb)
-        return result
+        signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        with _INDEX_CACHE_LOCK:
+            if (index := _INDEX_CACHE.get(self.path)) is not None and index.signature == signature:
+                return index
+
+        self._logger.debug(f"  Indexing {self.path}")
+        try:
+            index = _WalkIndex.build(self.path, signature)
+        except OSError:
+            raise MKSNMPError(f"No snmpwalk file {self.path}")
+
+        # Evicted indexes are not closed, other threads may still read from them. The file is
+        # unmapped as soon as the last of them is done.
+        with _INDEX_CACHE_LOCK:
+            _INDEX_CACHE.pop(self.path, None)
+            while len(_INDEX_CACHE) >= _INDEX_CACHE_SIZE:
+                del _INDEX_CACHE[next(iter(_INDEX_CACHE))]
+            _INDEX_CACHE[self.path] = index
+        return index
 
     @staticmethod
     def _to_bin_string(oid: OID) -> tuple[int, ...]:
@@ -125,32 +104,76 @@ class StoredWalkSNMPBackend(SNMPBackend):
         except Exception:
             raise MKGeneralException(f"Invalid OID {oid}")
 
-    @staticmethod
-    def _collect_until(
-        oid: OID, oid_prefix: OID, lines: Sequence[str], index: int, direction: int
-    ) -> SNMPRowInfo:
-        rows = []
-        # Handle case, where we run after the end of the lines list
-        if index >= len(lines):
-            if direction > 0:
-                return []
-            index -= 1
-        while True:
-            line = lines[index]
-            parts = line.split(None, 1)
-            o = parts[0]
-            if o.startswith("."):
-                o = o[1:]
-            if o == oid or o.startswith(oid_prefix + "."):
-                if len(parts) > 1:
-                    value = parts[1]
-                else:
-                    value = ""
-                # Fix for missing starting oids
-                rows.append(("." + o, strip_snmp_value(value)))
-                index += direction
-                if index < 0 or index >= len(lines):
-                    break
-            else:
-                break
-        return rows
+
+_OID_LINE: Final = re.compile(rb"^\.(\S*)", re.MULTILINE)
+_INDEX_CACHE_SIZE: Final = 128
+_INDEX_CACHE: Final[dict[Path, "_WalkIndex"]] = {}
+_INDEX_CACHE_LOCK: Final = threading.Lock()
+
+
+class _WalkIndex:
+    """Sorted OID index over a memory mapped walk file
+
+    The walk file is parsed exactly once: we record the numeric OID and the
+    byte offsets of every entry.  Lookups bisect the sorted OIDs and only
+    decode the entries that are actually requested.
+    """
+
+    def __init__(
+        self,
+        signature: tuple[int, int, int],
+        data: mmap.mmap | bytes,
+        oids: Sequence[tuple[int, ...]],
+        starts: array.array,
+        ends: array.array,
+    ) -> None:
+        self.signature: Final = signature
+        self._data = data
+        self._oids: Final = oids
+        self._starts: Final = starts
+        self._ends: Final = ends
+
+    @classmethod
+    def build(cls, path: Path, signature: tuple[int, int, int]) -> "_WalkIndex":
+        with path.open("rb") as f:
+            # mmap refuses to map empty files
+            data: mmap.mmap | bytes = (
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if signature[1] else b""
+            )
+
+        # Sometimes there are newlines in the data of snmpwalks. Such lines
+        # belong to the preceding OID, so an entry ends where the next one begins.
+        entries = []
+        matches = list(_OID_LINE.finditer(data))
+        for n, match in enumerate(matches):
+            try:
+                oid = tuple(map(int, match.group(1).split(b".")))
+            except ValueError:
+                raise MKGeneralException(f"Invalid OID {match.group(1).decode(errors='replace')}")
+            end = matches[n + 1].start() if n + 1 < len(matches) else len(data)
+            entries.append((oid, match.start(), end))
+
+        # The walk should already be sorted, but we must not rely on it for bisecting.
+        entries.sort(key=lambda e: e[0])
+        return cls(
+            signature,
+            data,
+            [e[0] for e in entries],
+            array.array("Q", (e[1] for e in entries)),
+            array.array("Q", (e[2] for e in entries)),
+        )
+
+    def find_range(self, oid_prefix: tuple[int, ...]) -> tuple[int, int]:
+        """Return the index range of all entries equal to or below `oid_prefix`"""
+        begin = bisect.bisect_left(self._oids, oid_prefix)
+        end = bisect.bisect_left(self._oids, (*oid_prefix[:-1], oid_prefix[-1] + 1), lo=begin)
+        return begin, end
+
+    def row(self, n: int) -> tuple[OID, SNMPRawValue]:
+        entry = (
+            self._data[self._starts[n] : self._ends[n]]
+            .decode()
+            .replace("\r\n", "\n")
+            .split(None, 1)
+        )
+        return entry[0], strip_snmp_value(entry[1] if len(entry) > 1 else "")
@@ -5,13 +5,12 @@
 """Core for getting the actual raw data points via Livestatus from RRD"""
 
 import collections
-import contextlib
 import time
 from collections.abc import Callable, Iterable, Iterator, Mapping
 from functools import lru_cache
+from typing import Literal
 
-import livestatus
-from livestatus import livestatus_lql, SiteId
+from livestatus import lq_logic, lqencode, SiteId
 
 import cmk.ccc.version as cmk_version
 from cmk.ccc.exceptions import MKGeneralException
@@ -60,30 +59,28 @@ def fetch_rrd_data_for_graph(
         for key in metric.operation.keys()
         if isinstance(key, RRDDataKey)
     )
-    rrd_data: dict[RRDDataKey, TimeSeries] = {}
-    for (site, host_name, service_description), metrics in by_service.items():
-        with contextlib.suppress(livestatus.MKLivestatusNotFoundError):
-            for (metric_name, consolidation_function, scale), data in _fetch_rrd_data(
-                site,
-                host_name,
-                service_description,
-                metrics,
-                graph_recipe.consolidation_function,
-                graph_data_range,
-            ):
-                rrd_data[
-                    RRDDataKey(
-                        site,
-                        host_name,
-                        service_description,
-                        metric_name,
-                        consolidation_function,
-                        scale,
-                    )
-                ] = TimeSeries(
-                    data,
-                    conversion=conversion,
-                )
+    rrd_data: dict[RRDDataKey, TimeSeries] = {
+        RRDDataKey(
+            site,
+            host_name,
+            service_description,
+            metric_name,
+            consolidation_function,
+            scale,
+        ): TimeSeries(
+            data,
+            conversion=conversion,
+        )
+        for (
+            (site, host_name, service_description),
+            (metric_name, consolidation_function, scale),
+            data,
+        ) in _fetch_rrd_data(
+            by_service,
+            graph_recipe.consolidation_function,
+            graph_data_range,
+        )
+    }
     _align_and_resample_rrds(rrd_data, graph_recipe.consolidation_function)
     _chop_last_empty_step(graph_data_range, rrd_data)
 
@@ -173,13 +170,15 @@ def _group_needed_rrd_data_by_service(
 
 
 def _fetch_rrd_data(
-    site: SiteId,
-    host_name: HostName,
-    service_description: ServiceName,
-    metrics: set[MetricProperties],
+    by_service: Mapping[tuple[SiteId, HostName, ServiceName], set[MetricProperties]],
     consolidation_function: GraphConsolidationFunction | None,
     graph_data_range: GraphDataRange,
-) -> list[tuple[MetricProperties, TimeSeriesValues]]:
+) -> Iterator[tuple[tuple[SiteId, HostName, ServiceName], MetricProperties, TimeSeriesValues]]:
+    """Fetch the RRD data of all services with one query per table
+
+    The query is sent to all involved sites in parallel, so the number of round trips
+    does not depend on the number of services. Services which are not found are skipped.
+    """
     start_time, end_time = graph_data_range.time_range
 
     step = graph_data_range.step
@@ -188,11 +187,72 @@ def _fetch_rrd_data(
         step = max(1, step)
 
     point_range = ":".join(map(str, (start_time, end_time, step)))
-    lql_columns = list(rrd_columns(metrics, consolidation_function, point_range))
-    query = livestatus_lql([host_name], lql_columns, service_description)
 
-    with sites.only_sites(site):
-        return list(zip(metrics, sites.live().query_row(query)))
+    host_metrics = {key: metrics for key, metrics in by_service.items() if key[2] == "_HOST_"}
+    service_metrics = {key: metrics for key, metrics in by_service.items() if key[2] != "_HOST_"}
+    if host_metrics:
+        yield from _fetch_rrd_data_of_table(
+            "hosts", host_metrics, consolidation_function, point_range
+        )
+    if service_metrics:
+        yield from _fetch_rrd_data_of_table(
+            "services", service_metrics, consolidation_function, point_range
+        )
+
+
+def _fetch_rrd_data_of_table(
+    table: Literal["hosts", "services"],
+    by_service: Mapping[tuple[SiteId, HostName, ServiceName], set[MetricProperties]],
+    consolidation_function: GraphConsolidationFunction | None,
+    point_range: str,
+) -> Iterator[tuple[tuple[SiteId, HostName, ServiceName], MetricProperties, TimeSeriesValues]]:
+    # Different metric properties may result in the same column, so query each column only once
+    column_of_metric = {
+        metrics: next(rrd_columns([metrics], consolidation_function, point_range))
+        for service_metrics in by_service.values()
+        for metrics in service_metrics
+    }
+    lql_columns = list(dict.fromkeys(column_of_metric.values()))
+    column_index = {column: index for index, column in enumerate(lql_columns)}
+
+    if table == "hosts":
+        key_columns = ["host_name"]
+        query_filter = lq_logic(
+            "Filter: host_name =",
+            sorted({host_name for _site, host_name, _svc in by_service}),
+            "Or",
+        )
+    else:
+        key_columns = ["host_name", "service_description"]
+        query_filter = "".join(
+            f"Filter: host_name = {lqencode(host_name)}\n"
+            f"Filter: service_description = {lqencode(service_description)}\n"
+            "And: 2\n"
+            for host_name, service_description in sorted(
+                {(host_name, svc) for _site, host_name, svc in by_service}
+            )
+        )
+        if (num_services := len({key[1:] for key in by_service})) > 1:
+            query_filter += f"Or: {num_services}\n"
+
+    query = f"GET {table}\nColumns: {' '.join(key_columns + lql_columns)}\n{query_filter}"
+
+    with sites.only_sites(sorted({site for site, _host, _svc in by_service})), sites.prepend_site():
+        rows = sites.live().query(query, "ColumnHeaders: off\n")
+
+    for site, host_name, *row in rows:
+        if table == "hosts":
+            service_description = "_HOST_"
+        else:
+            service_description, *row = row
+        if (metrics_of_service := by_service.get((site, host_name, service_description))) is None:
+            continue  # same host on another site
+        for metrics in metrics_of_service:
+            yield (
+                (site, host_name, service_description),
+                metrics,
+                row[column_index[column_of_metric[metrics]]],
+            )
 
 
 def rrd_columns(
@@ -22,7 +22,7 @@ from cmk.ccc.exceptions import MKException
 
 import cmk.utils.paths
 from cmk.utils.hostaddress import HostAddress, HostName
-from cmk.utils.structured_data import SDRawTree, serialize_tree
+from cmk.utils.structured_data import SDRawTree, serialize_tree, TreeOrArchiveStore
 
 from cmk.gui import sites
 from cmk.gui.config import active_config
@@ -253,15 +253,21 @@ class InventoryHousekeeping:
         self._inventory_delta_cache_path = Path(cmk.utils.paths.inventory_delta_cache_dir)
 
     def run(self):
-        if (
-            not self._inventory_delta_cache_path.exists()
-            or not self._inventory_archive_path.exists()
-        ):
+        if not self._inventory_archive_path.exists():
             return
 
         inventory_archive_hosts = {
             x.name for x in self._inventory_archive_path.iterdir() if x.is_dir()
         }
+        tree_or_archive_store = TreeOrArchiveStore(
+            self._inventory_path, self._inventory_archive_path
+        )
+        for hostname in inventory_archive_hosts:
+            tree_or_archive_store.prune_objects(host_name=HostName(hostname))
+
+        if not self._inventory_delta_cache_path.exists():
+            return
+
         inventory_delta_cache_hosts = {
             x.name for x in self._inventory_delta_cache_path.iterdir() if x.is_dir()
         }
@@ -295,10 +301,10 @@ class InventoryHousekeeping:
         except OSError:
             pass
 
-        for filename in [
-            x for x in (self._inventory_archive_path / hostname).iterdir() if not x.is_dir()
-        ]:
-            timestamps.add(filename.name)
+        # The archive holds <timestamp> and <timestamp>.delta files, and the objects directory
+        for filepath in (self._inventory_archive_path / hostname).iterdir():
+            if not filepath.is_dir():
+                timestamps.add(filepath.name.removesuffix(".delta"))
         return timestamps
 
 
@@ -19,6 +19,7 @@ from cmk.utils.structured_data import (
     load_tree,
     SDFilterChoice,
     serialize_delta_tree,
+    TreeOrArchiveStore,
 )
 
 from cmk.gui.i18n import _
@@ -30,6 +31,8 @@ from ._tree import _get_permitted_inventory_paths, make_filter_choices_from_perm
 class InventoryHistoryPath:
     path: Path
     timestamp: int | None
+    # The difference to the predecessor has been stored while archiving
+    archived_delta: bool = False
 
 
 @dataclass(frozen=True)
@@ -145,6 +148,10 @@ def _get_history(
     except FilterInventoryHistoryPathsError:
         return [], _sort_corrupted_history_files(corrupted_history_files)
 
+    tree_or_archive_store = TreeOrArchiveStore(
+        cmk.utils.paths.inventory_output_dir,
+        cmk.utils.paths.inventory_archive_dir,
+    )
     cached_tree_loader = _CachedTreeLoader()
     history: list[HistoryEntry] = []
     filters = (
@@ -164,6 +171,21 @@ def _get_history(
             filters,
         )
 
+        if current.archived_delta:
+            try:
+                archived_delta = tree_or_archive_store.load_archived_delta(
+                    host_name=hostname, timestamp=current.timestamp
+                )
+            except ValueError:
+                corrupted_history_files.append(current.path)
+                continue
+            if archived_delta.previous_timestamp == previous.timestamp:
+                if (
+                    history_entry := cached_delta_tree_loader.get_entry(archived_delta.delta_tree)
+                ) is not None:
+                    history.append(history_entry)
+                continue
+
         if (cached_history_entry := cached_delta_tree_loader.get_cached_entry()) is not None:
             history.append(cached_history_entry)
             continue
@@ -192,24 +214,35 @@ def _get_inventory_history_paths(
     inventory_archive_dir = Path(cmk.utils.paths.inventory_archive_dir, hostname)
 
     try:
-        sorted_tree_paths = sorted(inventory_archive_dir.iterdir())
+        archive_file_paths = list(inventory_archive_dir.iterdir())
     except FileNotFoundError:
         return [], []
 
-    archived_tree_paths = []
+    # Archived trees are either stored in full (<timestamp>) or as delta to their predecessor
+    # (<timestamp>.delta) or both. The nodes of the deltas are kept below objects/.
+    archived_deltas: dict[int, bool] = {}
     corrupted_history_files = []
-    for file_path in sorted_tree_paths:
+    for file_path in archive_file_paths:
+        if file_path.name == "objects" and file_path.is_dir():
+            continue
+        raw_timestamp, is_delta = (
+            (file_path.stem, True) if file_path.suffix == ".delta" else (file_path.name, False)
+        )
         try:
-            archived_tree_paths.append(
-                InventoryHistoryPath(
-                    path=file_path,
-                    timestamp=int(file_path.name),
-                )
-            )
-        except FileNotFoundError:
-            pass
+            timestamp = int(raw_timestamp)
         except ValueError:
             corrupted_history_files.append(file_path)
+            continue
+        archived_deltas[timestamp] = archived_deltas.get(timestamp, False) or is_delta
+
+    archived_tree_paths = [
+        InventoryHistoryPath(
+            path=inventory_archive_dir / str(timestamp),
+            timestamp=timestamp,
+            archived_delta=archived_delta,
+        )
+        for timestamp, archived_delta in sorted(archived_deltas.items())
+    ]
 
     try:
         archived_tree_paths.append(
@@ -287,6 +320,15 @@ class _CachedDeltaTreeLoader:
             deserialize_delta_tree(raw_delta_tree),
         )
 
+    def get_entry(self, delta_tree: ImmutableDeltaTree) -> HistoryEntry | None:
+        delta_stats = delta_tree.get_stats()
+        new = delta_stats["new"]
+        changed = delta_stats["changed"]
+        removed = delta_stats["removed"]
+        if new or changed or removed:
+            return self._make_history_entry(new, changed, removed, delta_tree)
+        return None
+
     def get_calculated_or_store_entry(
         self,
         previous_tree: ImmutableTree,
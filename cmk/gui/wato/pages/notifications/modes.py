@@ -12,16 +12,17 @@ from collections.abc import Collection, Generator, Iterator, Mapping
 from copy import deepcopy
 from dataclasses import asdict
 from datetime import datetime
+from pathlib import Path
 from typing import Any, cast, Literal, NamedTuple, overload
 from urllib.parse import urlencode
 
 from livestatus import LivestatusResponse, SiteId
 
-from cmk.ccc import store
 from cmk.ccc.version import Edition, edition
 
 from cmk.utils import paths
 from cmk.utils.labels import Labels
+from cmk.utils.notification_backlog import load_notification_backlog
 from cmk.utils.notify import NotificationContext
 from cmk.utils.notify_types import (
     EventRule,
@@ -1333,10 +1334,7 @@ class ModeAnalyzeNotifications(ModeNotifications):
 
     def _show_notification_backlog(self) -> None:
         """Show recent notifications. We can use them for rule analysis"""
-        backlog = store.load_object_from_file(
-            cmk.utils.paths.var_dir + "/notify/backlog.mk",
-            default=[],
-        )
+        backlog = load_notification_backlog(Path(paths.var_dir, "notify"))
         if not backlog:
             return
 
@@ -1379,7 +1377,7 @@ class ModeAnalyzeNotifications(ModeNotifications):
                         state = context["SERVICESTATEID"]
                         css = [f"state svcstate state{state}"]
                     else:
-                        statename = context.get("HOSTSTATE")[:4]
+                        statename = context.get("HOSTSTATE", "")[:4]
                         state = context["HOSTSTATEID"]
                         css = [f"state hstate hstate{state}"]
                     table.cell(
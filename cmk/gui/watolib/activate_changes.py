@@ -15,6 +15,7 @@ import io
 import logging
 import multiprocessing
 import os
+import pickle
 import re
 import shutil
 import subprocess
@@ -667,21 +668,36 @@ def _set_sync_state(
 
 
 def _get_config_sync_state(
-    site_id: SiteId, replication_paths: Sequence[ReplicationPath]
+    site_id: SiteId,
+    replication_paths: Sequence[ReplicationPath],
+    central_file_infos: ConfigSyncFileInfos,
 ) -> tuple[ConfigSyncFileInfos, int]:
     """Get the config file states from the remote sites
 
     Calls the automation call "get-config-sync-state" on the remote site,
-    which is handled by AutomationGetConfigSyncState."""
+    which is handled by AutomationGetConfigSyncState.
+
+    The digests of the central directories are handed over, so that the remote site can skip
+    reporting the files of identical directories. These are then taken from the central site."""
     site = get_site_config(active_config, site_id)
     response = cmk.gui.watolib.automations.do_remote_automation(
         site,
         "get-config-sync-state",
-        [("replication_paths", repr([tuple(r) for r in replication_paths]))],
+        [
+            ("replication_paths", repr([tuple(r) for r in replication_paths])),
+            (
+                "directory_digests",
+                repr(_get_config_sync_directory_digests(central_file_infos)),
+            ),
+        ],
     )
 
     assert isinstance(response, tuple)
-    return {k: ConfigSyncFileInfo(*v) for k, v in response[0].items()}, response[1]
+    remote_file_infos = {k: ConfigSyncFileInfo(*v) for k, v in response[0].items()}
+    # Remote sites not knowing about the directory digests always report all files
+    if len(response) > 2:
+        remote_file_infos.update(_get_file_infos_below(central_file_infos, response[2]))
+    return remote_file_infos, response[1]
 
 
 def _synchronize_files(
@@ -742,7 +758,7 @@ def fetch_sync_state(
             site_logger.debug("Starting config sync (%r)", site_activation_state)
 
             remote_file_infos, remote_config_generation = _get_config_sync_state(
-                site_id, replication_paths
+                site_id, replication_paths, central_file_infos
             )
             site_logger.debug("Received %d file infos from remote", len(remote_file_infos))
 
@@ -1982,6 +1998,7 @@ class ReplicationPathType(enum.StrEnum):
 
 def _get_config_sync_file_infos_per_inode(
     replication_paths: Sequence[ReplicationPath],
+    hash_cache: ConfigSyncHashCache | None = None,
 ) -> Mapping[int, ConfigSyncFileInfo]:
     inode_sync_states = {}
 
@@ -1993,11 +2010,11 @@ def _get_config_sync_file_infos_per_inode(
 
         if replication_path.ty == ReplicationPathType.FILE:
             inode_sync_states[os.stat(replication_path_full).st_ino] = _get_config_sync_file_info(
-                replication_path_full
+                replication_path_full, hash_cache
             )
         elif replication_path.ty == ReplicationPathType.DIR:
             _get_replication_dir_config_sync_file_infos_per_inode(
-                inode_sync_states, replication_path_full, replication_path.excludes
+                inode_sync_states, replication_path_full, replication_path.excludes, hash_cache
             )
         else:
             raise NotImplementedError()
@@ -2009,6 +2026,7 @@ def _get_replication_dir_config_sync_file_infos_per_inode(
     inode_sync_states: MutableMapping[int, ConfigSyncFileInfo],
     replication_path: str,
     replication_path_excludes: Sequence[str],
+    hash_cache: ConfigSyncHashCache | None,
 ) -> None:
     # Use os functionality instead of pathlib since it is faster
     for root, dir_names, file_names in os.walk(replication_path):
@@ -2021,7 +2039,7 @@ def _get_replication_dir_config_sync_file_infos_per_inode(
             try:
                 if os.path.islink(dir_path) and not dir_name == GENERAL_DIR_EXCLUDE:
                     inode_sync_states[os.stat(dir_path).st_ino] = _get_config_sync_file_info(
-                        dir_path
+                        dir_path, hash_cache
                     )
             except FileNotFoundError:
                 pass  # Ignore directories vanishing during processing
@@ -2029,7 +2047,9 @@ def _get_replication_dir_config_sync_file_infos_per_inode(
         for file_name in file_names:
             file_path = os.path.join(root, file_name)
             try:
-                inode_sync_states[os.stat(file_path).st_ino] = _get_config_sync_file_info(file_path)
+                inode_sync_states[os.stat(file_path).st_ino] = _get_config_sync_file_info(
+                    file_path, hash_cache
+                )
             except FileNotFoundError:
                 pass  # Ignore files vanishing during processing
 
@@ -2041,8 +2061,9 @@ def _prepare_for_activation_tasks(
     time_started: float,
     source: ActivationSource,
 ) -> tuple[Mapping[SiteId, ConfigSyncFileInfos], Mapping[SiteId, SiteActivationState]]:
+    hash_cache = ConfigSyncHashCache.load()
     config_sync_file_infos_per_inode = _get_config_sync_file_infos_per_inode(
-        list(replication_path_registry.values())
+        list(replication_path_registry.values()), hash_cache
     )
     central_file_infos_per_site = {}
     site_activation_states_per_site = {}
@@ -2060,13 +2081,14 @@ def _prepare_for_activation_tasks(
 
             if activate_changes.is_sync_needed(site_id):
                 central_file_infos_per_site[site_id] = _get_site_central_file_infos(
-                    site_id, snapshot_settings, config_sync_file_infos_per_inode
+                    site_id, snapshot_settings, config_sync_file_infos_per_inode, hash_cache
                 )
         except Exception as e:
             _handle_activation_changes_exception(
                 logger.getChild(f"site[{site_id}]"), str(e), site_activation_state
             )
             _cleanup_activation(site_id, activation_id, source)
+    hash_cache.save()
     return central_file_infos_per_site, site_activation_states_per_site
 
 
@@ -2074,6 +2096,7 @@ def _get_site_central_file_infos(
     site_id: SiteId,
     snapshot_settings: SnapshotSettings,
     config_sync_file_infos_per_inode: Mapping[int, ConfigSyncFileInfo],
+    hash_cache: ConfigSyncHashCache | None = None,
 ) -> ConfigSyncFileInfos:
     # In case we experience performance issues here, we could postpone the hashing of the
     # central files to only be done ad-hoc in get_file_names_to_sync when the other attributes
@@ -2084,6 +2107,7 @@ def _get_site_central_file_infos(
         snapshot_settings.snapshot_components,
         site_config_dir,
         config_sync_file_infos_per_inode,
+        hash_cache,
     )
 
     logger.getChild(f"site[{site_id}]").debug(
@@ -2905,7 +2929,12 @@ class ConfigSyncFileInfo(NamedTuple):
 #    ("file_infos", dict[str, ConfigSyncFileInfo]),
 #    ("config_generation", int),
 # ])
-GetConfigSyncStateResponse = tuple[dict[str, tuple[int, int, str | None, str | None]], int]
+# When the central site handed over directory digests, the response has a third element: The
+# directories which are identical on both sites and whose files have been left out.
+GetConfigSyncStateResponse = (
+    tuple[dict[str, tuple[int, int, str | None, str | None]], int]
+    | tuple[dict[str, tuple[int, int, str | None, str | None]], int, list[str]]
+)
 
 ConfigSyncFileInfos = dict[str, ConfigSyncFileInfo]
 
@@ -2917,31 +2946,122 @@ class SyncDelta:
     to_delete: list[str]
 
 
-class AutomationGetConfigSyncState(AutomationCommand[list[ReplicationPath]]):
+class GetConfigSyncStateRequest(NamedTuple):
+    replication_paths: list[ReplicationPath]
+    directory_digests: Mapping[str, str] | None = None
+
+
+class AutomationGetConfigSyncState(AutomationCommand[GetConfigSyncStateRequest]):
     """Called on remote site from a central site to get the current config sync state
 
     The central site hands over the list of replication paths it will try to synchronize later.  The
     remote site computes the list of replication files and sends it back together with the current
     configuration generation ID. The config generation ID is increased on every Setup modification
     and ensures that nothing is changed between the two config sync steps.
+
+    In case the central site also hands over its directory digests, the files of directories having
+    the same digest on both sites are left out and only the identical directories are reported.
     """
 
     def command_name(self) -> str:
         return "get-config-sync-state"
 
-    def get_request(self) -> list[ReplicationPath]:
-        return [
-            ReplicationPath(*e)
-            for e in ast.literal_eval(_request.get_ascii_input_mandatory("replication_paths"))
-        ]
+    def get_request(self) -> GetConfigSyncStateRequest:
+        directory_digests = _request.get_str_input("directory_digests")
+        return GetConfigSyncStateRequest(
+            [
+                ReplicationPath(*e)
+                for e in ast.literal_eval(_request.get_ascii_input_mandatory("replication_paths"))
+            ],
+            None if directory_digests is None else ast.literal_eval(directory_digests),
+        )
 
-    def execute(self, api_request: list[ReplicationPath]) -> GetConfigSyncStateResponse:
+    def execute(self, api_request: GetConfigSyncStateRequest) -> GetConfigSyncStateResponse:
         with store.lock_checkmk_configuration(configuration_lockfile):
-            file_infos = _get_config_sync_file_infos(api_request, base_dir=cmk.utils.paths.omd_root)
-            transport_file_infos = {
-                k: (v.st_mode, v.st_size, v.link_target, v.file_hash) for k, v in file_infos.items()
-            }
-            return (transport_file_infos, _get_current_config_generation())
+            hash_cache = ConfigSyncHashCache.load()
+            file_infos = _get_config_sync_file_infos(
+                api_request.replication_paths,
+                base_dir=cmk.utils.paths.omd_root,
+                hash_cache=hash_cache,
+            )
+            hash_cache.save()
+
+            if api_request.directory_digests is None:
+                return (_transport_file_infos(file_infos), _get_current_config_generation())
+
+            identical_directories = _get_identical_directories(
+                _get_config_sync_directory_digests(file_infos), api_request.directory_digests
+            )
+            return (
+                _transport_file_infos(
+                    {
+                        k: v
+                        for k, v in file_infos.items()
+                        if os.path.dirname(k) not in identical_directories
+                    }
+                ),
+                _get_current_config_generation(),
+                sorted(
+                    d
+                    for d in identical_directories
+                    if not d or os.path.dirname(d) not in identical_directories
+                ),
+            )
+
+
+def _transport_file_infos(
+    file_infos: ConfigSyncFileInfos,
+) -> dict[str, tuple[int, int, str | None, str | None]]:
+    return {k: (v.st_mode, v.st_size, v.link_target, v.file_hash) for k, v in file_infos.items()}
+
+
+def _get_config_sync_directory_digests(file_infos: ConfigSyncFileInfos) -> dict[str, str]:
+    """Compute the Merkle digests of all directories containing files to be synchronized
+
+    The digest of a directory covers the names and sync infos of its files and the names and
+    digests of its sub directories. Equal digests thus mean equal directory trees. The common
+    top level directory is identified by the empty string.
+    """
+    entries: dict[str, list[tuple[str | int | None, ...]]] = {"": []}
+    for site_path, info in file_infos.items():
+        entries.setdefault(os.path.dirname(site_path), []).append(
+            ("f", os.path.basename(site_path), *info)
+        )
+    for directory in list(entries):
+        while directory and (directory := os.path.dirname(directory)) not in entries:
+            entries[directory] = []
+
+    digests = {}
+    # Sub directories have to be computed first, so process them from the deepest one up
+    for directory in sorted(entries, key=lambda d: d.count("/") + bool(d), reverse=True):
+        digests[directory] = hashlib.sha256(repr(sorted(entries[directory])).encode()).hexdigest()
+        if directory:
+            entries[os.path.dirname(directory)].append(
+                ("d", os.path.basename(directory), digests[directory])
+            )
+    return digests
+
+
+def _get_identical_directories(
+    digests: Mapping[str, str], other_digests: Mapping[str, str]
+) -> set[str]:
+    return {d for d, digest in digests.items() if other_digests.get(d) == digest}
+
+
+def _get_file_infos_below(
+    file_infos: ConfigSyncFileInfos, directories: Collection[str]
+) -> ConfigSyncFileInfos:
+    """Return the file infos of all files in the given directories or their sub directories"""
+    directories = set(directories)
+    infos = {}
+    for site_path, info in file_infos.items():
+        directory = site_path
+        while directory:
+            directory = os.path.dirname(directory)
+            if directory in directories:
+                infos[site_path] = info
+                break
+    return infos
 
 
 def _get_config_sync_paths(
@@ -2977,6 +3097,7 @@ def _get_config_sync_file_infos(
     replication_paths: list[ReplicationPath],
     base_dir: Path,
     config_sync_file_infos_per_inode: Mapping[int, ConfigSyncFileInfo] | None = None,
+    hash_cache: ConfigSyncHashCache | None = None,
 ) -> ConfigSyncFileInfos:
     """Scans the given replication paths for the information needed for the config sync
 
@@ -2996,7 +3117,9 @@ def _get_config_sync_file_infos(
             continue  # Only report back existing things
 
         if replication_path.ty == ReplicationPathType.FILE:
-            infos[replication_path.site_path] = _get_config_sync_file_info(replication_path_full)
+            infos[replication_path.site_path] = _get_config_sync_file_info(
+                replication_path_full, hash_cache
+            )
 
         elif replication_path.ty == ReplicationPathType.DIR:
             _get_replication_dir_config_sync_file_infos(
@@ -3005,6 +3128,7 @@ def _get_config_sync_file_infos(
                 base_dir,
                 replication_path_full,
                 replication_path.excludes,
+                hash_cache,
             )
         else:
             raise NotImplementedError()
@@ -3017,6 +3141,7 @@ def _get_replication_dir_config_sync_file_infos(
     base_dir: Path,
     replication_path: str,
     replication_path_excludes: Sequence[str],
+    hash_cache: ConfigSyncHashCache | None,
 ) -> None:
     # Use os functionality instead of pathlib since it is faster
     for root, dir_names, file_names in os.walk(replication_path):
@@ -3036,19 +3161,29 @@ def _get_replication_dir_config_sync_file_infos(
                 ):
                     infos[valid_site_path] = sync_file_info
                 else:
-                    infos[valid_site_path] = _get_config_sync_file_info(config_sync_path)
+                    infos[valid_site_path] = _get_config_sync_file_info(
+                        config_sync_path, hash_cache
+                    )
             except FileNotFoundError:  # e.g. broken symlinks
-                infos[valid_site_path] = _get_config_sync_file_info(config_sync_path)
+                infos[valid_site_path] = _get_config_sync_file_info(config_sync_path, hash_cache)
 
 
-def _get_config_sync_file_info(file_path: str) -> ConfigSyncFileInfo:
+def _get_config_sync_file_info(
+    file_path: str, hash_cache: ConfigSyncHashCache | None = None
+) -> ConfigSyncFileInfo:
     stat = os.lstat(file_path)
     is_symlink = os.path.islink(file_path)
+    if is_symlink:
+        file_hash = None
+    elif hash_cache is not None:
+        file_hash = hash_cache.file_hash(file_path, stat)
+    else:
+        file_hash = _create_config_sync_file_hash(file_path)
     return ConfigSyncFileInfo(
         stat.st_mode,
         stat.st_size,
         os.readlink(str(file_path)) if is_symlink else None,
-        _create_config_sync_file_hash(file_path) if not is_symlink else None,
+        file_hash,
     )
 
 
@@ -3063,6 +3198,51 @@ def _create_config_sync_file_hash(file_path: str) -> str:
     return sha256.hexdigest()
 
 
+_ConfigSyncHashCacheKey = tuple[int, int, int, int]
+
+
+class ConfigSyncHashCache:
+    """Persistent cache of the file hashes computed for the config sync
+
+    Files are identified by device, inode, size and modification time. The change time is not part
+    of the key, because creating the hard linked sync snapshots changes it on every activation.
+    Hashes of files modified shortly before or during the scan are not persisted, since another
+    modification within the timestamp granularity of the file system would go unnoticed.
+    Entries not used during a scan are dropped when saving, so the cache follows the configuration.
+    """
+
+    def __init__(self, path: Path, hashes: Mapping[_ConfigSyncHashCacheKey, str]) -> None:
+        self._path = path
+        self._loaded = hashes
+        self._used: dict[_ConfigSyncHashCacheKey, str] = {}
+        self._mtime_ns_limit = time.time_ns() - 2 * 10**9
+
+    @classmethod
+    def load(cls, path: Path | None = None) -> ConfigSyncHashCache:
+        path = wato_var_dir() / "config_sync_hashes.pickle" if path is None else path
+        try:
+            hashes = store.load_object_from_pickle_file(path, default={})
+        except (EOFError, pickle.UnpicklingError):
+            logger.warning("Ignoring corrupted config sync hash cache %s", path)
+            hashes = {}
+        return cls(path, hashes)
+
+    def file_hash(self, file_path: str, stat: os.stat_result) -> str:
+        key = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if (file_hash := self._used.get(key)) is None:
+            if (file_hash := self._loaded.get(key)) is None:
+                file_hash = _create_config_sync_file_hash(file_path)
+            self._used[key] = file_hash
+        return file_hash
+
+    def save(self) -> None:
+        hashes = {k: v for k, v in self._used.items() if k[3] < self._mtime_ns_limit}
+        if hashes != self._loaded:
+            store.makedirs(self._path.parent)
+            store.save_object_to_pickle_file(self._path, hashes)
+            self._loaded = hashes
+
+
 def update_config_generation() -> None:
     """Increase the config generation ID
 
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Index of the piggyback meta data
+
+Looking up the piggyback data of a host used to list its piggybacked host folder and
+stat every payload file along with the status file of its source. The index keeps
+the result of this in one SQLite database:
+
+    folders:  piggybacked host -> stat of its piggybacked host folder
+    payloads: (piggybacked host, source) -> last update
+    sources:  source -> last contact
+
+The files remain the authoritative source, they may also be changed by other means
+(renaming hosts, removing files manually). The index therefore records the stat data
+of the directories it has been built from. Instead of stat'ing every file, a lookup
+only stats the relevant directories and refreshes the index in case they have been
+changed behind its back.
+
+All modifications of the piggyback files done by this package are recorded while
+holding the write lock of the index, see PiggybackIndex.update(). In case the lock
+can't be acquired in time, the files are looked up or modified without the index.
+It catches up on the changes by the stat data of the directories afterwards.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from contextlib import closing, contextmanager, ExitStack
+from pathlib import Path
+from typing import Final
+
+from cmk.utils.hostaddress import HostAddress, HostName
+
+from ._paths import files_in, get_mtime, index_path, payload_dir, source_status_dir
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA_VERSION: Final = 1
+
+# Seconds to wait for the lock of the index
+_LOCK_TIMEOUT = 60.0
+
+# Last update and last contact of a source: (source, last_update, last_contact)
+IndexEntry = tuple[HostAddress, int, int | None]
+
+
+def _dir_stat(path: Path) -> str | None:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return repr((st.st_ino, st.st_size, st.st_mtime_ns))
+
+
+@contextmanager
+def _transaction(connection: sqlite3.Connection, mode: str = "DEFERRED") -> Iterator[None]:
+    connection.execute(f"BEGIN {mode}")
+    try:
+        yield
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+
+class PiggybackIndex:
+    def __init__(self, omd_root: Path) -> None:
+        self._omd_root = omd_root
+        self.path = index_path(omd_root)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        self.path.parent.mkdir(mode=0o770, exist_ok=True, parents=True)
+        try:
+            connection = self._open()
+        except sqlite3.DatabaseError as e:
+            # Other processes may still use the files, so only remove them if they are
+            # broken, not e.g. if they are locked. The index can always be rebuilt.
+            if not _is_corrupt(e):
+                raise
+            logger.warning("Recreating piggyback index %s: %s", self.path, e)
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{self.path}{suffix}").unlink(missing_ok=True)
+            connection = self._open()
+        with closing(connection):
+            yield connection
+
+    def _open(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=_LOCK_TIMEOUT, isolation_level=None)
+        try:
+            # Readers must not be blocked by the writers
+            connection.execute("PRAGMA journal_mode=WAL")
+            if connection.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+                with _transaction(connection, "IMMEDIATE"):
+                    _create_schema(connection)
+        except BaseException:
+            connection.close()
+            raise
+        return connection
+
+    def get_entries(self, piggybacked_hostname: HostName) -> Sequence[IndexEntry]:
+        """Return the sources of the piggybacked host, sorted by name"""
+        try:
+            with self._connect() as connection:
+                with _transaction(connection):
+                    if _is_current(connection, self._omd_root, [piggybacked_hostname]):
+                        return _query(connection, piggybacked_hostname)
+                with _transaction(connection, "IMMEDIATE"):
+                    return self._sync_and_query(connection, piggybacked_hostname)
+        except sqlite3.OperationalError as e:
+            if not _is_locked(e):
+                raise
+            logger.warning("Reading piggyback files without index %s: %s", self.path, e)
+            with _unindexed() as connection:
+                return self._sync_and_query(connection, piggybacked_hostname)
+
+    def _sync_and_query(
+        self, connection: sqlite3.Connection, piggybacked_hostname: HostName
+    ) -> Sequence[IndexEntry]:
+        _sync_sources(connection, self._omd_root)
+        _sync_folder(connection, self._omd_root, piggybacked_hostname)
+        return _query(connection, piggybacked_hostname)
+
+    def get_all_entries(self) -> Mapping[HostAddress, Sequence[IndexEntry]]:
+        """Return the sources of all piggybacked hosts, sorted by name
+
+        Hosts having a piggybacked host folder without payload files are included.
+        """
+        try:
+            with self._connect() as connection:
+                with _transaction(connection):
+                    if _get_stat(connection, "payloads") == _dir_stat(
+                        payload_dir(self._omd_root)
+                    ) and _is_current(connection, self._omd_root, _indexed_hosts(connection)):
+                        return _query_all(connection)
+                with _transaction(connection, "IMMEDIATE"):
+                    _sync(connection, self._omd_root)
+                    return _query_all(connection)
+        except sqlite3.OperationalError as e:
+            if not _is_locked(e):
+                raise
+            logger.warning("Reading piggyback files without index %s: %s", self.path, e)
+            with _unindexed() as connection:
+                _sync(connection, self._omd_root)
+                return _query_all(connection)
+
+    @contextmanager
+    def update(self) -> Iterator[IndexUpdate]:
+        """Modify the piggyback files while holding the write lock of the index"""
+        with ExitStack() as stack:
+            try:
+                connection = stack.enter_context(self._connect())
+                stack.enter_context(_transaction(connection, "IMMEDIATE"))
+            except sqlite3.OperationalError as e:
+                if not _is_locked(e):
+                    raise
+                logger.warning("Modifying piggyback files without index %s: %s", self.path, e)
+                stack.close()
+                connection = stack.enter_context(_unindexed())
+            yield IndexUpdate(connection, self._omd_root)
+
+
+def _is_locked(e: sqlite3.OperationalError) -> bool:
+    """Tell whether the lock of the database couldn't be acquired within the timeout"""
+    # The extended error codes keep the primary one in the lowest byte
+    return e.sqlite_errorcode & 0xFF == sqlite3.SQLITE_BUSY
+
+
+def _is_corrupt(e: sqlite3.DatabaseError) -> bool:
+    return e.sqlite_errorcode & 0xFF in (sqlite3.SQLITE_CORRUPT, sqlite3.SQLITE_NOTADB)
+
+
+@contextmanager
+def _unindexed() -> Iterator[sqlite3.Connection]:
+    """A throwaway index, e.g. in case the lock of the real one can't be acquired"""
+    with closing(sqlite3.connect(":memory:", isolation_level=None)) as connection:
+        _create_schema(connection)
+        yield connection
+
+
+class IndexUpdate:
+    """Keep the index in line with the modifications of the piggyback files
+
+    Before touching the files of a directory, its index has to be brought up to date
+    with one of the sync methods. Afterwards the modifications are recorded along with
+    the new stat data of the directory.
+    """
+
+    def __init__(self, connection: sqlite3.Connection, omd_root: Path) -> None:
+        self._connection = connection
+        self._omd_root = omd_root
+
+    def sync_all(self) -> Mapping[HostAddress, Sequence[IndexEntry]]:
+        _sync(self._connection, self._omd_root)
+        return _query_all(self._connection)
+
+    def sync_sources(self) -> None:
+        _sync_sources(self._connection, self._omd_root)
+
+    def sync_folder(self, piggybacked_hostname: HostName) -> None:
+        _sync_folder(self._connection, self._omd_root, piggybacked_hostname)
+
+    def get_last_contacts(self) -> Mapping[HostAddress, int]:
+        return {
+            HostAddress(source): last_contact
+            for source, last_contact in self._connection.execute(
+                "SELECT source, last_contact FROM sources"
+            )
+        }
+
+    def set_last_contact(self, source: HostName, last_contact: int | None) -> None:
+        if last_contact is None:
+            self._connection.execute("DELETE FROM sources WHERE source = ?", (source,))
+        else:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO sources (source, last_contact) VALUES (?, ?)",
+                (source, last_contact),
+            )
+        _set_stat(self._connection, "sources", _dir_stat(source_status_dir(self._omd_root)))
+
+    def set_last_update(
+        self, source: HostName, piggybacked_hostname: HostName, last_update: int | None
+    ) -> None:
+        if last_update is None:
+            self._connection.execute(
+                "DELETE FROM payloads WHERE host = ? AND source = ?",
+                (piggybacked_hostname, source),
+            )
+        else:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO payloads (host, source, last_update) VALUES (?, ?, ?)",
+                (piggybacked_hostname, source, last_update),
+            )
+        self.folder_changed(piggybacked_hostname)
+
+    def folder_changed(self, piggybacked_hostname: HostName) -> None:
+        _set_folder_stat(
+            self._connection,
+            piggybacked_hostname,
+            _dir_stat(payload_dir(self._omd_root) / piggybacked_hostname),
+        )
+
+
+def _create_schema(connection: sqlite3.Connection) -> None:
+    for table in ("folders", "payloads", "sources", "meta"):
+        connection.execute(f"DROP TABLE IF EXISTS {table}")
+    connection.execute("CREATE TABLE folders (host TEXT PRIMARY KEY, stat TEXT NOT NULL)")
+    connection.execute(
+        """CREATE TABLE payloads (
+            host TEXT NOT NULL,
+            source TEXT NOT NULL,
+            last_update INTEGER NOT NULL,
+            PRIMARY KEY (host, source)
+        )"""
+    )
+    connection.execute(
+        "CREATE TABLE sources (source TEXT PRIMARY KEY, last_contact INTEGER NOT NULL)"
+    )
+    connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, stat TEXT)")
+    connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+
+def _is_current(connection: sqlite3.Connection, omd_root: Path, hosts: Iterable[HostName]) -> bool:
+    if _get_stat(connection, "sources") != _dir_stat(source_status_dir(omd_root)):
+        return False
+    indexed = dict(connection.execute("SELECT host, stat FROM folders"))
+    return all(indexed.get(host) == _dir_stat(payload_dir(omd_root) / host) for host in hosts)
+
+
+def _indexed_hosts(connection: sqlite3.Connection) -> list[HostName]:
+    return [HostName(h) for (h,) in connection.execute("SELECT host FROM folders")]
+
+
+def _query(connection: sqlite3.Connection, piggybacked_hostname: HostName) -> list[IndexEntry]:
+    return [
+        (HostAddress(source), last_update, last_contact)
+        for source, last_update, last_contact in connection.execute(
+            "SELECT p.source, p.last_update, s.last_contact FROM payloads p"
+            " LEFT JOIN sources s ON p.source = s.source"
+            " WHERE p.host = ? ORDER BY p.source",
+            (piggybacked_hostname,),
+        )
+    ]
+
+
+def _query_all(connection: sqlite3.Connection) -> dict[HostAddress, list[IndexEntry]]:
+    entries: dict[HostAddress, list[IndexEntry]] = {
+        HostAddress(host): [] for (host,) in connection.execute("SELECT host FROM folders")
+    }
+    for host, source, last_update, last_contact in connection.execute(
+        "SELECT p.host, p.source, p.last_update, s.last_contact FROM payloads p"
+        " LEFT JOIN sources s ON p.source = s.source ORDER BY p.host, p.source"
+    ):
+        entries.setdefault(HostAddress(host), []).append(
+            (HostAddress(source), last_update, last_contact)
+        )
+    return dict(sorted(entries.items()))
+
+
+def _sync(connection: sqlite3.Connection, omd_root: Path) -> None:
+    _sync_sources(connection, omd_root)
+    folders_dir = payload_dir(omd_root)
+    if _get_stat(connection, "payloads") == (stat := _dir_stat(folders_dir)):
+        hosts = _indexed_hosts(connection)
+    else:
+        hosts = [HostName(f.name) for f in files_in(folders_dir)]
+        for removed in set(_indexed_hosts(connection)) - set(hosts):
+            _sync_folder(connection, omd_root, removed)
+        _set_stat(connection, "payloads", stat)
+    for host in hosts:
+        _sync_folder(connection, omd_root, host)
+
+
+def _sync_sources(connection: sqlite3.Connection, omd_root: Path) -> None:
+    status_dir = source_status_dir(omd_root)
+    if _get_stat(connection, "sources") == (stat := _dir_stat(status_dir)):
+        return
+    logger.debug("Refreshing piggyback index of %s", status_dir)
+    connection.execute("DELETE FROM sources")
+    connection.executemany(
+        "INSERT INTO sources (source, last_contact) VALUES (?, ?)",
+        [
+            (status_file.name, mtime)
+            for status_file in files_in(status_dir)
+            if (mtime := get_mtime(status_file)) is not None
+        ],
+    )
+    _set_stat(connection, "sources", stat)
+
+
+def _sync_folder(
+    connection: sqlite3.Connection, omd_root: Path, piggybacked_hostname: HostName
+) -> None:
+    folder = payload_dir(omd_root) / piggybacked_hostname
+    row = connection.execute(
+        "SELECT stat FROM folders WHERE host = ?", (piggybacked_hostname,)
+    ).fetchone()
+    if (None if row is None else row[0]) == (stat := _dir_stat(folder)):
+        return
+    logger.debug("Refreshing piggyback index of %s", folder)
+    connection.execute("DELETE FROM payloads WHERE host = ?", (piggybacked_hostname,))
+    connection.executemany(
+        "INSERT INTO payloads (host, source, last_update) VALUES (?, ?, ?)",
+        [
+            (piggybacked_hostname, payload_file.name, mtime)
+            for payload_file in files_in(folder)
+            if (mtime := get_mtime(payload_file)) is not None
+        ],
+    )
+    _set_folder_stat(connection, piggybacked_hostname, stat)
+
+
+def _get_stat(connection: sqlite3.Connection, key: str) -> str | None:
+    row = connection.execute("SELECT stat FROM meta WHERE key = ?", (key,)).fetchone()
+    return None if row is None else row[0]
+
+
+def _set_stat(connection: sqlite3.Connection, key: str, stat: str | None) -> None:
+    connection.execute("INSERT OR REPLACE INTO meta (key, stat) VALUES (?, ?)", (key, stat))
+
+
+def _set_folder_stat(
+    connection: sqlite3.Connection, piggybacked_hostname: HostName, stat: str | None
+) -> None:
+    if stat is None:
+        connection.execute("DELETE FROM payloads WHERE host = ?", (piggybacked_hostname,))
+        connection.execute("DELETE FROM folders WHERE host = ?", (piggybacked_hostname,))
+        return
+    connection.execute(
+        "INSERT OR REPLACE INTO folders (host, stat) VALUES (?, ?)", (piggybacked_hostname, stat)
+    )
@@ -3,10 +3,13 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+from collections.abc import Sequence
 from pathlib import Path
 
 _RELATIVE_PAYLOAD_DIR = "tmp/check_mk/piggyback"
 _RELATIVE_SOURCE_STATUS_DIR = "tmp/check_mk/piggyback_sources"
+# Not inside the payload dir, which is watched for new piggybacked host folders
+_RELATIVE_INDEX_PATH = "tmp/check_mk/piggyback_index.sqlite"
 
 
 def payload_dir(omd_root: Path) -> Path:
@@ -15,3 +18,30 @@ def payload_dir(omd_root: Path) -> Path:
 
 def source_status_dir(omd_root: Path) -> Path:
     return omd_root / _RELATIVE_SOURCE_STATUS_DIR
+
+
+def index_path(omd_root: Path) -> Path:
+    return omd_root / _RELATIVE_INDEX_PATH
+
+
+def files_in(path: Path) -> Sequence[Path]:
+    """Return a sorted sequence of files in `path` excluding hidden files.
+
+    While the order of the files _should_ not matter, in some weird cases it might.
+    We don't expect that to happen (let alone be noticed), but in case it *does* happen, at least be predictable.
+    """
+    try:
+        return sorted(f for f in path.iterdir() if not f.name.startswith("."))
+    except FileNotFoundError:
+        return []
+
+
+def get_mtime(path: Path) -> int | None:
+    try:
+        # Beware:
+        # On POSIX platforms Python reads atime and mtime at nanosecond resolution
+        # but only writes them at microsecond resolution.
+        # (We're using os.utime() in _store_status_file_of())
+        return int(path.stat().st_mtime)
+    except FileNotFoundError:
+        return None
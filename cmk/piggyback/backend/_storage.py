@@ -16,9 +16,10 @@ from pathlib import Path
 from typing import Self
 
 from cmk.utils.hostaddress import HostAddress, HostName
+from cmk.utils.inotify import Event, INotify, Masks
 
-from ._inotify import Event, INotify, Masks
-from ._paths import payload_dir, source_status_dir
+from ._index import IndexEntry, IndexUpdate, PiggybackIndex
+from ._paths import files_in, get_mtime, payload_dir, source_status_dir
 
 logger = logging.getLogger(__name__)
 
@@ -95,7 +96,7 @@ def _make_message_from_event(event: Event, omd_root: Path) -> PiggybackMessage |
     status_file_path = _get_source_status_file_path(source, omd_root)
     payload_file_path = event.watchee.path / event.name
 
-    if (mtime := _get_mtime(payload_file_path)) is None:
+    if (mtime := get_mtime(payload_file_path)) is None:
         return None
 
     return PiggybackMessage(
@@ -103,7 +104,7 @@ def _make_message_from_event(event: Event, omd_root: Path) -> PiggybackMessage |
             source=source,
             piggybacked=piggybacked,
             last_update=mtime,
-            last_contact=_get_mtime(status_file_path),
+            last_contact=get_mtime(status_file_path),
         ),
         payload_file_path.read_bytes(),
     )
@@ -140,9 +141,8 @@ def get_piggybacked_host_with_sources(
 ) -> Mapping[HostAddress, Sequence[PiggybackMetaData]]:
     """Generates all piggyback pig/piggybacked host pairs"""
     return {
-        piggybacked_host: _get_payload_meta_data(piggybacked_host, omd_root)
-        for piggybacked_host_folder in _get_piggybacked_host_folders(omd_root)
-        if (piggybacked_host := HostAddress(piggybacked_host_folder.name))
+        piggybacked_host: _make_meta_data(piggybacked_host, entries)
+        for piggybacked_host, entries in PiggybackIndex(omd_root).get_all_entries().items()
     }
 
 
@@ -157,8 +157,17 @@ def _remove_piggyback_file(piggyback_file_path: Path) -> bool:
 def remove_source_status_file(source_hostname: HostName, omd_root: Path) -> bool:
     """Remove the source_status_file of this piggyback host which will
     mark the piggyback data from this source as outdated."""
-    source_status_path = _get_source_status_file_path(source_hostname, omd_root)
-    return _remove_piggyback_file(source_status_path)
+    with PiggybackIndex(omd_root).update() as index:
+        return _remove_source_status_file(index, source_hostname, omd_root)
+
+
+def _remove_source_status_file(
+    index: IndexUpdate, source_hostname: HostName, omd_root: Path
+) -> bool:
+    index.sync_sources()
+    removed = _remove_piggyback_file(_get_source_status_file_path(source_hostname, omd_root))
+    index.set_last_contact(source_hostname, None)
+    return removed
 
 
 def store_piggyback_raw_data(
@@ -173,26 +182,56 @@ def store_piggyback_raw_data(
         logger.debug("Received no piggyback data")
         remove_source_status_file(source_hostname, omd_root)
         return
-    # Store the last contact with this piggyback source to be able to filter outdated data later
-    # We use the mtime of this file later for comparison.
-    # Only do this for hosts that sent piggyback data this turn.
+
     logger.debug("Received piggyback data for %d hosts", len(piggybacked_raw_data))
-    status_file_path = _get_source_status_file_path(source_hostname, omd_root)
-    # usually the status file is updated with the same timestamp as the piggyback files, but in
-    # case of distributed piggyback we want to keep the original timestamps so the fetchers etc.
-    # work as if on the source system
-    _write_file_with_mtime(file_path=status_file_path, content=b"", mtime=contact_timestamp)
-
-    for piggybacked_hostname, lines in piggybacked_raw_data.items():
-        logger.debug("Storing piggyback data for: %r", piggybacked_hostname)
-        # Raw data is always stored as bytes. Later the content is
-        # converted to unicode in abstact.py:_parse_info which respects
-        # 'encoding' in section options.
-        _write_file_with_mtime(
-            file_path=_get_piggybacked_file_path(source_hostname, piggybacked_hostname, omd_root),
-            content=b"%s\n" % b"\n".join(lines),
-            mtime=message_timestamp,
+    # The payload files are written without holding the lock of the index. When recording
+    # their meta data, the index notices the changed folders and refreshes them.
+    piggybacked_file_paths = {
+        piggybacked_hostname: _store_payload(
+            source_hostname, piggybacked_hostname, lines, message_timestamp, omd_root
         )
+        for piggybacked_hostname, lines in piggybacked_raw_data.items()
+    }
+
+    with PiggybackIndex(omd_root).update() as index:
+        # Store the last contact with this piggyback source to be able to filter outdated data
+        # later. We use the mtime of this file later for comparison.
+        # Only do this for hosts that sent piggyback data this turn.
+        # usually the status file is updated with the same timestamp as the piggyback files, but
+        # in case of distributed piggyback we want to keep the original timestamps so the fetchers
+        # etc. work as if on the source system
+        status_file_path = _get_source_status_file_path(source_hostname, omd_root)
+        index.sync_sources()
+        _write_file_with_mtime(file_path=status_file_path, content=b"", mtime=contact_timestamp)
+        index.set_last_contact(source_hostname, get_mtime(status_file_path))
+
+        for piggybacked_hostname, piggybacked_file_path in piggybacked_file_paths.items():
+            index.sync_folder(piggybacked_hostname)
+            index.set_last_update(
+                source_hostname, piggybacked_hostname, get_mtime(piggybacked_file_path)
+            )
+
+
+def _store_payload(
+    source_hostname: HostName,
+    piggybacked_hostname: HostName,
+    lines: Sequence[bytes],
+    message_timestamp: float,
+    omd_root: Path,
+) -> Path:
+    logger.debug("Storing piggyback data for: %r", piggybacked_hostname)
+    piggybacked_file_path = _get_piggybacked_file_path(
+        source_hostname, piggybacked_hostname, omd_root
+    )
+    # Raw data is always stored as bytes. Later the content is
+    # converted to unicode in abstact.py:_parse_info which respects
+    # 'encoding' in section options.
+    _write_file_with_mtime(
+        file_path=piggybacked_file_path,
+        content=b"%s\n" % b"\n".join(lines),
+        mtime=message_timestamp,
+    )
+    return piggybacked_file_path
 
 
 def _write_file_with_mtime(
@@ -233,44 +272,27 @@ def _get_payload_meta_data(
     store_piggyback_raw_data() or cleanup_piggyback_files() functions.
     All these functions need to deal with suddenly vanishing or updated files/directories.
     """
-    piggybacked_host_folder = payload_dir(omd_root) / Path(piggybacked_hostname)
-    meta_data = []
-    for payload_file in _files_in(piggybacked_host_folder):
-        source = HostAddress(payload_file.name)
-        status_file_path = _get_source_status_file_path(source, omd_root)
+    return _make_meta_data(
+        piggybacked_hostname, PiggybackIndex(omd_root).get_entries(piggybacked_hostname)
+    )
 
-        if (mtime := _get_mtime(payload_file)) is None:
-            continue
 
-        meta_data.append(
-            PiggybackMetaData(
-                source=source,
-                piggybacked=piggybacked_hostname,
-                last_update=mtime,
-                last_contact=_get_mtime(status_file_path),
-            )
+def _make_meta_data(
+    piggybacked_hostname: HostName, entries: Iterable[IndexEntry]
+) -> Sequence[PiggybackMetaData]:
+    return [
+        PiggybackMetaData(
+            source=source,
+            piggybacked=piggybacked_hostname,
+            last_update=last_update,
+            last_contact=last_contact,
         )
-    return meta_data
+        for source, last_update, last_contact in entries
+    ]
 
 
 def _get_piggybacked_host_folders(omd_root: Path) -> Sequence[Path]:
-    return _files_in(payload_dir(omd_root))
-
-
-def _get_source_state_files(omd_root: Path) -> Sequence[Path]:
-    return _files_in(source_status_dir(omd_root))
-
-
-def _files_in(path: Path) -> Sequence[Path]:
-    """Return a sorted sequence of files in `path` excluding hidden files.
-
-    While the order of the files _should_ not matter, in some weird cases it might.
-    We don't expect that to happen (let alone be noticed), but in case it *does* happen, at least be predictable.
-    """
-    try:
-        return sorted(f for f in path.iterdir() if not f.name.startswith("."))
-    except FileNotFoundError:
-        return []
+    return files_in(payload_dir(omd_root))
 
 
 def _get_source_status_file_path(source_hostname: HostName, omd_root: Path) -> Path:
@@ -309,75 +331,66 @@ def cleanup_piggyback_files(cut_off_timestamp: float, omd_root: Path) -> None:
         cut_off_timestamp,
     )
 
-    piggybacked_hosts_settings = [
-        (piggybacked_host_folder, _files_in(piggybacked_host_folder))
-        for piggybacked_host_folder in _get_piggybacked_host_folders(omd_root)
-    ]
-
-    _cleanup_old_source_status_files(_get_source_state_files(omd_root), cut_off_timestamp)
-    _cleanup_old_piggybacked_files(piggybacked_hosts_settings, cut_off_timestamp)
+    # The index tells the age of all files, so there is no need to stat them
+    with PiggybackIndex(omd_root).update() as index:
+        piggybacked_hosts = index.sync_all()
+        _cleanup_old_source_status_files(index, cut_off_timestamp, omd_root)
+        _cleanup_old_piggybacked_files(index, piggybacked_hosts, cut_off_timestamp, omd_root)
 
 
 def _cleanup_old_source_status_files(
-    source_state_files: Sequence[Path],
-    cut_off_timestamp: float,
+    index: IndexUpdate, cut_off_timestamp: float, omd_root: Path
 ) -> None:
     """Remove source status files which exceed provided maximum age."""
-    for source_state_file in source_state_files:
-        if (mtime := _get_mtime(source_state_file)) is None:
-            continue  # File has been removed, that's OK.
-
+    for source, mtime in index.get_last_contacts().items():
         if mtime < cut_off_timestamp:
+            source_state_file = _get_source_status_file_path(source, omd_root)
             logger.debug(
                 "Piggyback source status file '%s' too old (%s). Remove it.",
                 source_state_file,
                 _render_datetime(mtime),
             )
             _remove_piggyback_file(source_state_file)
+            index.set_last_contact(source, None)
 
 
 def _cleanup_old_piggybacked_files(
-    piggybacked_hosts_settings: Iterable[tuple[Path, Iterable[Path]]], cut_off_timestamp: float
+    index: IndexUpdate,
+    piggybacked_hosts: Mapping[HostAddress, Iterable[IndexEntry]],
+    cut_off_timestamp: float,
+    omd_root: Path,
 ) -> None:
     """Remove piggybacked data files which exceed provided maximum age."""
 
-    for piggybacked_host_folder, source_hosts in piggybacked_hosts_settings:
-        for piggybacked_host_source in source_hosts:
-            if (mtime := _get_mtime(piggybacked_host_source)) is None:
-                continue
-
+    for piggybacked_hostname, entries in piggybacked_hosts.items():
+        for source, mtime, _last_contact in entries:
             if mtime < cut_off_timestamp:
+                piggybacked_host_source = _get_piggybacked_file_path(
+                    source, piggybacked_hostname, omd_root
+                )
                 logger.debug(
                     "Piggyback file '%s' too old (%s). Remove it.",
                     piggybacked_host_source,
                     _render_datetime(mtime),
                 )
                 _remove_piggyback_file(piggybacked_host_source)
+                index.set_last_update(source, piggybacked_hostname, None)
 
         # Remove empty backed host directory
+        piggybacked_host_folder = payload_dir(omd_root) / piggybacked_hostname
         try:
             piggybacked_host_folder.rmdir()
         except OSError as e:
             if e.errno == errno.ENOTEMPTY:
                 continue
             raise
+        index.folder_changed(piggybacked_hostname)
         logger.debug(
             "Piggyback folder '%s' was empty. Removed it.",
             piggybacked_host_folder,
         )
 
 
-def _get_mtime(path: Path) -> int | None:
-    try:
-        # Beware:
-        # On POSIX platforms Python reads atime and mtime at nanosecond resolution
-        # but only writes them at microsecond resolution.
-        # (We're using os.utime() in _store_status_file_of())
-        return int(path.stat().st_mtime)
-    except FileNotFoundError:
-        return None
-
-
 def _render_datetime(timestamp: float) -> str:
     return datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
 
@@ -387,6 +400,12 @@ def move_for_host_rename(omd_root: Path, old_host: str, new_host: str) -> tuple[
 
     Return a tuple of strings representing the actions taken.
     """
+    # The index notices the changed directories by itself, but we have to keep the writers out
+    with PiggybackIndex(omd_root).update():
+        return _move_for_host_rename(omd_root, old_host, new_host)
+
+
+def _move_for_host_rename(omd_root: Path, old_host: str, new_host: str) -> tuple[str, ...]:
     piggyback_dir = payload_dir(omd_root)
 
     def _rename_piggybacked_dir(old_name: str, new_name: str) -> Iterable[str]:
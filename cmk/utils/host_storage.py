@@ -15,6 +15,7 @@ from typing import Any, Generic, TypedDict, TypeVar
 
 from cmk.ccc import store
 
+import cmk.utils.paths
 from cmk.utils.hostaddress import HostName
 from cmk.utils.labels import Labels
 from cmk.utils.rulesets.tuple_rulesets import ALL_HOSTS, ALL_SERVICES
@@ -345,6 +346,15 @@ class ABCHostsStorageLoader(abc.ABC, Generic[THostsReadData]):
 
 
 class StandardStorageLoader(ABCHostsStorageLoader[str]):
+    def read_and_apply(self, file_path: Path, global_dict: dict[str, Any]) -> bool:
+        hosts_mk_path = self._storage.add_file_extension(file_path)
+        store.raise_for_permissions(hosts_mk_path)
+        code = store.load_code_from_compiled_files_cache(
+            hosts_mk_path, temp_dir=cmk.utils.paths.tmp_dir, root_dir=cmk.utils.paths.omd_root
+        )
+        exec(code, global_dict, global_dict)  # nosec B102 # BNS:aee528
+        return True
+
     def apply(self, data: str, global_dict: dict[str, Any]) -> bool:
         exec(data, global_dict, global_dict)  # nosec B102 # BNS:aee528
         return True
@@ -10,7 +10,7 @@ features that we want (type annotations).
 This is quite stripped down to only provide what we currently need,
 rather than being a comprehensive interface to what the kernel offers.
 
-As this is currently only needed for the piggyback hub, we put it here.
+It is used by the piggyback hub and the event console.
 """
 
 import enum
@@ -143,13 +143,20 @@ class _LibCINotify:
 
 
 class INotify:
-    def __init__(self):
+    def __init__(self) -> None:
         self._libc = _LibCINotify()
         self._parser = _EventParser()
         self._fileio = FileIO(self._libc.init1(os.O_CLOEXEC), mode="rb")
         self._poller = poll()
         self._poller.register(self._fileio.fileno())
 
+    def fileno(self) -> int:
+        """For registering the instance with select/poll/epoll based event loops"""
+        return self._fileio.fileno()
+
+    def close(self) -> None:
+        self._fileio.close()
+
     def add_watch(self, path: Path, mask: Masks) -> Watchee:
         watch_descriptor = self._libc.add_watch(self._fileio.fileno(), fsencode(path), mask)
         self._parser.track(watch_descriptor, path)
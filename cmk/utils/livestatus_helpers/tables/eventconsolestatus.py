@@ -31,6 +31,13 @@ class Eventconsolestatus(Table):
     )
     """The average event rate"""
 
+    status_average_ingestion_drop_rate = Column(
+        'status_average_ingestion_drop_rate',
+        col_type='float',
+        description='The average rate of messages dropped because the ingestion queue was full',
+    )
+    """The average rate of messages dropped because the ingestion queue was full"""
+
     status_average_message_rate = Column(
         'status_average_message_rate',
         col_type='float',
@@ -171,6 +178,27 @@ class Eventconsolestatus(Table):
     )
     """The number of events received since startup of the Event Console"""
 
+    status_ingestion_drop_rate = Column(
+        'status_ingestion_drop_rate',
+        col_type='float',
+        description='The rate of messages dropped because the ingestion queue was full',
+    )
+    """The rate of messages dropped because the ingestion queue was full"""
+
+    status_ingestion_drops = Column(
+        'status_ingestion_drops',
+        col_type='int',
+        description='The number of messages dropped because the ingestion queue was full',
+    )
+    """The number of messages dropped because the ingestion queue was full"""
+
+    status_ingestion_queue_length = Column(
+        'status_ingestion_queue_length',
+        col_type='int',
+        description='The number of received messages waiting for being processed',
+    )
+    """The number of received messages waiting for being processed"""
+
     status_message_rate = Column(
         'status_message_rate',
         col_type='float',
@@ -110,6 +110,11 @@ class FakeSocket:
     def recv(self, length: int) -> bytes:
         return self.mock_live.socket_recv(length)
 
+    def recv_into(self, buffer: memoryview, nbytes: int = 0) -> int:
+        data = self.mock_live.socket_recv(nbytes or len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
     def send(self, data: bytes) -> None:
         return self.mock_live.socket_send(data)
 
@@ -160,7 +165,7 @@ def _make_livestatus_response(response: Response, output_format: str) -> str:
         raise ValueError(f"Unknown output format: {output_format}")
 
     code = 200
-    length = len(data)
+    length = len(data.encode("utf-8"))
     return f"{code:<3} {length:>11}\n{data}"
 
 
@@ -630,7 +635,7 @@ class MockSingleSiteConnection:
         self._sent_queries: list[bytes] = []
         self._site_name = site_name
         self._multisite = multisite_connection
-        self._last_response: io.StringIO | None = None
+        self._last_response: io.BytesIO | None = None
         self._expected_queries: list[tuple[str, MatchType]] = []
 
         self.socket = FakeSocket(self)
@@ -715,14 +720,16 @@ class MockSingleSiteConnection:
     def socket_recv(self, length: int) -> bytes:
         if self._last_response is None:
             raise LivestatusTestingError("Nothing sent yet. Can't receive!")
-        return self._last_response.read(length).encode("utf-8")
+        return self._last_response.read(length)
 
     def socket_send(self, data: bytes) -> None:
         self._sent_queries.append(data)
         if data[-2:] == b"\n\n":
             data = data[:-2]
         response, output_format = self.result_of_next_query(data.decode("utf-8"))
-        self._last_response = io.StringIO(_make_livestatus_response(response, output_format))
+        self._last_response = io.BytesIO(
+            _make_livestatus_response(response, output_format).encode("utf-8")
+        )
 
     def __enter__(self) -> None:
         pass
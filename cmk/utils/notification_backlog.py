@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""On-disk ring buffer of the most recent raw notification contexts
+
+The backlog is kept in a preallocated file with one fixed-size slot per entry.
+Each slot holds a length-prefixed record, so storing a notification only writes
+one slot and the file header instead of rewriting the whole backlog.
+
+    header: magic, number of slots, slot size, sequence number of the next record
+    slot:   sequence number + 1, record length (highest bit: zlib compressed), record
+
+The sequence number stored in each slot allows readers to detect slots that have
+not been written (yet) or that do not belong to the expected record.
+"""
+
+import ast
+import fcntl
+import logging
+import os
+import struct
+import zlib
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Final
+
+from cmk.ccc import store
+
+from cmk.events.event_context import EventContext
+from cmk.events.notification_result import NotificationContext
+
+logger = logging.getLogger("cmk.utils.notification_backlog")
+
+_MAGIC: Final = b"CMKNBL01"
+_HEADER: Final = struct.Struct("<8sIIQ")
+_SLOT_HEADER: Final = struct.Struct("<QI")
+_COMPRESSED: Final = 1 << 31
+SLOT_SIZE: Final = 64 * 1024
+
+
+def _backlog_path(notify_dir: Path) -> Path:
+    return notify_dir / "backlog.ring"
+
+
+def _legacy_backlog_path(notify_dir: Path) -> Path:
+    return notify_dir / "backlog.mk"
+
+
+def store_notification_backlog(
+    notify_dir: Path, raw_context: EventContext, *, backlog_size: int
+) -> None:
+    """Add the context as most recent entry, dropping the oldest one if the backlog is full"""
+    path = _backlog_path(notify_dir)
+    if not backlog_size:
+        for p in (path, _legacy_backlog_path(notify_dir)):
+            p.unlink(missing_ok=True)
+        return
+
+    record = _serialize(raw_context)
+    if record is None:
+        logger.warning(
+            "Notification context exceeds %d bytes, not adding it to the backlog", SLOT_SIZE
+        )
+        return
+
+    store.makedirs(notify_dir)
+    with _open_locked(path, os.O_RDWR | os.O_CREAT, fcntl.LOCK_EX) as fd:
+        header = _read_header(fd)
+        if header is None or header[0] != backlog_size:
+            header = _rebuild(fd, notify_dir, backlog_size)
+        slots, next_seq = header
+        _write_slot(fd, slots, next_seq, record)
+        os.pwrite(fd, _HEADER.pack(_MAGIC, slots, SLOT_SIZE, next_seq + 1), 0)
+
+
+def load_notification_backlog(notify_dir: Path) -> Sequence[NotificationContext]:
+    """Return all entries of the backlog, the most recent one first"""
+    return [
+        NotificationContext({key: str(value) for key, value in raw_context.items()})
+        for raw_context in _load_entries(notify_dir)
+    ]
+
+
+def _load_entries(notify_dir: Path) -> Sequence[EventContext]:
+    path = _backlog_path(notify_dir)
+    try:
+        with _open_locked(path, os.O_RDONLY, fcntl.LOCK_SH) as fd:
+            return _read_entries(fd)
+    except FileNotFoundError:
+        return store.load_object_from_file(_legacy_backlog_path(notify_dir), default=[])
+
+
+def load_notification_backlog_entry(notify_dir: Path, nr: int) -> EventContext | None:
+    """Return the nr'th most recent entry of the backlog"""
+    if nr < 0:
+        return None
+    path = _backlog_path(notify_dir)
+    try:
+        with _open_locked(path, os.O_RDONLY, fcntl.LOCK_SH) as fd:
+            if (header := _read_header(fd)) is None:
+                return None
+            slots, next_seq = header
+            if nr >= min(slots, next_seq):
+                return None
+            return _read_slot(fd, slots, next_seq - 1 - nr)
+    except FileNotFoundError:
+        backlog = _load_entries(notify_dir)
+        return backlog[nr] if nr < len(backlog) else None
+
+
+def _serialize(raw_context: EventContext) -> bytes | None:
+    """Return the length prefixed record or None if it does not fit into a slot"""
+    max_length = SLOT_SIZE - _SLOT_HEADER.size
+    data = repr(raw_context).encode("utf-8")
+    if len(data) <= max_length:
+        return struct.pack("<I", len(data)) + data
+    # Large plug-in outputs compress well, only give up if even that is not enough
+    if len(data := zlib.compress(data)) <= max_length:
+        return struct.pack("<I", len(data) | _COMPRESSED) + data
+    return None
+
+
+def _deserialize(raw: bytes, compressed: bool) -> EventContext:
+    return ast.literal_eval((zlib.decompress(raw) if compressed else raw).decode("utf-8"))
+
+
+@contextmanager
+def _open_locked(path: Path, flags: int, operation: int) -> Iterator[int]:
+    fd = os.open(path, flags, 0o660)
+    try:
+        fcntl.flock(fd, operation)
+        yield fd
+    finally:
+        os.close(fd)  # also releases the lock
+
+
+def _slot_offset(slot: int) -> int:
+    return _HEADER.size + slot * SLOT_SIZE
+
+
+def _read_header(fd: int) -> tuple[int, int] | None:
+    raw = os.pread(fd, _HEADER.size, 0)
+    if len(raw) != _HEADER.size:
+        return None
+    magic, slots, slot_size, next_seq = _HEADER.unpack(raw)
+    if magic != _MAGIC or slot_size != SLOT_SIZE or not slots:
+        return None
+    return slots, next_seq
+
+
+def _write_slot(fd: int, slots: int, seq: int, record: bytes) -> None:
+    os.pwrite(fd, struct.pack("<Q", seq + 1) + record, _slot_offset(seq % slots))
+
+
+def _read_slot(fd: int, slots: int, seq: int) -> EventContext | None:
+    offset = _slot_offset(seq % slots)
+    slot_seq, length = _SLOT_HEADER.unpack(os.pread(fd, _SLOT_HEADER.size, offset))
+    if slot_seq != seq + 1:
+        return None
+    raw = os.pread(fd, length & ~_COMPRESSED, offset + _SLOT_HEADER.size)
+    try:
+        return _deserialize(raw, bool(length & _COMPRESSED))
+    except (ValueError, SyntaxError, zlib.error):
+        logger.warning("Skipping corrupted notification backlog entry %d", seq)
+        return None
+
+
+def _read_entries(fd: int) -> list[EventContext]:
+    if (header := _read_header(fd)) is None:
+        return []
+    slots, next_seq = header
+    return [
+        context
+        for seq in range(next_seq - 1, max(next_seq - slots, 0) - 1, -1)
+        if (context := _read_slot(fd, slots, seq)) is not None
+    ]
+
+
+def _rebuild(fd: int, notify_dir: Path, slots: int) -> tuple[int, int]:
+    """(Re-)initialize the file for the given number of slots
+
+    This only happens initially or after the backlog size has been changed. The
+    entries of the former backlog (or of the legacy backlog.mk) are preserved.
+    """
+    if _read_header(fd) is None:
+        legacy_path = _legacy_backlog_path(notify_dir)
+        entries = list(store.load_object_from_file(legacy_path, default=[]))
+        legacy_path.unlink(missing_ok=True)
+    else:
+        entries = _read_entries(fd)
+
+    records = [r for r in map(_serialize, reversed(entries[:slots])) if r is not None]
+    os.ftruncate(fd, 0)
+    os.ftruncate(fd, _slot_offset(slots))
+    for seq, record in enumerate(records):
+        _write_slot(fd, slots, seq, record)
+    os.pwrite(fd, _HEADER.pack(_MAGIC, slots, SLOT_SIZE, len(records)), 0)
+    return slots, len(records)
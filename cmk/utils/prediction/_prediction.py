@@ -7,8 +7,10 @@ import logging
 import math
 from collections.abc import Callable, Iterable, Iterator, Sequence
 from pathlib import Path
-from typing import Final, Literal, NamedTuple, Protocol, Self
+from typing import Final, Literal, NamedTuple, Protocol
 
+import numpy as np
+import numpy.typing as npt
 from pydantic import BaseModel
 
 from cmk.agent_based.prediction_backend import PredictionInfo
@@ -38,17 +40,6 @@ class DataStat(NamedTuple):
     max_: float
     stdev: float | None
 
-    @classmethod
-    def from_values(cls, values: Sequence[float]) -> Self:
-        """Statistically summarize all the measured values"""
-        average = sum(values) / float(len(values))
-        return cls(
-            average=average,
-            min_=min(values),
-            max_=max(values),
-            stdev=_std_dev(values, average),
-        )
-
 
 class PredictionData(BaseModel, frozen=True):
     points: list[DataStat | None]
@@ -189,32 +180,51 @@ def _calculate_data_for_prediction(
 
 def _forward_fill_resample(
     current_range: range, values: Sequence[float | None], new_range: range
-) -> Sequence[float | None]:
+) -> npt.NDArray[np.float64]:
+    # None becomes NaN
+    data = np.asarray(values, dtype=np.float64)
     if current_range == new_range:
-        return values
+        return data
 
-    idx_max = len(values) - 1
-    return [
-        values[max(0, min(int((t - current_range.start) / current_range.step), idx_max))]
-        for t in new_range
-    ]
+    indices = np.trunc(
+        (np.arange(new_range.start, new_range.stop, new_range.step) - current_range.start)
+        / current_range.step
+    )
+    return data[np.clip(indices, 0, len(data) - 1).astype(np.intp)]
 
 
-def _data_stats(slices: Iterable[Iterable[float | None]]) -> list[DataStat | None]:
+def _data_stats(
+    slices: Iterable[Sequence[float | None] | npt.NDArray[np.float64]],
+) -> list[DataStat | None]:
     "Statistically summarize all the upsampled RRD data"
-    return [  # can't inline this b/c it is unit tested :-/
-        (
-            DataStat.from_values(point_line)
-            if (point_line := [x for x in time_column if x is not None])
-            else None
-        )
-        for time_column in zip(*slices)
-    ]
+    rows = [np.asarray(time_column, dtype=np.float64) for time_column in slices]
+    if not rows:
+        return []
+    num_points = min(len(r) for r in rows)
+    data = np.vstack([r[:num_points] for r in rows])
+    present = ~np.isnan(data)
+    samples = np.count_nonzero(present, axis=0)
+    # NaN is ignored by fmin/fmax, all NaN columns stay NaN
+    min_ = np.fmin.reduce(data, axis=0)
+    max_ = np.fmax.reduce(data, axis=0)
+
+    # Sum up the columns exactly rounded: This keeps the averages identical to the ones of
+    # the former pure Python code, and the standard deviation formula amplifies rounding
+    # errors of the sums for data with a high mean and a low variance.
+    filled = np.where(present, data, 0.0)
+    total = np.fromiter(map(math.fsum, filled.T.tolist()), np.float64, count=num_points)
+    total_of_squares = np.fromiter(
+        map(math.fsum, np.square(filled).T.tolist()), np.float64, count=num_points
+    )
 
+    with np.errstate(divide="ignore", invalid="ignore"):
+        average = total / samples
+        stdev = np.sqrt(np.abs(total_of_squares - np.square(average) * samples) / (samples - 1))
 
-def _std_dev(point_line: Sequence[float], average: float) -> float | None:
-    samples = len(point_line)
-    # In the case of a single data-point an unbiased standard deviation is undefined.
-    if samples == 1:
-        return None
-    return math.sqrt(abs(sum(p**2 for p in point_line) - average**2 * samples) / float(samples - 1))
+    return [
+        # In the case of a single data-point an unbiased standard deviation is undefined.
+        DataStat(average=avg, min_=lo, max_=hi, stdev=None if n == 1 else std) if n else None
+        for n, avg, lo, hi, std in zip(
+            samples.tolist(), average.tolist(), min_.tolist(), max_.tolist(), stdev.tolist()
+        )
+    ]
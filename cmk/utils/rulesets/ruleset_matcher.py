@@ -93,14 +93,17 @@ TagsOfHosts: TypeAlias = dict[HostName | HostAddress, Mapping[TagGroupID, TagID]
 LabelGroupsCacheId = tuple[tuple[AndOrNotLiteral, tuple[tuple[AndOrNotLiteral, str], ...]], ...]
 
 PreprocessedPattern: TypeAlias = tuple[bool, Pattern[str]]
-PreprocessedServiceRuleset: TypeAlias = list[
-    tuple[
-        TRuleValue,
-        set[HostName],
-        LabelGroups,
-        LabelGroupsCacheId,
-        PreprocessedPattern,
-    ]
+PreprocessedServiceRule: TypeAlias = tuple[
+    TRuleValue,
+    set[HostName],
+    LabelGroups,
+    LabelGroupsCacheId,
+    PreprocessedPattern,
+]
+PreprocessedServiceRuleset: TypeAlias = list[PreprocessedServiceRule[TRuleValue]]
+# Host -> the rules of a service ruleset that may apply to the services of the host
+ServiceRulesetIndex: TypeAlias = Mapping[
+    HostName | HostAddress, Sequence[PreprocessedServiceRule[TRuleValue]]
 ]
 
 # FIXME: A lot of signatures regarding rules and rule sets are simply lying:
@@ -160,6 +163,15 @@ class RulesetMatchObject:
     #   * Item to match checkgroups
     service_description: ServiceName | Item
     service_labels: Labels
+    service_labels_hash: int = dataclasses.field(init=False, compare=False, repr=False)
+
+    def __post_init__(self) -> None:
+        # Needed for every rule evaluated for this object, so compute it only once.
+        object.__setattr__(
+            self,
+            "service_labels_hash",
+            hash(None if self.service_labels is None else frozenset(self.service_labels.items())),
+        )
 
 
 def merge_cluster_labels(all_node_labels: Iterable[Iterable[HostLabel]]) -> Sequence[HostLabel]:
@@ -408,33 +420,26 @@ class RulesetMatcher:
         ruleset: Sequence[RuleSpec[TRuleValue]],
     ) -> Iterator[TRuleValue]:
         """Returns a generator of the values of the matched rules"""
+        if match_object.service_description is None:
+            return
+
         with_foreign_hosts = (
             match_object.host_name not in self.ruleset_optimizer.all_processed_hosts()
         )
-        optimized_ruleset = self.ruleset_optimizer.get_service_ruleset(ruleset, with_foreign_hosts)
+        ruleset_index = self.ruleset_optimizer.get_service_ruleset_index(
+            ruleset, with_foreign_hosts
+        )
+        service_id = (match_object.service_description, match_object.service_labels_hash)
 
         for (
             value,
-            hosts,
+            _hosts,
             service_label_groups,
             service_label_groups_cache_id,
             service_description_condition,
-        ) in optimized_ruleset:
-            if match_object.service_description is None:
-                continue
-
-            if match_object.host_name not in hosts:
-                continue
-
+        ) in ruleset_index.get(match_object.host_name, ()):
             service_cache_id = (
-                (
-                    match_object.service_description,
-                    hash(
-                        None
-                        if match_object.service_labels is None
-                        else frozenset(match_object.service_labels.items())
-                    ),
-                ),
+                service_id,
                 service_description_condition,
                 service_label_groups_cache_id,
             )
@@ -498,6 +503,7 @@ class RulesetOptimizer:
         self._all_processed_hosts_similarity = 1.0
 
         self.__service_ruleset_cache: dict[tuple[int, bool], PreprocessedServiceRuleset] = {}
+        self.__service_ruleset_index_cache: dict[tuple[int, bool], ServiceRulesetIndex] = {}
         self.__host_ruleset_cache: dict[tuple[int, bool], Mapping[HostAddress, Sequence[Any]]] = {}
         self._all_matching_hosts_match_cache: dict[
             tuple[_ConditionCacheID, bool], set[HostName]
@@ -522,6 +528,7 @@ class RulesetOptimizer:
     def clear_ruleset_caches(self) -> None:
         self.__host_ruleset_cache.clear()
         self.__service_ruleset_cache.clear()
+        self.__service_ruleset_index_cache.clear()
 
     def clear_caches(self) -> None:
         self.__host_ruleset_cache.clear()
@@ -632,6 +639,42 @@ class RulesetOptimizer:
 
         return self.__service_ruleset_cache.setdefault(cache_id, _impl(ruleset, with_foreign_hosts))
 
+    def get_service_ruleset_index(
+        self, ruleset: Sequence[RuleSpec[TRuleValue]], with_foreign_hosts: bool
+    ) -> ServiceRulesetIndex[TRuleValue]:
+        """Maps each host to the rules of the ruleset matching the host (in ruleset order)
+
+        This way the service ruleset matching only needs to look at the rules that can
+        apply to the host at all. Many hosts share the same candidate rules, so the rule
+        sequences are shared between them.
+        """
+
+        def _impl(
+            ruleset: Sequence[RuleSpec[TRuleValue]], with_foreign_hosts: bool
+        ) -> ServiceRulesetIndex[TRuleValue]:
+            preprocessed_rules = self.get_service_ruleset(ruleset, with_foreign_hosts)
+            rule_indices: dict[HostName | HostAddress, list[int]] = {}
+            for rule_index, (_value, hosts, *_rest) in enumerate(preprocessed_rules):
+                for hostname in hosts:
+                    rule_indices.setdefault(hostname, []).append(rule_index)
+
+            shared: dict[tuple[int, ...], Sequence[PreprocessedServiceRule[TRuleValue]]] = {}
+            index: dict[HostName | HostAddress, Sequence[PreprocessedServiceRule[TRuleValue]]] = {}
+            for hostname, indices in rule_indices.items():
+                key = tuple(indices)
+                if (rules := shared.get(key)) is None:
+                    rules = shared[key] = tuple(preprocessed_rules[i] for i in key)
+                index[hostname] = rules
+            return index
+
+        cache_id = id(ruleset), with_foreign_hosts
+        with contextlib.suppress(KeyError):
+            return self.__service_ruleset_index_cache[cache_id]
+
+        return self.__service_ruleset_index_cache.setdefault(
+            cache_id, _impl(ruleset, with_foreign_hosts)
+        )
+
     @staticmethod
     def _convert_pattern_list(patterns: HostOrServiceConditions | None) -> PreprocessedPattern:
         """Compiles a list of service match patterns to a to a single regex
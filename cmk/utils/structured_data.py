@@ -10,10 +10,14 @@ structured monitoring data of Check_MK.
 from __future__ import annotations
 
 import gzip
+import hashlib
 import io
+import os
 import pprint
+import time
 from collections import Counter
 from collections.abc import Callable, Iterable, Mapping, Sequence
+from contextlib import suppress
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Generic, Literal, NewType, Self, TypedDict, TypeVar
@@ -38,7 +42,7 @@ from cmk.utils.hostaddress import HostName
 #   - 'all' -> _use_all
 # TODO Centralize different stores and loaders of tree files:
 #   - inventory/HOSTNAME, inventory/HOSTNAME.gz, inventory/.last
-#   - inventory_archive/HOSTNAME/TIMESTAMP,
+#   - inventory_archive/HOSTNAME/TIMESTAMP{,.delta}, inventory_archive/HOSTNAME/objects/HASH
 #   - inventory_delta_cache/HOSTNAME/TIMESTAMP_{TIMESTAMP,None}
 #   - status_data/HOSTNAME, status_data/HOSTNAME.gz
 
@@ -1760,7 +1764,29 @@ class TreeStore:
         return self._tree_dir / f"{host_name}.gz"
 
 
+# Time for archive() to write the delta file after the nodes it refers to
+_PRUNE_OBJECTS_MIN_AGE = 3600
+
+
+@dataclass(frozen=True, kw_only=True)
+class ArchivedDelta:
+    previous_timestamp: int | None
+    delta_tree: ImmutableDeltaTree
+
+
 class TreeOrArchiveStore(TreeStore):
+    """Current trees and their history
+
+    The archive of a host keeps the most recent archived tree in full. Each archived tree
+    additionally gets a delta file <timestamp>.delta which refers to the difference to its
+    predecessor (or to the empty tree). Once a newer tree is archived, the full tree of its
+    predecessor is dropped. Full trees archived by former versions are kept and serve as base.
+
+    The nodes of the delta trees are stored content addressed below objects/, thus
+    identical subtrees (eg. a flapping software package) are stored only once. Nodes which are
+    no longer referred to, eg. after removing deltas, are removed by prune_objects().
+    """
+
     def __init__(self, tree_dir: Path | str, archive: Path | str) -> None:
         super().__init__(tree_dir)
         self._archive_dir = Path(archive)
@@ -1769,11 +1795,7 @@ class TreeOrArchiveStore(TreeStore):
         if (tree_file := self._tree_file(host_name=host_name)).exists():
             return load_tree(tree_file)
 
-        try:
-            latest_archive_tree_file = max(
-                self._archive_host_dir(host_name).iterdir(), key=lambda tp: int(tp.name)
-            )
-        except (FileNotFoundError, ValueError):
+        if (latest_archive_tree_file := self._latest_archive_tree_file(host_name)) is None:
             return ImmutableTree()
 
         return load_tree(latest_archive_tree_file)
@@ -1781,10 +1803,139 @@ class TreeOrArchiveStore(TreeStore):
     def _archive_host_dir(self, host_name: HostName) -> Path:
         return self._archive_dir / str(host_name)
 
+    def _objects_dir(self, host_name: HostName) -> Path:
+        return self._archive_host_dir(host_name) / "objects"
+
+    def _delta_file(self, host_name: HostName, timestamp: int) -> Path:
+        return self._archive_host_dir(host_name) / f"{timestamp}.delta"
+
+    def _latest_archive_tree_file(self, host_name: HostName) -> Path | None:
+        try:
+            return max(
+                (fp for fp in self._archive_host_dir(host_name).iterdir() if fp.name.isdigit()),
+                key=lambda fp: int(fp.name),
+                default=None,
+            )
+        except FileNotFoundError:
+            return None
+
     def archive(self, *, host_name: HostName) -> None:
         if not (tree_file := self._tree_file(host_name)).exists():
             return
         target_dir = self._archive_host_dir(host_name)
         target_dir.mkdir(parents=True, exist_ok=True)
-        tree_file.rename(target_dir / str(int(tree_file.stat().st_mtime)))
+
+        timestamp = int(tree_file.stat().st_mtime)
+        if (previous_tree_file := self._latest_archive_tree_file(host_name)) is None:
+            previous_timestamp = None
+            previous_tree = ImmutableTree()
+        else:
+            # Trees which are archived within the same second must not overwrite each other.
+            previous_timestamp = int(previous_tree_file.name)
+            timestamp = max(timestamp, previous_timestamp + 1)
+            previous_tree = load_tree(previous_tree_file)
+
+        store.save_object_to_file(
+            self._delta_file(host_name, timestamp),
+            {
+                "previous": previous_timestamp,
+                "delta": self._store_delta_node(
+                    self._objects_dir(host_name),
+                    load_tree(tree_file).difference(previous_tree),
+                ),
+            },
+        )
+        tree_file.rename(target_dir / str(timestamp))
         self._gz_file(host_name).unlink(missing_ok=True)
+
+        if (
+            previous_tree_file is not None
+            and self._delta_file(host_name, int(previous_tree_file.name)).exists()
+        ):
+            # The predecessor can be looked up via the delta files from now on
+            previous_tree_file.unlink(missing_ok=True)
+
+    def _store_delta_node(self, objects_dir: Path, delta_tree: ImmutableDeltaTree) -> str:
+        raw = repr(
+            {
+                "Attributes": _serialize_delta_attributes(delta_tree.attributes),
+                "Table": _serialize_delta_table(delta_tree.table),
+                "Nodes": {
+                    name: self._store_delta_node(objects_dir, node)
+                    for name, node in delta_tree.nodes_by_name.items()
+                    if node
+                },
+            }
+        )
+        digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+        object_file = objects_dir / digest
+        try:
+            # Refresh existing nodes, they are not pruned until the delta file is written
+            os.utime(object_file)
+        except FileNotFoundError:
+            store.save_text_to_file(object_file, raw)
+        return digest
+
+    def prune_objects(self, *, host_name: HostName) -> None:
+        """Remove the nodes which are not referred to by any delta of the host
+
+        Recently written nodes are kept, they may belong to a delta which is just being
+        archived. Nothing is removed if one of the deltas or nodes cannot be read.
+        """
+        objects_dir = self._objects_dir(host_name)
+        try:
+            object_files = list(objects_dir.iterdir())
+        except FileNotFoundError:
+            return
+
+        referenced: set[str] = set()
+        try:
+            digests = [
+                store.load_object_from_file(delta_file, default=None)["delta"]
+                for delta_file in self._archive_host_dir(host_name).glob("*.delta")
+            ]
+            while digests:
+                if (digest := digests.pop()) in referenced:
+                    continue
+                referenced.add(digest)
+                if (
+                    raw_node := store.load_object_from_file(objects_dir / digest, default=None)
+                ) is not None:
+                    digests.extend(raw_node["Nodes"].values())
+        except (SyntaxError, ValueError, KeyError, TypeError):
+            return
+
+        min_mtime = time.time() - _PRUNE_OBJECTS_MIN_AGE
+        for object_file in object_files:
+            if object_file.name in referenced:
+                continue
+            with suppress(FileNotFoundError):
+                if object_file.stat().st_mtime < min_mtime:
+                    object_file.unlink()
+
+    def load_archived_delta(self, *, host_name: HostName, timestamp: int) -> ArchivedDelta:
+        """Load the difference of an archived tree to its predecessor
+
+        Raises ValueError if the delta or one of its nodes is missing or corrupted.
+        """
+        delta_file = self._delta_file(host_name, timestamp)
+        try:
+            raw = store.load_object_from_file(delta_file, default=None)
+            return ArchivedDelta(
+                previous_timestamp=raw["previous"],
+                delta_tree=self._load_delta_node(self._objects_dir(host_name), (), raw["delta"]),
+            )
+        except (SyntaxError, KeyError, TypeError) as e:
+            raise ValueError(delta_file) from e
+
+    def _load_delta_node(self, objects_dir: Path, path: SDPath, digest: str) -> ImmutableDeltaTree:
+        raw_node = store.load_object_from_file(objects_dir / digest, default=None)
+        return ImmutableDeltaTree(
+            path=path,
+            attributes=_deserialize_delta_attributes(raw_node["Attributes"]),
+            table=_deserialize_delta_table(raw_node["Table"]),
+            nodes_by_name={
+                name: self._load_delta_node(objects_dir, path + (name,), node_digest)
+                for name, node_digest in raw_node["Nodes"].items()
+            },
+        )
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmark of loading .mk configuration files with and without compiled files cache
+
+Generates folders with a rules.mk file each in a temporary directory and executes
+them like the configuration loading does, once with an empty compiled files cache
+and once with the cached code objects:
+
+    compiled_files_cache_benchmark.py --folders 100 --rules 100 --rounds 5
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+from cmk.ccc import store
+
+
+def write_rules_files(root_dir: Path, num_folders: int, num_rules: int) -> list[Path]:
+    paths = []
+    for folder_nr in range(num_folders):
+        path = root_dir / f"etc/check_mk/conf.d/wato/folder-{folder_nr}/rules.mk"
+        path.parent.mkdir(parents=True)
+        rules = ",\n".join(
+            repr(
+                {
+                    "id": f"{folder_nr}-{rule_nr}",
+                    "value": float(rule_nr),
+                    "condition": {
+                        "host_folder": f"/wato/folder-{folder_nr}/",
+                        "service_description": [{"$regex": f"Service {rule_nr}$"}],
+                    },
+                    "options": {"description": f"Rule {rule_nr} of folder {folder_nr}"},
+                }
+            )
+            for rule_nr in range(num_rules)
+        )
+        path.write_text(
+            "\nextra_service_conf.setdefault('check_interval', [])\n"
+            f"extra_service_conf['check_interval'] = [\n{rules}\n]"
+            " + extra_service_conf['check_interval']\n"
+        )
+        # Files modified just now are not cached
+        mtime = path.stat().st_mtime - 10
+        os.utime(path, (mtime, mtime))
+        paths.append(path)
+    return paths
+
+
+def load_duration(paths: Sequence[Path], temp_dir: Path, root_dir: Path) -> float:
+    start = time.perf_counter()
+    global_dict: dict[str, Any] = {"extra_service_conf": {}}
+    for path in paths:
+        code = store.load_code_from_compiled_files_cache(path, temp_dir=temp_dir, root_dir=root_dir)
+        exec(code, global_dict, global_dict)  # nosec B102 # BNS:aee528
+    return time.perf_counter() - start
+
+
+def parse_arguments(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--folders", type=int, default=100, help="number of folders")
+    parser.add_argument("--rules", type=int, default=100, help="rules per folder")
+    parser.add_argument("--rounds", type=int, default=5, help="loads of each kind")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str]) -> int:
+    args = parse_arguments(argv)
+    with tempfile.TemporaryDirectory() as work_dir:
+        root_dir = Path(work_dir, "site")
+        temp_dir = root_dir / "tmp/check_mk"
+        paths = write_rules_files(root_dir, args.folders, args.rules)
+
+        compiling = cached = 0.0
+        for _round in range(args.rounds):
+            store.clear_compiled_files_cache(temp_dir)
+            compiling += load_duration(paths, temp_dir, root_dir)
+            cached += load_duration(paths, temp_dir, root_dir)
+
+    print(f"Empty cache:   {compiling / args.rounds * 1000:.1f} ms")
+    print(f"Warm cache:    {cached / args.rounds * 1000:.1f} ms")
+    print(f"Speedup:       {compiling / cached:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
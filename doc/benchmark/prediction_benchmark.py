@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmark of summarizing the time slices of a prediction
+
+Generates the time slices of a prediction from a seed, with a few missing values, and
+resamples and summarizes them once with the former pure Python implementation and once
+with the current one. The averages, minima and maxima must be identical, the standard
+deviations may differ in the last bits:
+
+    prediction_benchmark.py --slices 13 --points 1440 --rounds 5 --seed 42
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from collections.abc import Callable, Sequence
+
+from cmk.utils.prediction import _prediction, DataStat
+
+
+def reference_resample(
+    current_range: range, values: Sequence[float | None], new_range: range
+) -> Sequence[float | None]:
+    """The former pure Python implementation"""
+    idx_max = len(values) - 1
+    return [
+        values[max(0, min(int((t - current_range.start) / current_range.step), idx_max))]
+        for t in new_range
+    ]
+
+
+def reference_data_stats(slices: Sequence[Sequence[float | None]]) -> list[DataStat | None]:
+    """The former pure Python implementation"""
+    result: list[DataStat | None] = []
+    for time_column in zip(*slices):
+        if not (values := [x for x in time_column if x is not None]):
+            result.append(None)
+            continue
+        average = sum(values) / float(len(values))
+        stdev = (
+            None
+            if len(values) == 1
+            else math.sqrt(
+                abs(sum(p**2 for p in values) - average**2 * len(values)) / float(len(values) - 1)
+            )
+        )
+        result.append(DataStat(average=average, min_=min(values), max_=max(values), stdev=stdev))
+    return result
+
+
+def reference_summary(
+    raw_range: range, slices: Sequence[Sequence[float | None]], new_range: range
+) -> list[DataStat | None]:
+    return reference_data_stats([reference_resample(raw_range, s, new_range) for s in slices])
+
+
+def current_summary(
+    raw_range: range, slices: Sequence[Sequence[float | None]], new_range: range
+) -> list[DataStat | None]:
+    return _prediction._data_stats(  # noqa: SLF001
+        [_prediction._forward_fill_resample(raw_range, s, new_range) for s in slices]  # noqa: SLF001
+    )
+
+
+def duration(
+    summary: Callable[[range, Sequence[Sequence[float | None]], range], list[DataStat | None]],
+    raw_range: range,
+    slices: Sequence[Sequence[float | None]],
+    rounds: int,
+) -> tuple[float, list[DataStat | None]]:
+    start = time.perf_counter()
+    for _round in range(rounds):
+        stats = summary(raw_range, slices, range(0, raw_range.stop // 2, raw_range.step // 2))
+    return (time.perf_counter() - start) / rounds, stats
+
+
+def stdev_deviation(found: list[DataStat | None], expected: list[DataStat | None]) -> float:
+    """The largest relative difference of the standard deviations
+
+    Returns infinity if anything else differs.
+    """
+    deviation = 0.0
+    for stat, reference in zip(found, expected, strict=True):
+        if stat is None or reference is None:
+            if stat is not reference:
+                return math.inf
+            continue
+        if (stat.average, stat.min_, stat.max_) != (
+            reference.average,
+            reference.min_,
+            reference.max_,
+        ):
+            return math.inf
+        if stat.stdev is None or reference.stdev is None:
+            if stat.stdev is not reference.stdev:
+                return math.inf
+            continue
+        if stat.stdev != reference.stdev:
+            if not reference.stdev:
+                return math.inf
+            deviation = max(deviation, abs(stat.stdev - reference.stdev) / reference.stdev)
+    return deviation
+
+
+def parse_arguments(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--slices", type=int, default=13, help="number of time slices")
+    parser.add_argument("--points", type=int, default=1440, help="values per time slice")
+    parser.add_argument("--rounds", type=int, default=5, help="summaries of each implementation")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the values")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str]) -> int:
+    args = parse_arguments(argv)
+    rng = random.Random(args.seed)
+    # The slices are upsampled to half of the step, as done for an RRD with a coarser resolution
+    raw_range = range(0, 120 * args.points, 120)
+    slices = [
+        [None if rng.random() < 0.05 else rng.uniform(0, 100) for _point in raw_range]
+        for _slice in range(args.slices)
+    ]
+
+    time_reference, expected = duration(reference_summary, raw_range, slices, args.rounds)
+    time_current, found = duration(current_summary, raw_range, slices, args.rounds)
+
+    print(f"Former implementation:  {time_reference * 1000:.1f} ms")
+    print(f"Current implementation: {time_current * 1000:.1f} ms")
+    print(f"Speedup:                {time_reference / time_current:.1f}x")
+    deviation = stdev_deviation(found, expected)
+    print(f"Standard deviations:    {deviation:.1e} largest relative difference")
+    if deviation > 1e-12:
+        print("ERROR: The summaries of the implementations differ")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmark of service ruleset lookups depending on the rules of other hosts
+
+Each host has one rule of its own in the service ruleset. The lookups are done for
+the services of a few hosts, once with only the rules of these hosts and once with
+the rules of all hosts. The time per lookup should not depend on the latter:
+
+    ruleset_matcher_benchmark.py --hosts 2000 --services 50 --rounds 5
+"""
+
+import argparse
+import sys
+import time
+from collections.abc import Sequence
+
+from cmk.utils.hostaddress import HostName
+from cmk.utils.labels import BuiltinHostLabelsStore
+from cmk.utils.rulesets.ruleset_matcher import (
+    LabelManager,
+    RulesetMatcher,
+    RulesetMatchObject,
+    RuleSpec,
+)
+
+
+def make_matcher(hosts: Sequence[HostName]) -> RulesetMatcher:
+    return RulesetMatcher(
+        host_tags={host: {} for host in hosts},
+        host_paths={},
+        label_manager=LabelManager(
+            explicit_host_labels={},
+            host_label_rules=(),
+            service_label_rules=(),
+            discovered_labels_of_service=lambda _host_name, _service_name: {},
+        ),
+        all_configured_hosts=frozenset(hosts),
+        clusters_of={},
+        nodes_of={},
+        builtin_host_labels_store=BuiltinHostLabelsStore(),
+    )
+
+
+def make_ruleset(
+    hosts: Sequence[HostName], num_rules: int, num_services: int
+) -> Sequence[RuleSpec[int]]:
+    return [
+        {
+            "id": str(n),
+            "value": n,
+            "condition": {
+                "host_name": [hosts[n]],
+                "service_description": [{"$regex": f"Service {n % num_services}$"}],
+            },
+        }
+        for n in range(num_rules)
+    ]
+
+
+def per_lookup_duration(
+    matcher: RulesetMatcher,
+    match_objects: Sequence[RulesetMatchObject],
+    ruleset: Sequence[RuleSpec[int]],
+    rounds: int,
+) -> float:
+    # Build the index outside of the measurement
+    list(matcher.get_service_ruleset_values(match_objects[0], ruleset))
+    start = time.perf_counter()
+    for _round in range(rounds):
+        for match_object in match_objects:
+            list(matcher.get_service_ruleset_values(match_object, ruleset))
+    return (time.perf_counter() - start) / (rounds * len(match_objects))
+
+
+def parse_arguments(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--hosts", type=int, default=2000, help="number of hosts")
+    parser.add_argument("--lookup-hosts", type=int, default=20, help="hosts to look up")
+    parser.add_argument("--services", type=int, default=50, help="services per host")
+    parser.add_argument("--rounds", type=int, default=5, help="lookups of each service")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str]) -> int:
+    args = parse_arguments(argv)
+    hosts = [HostName(f"host{n}") for n in range(args.hosts)]
+    matcher = make_matcher(hosts)
+    match_objects = [
+        RulesetMatchObject(host, f"Service {n}", {"label": str(n)})
+        for host in hosts[: args.lookup_hosts]
+        for n in range(args.services)
+    ]
+
+    few_rules = per_lookup_duration(
+        matcher,
+        match_objects,
+        make_ruleset(hosts, args.lookup_hosts, args.services),
+        args.rounds,
+    )
+    many_rules = per_lookup_duration(
+        matcher, match_objects, make_ruleset(hosts, args.hosts, args.services), args.rounds
+    )
+
+    print(f"Rules of looked up hosts:  {few_rules * 1e6:.2f} us/lookup")
+    print(f"Rules of all hosts:        {many_rules * 1e6:.2f} us/lookup")
+    print(f"Ratio:                     {many_rules / few_rules:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmark of the rule matching of the event console with and without literal prefilter
+
+Generates rule packs and syslog messages from a seed, similar to the ones found in
+larger installations: Most message patterns contain some literal text, a few
+don't, and some rule packs start with a rule skipping the rest of the pack. Each
+message is matched against the rules like the event console does it, once trying
+all rules and once only the candidates of the prefilter. The first matching rule
+must be the same for each message:
+
+    rule_matching_benchmark.py --rules 2000 --packs 40 --messages 2000 --seed 42
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections.abc import Callable, Sequence
+
+from livestatus import SiteId
+
+from cmk.ec.config import Rule
+from cmk.ec.event import create_event_from_syslog_message, Event
+from cmk.ec.rule_matcher import compile_rule, MatchSuccess, RuleMatcher
+from cmk.ec.rule_prefilter import RulePrefilter
+
+_SERVICES = ["nginx", "postgres", "backup", "mysql", "kafka", "redis", "haproxy", "tomcat", "ldap"]
+_APPLICATIONS = ["sshd", "kernel", "cron", "postfix/smtpd", "systemd", "java", "sudo"]
+
+# Pairs of message pattern and message text, {name} is replaced by a service name
+_TEMPLATES = [
+    ("{name}: connection to [a-z0-9.-]+ failed", "{name}: connection to db-17.example.com failed"),
+    (
+        "Out of memory: Kill(ed)? process [0-9]+ \\({name}\\)",
+        "Out of memory: Killed process 42 ({name})",
+    ),
+    ("{name} (disk|raid|controller) (failure|error)", "{name} raid failure on slot 3"),
+    ("(Started|Stopped) {name}\\.service", "Stopped {name}.service"),
+    ("{name} health check timeout", "{name} health check timeout"),
+    (
+        "^{name}\\[[0-9]+\\]: certificate expires in [0-9]+ days",
+        "{name}[4711]: certificate expires in 7 days",
+    ),
+    ("job {name} finished with (exit code [1-9]|errors)", "job {name} finished with errors"),
+]
+
+# Patterns the prefilter can't say anything about, they are always tried
+_UNSPECIFIC = ["^[0-9]+ .*[0-9]$", "(ok|up)$", ".*"]
+
+_NOISE = [
+    "Accepted publickey for root from 10.1.2.%d port 4711",
+    "session opened for user backup by (uid=%d)",
+    "connect from unknown[192.168.0.%d]",
+    "Started Daily apt activities %d.",
+    "pam_unix(cron:session): session closed for user root %d",
+]
+
+
+def generate_rule_packs(
+    rng: random.Random, num_rules: int, num_packs: int
+) -> tuple[list[Rule], list[str]]:
+    """Return the compiled rules of all packs and message texts matching some of them"""
+    rules: list[Rule] = []
+    samples: list[str] = []
+    for nr in range(num_rules):
+        pack = f"pack{nr * num_packs // num_rules}"
+        name = f"{rng.choice(_SERVICES)}{rng.randrange(1000)}"
+        rule = Rule(id=f"rule{nr}", pack=pack)
+        if nr * num_packs % num_rules < num_packs and rng.random() < 0.5:
+            rule["match"] = f"^{name}-debug"
+            rule["drop"] = "skip_pack"
+            samples.append(f"{name}-debug: {rng.choice(_NOISE) % nr}")
+        elif rng.random() < 0.02:
+            rule["match"] = rng.choice(_UNSPECIFIC)
+            rule["match_priority"] = (0, 1)
+        else:
+            pattern, sample = rng.choice(_TEMPLATES)
+            rule["match"] = pattern.format(name=name)
+            samples.append(sample.format(name=name))
+        if rng.random() < 0.1:
+            rule["match_application"] = rng.choice(_APPLICATIONS)
+        compile_rule(rule)
+        rules.append(rule)
+    return rules, samples
+
+
+def generate_events(rng: random.Random, samples: Sequence[str], num_messages: int) -> list[Event]:
+    events = []
+    for nr in range(num_messages):
+        text = rng.choice(samples) if rng.random() < 0.3 else rng.choice(_NOISE) % nr
+        message = (
+            f"<{rng.randrange(192)}>{time.strftime('%b %d %H:%M:%S')} "
+            f"host-{rng.randrange(1000)} {rng.choice(_APPLICATIONS)}[{nr}]: {text}"
+        )
+        events.append(create_event_from_syslog_message(message.encode("utf-8"), None, None))
+    return events
+
+
+def first_matches(
+    matcher: RuleMatcher,
+    events: Sequence[Event],
+    candidates: Callable[[Event], Sequence[Rule]],
+) -> list[str | None]:
+    """Return the ID of the rule creating an event for each message, like the event console"""
+    result: list[str | None] = []
+    for event in events:
+        skip_pack = None
+        hit = None
+        for rule in candidates(event):
+            if skip_pack and rule["pack"] == skip_pack:
+                continue
+            skip_pack = None
+            if isinstance(matcher.event_rule_matches(rule, event), MatchSuccess):
+                if rule.get("drop") == "skip_pack":
+                    skip_pack = rule["pack"]
+                    continue
+                hit = rule["id"]
+                break
+        result.append(hit)
+    return result
+
+
+def parse_arguments(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--rules", type=int, default=2000, help="number of rules")
+    parser.add_argument("--packs", type=int, default=40, help="number of rule packs")
+    parser.add_argument("--messages", type=int, default=2000, help="number of messages")
+    parser.add_argument("--seed", type=int, default=0, help="seed for rules and messages")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str]) -> int:
+    args = parse_arguments(argv)
+    rng = random.Random(args.seed)
+    rules, samples = generate_rule_packs(rng, args.rules, args.packs)
+    events = generate_events(rng, samples, args.messages)
+    matcher = RuleMatcher(None, SiteId("benchmark"), lambda _timeperiod: True)
+
+    start = time.perf_counter()
+    prefilter = RulePrefilter(rules)
+    setup_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = first_matches(matcher, events, lambda _event: rules)
+    time_all = time.perf_counter() - start
+
+    start = time.perf_counter()
+    found = first_matches(matcher, events, lambda event: prefilter.candidates(rules, event["text"]))
+    time_prefiltered = time.perf_counter() - start
+
+    num_candidates = sum(len(prefilter.candidates(rules, event["text"])) for event in events)
+    print(f"Rules:                  {len(rules)} ({prefilter.num_unfiltered} always tried)")
+    print(
+        f"Messages:               {len(events)} ({sum(hit is not None for hit in expected)} hits)"
+    )
+    print(f"Prefilter setup:        {setup_time * 1000:.1f} ms")
+    print(f"Avg. candidate rules:   {num_candidates / len(events):.1f}")
+    print(f"All rules:              {time_all / len(events) * 1e6:.1f} us/message")
+    print(f"Prefiltered rules:      {time_prefiltered / len(events) * 1e6:.1f} us/message")
+    print(f"Speedup:                {time_all / time_prefiltered:.1f}x")
+    if found != expected:
+        print("ERROR: The prefilter changed the first matching rule of some messages")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Replayable syslog load for benchmarking the ingestion of the event console
+
+Sends syslog messages via UDP at a fixed rate and reports how many of them the
+event console has received, processed and dropped, according to its status table.
+
+The messages are either generated from a seed (the same seed always produces the
+same messages, apart from the timestamps) or replayed from a file with one message per line, e.g. recorded
+from a production syslog stream:
+
+    syslog_load_generator.py --rate 20000 --duration 10 --seed 42
+    syslog_load_generator.py --rate 5000 --duration 60 --replay messages.txt
+
+Run it as site user, so the status socket of the event console can be found.
+"""
+
+import argparse
+import ast
+import itertools
+import os
+import random
+import socket
+import sys
+import time
+from collections.abc import Iterator, Mapping, Sequence
+from pathlib import Path
+
+_STATUS_COLUMNS = [
+    "status_messages",
+    "status_ingestion_drops",
+    "status_ingestion_queue_length",
+    "status_average_processing_time",
+]
+
+
+def generated_messages(seed: int) -> Iterator[bytes]:
+    rng = random.Random(seed)
+    applications = ["sshd", "kernel", "cron", "postfix/smtpd", "systemd"]
+    texts = [
+        "Accepted publickey for root from 10.1.2.%d port 4711",
+        "Out of memory: Killed process %d",
+        "session opened for user backup by (uid=%d)",
+        "connect from unknown[192.168.0.%d]",
+        "Started Daily apt activities %d.",
+    ]
+    for nr in itertools.count():
+        text = rng.choice(texts) % rng.randrange(256)
+        yield (
+            f"<{rng.randrange(192)}>{time.strftime('%b %d %H:%M:%S')} "
+            f"host-{rng.randrange(1000)} {rng.choice(applications)}[{nr}]: {text}"
+        ).encode("utf-8")
+
+
+def replayed_messages(path: Path) -> Iterator[bytes]:
+    messages = [line for line in path.read_bytes().splitlines() if line]
+    if not messages:
+        raise ValueError(f"No messages in {path}")
+    return itertools.cycle(messages)
+
+
+def send(messages: Iterator[bytes], address: tuple[str, int], rate: int, duration: float) -> int:
+    """Send the messages evenly distributed in bursts of 10ms, return the number of sent ones"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.connect(address)
+    sent = 0
+    start = time.monotonic()
+    while (elapsed := time.monotonic() - start) < duration:
+        for message in itertools.islice(messages, int(rate * elapsed) - sent):
+            sock.send(message)
+            sent += 1
+        time.sleep(0.01)
+    sock.close()
+    return sent
+
+
+def query_status(socket_path: Path) -> Mapping[str, float]:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(10)
+        sock.connect(str(socket_path))
+        sock.sendall(f"GET status\nColumns: {' '.join(_STATUS_COLUMNS)}\n".encode("utf-8"))
+        sock.shutdown(socket.SHUT_WR)
+        response = b""
+        while chunk := sock.recv(8192):
+            response += chunk
+    headers, row = ast.literal_eval(response.decode("utf-8"))
+    return dict(zip(headers, row))
+
+
+def parse_arguments(argv: Sequence[str]) -> argparse.Namespace:
+    omd_root = Path(os.environ.get("OMD_ROOT", ""))
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--host", default="127.0.0.1", help="syslog host (default: %(default)s)")
+    parser.add_argument(
+        "--port", type=int, default=514, help="syslog UDP port (default: %(default)s)"
+    )
+    parser.add_argument("--rate", type=int, default=20000, help="messages per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to send messages")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the generated messages")
+    parser.add_argument("--replay", type=Path, help="file with messages to send, one per line")
+    parser.add_argument(
+        "--status-socket",
+        type=Path,
+        default=omd_root / "tmp/run/mkeventd/status",
+        help="status socket of the event console (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--settle-time",
+        type=float,
+        default=5.0,
+        help="seconds to wait for the event console to process the queued messages",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str]) -> int:
+    args = parse_arguments(argv)
+    messages = (
+        generated_messages(args.seed) if args.replay is None else replayed_messages(args.replay)
+    )
+
+    before = query_status(args.status_socket)
+    sent = send(messages, (args.host, args.port), args.rate, args.duration)
+    time.sleep(args.settle_time)
+    after = query_status(args.status_socket)
+
+    received = after["status_messages"] - before["status_messages"]
+    dropped = after["status_ingestion_drops"] - before["status_ingestion_drops"]
+    queued = after["status_ingestion_queue_length"]
+    print(f"Sent:                   {sent} ({sent / args.duration:.0f}/s)")
+    print(f"Processed:              {received:.0f}")
+    print(f"Dropped (ingestion):    {dropped:.0f}")
+    print(f"Lost (kernel/network):  {sent - received - dropped - queued:.0f}")
+    print(f"Still queued:           {queued:.0f}")
+    print(f"Avg. processing time:   {after['status_average_processing_time'] * 1000:.3f} ms")
+    return 0 if received == sent else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
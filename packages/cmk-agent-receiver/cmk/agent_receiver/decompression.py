@@ -3,10 +3,15 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+from collections.abc import Iterator
 from enum import Enum
-from zlib import decompress
+from typing import BinaryIO, IO
+from zlib import decompress, decompressobj
 from zlib import error as zlibError
 
+# Upper bound for the size of the chunks read from the upload and written to disk
+CHUNK_SIZE = 64 * 1024
+
 
 class DecompressionError(Exception): ...
 
@@ -22,6 +27,19 @@ class Decompressor(Enum):
         """
         return {Decompressor.ZLIB: Decompressor._zlib_decompress}[self](data)
 
+    def stream(self, source: BinaryIO, target: IO[bytes]) -> None:
+        """Decompress from source to target without holding the complete data in memory
+
+        >>> from io import BytesIO
+        >>> from zlib import compress
+        >>> target = BytesIO()
+        >>> Decompressor("zlib").stream(BytesIO(compress(b"blablub" * 100000)), target)
+        >>> target.getvalue() == b"blablub" * 100000
+        True
+        """
+        for chunk in {Decompressor.ZLIB: Decompressor._zlib_decompress_chunks}[self](source):
+            target.write(chunk)
+
     @staticmethod
     def _zlib_decompress(data: bytes) -> bytes:
         """
@@ -37,3 +55,31 @@ class Decompressor(Enum):
             return decompress(data)
         except zlibError as e:
             raise DecompressionError(f"Decompression with zlib failed: {e}") from e
+
+    @staticmethod
+    def _zlib_decompress_chunks(source: BinaryIO) -> Iterator[bytes]:
+        """
+        >>> from io import BytesIO
+        >>> from zlib import compress
+        >>> list(Decompressor._zlib_decompress_chunks(BytesIO(compress(b"blablub"))))
+        [b'blablub']
+        >>> list(Decompressor._zlib_decompress_chunks(BytesIO(compress(b"blablub")[:-2])))
+        Traceback (most recent call last):
+            ...
+        packages.cmk-agent-receiver.cmk.agent_receiver.decompression.DecompressionError: ...
+        """
+        decompressor = decompressobj()
+        try:
+            while compressed := source.read(CHUNK_SIZE):
+                # Limit the output per step, highly compressed data must not blow up the memory
+                while compressed and not decompressor.eof:
+                    yield decompressor.decompress(compressed, CHUNK_SIZE)
+                    compressed = decompressor.unconsumed_tail
+                if decompressor.eof:
+                    break
+            if not decompressor.eof:
+                raise DecompressionError(
+                    "Decompression with zlib failed: incomplete or truncated stream"
+                )
+        except zlibError as e:
+            raise DecompressionError(f"Decompression with zlib failed: {e}") from e
@@ -7,10 +7,11 @@ import os
 import tempfile
 from functools import cache
 from pathlib import Path
-from typing import assert_never
+from typing import assert_never, BinaryIO
 
 from cryptography.x509 import Certificate
 from fastapi import Depends, File, Header, HTTPException, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from pydantic import UUID4
 from starlette.status import (
@@ -350,15 +351,21 @@ def _validate_is_allowed(credentials: HTTPBasicCredentials, uuid: UUID4) -> None
 
 def _store_agent_data(
     target_dir: Path,
-    decompressed_data: bytes,
+    compressed_data: BinaryIO,
+    decompressor: Decompressor,
 ) -> None:
+    """Decompress the data chunk by chunk directly into the agent output file
+
+    This is blocking file I/O, so it must not be executed in the event loop.
+    """
     target_dir.resolve().mkdir(parents=True, exist_ok=True)
     with tempfile.NamedTemporaryFile(
         dir=target_dir,
         delete=False,
     ) as temp_file:
         try:
-            temp_file.write(decompressed_data)
+            decompressor.stream(compressed_data, temp_file)
+            temp_file.flush()
             os.rename(temp_file.name, target_dir / "agent_output")
         finally:
             Path(temp_file.name).unlink(missing_ok=True)
@@ -409,7 +416,12 @@ async def agent_data(
         ) from e
 
     try:
-        decompressed_agent_data = decompressor(monitoring_data.file.read())
+        await run_in_threadpool(
+            _store_agent_data,
+            host.source_path,
+            monitoring_data.file,
+            decompressor,
+        )
     except DecompressionError as e:
         logger.error(
             "uuid=%s Decompression of agent data failed: %s",
@@ -421,11 +433,6 @@ async def agent_data(
             detail="Decompression of agent data failed",
         ) from e
 
-    _store_agent_data(
-        host.source_path,
-        decompressed_agent_data,
-    )
-
     logger.info(
         "uuid=%s Agent data saved",
         uuid,
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Load test for the agent data upload of many concurrent push agents"""
+
+import asyncio
+import statistics
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from uuid import UUID, uuid4
+from zlib import compress
+
+import httpx
+from fastapi import FastAPI
+from pydantic import UUID4
+
+from cmk.agent_receiver import site_context
+from cmk.agent_receiver.apps_and_routers import AGENT_RECEIVER_APP
+from cmk.agent_receiver.main import main_app
+
+
+@dataclass(frozen=True)
+class LoadResult:
+    duration: float
+    latencies: Sequence[float]
+    failures: int
+
+    @property
+    def requests_per_second(self) -> float:
+        return len(self.latencies) / self.duration
+
+    @property
+    def p99_latency(self) -> float:
+        return statistics.quantiles(self.latencies, n=100)[98]
+
+    def __str__(self) -> str:
+        return (
+            f"{len(self.latencies)} requests, {self.failures} failed, "
+            f"{self.requests_per_second:.1f} requests/s, p99 latency {self.p99_latency * 1000:.1f} ms"
+        )
+
+
+async def push_agent_data(
+    app: FastAPI, uuids: Sequence[UUID4], compressed_data: bytes, *, rounds: int
+) -> LoadResult:
+    """Let every agent upload its data the given number of times, all agents concurrently"""
+    latencies: list[float] = []
+    failures = 0
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://agent-receiver"
+    ) as client:
+
+        async def push_agent(uuid: UUID4) -> None:
+            nonlocal failures
+            for _round in range(rounds):
+                before = time.perf_counter()
+                response = await client.post(
+                    f"/agent_data/{uuid}",
+                    headers={"compression": "zlib", "verified-uuid": str(uuid)},
+                    files={"monitoring_data": ("monitoring_data", compressed_data)},
+                )
+                latencies.append(time.perf_counter() - before)
+                if response.status_code != 204:
+                    failures += 1
+
+        before = time.perf_counter()
+        await asyncio.gather(*(push_agent(uuid) for uuid in uuids))
+        duration = time.perf_counter() - before
+
+    return LoadResult(duration, latencies, failures)
+
+
+def _register_push_hosts(tmp_path: Path, number: int) -> list[UUID4]:
+    uuids = []
+    for nr in range(number):
+        uuid = UUID(str(uuid4()))
+        (target_dir := tmp_path / "push-agent" / f"host-{nr}").mkdir(parents=True)
+        (site_context.agent_output_dir() / str(uuid)).symlink_to(target_dir)
+        uuids.append(uuid)
+    return uuids
+
+
+def test_agent_data_concurrent_push_agents(
+    tmp_path: Path, record_property: Callable[[str, object], None]
+) -> None:
+    main_app()
+    uuids = _register_push_hosts(tmp_path, 50)
+    agent_output = b"".join(b"<<<section_%d>>>\n%s\n" % (nr, b"x" * nr) for nr in range(2000))
+
+    result = asyncio.run(
+        push_agent_data(AGENT_RECEIVER_APP, uuids, compress(agent_output), rounds=4)
+    )
+
+    # Reported in the JUnit XML, e.g. to follow the throughput over time
+    record_property("requests_per_second", round(result.requests_per_second, 1))
+    record_property("p99_latency_ms", round(result.p99_latency * 1000, 1))
+    assert not result.failures, str(result)
+    assert len(result.latencies) == 200
+    for nr in range(len(uuids)):
+        assert (
+            tmp_path / "push-agent" / f"host-{nr}" / "agent_output"
+        ).read_bytes() == agent_output
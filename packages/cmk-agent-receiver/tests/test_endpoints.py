@@ -680,6 +680,42 @@ def test_agent_data_success(
     assert response.status_code == 204
 
 
+@pytest.mark.usefixtures("symlink_push_host")
+def test_agent_data_success_large_data(
+    tmp_path: Path,
+    client: TestClient,
+    uuid: UUID4,
+    agent_data_headers: MutableMapping[str, str],
+) -> None:
+    agent_output = b"".join(b"<<<section_%d>>>\n%s\n" % (nr, b"x" * nr) for nr in range(5000))
+    response = client.post(
+        f"/agent_data/{uuid}",
+        headers=agent_data_headers,
+        files={"monitoring_data": ("filename", io.BytesIO(compress(agent_output)))},
+    )
+
+    assert response.status_code == 204
+    assert (tmp_path / "push-agent" / "hostname" / "agent_output").read_bytes() == agent_output
+
+
+@pytest.mark.usefixtures("symlink_push_host")
+def test_agent_data_truncated_data(
+    tmp_path: Path,
+    client: TestClient,
+    uuid: UUID4,
+    agent_data_headers: MutableMapping[str, str],
+) -> None:
+    response = client.post(
+        f"/agent_data/{uuid}",
+        headers=agent_data_headers,
+        files={"monitoring_data": ("filename", io.BytesIO(compress(b"mock file" * 1000)[:-10]))},
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Decompression of agent data failed"}
+    assert not list((tmp_path / "push-agent" / "hostname").iterdir())
+
+
 @pytest.fixture(name="registration_status_headers")
 def fixture_registration_status_headers(uuid: UUID4) -> dict[str, str]:
     return {
@@ -6,14 +6,20 @@
 functionality is the locked file opening realized with the File() context
 manager."""
 
+import importlib.util
 import logging
+import marshal
+import os
 import pickle
 import pprint
 import shutil
+import struct
+import time
 from collections.abc import Mapping
-from contextlib import nullcontext
+from contextlib import nullcontext, suppress
 from pathlib import Path
-from typing import Any
+from types import CodeType
+from typing import Any, Final
 
 from cmk import trace
 from cmk.ccc.exceptions import MKGeneralException, MKTerminate, MKTimeout
@@ -24,6 +30,7 @@ from cmk.ccc.store._file import (
     ObjectStore,
     PickleSerializer,
     PydanticStore,
+    raise_for_permissions,
     Serializer,
     TextSerializer,
 )
@@ -55,6 +62,7 @@ __all__ = [
     "lock_checkmk_configuration",
     "lock_exclusive",
     "locked",
+    "raise_for_permissions",
     "release_all_locks",
     "release_lock",
     "try_acquire_lock",
@@ -359,3 +367,96 @@ def try_load_file_from_pickle_cache(
 def clear_pickled_files_cache(temp_dir: Path) -> None:
     """Remove all cached pickle files"""
     shutil.rmtree(_pickled_files_cache_dir(temp_dir), ignore_errors=True)
+
+
+def _compiled_files_cache_dir(temp_dir: Path) -> Path:
+    return temp_dir / "compiled_files_cache"
+
+
+# Python magic number, inode, size and mtime of the source file
+_COMPILED_FILE_HEADER: Final = struct.Struct("<4sQQQ")
+
+# Files modified within this period may still be modified without changing the mtime
+_COMPILED_FILE_MIN_AGE_NS: Final = 2 * 10**9
+
+# Seconds between two prunings of the compiled files cache
+_COMPILED_FILES_PRUNE_INTERVAL: Final = 3600
+
+
+def load_code_from_compiled_files_cache(path: Path, *, temp_dir: Path, root_dir: Path) -> CodeType:
+    """Compile the Python source file `path`, reusing the code compiled by earlier calls
+
+    Configuration files like rules.mk are executed by every process loading the
+    configuration. Instead of parsing them again and again, the marshalled code objects
+    are cached in the tmpfs directory under the same relative site path (like the
+    pickled files cache). A cached code object is only used if the inode, size and
+    mtime of the source file and the Python version still match.
+    """
+    stat = path.stat()
+    header = _COMPILED_FILE_HEADER.pack(
+        importlib.util.MAGIC_NUMBER, stat.st_ino, stat.st_size, stat.st_mtime_ns
+    )
+
+    try:
+        relative_path = path.relative_to(root_dir)  # usually cmk.utils.paths.omd_root
+    except ValueError:
+        return compile(path.read_bytes(), path, "exec")
+
+    cache_path = (
+        _compiled_files_cache_dir(temp_dir) / relative_path.parent / (relative_path.name + ".code")
+    )
+    try:
+        cached = cache_path.read_bytes()
+        if cached.startswith(header):
+            if isinstance(code := marshal.loads(memoryview(cached)[len(header) :]), CodeType):
+                return code
+    except FileNotFoundError:
+        pass
+    except (EOFError, ValueError, TypeError):
+        logger.debug("Ignoring broken compiled file %s", cache_path)
+
+    code = compile(path.read_bytes(), path, "exec")
+    if stat.st_mtime_ns < time.time_ns() - _COMPILED_FILE_MIN_AGE_NS:
+        try:
+            cache_path.parent.mkdir(exist_ok=True, parents=True)
+            ObjectStore(cache_path, serializer=BytesSerializer()).write_obj(
+                header + marshal.dumps(code)
+            )
+        except (OSError, MKGeneralException) as e:
+            # E.g. a full tmpfs, or the directory has just been pruned by another process
+            logger.debug("Cannot write compiled file %s: %s", cache_path, e)
+    return code
+
+
+def prune_compiled_files_cache(*, temp_dir: Path, root_dir: Path) -> None:
+    """Remove the cached code objects of source files which don't exist anymore
+
+    This looks at every cached file, so it is done at most once per
+    _COMPILED_FILES_PRUNE_INTERVAL by all processes together.
+    """
+    cache_dir = _compiled_files_cache_dir(temp_dir)
+    stamp_path = cache_dir.with_name(cache_dir.name + ".pruned")
+    with suppress(FileNotFoundError):
+        if time.time() - stamp_path.stat().st_mtime < _COMPILED_FILES_PRUNE_INTERVAL:
+            return
+    try:
+        stamp_path.touch()
+    except OSError:
+        return
+
+    for dir_path, _dir_names, file_names in os.walk(cache_dir, topdown=False):
+        relative_dir = Path(dir_path).relative_to(cache_dir)
+        for file_name in file_names:
+            if (
+                file_name.endswith(".code")
+                and not (root_dir / relative_dir / file_name.removesuffix(".code")).exists()
+            ):
+                (Path(dir_path) / file_name).unlink(missing_ok=True)
+        if relative_dir != Path("."):
+            with suppress(OSError):
+                os.rmdir(dir_path)  # fails unless empty
+
+
+def clear_compiled_files_cache(temp_dir: Path) -> None:
+    """Remove all cached code objects"""
+    shutil.rmtree(_compiled_files_cache_dir(temp_dir), ignore_errors=True)
@@ -88,7 +88,7 @@ class PickleSerializer(Generic[TObject]):
         return obj
 
 
-def _raise_for_permissions(path: Path) -> None:
+def raise_for_permissions(path: Path) -> None:
     """Ensure that the file is owned by the current user or root and not world writable.
     Raise an exception otherwise."""
     stat = path.stat()
@@ -145,7 +145,7 @@ class RealIo:
 
     def read(self) -> bytes:
         try:
-            _raise_for_permissions(self.path)
+            raise_for_permissions(self.path)
             return self.path.read_bytes()
         except FileNotFoundError:
             # Since locking (currently) creates an empty file,
@@ -7,11 +7,11 @@
 from __future__ import annotations
 
 import ast
+import codecs
 import contextlib
 import json
 import os
 import re
-import select
 import socket
 import ssl
 import threading
@@ -20,8 +20,7 @@ from collections.abc import Callable, Iterator, Sequence
 from dataclasses import dataclass, field
 from enum import Enum
 from functools import cache
-from io import BytesIO
-from typing import Any, Literal, NamedTuple, NewType, override, TypedDict
+from typing import Any, Literal, NamedTuple, NewType, NoReturn, override, TypedDict
 
 from opentelemetry import trace
 
@@ -676,29 +675,114 @@ class SingleSiteConnection(Helpers):
             except KeyError:
                 pass
 
-    def receive_data(self, size: int, timeout: float | None = None) -> bytes:
+    def receive_data(self, size: int, timeout: float | None = None) -> bytearray:
+        data = bytearray(size)
+        for _chunk in self._receive_chunks(size, timeout, memoryview(data)):
+            pass
+        return data
+
+    def _receive_chunks(
+        self, size: int, timeout: float | None, buffer: memoryview
+    ) -> Iterator[memoryview]:
+        """Receive size bytes into the buffer and yield the received parts of it
+
+        In case the buffer is smaller than size, it is reused from its start once it is full, so a
+        chunk is only valid until the next one has been requested. The timeout applies to each
+        read from the socket and to the whole operation.
+        """
         if self.socket is None:
             raise MKLivestatusSocketError("Socket to '%s' is not connected" % self.socketurl)
 
-        data = BytesIO()
         self.socket.settimeout(timeout)
         receive_start = time.time()
-        while size > 0:
-            if is_socket_readable(self.socket, 0.1):
-                packet = self.socket.recv(size)
-                if not packet:
+        received = 0
+        offset = 0
+        try:
+            while received < size:
+                if offset == len(buffer):
+                    offset = 0
+                num_bytes = self.socket.recv_into(
+                    buffer[offset:], min(len(buffer) - offset, size - received)
+                )
+                if not num_bytes:
                     raise MKLivestatusSocketClosed(
                         "Read zero data from socket, remote peer closed connection."
                     )
-                size -= len(packet)
-                data.write(packet)
-            if timeout is not None and (time.time() - receive_start) > timeout:
-                raise MKLivestatusSocketError(
-                    f"{timeout}s while reading data from socket. "
-                    "Received data: {data.getbuffer().nbytes}/{size} bytes"
-                )
+                yield buffer[offset : offset + num_bytes]
+                received += num_bytes
+                offset += num_bytes
+                if timeout is not None and (time.time() - receive_start) > timeout:
+                    raise TimeoutError()
+        except TimeoutError:
+            raise MKLivestatusSocketError(
+                f"{timeout}s while reading data from socket. "
+                f"Received data: {received}/{size} bytes"
+            )
+
+    def _receive_response_header(self) -> tuple[str, int]:
+        # Headers are always ASCII encoded
+        resp = self.receive_data(16)
+        try:
+            return resp[0:3].decode("ascii"), int(resp[4:15].lstrip())
+        except Exception:
+            self.disconnect()
+            raise MKLivestatusSocketError(
+                f"Malformed response header {bytes(resp)!r}. Livestatus TCP socket might be "
+                "unreachable or wrong encryption settings are used."
+            )
+
+    def iter_query(self, query: QueryTypes, add_headers: str = "") -> Iterator[LivestatusRow]:
+        """Yield the rows of the response while it is still being received
+
+        Only queries supporting the JSON output format are streamed, all others are answered by
+        query(). In contrast to query(), a failing query is not sent again, because some rows may
+        already have been handed out. Stopping the iteration early closes the connection.
+        """
+        normalized_query = self._normalize_query(query)
+        if not normalized_query.supports_json_format():
+            yield from self.query(normalized_query, add_headers)
+            return
 
-        return data.getvalue()
+        with _livestatus_output_format_switcher(normalized_query, self):
+            str_query = self.build_query(normalized_query, add_headers)
+
+        with tracer.start_as_current_span(
+            "iter_query",
+            kind=trace.SpanKind.CLIENT,
+            attributes={
+                "cmk.livestatus.target_site_id": str(self.site_name),
+                "cmk.livestatus.query": str_query,
+            },
+        ):
+            self.send_query(str_query)
+            complete = False
+            try:
+                code, length = self._receive_response_header()
+                if code != "200":
+                    _raise_response_error(code, self.receive_data(length, 30).decode("utf-8"))
+
+                parser = JSONRowParser()
+                for chunk in self._receive_chunks(
+                    length, 30, memoryview(bytearray(min(length, 64 * 1024)))
+                ):
+                    yield from self._prepend_site(parser.feed(chunk))
+                yield from self._prepend_site(parser.feed(b"", final=True))
+                complete = True
+            except normalized_query.suppress_exceptions:
+                complete = True
+                raise
+            except (MKLivestatusSocketClosed, OSError) as e:
+                raise MKLivestatusSocketError(str(e))
+            finally:
+                # Unread data of the response would otherwise be read by the next query
+                if not complete:
+                    self.disconnect()
+
+    def _prepend_site(self, rows: list[LivestatusRow]) -> list[LivestatusRow]:
+        if self.prepend_site:
+            for row in rows:
+                row.insert(0, b"")
+        return rows
 
     def do_query(self, query: Query, add_headers: str = "") -> LivestatusResponse:
         with (
@@ -773,19 +857,9 @@ class SingleSiteConnection(Helpers):
         query: str,
         suppress_exceptions: tuple[type[Exception], ...],
         timeout_at: float | None = None,
-    ) -> bytes:
+    ) -> bytearray:
         try:
-            # Headers are always ASCII encoded
-            resp = self.receive_data(16)
-            code = resp[0:3].decode("ascii")
-            try:
-                length = int(resp[4:15].lstrip())
-            except Exception:
-                self.disconnect()
-                raise MKLivestatusSocketError(
-                    f"Malformed response header {resp!r}. Livestatus TCP socket might be "
-                    "unreachable or wrong encryption settings are used."
-                )
+            code, length = self._receive_response_header()
 
             # Apply a lower timeout for the content because the data is already available
             # in the socket. The liveproxyd (same system) has the complete data available
@@ -796,17 +870,7 @@ class SingleSiteConnection(Helpers):
             if code == "200":
                 return data
 
-            error_info = data.decode("utf-8")
-            if code == "404":
-                raise MKLivestatusTableNotFoundError(f"Not Found ({code}): {error_info!r}")
-
-            if code == "413":
-                raise MKLivestatusPayloadTooLargeError(error_info)
-
-            if code == "502":
-                raise MKLivestatusBadGatewayError(error_info)
-
-            raise MKLivestatusQueryError(f"{code}: {error_info}")
+            _raise_response_error(code, data.decode("utf-8"))
 
         except (MKLivestatusSocketClosed, OSError) as e:
             # In case of an IO error or the other side having
@@ -846,11 +910,15 @@ class SingleSiteConnection(Helpers):
             # FIXME: ? self.disconnect()
             raise MKLivestatusSocketError("Unhandled exception: %s" % e)
 
-    def parse_raw_response(self, raw_response: bytes, query: Query) -> LivestatusResponse:
-        data = raw_response.decode("utf-8")
+    def parse_raw_response(
+        self, raw_response: bytes | bytearray, query: Query
+    ) -> LivestatusResponse:
         try:
+            # The JSON parser takes the received buffer as it is, saving a copy of the response
             response: LivestatusResponse = (
-                json.loads(data) if query.supports_json_format() else ast.literal_eval(data)
+                json.loads(raw_response)
+                if query.supports_json_format()
+                else ast.literal_eval(raw_response.decode("utf-8"))
             )
             return response
         except (ValueError, SyntaxError):
@@ -873,21 +941,20 @@ class SingleSiteConnection(Helpers):
 
     @override
     def query(self, query: QueryTypes, add_headers: str = "") -> LivestatusResponse:
-        # Normalize argument types
-        normalized_add_headers = add_headers
-        normalized_query = Query(query) if not isinstance(query, Query) else query
+        response = self.do_query(self._normalize_query(query), add_headers)
+        if self.prepend_site:
+            for row in response:
+                row.insert(0, b"")
+        return response
 
+    def _normalize_query(self, query: QueryTypes) -> Query:
+        normalized_query = Query(query) if not isinstance(query, Query) else query
         if self.limit is not None:
             normalized_query = Query(
                 "%sLimit: %d\n" % (normalized_query, self.limit),
                 normalized_query.suppress_exceptions,
             )
-
-        response = self.do_query(normalized_query, normalized_add_headers)
-        if self.prepend_site:
-            for row in response:
-                row.insert(0, b"")
-        return response
+        return normalized_query
 
     def command(
         self,
@@ -1306,8 +1373,8 @@ class MultiSiteConnection(Helpers):
         query: Query,
         retrieve_responses: list[tuple[str, trace.Span, ConnectedSite]],
         stillalive: ConnectedSites,
-    ) -> list[tuple[ConnectedSite, bytes]]:
-        site_responses: list[tuple[ConnectedSite, bytes]] = []
+    ) -> list[tuple[ConnectedSite, bytearray]]:
+        site_responses: list[tuple[ConnectedSite, bytearray]] = []
         for str_query, request_span, connected_site in retrieve_responses:
             with tracer.start_as_current_span(
                 f"receive_from_site[{connected_site.id}]",
@@ -1344,7 +1411,7 @@ class MultiSiteConnection(Helpers):
     def _parse_responses(
         self,
         query: Query,
-        site_responses: list[tuple[ConnectedSite, bytes]],
+        site_responses: list[tuple[ConnectedSite, bytearray]],
         stillalive: ConnectedSites,
     ) -> list[LivestatusRow]:
         result: list[LivestatusRow] = []
@@ -1496,14 +1563,71 @@ def _combine_query(query: str, headers: str | list[str]) -> str:
     return query + "\n" + headers
 
 
-def is_socket_readable(sock: socket.socket, select_timeout: float = 1.0) -> bool:
-    # SSL sockets may not return any fileno in the select, since the data lingers around in pending
-    # https://stackoverflow.com/questions/3187565/select-and-ssl-in-python
-    # https://stackoverflow.com/questions/40346619/behavior-of-pythons-select-with-partial-recv-on-ssl-socket/40347469#40347469
-    if isinstance(sock, ssl.SSLSocket) and sock.pending():
-        return True
-    fd_sets = select.select([sock], [], [], select_timeout)
-    return sock in fd_sets[0]
+def _raise_response_error(code: str, error_info: str) -> NoReturn:
+    if code == "404":
+        raise MKLivestatusTableNotFoundError(f"Not Found ({code}): {error_info!r}")
+
+    if code == "413":
+        raise MKLivestatusPayloadTooLargeError(error_info)
+
+    if code == "502":
+        raise MKLivestatusBadGatewayError(error_info)
+
+    raise MKLivestatusQueryError(f"{code}: {error_info}")
+
+
+_JSON_ROW_SEPARATOR = re.compile(r"[\s,]*")
+
+
+class JSONRowParser:
+    """Incrementally parse the rows of a livestatus response in JSON format
+
+    Livestatus puts every row of the response on a line of its own. A row is parsed once the line
+    break following it has been received, so the decoder does not have to deal with partial rows.
+    """
+
+    def __init__(self) -> None:
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json_decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._state: Literal["start", "rows", "end"] = "start"
+
+    def feed(self, data: bytes | memoryview, final: bool = False) -> list[LivestatusRow]:
+        """Add the next part of the response and return the rows completed by it
+
+        Call it with final=True after the last part to verify that the response is complete."""
+        buf = self._buffer + self._text_decoder.decode(data, final)
+        end = len(buf) if final else buf.rfind("\n") + 1
+        rows: list[LivestatusRow] = []
+        pos = 0
+        while (pos := _skip_json_row_separator(buf, pos)) < end:
+            if self._state == "start" and buf[pos] == "[":
+                self._state = "rows"
+                pos += 1
+            elif self._state == "rows" and buf[pos] == "]":
+                self._state = "end"
+                pos += 1
+            elif self._state == "rows":
+                try:
+                    row, pos = self._json_decoder.raw_decode(buf, pos)
+                except ValueError:
+                    if final:
+                        raise MKLivestatusQueryError("Malformed raw response output")
+                    break  # The row continues after the last line break
+                rows.append(row)
+            else:
+                raise MKLivestatusQueryError("Malformed raw response output")
+
+        self._buffer = buf[pos:]
+        if final and self._state != "end":
+            raise MKLivestatusQueryError("Malformed raw response output")
+        return rows
+
+
+def _skip_json_row_separator(buf: str, pos: int) -> int:
+    if (match := _JSON_ROW_SEPARATOR.match(buf, pos)) is None:
+        return pos
+    return match.end()
 
 
 @dataclass(frozen=True)
@@ -5,6 +5,9 @@
 
 # pylint: disable=protected-access
 
+import posix
+import signal
+import threading
 import time
 from collections.abc import Iterable, Mapping
 from typing import Literal
@@ -14,13 +17,24 @@ from pytest import MonkeyPatch
 
 from tests.testlib.base import Scenario
 
+from cmk.ccc.exceptions import MKFetcherError, MKTimeout
+
+import cmk.utils.resulttype as result
+from cmk.utils.agentdatatype import AgentRawData
+from cmk.utils.cpu_tracking import Snapshot
 from cmk.utils.hostaddress import HostName
 
+from cmk.snmplib import SNMPRawData
+
+from cmk.fetchers import Fetcher, Mode
+from cmk.fetchers.filecache import FileCache, FileCacheOptions, NoCache
+
 from cmk.checkengine.checkresults import ServiceCheckResult, SubmittableServiceCheckResult
-from cmk.checkengine.fetcher import HostKey, SourceType
+from cmk.checkengine.fetcher import FetcherType, HostKey, SourceInfo, SourceType
 from cmk.checkengine.parameters import TimespecificParameters, TimespecificParameterSet
 
 from cmk.base import checkers, config
+from cmk.base.sources import Source
 
 from cmk.agent_based.prediction_backend import (
     InjectedParameters,
@@ -278,3 +292,125 @@ def test_prediction_injection() -> None:
             ("my_reference_metric", *prediction),
         )
     }
+
+
+class _RendezvousFetcher(Fetcher[AgentRawData]):
+    """Only returns when all fetchers sharing the barrier are fetching at the same time"""
+
+    def __init__(self, barrier: threading.Barrier, payload: bytes) -> None:
+        self.barrier = barrier
+        self.payload = payload
+
+    def open(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def _fetch_from_io(self, mode: Mode) -> AgentRawData:
+        self.barrier.wait()
+        return AgentRawData(b"<<<fetched>>>\n" + self.payload)
+
+
+class _HangingFetcher(Fetcher[AgentRawData]):
+    """Only returns when it is cancelled"""
+
+    def __init__(self) -> None:
+        self.cancelled = threading.Event()
+
+    def open(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+
+    def _fetch_from_io(self, mode: Mode) -> AgentRawData:
+        self.cancelled.wait()
+        raise MKFetcherError("cancelled")
+
+
+class _FetcherSource(Source[AgentRawData]):
+    def __init__(self, ident: str, fetcher: Fetcher[AgentRawData]) -> None:
+        self.ident = ident
+        self._fetcher = fetcher
+
+    def source_info(self) -> SourceInfo:
+        return SourceInfo(HostName("heute"), None, self.ident, FetcherType.PROGRAM, SourceType.HOST)
+
+    def fetcher(self) -> Fetcher[AgentRawData]:
+        return self._fetcher
+
+    def file_cache(
+        self, *, simulation: bool, file_cache_options: FileCacheOptions
+    ) -> FileCache[AgentRawData]:
+        return NoCache()
+
+
+def test_fetch_all_concurrently() -> None:
+    # Fetching one after another would break the barrier, as the first fetcher waits in vain.
+    barrier = threading.Barrier(3, timeout=10)
+    sources = [
+        _FetcherSource(f"source-{n}", _RendezvousFetcher(barrier, f"source-{n}".encode()))
+        for n in range(3)
+    ]
+
+    fetched = checkers._fetch_all(
+        sources, simulation=False, file_cache_options=FileCacheOptions(), mode=Mode.CHECKING
+    )
+
+    assert [source_info.ident for source_info, _raw_data, _duration in fetched] == [
+        "source-0",
+        "source-1",
+        "source-2",
+    ]
+    assert [raw_data.ok for _source_info, raw_data, _duration in fetched] == [
+        b"<<<fetched>>>\nsource-0",
+        b"<<<fetched>>>\nsource-1",
+        b"<<<fetched>>>\nsource-2",
+    ]
+
+
+def test_fetch_all_cancels_fetchers_when_interrupted() -> None:
+    fetchers = [_HangingFetcher() for _n in range(3)]
+
+    def raise_timeout(_signum: int, _frame: object) -> None:
+        raise MKTimeout("Check timed out")
+
+    previous_handler = signal.signal(signal.SIGALRM, raise_timeout)
+    try:
+        signal.setitimer(signal.ITIMER_REAL, 0.1)
+        with pytest.raises(MKTimeout):
+            checkers._fetch_all(
+                [_FetcherSource(f"source-{n}", fetcher) for n, fetcher in enumerate(fetchers)],
+                simulation=False,
+                file_cache_options=FileCacheOptions(),
+                mode=Mode.CHECKING,
+            )
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+    assert all(fetcher.cancelled.is_set() for fetcher in fetchers)
+
+
+def test_apportion_durations() -> None:
+    def snapshot(user: float, elapsed: float) -> Snapshot:
+        return Snapshot(posix.times_result((user, 0.0, 0.0, 0.0, elapsed)))
+
+    source_info = SourceInfo(HostName("heute"), None, "ident", FetcherType.PROGRAM, SourceType.HOST)
+    raw_data: result.Result[AgentRawData | SNMPRawData, Exception] = result.OK(AgentRawData(b""))
+    # Two fetches running at the same time, each one measured on its own
+    fetched = [
+        (source_info, raw_data, snapshot(0.2, 3.0)),
+        (source_info, raw_data, snapshot(0.2, 1.0)),
+    ]
+
+    apportioned = checkers._apportion_durations(fetched, snapshot(0.2, 3.0))
+
+    assert [duration.process for _s, _r, duration in apportioned] == [
+        (0.1, 0.0, 0.0, 0.0, 2.25),
+        (0.1, 0.0, 0.0, 0.0, 0.75),
+    ]
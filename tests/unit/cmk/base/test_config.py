@@ -6,6 +6,7 @@
 # pylint: disable=protected-access
 
 import itertools
+import os
 import re
 import shutil
 import socket
@@ -20,6 +21,7 @@ from tests.testlib.base import Scenario
 
 import cmk.ccc.debug
 import cmk.ccc.version as cmk_version
+from cmk.ccc import store
 from cmk.ccc.exceptions import MKGeneralException
 from cmk.ccc.version import Edition, edition
 
@@ -2862,6 +2864,62 @@ cmc_host_rrd_config = [
     (config._initialize_config())
 
 
+def test_load_config_uses_compiled_files_cache(
+    patch_omd_site: None, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    main_mk_file = Path(cmk.utils.paths.main_config_file)
+    main_mk_file.touch()
+    wato_main_folder = Path(cmk.utils.paths.check_mk_config_dir) / "wato"
+    for folder_nr in range(10):
+        folder_path = wato_main_folder / f"folder-{folder_nr}"
+        folder_path.mkdir(parents=True)
+        _add_host_in_folder(folder_path, f"host-{folder_nr}")
+        (folder_path / "rules.mk").write_text(
+            "\nextra_service_conf.setdefault('check_interval', [])\n"
+            "extra_service_conf['check_interval'] = [\n%s\n] + extra_service_conf['check_interval']\n"
+            % ",\n".join(
+                repr(
+                    {
+                        "id": f"{folder_nr}-{rule_nr}",
+                        "value": float(rule_nr),
+                        "condition": {"host_folder": f"/wato/folder-{folder_nr}/"},
+                    }
+                )
+                for rule_nr in range(10)
+            )
+        )
+    for mk_file in [main_mk_file, *wato_main_folder.glob("*/*.mk")]:
+        # files modified just now are not cached
+        os.utime(mk_file, (mk_file.stat().st_mtime - 10,) * 2)
+    cache_dir = Path(cmk.utils.paths.tmp_dir, "compiled_files_cache")
+
+    try:
+        store.clear_compiled_files_cache(cmk.utils.paths.tmp_dir)
+        config.load(validate_hosts=False)
+        assert len(list(cache_dir.rglob("folder-*/*.mk.code"))) == 2 * 10
+
+        with monkeypatch.context() as m:
+            m.setattr("builtins.compile", lambda *args: pytest.fail("unexpected compilation"))
+            config.load(validate_hosts=False)
+        assert len(config.all_hosts) == 10
+        assert len(config.extra_service_conf["check_interval"]) == 10 * 10
+
+        shutil.rmtree(wato_main_folder / "folder-0")
+        # The first load has pruned the cache just now
+        Path(cmk.utils.paths.tmp_dir, "compiled_files_cache.pruned").unlink()
+        config.load(validate_hosts=False)
+        assert len(config.all_hosts) == 9
+        assert not (
+            cache_dir / wato_main_folder.relative_to(cmk.utils.paths.omd_root) / "folder-0"
+        ).exists()
+        assert len(list(cache_dir.rglob("folder-*/*.mk.code"))) == 2 * 9
+    finally:
+        main_mk_file.unlink()
+        shutil.rmtree(wato_main_folder)
+        store.clear_compiled_files_cache(cmk.utils.paths.tmp_dir)
+        config._initialize_config()
+
+
 def _add_host_in_folder(folder_path: Path, name: str) -> None:
     with (folder_path / "hosts.mk").open("w", encoding="utf-8") as f:
         f.write(
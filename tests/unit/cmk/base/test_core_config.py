@@ -25,6 +25,7 @@ from cmk.utils.labels import Labels, LabelSources
 from cmk.utils.tags import TagGroupID, TagID
 
 from cmk.checkengine.checking import CheckPluginName, ConfiguredService
+from cmk.checkengine.discovery import AutocheckEntry, AutochecksStore
 from cmk.checkengine.parameters import TimespecificParameters
 
 import cmk.base.nagios_utils
@@ -112,6 +113,45 @@ def test_do_create_config_nagios_collects_passwords(
     assert password_store.load(core_store) == passwords
 
 
+@pytest.mark.usefixtures("config_path")
+def test_do_create_config_updates_hosts_with_changed_autochecks(
+    core_scenario: ConfigCache, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setattr(config, "get_resource_macros", lambda *_: {})
+    monkeypatch.setattr(cmk.utils.paths, "autochecks_dir", str(tmp_path))
+    monkeypatch.setattr(config, "use_autochecks_index", True)
+    ip_address_of = config.ConfiguredIPLookup(
+        core_scenario, error_handler=ip_lookup.CollectFailedHosts()
+    )
+    core = create_core("nagios")
+    updated: list[set[HostName] | None] = []
+    monkeypatch.setattr(core, "_create_config", lambda *args: updated.append(args[-1]))
+
+    def create_config(hosts_to_update: set[HostName] | None) -> set[HostName] | None:
+        core_config.do_create_config(
+            core,
+            core_scenario,
+            AgentBasedPlugins({}, {}, {}, {}),
+            ip_address_of,
+            all_hosts=[HostName("test-host")],
+            hosts_to_update=hosts_to_update,
+            duplicates=(),
+        )
+        return updated[-1]
+
+    autochecks = AutochecksStore(HostName("test-host"))
+    autochecks.write([AutocheckEntry(CheckPluginName("norris"), "abc", {}, {})])
+    assert create_config(None) is None
+    assert create_config({HostName("other-host")}) == {HostName("other-host")}
+
+    autochecks.write([AutocheckEntry(CheckPluginName("norris"), "xyz", {}, {})])
+    assert create_config({HostName("other-host")}) == {
+        HostName("other-host"),
+        HostName("test-host"),
+    }
+    assert create_config({HostName("other-host")}) == {HostName("other-host")}
+
+
 def test_get_host_attributes(monkeypatch: MonkeyPatch) -> None:
     ts = Scenario()
     ts.add_host(HostName("test-host"), tags={TagGroupID("agent"): TagID("no-agent")})
@@ -1319,6 +1319,7 @@ def test_commandline_discovery(
             {**agent_based_plugins.agent_sections, **agent_based_plugins.snmp_sections}
         ),
         section_error_handling=lambda *args, **kw: "error",
+        parsed_sections_cache=None,
         host_label_plugins=HostLabelPluginMapper(
             ruleset_matcher=config_cache.ruleset_matcher,
             sections={**agent_based_plugins.agent_sections, **agent_based_plugins.snmp_sections},
@@ -1295,6 +1295,7 @@ def test_inventorize_host(failed_state: int | None, expected: int) -> None:
             )
         },
         section_error_handling=lambda *args, **kw: "error",
+        parsed_sections_cache=None,
         inventory_plugins={},
         run_plugin_names=EVERYTHING,
         parameters=HWSWInventoryParameters.from_raw(
@@ -1320,6 +1321,7 @@ def test_inventorize_host_with_no_data_nor_files() -> None:
         inventory_parameters=lambda *args, **kw: {},
         section_plugins={},
         section_error_handling=lambda *args, **kw: "error",
+        parsed_sections_cache=None,
         inventory_plugins={},
         run_plugin_names=EVERYTHING,
         parameters=HWSWInventoryParameters.from_raw({}),
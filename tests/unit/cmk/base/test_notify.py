@@ -4,7 +4,10 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import os
+import threading
+import time
 from collections.abc import Mapping
+from functools import partial
 from typing import Final
 
 import pytest
@@ -124,3 +127,75 @@ def test_rbn_groups_contacts(user_groups: Mapping[ContactName, list[str]]) -> No
         "dong",
         "harry",
     }
+
+
+def test_notification_plugin_pool_keeps_order_per_key() -> None:
+    pool = notify.NotificationPluginPool(4, {})
+    executed: list[tuple[str, int]] = []
+
+    def job(key: str, num: int) -> None:
+        time.sleep(0.001 * (num % 3))
+        executed.append((key, num))
+
+    for num in range(20):
+        for key in ("a", "b", "c"):
+            pool.submit(key, "mail", partial(job, key, num))
+    pool.shutdown()
+
+    for key in ("a", "b", "c"):
+        assert [num for k, num in executed if k == key] == list(range(20))
+
+
+def test_notification_plugin_pool_limits_plugin_concurrency() -> None:
+    pool = notify.NotificationPluginPool(8, {"sms": 1})
+    lock = threading.Lock()
+    running = {"sms": 0, "mail": 0}
+    max_running = {"sms": 0, "mail": 0}
+
+    def job(plugin_name: str) -> None:
+        with lock:
+            running[plugin_name] += 1
+            max_running[plugin_name] = max(max_running[plugin_name], running[plugin_name])
+        time.sleep(0.02)
+        with lock:
+            running[plugin_name] -= 1
+
+    for num in range(4):
+        pool.submit(("sms", num), "sms", partial(job, "sms"))
+        pool.submit(("mail", num), "mail", partial(job, "mail"))
+    pool.shutdown()
+
+    assert max_running == {"sms": 1, "mail": 4}
+
+
+def test_notification_plugin_pool_runs_keys_concurrently() -> None:
+    pool = notify.NotificationPluginPool(4, {})
+    # Executing the jobs one after another would break the barrier
+    barrier = threading.Barrier(4, timeout=10)
+    for num in range(8):
+        pool.submit(num, "mail", barrier.wait)
+    pool.shutdown()
+
+    assert not barrier.broken
+
+
+def test_notification_plugin_pool_does_not_block_workers_on_plugin_limit() -> None:
+    pool = notify.NotificationPluginPool(2, {"sms": 1})
+    release_sms = threading.Event()
+    mail_done = threading.Event()
+    executed: list[str] = []
+
+    def sms(name: str) -> None:
+        release_sms.wait(timeout=10)
+        executed.append(name)
+
+    pool.submit("a", "sms", lambda: sms("sms a"))
+    # Waits for the slot of the first one, but must not occupy the second worker
+    pool.submit("b", "sms", lambda: sms("sms b"))
+    pool.submit("c", "mail", mail_done.set)
+
+    assert mail_done.wait(timeout=10)
+    release_sms.set()
+    pool.shutdown()
+
+    assert executed == ["sms a", "sms b"]
@@ -7,6 +7,8 @@
 
 import datetime
 import math
+import random
+import sys
 import time
 from collections.abc import Callable, Sequence
 from pathlib import Path
@@ -209,6 +211,89 @@ def test_data_stats(
     assert _prediction._data_stats(slices) == result
 
 
+def _reference_forward_fill_resample(
+    current_range: range, values: Sequence[float | None], new_range: range
+) -> Sequence[float | None]:
+    idx_max = len(values) - 1
+    return [
+        values[max(0, min(int((t - current_range.start) / current_range.step), idx_max))]
+        for t in new_range
+    ]
+
+
+def _reference_data_stats(slices: Sequence[Sequence[float | None]]) -> list[DataStat | None]:
+    """The former pure Python implementation"""
+    result: list[DataStat | None] = []
+    for time_column in zip(*slices):
+        if not (values := [x for x in time_column if x is not None]):
+            result.append(None)
+            continue
+        average = sum(values) / float(len(values))
+        result.append(
+            DataStat(
+                average=average,
+                min_=min(values),
+                max_=max(values),
+                stdev=(
+                    None
+                    if len(values) == 1
+                    else math.sqrt(
+                        abs(sum(p**2 for p in values) - average**2 * len(values))
+                        / float(len(values) - 1)
+                    )
+                ),
+            )
+        )
+    return result
+
+
+@pytest.mark.parametrize(
+    "make_value",
+    [
+        pytest.param(lambda rng: rng.uniform(0, 100), id="uniform"),
+        pytest.param(lambda rng: 1e9 + rng.uniform(0, 1e-3), id="high mean, low variance"),
+        pytest.param(lambda rng: float(rng.getrandbits(30)), id="large integers"),
+        pytest.param(lambda rng: rng.choice([0.1, 0.2, 0.3]) * 1e6, id="few values"),
+    ],
+)
+def test_data_stats_like_former_implementation(
+    make_value: Callable[[random.Random], float],
+) -> None:
+    rng = random.Random(4711)
+    raw_range = range(0, 2 * 86400, 60)
+    new_range = range(0, 86400, 30)
+    slices = [
+        [None if rng.random() < 0.05 else make_value(rng) for _t in raw_range]
+        for _slice in range(8)
+    ]
+
+    stats = _prediction._data_stats(
+        [_prediction._forward_fill_resample(raw_range, s, new_range) for s in slices]
+    )
+    expected_stats = _reference_data_stats(
+        [_reference_forward_fill_resample(raw_range, s, new_range) for s in slices]
+    )
+
+    assert len(stats) == len(expected_stats)
+    for stat, expected in zip(stats, expected_stats):
+        if stat is None or expected is None:
+            assert stat is expected
+            continue
+        assert (stat.average, stat.min_, stat.max_) == (
+            expected.average,
+            expected.min_,
+            expected.max_,
+        )
+        if stat.stdev is None or expected.stdev is None:
+            assert stat.stdev is expected.stdev
+            continue
+        # NumPy squares by multiplying, Python's pow() rounds some squares differently.
+        # The variances may differ by the rounding error of the sum of squares.
+        assert stat.stdev**2 == pytest.approx(
+            expected.stdev**2, abs=16 * sys.float_info.epsilon * expected.average**2
+        )
+
+
 class TestPredictionStore:
     def test_remove_outdated_predictions(self, tmp_path: Path) -> None:
         now = int(time.time())
@@ -3,10 +3,21 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import re
+
 import pytest
 
+from livestatus import SiteId
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.bi.data_fetcher import BIStructureFetcher
+from cmk.bi.lib import BIHostData, BIHostSearchMatch, BIServiceData
+from cmk.bi.packs import BIAggregationPacks
 from cmk.bi.search import BIEmptySearch, BIFixedArgumentsSearch, BIHostSearch, BIServiceSearch
-from cmk.bi.searcher import BISearcher
+from cmk.bi.searcher import _literal_prefix, BISearcher
+
+from .bi_test_data import sample_config
 
 
 def test_empty_search(bi_searcher: BISearcher) -> None:
@@ -189,3 +200,130 @@ def test_service_search(
     search = BIServiceSearch(schema_config)
     results = search.execute({}, bi_searcher_with_sample_config)
     assert len(results) == expected_matches
+
+
+@pytest.mark.parametrize(
+    "pattern, expected_prefix",
+    [
+        ("heute", "heute"),
+        ("heute_cl.*", "heute_cl"),
+        ("(heute_cl).*", ""),
+        ("Interface (2|4)", ""),
+        ("Interfaces?", "Interface"),
+        ("Interface +2", "Interface "),
+        ("CPU\\d{1,2}", "CPU"),
+        ("a{2}", ""),
+        ("*", ""),
+    ],
+)
+def test_literal_prefix(pattern: str, expected_prefix: str) -> None:
+    assert _literal_prefix(pattern) == expected_prefix
+
+
+def _host_data(name: str, alias: str, services: list[str]) -> BIHostData:
+    return BIHostData(
+        site_id="heute",
+        tags=set(),
+        labels={},
+        folder="",
+        services={s: BIServiceData(tags=set(), labels={}) for s in services},
+        children=(HostName("switch"),),
+        parents=(HostName("router"),),
+        alias=alias,
+        name=HostName(name),
+    )
+
+
+def test_searcher_indexes_match_regex(bi_searcher: BISearcher) -> None:
+    names = [f"{prefix}-{nr}" for prefix in ("db", "web", "webproxy", "w") for nr in range(20)]
+    bi_searcher.set_hosts(
+        {
+            name: _host_data(name, name.upper(), [f"Interface {nr}" for nr in range(5)] + ["CPU"])
+            for name in names
+        }
+    )
+    hosts = list(bi_searcher.hosts.values())
+
+    for pattern in ("web-1(.*)", "web", "w(.*)-1", "(db|w)-2", "webproxy-1.?$", "x"):
+        anchored = re.compile(pattern if pattern.endswith("$") else f"{pattern}$")
+        matched_hosts, groups = bi_searcher.get_host_name_matches(hosts, pattern)
+        assert [h.name for h in matched_hosts] == [n for n in names if anchored.match(n)]
+        assert groups == {h.name: anchored.match(h.name).groups() for h in matched_hosts}  # type: ignore[union-attr]
+
+        matched_hosts, groups = bi_searcher.get_host_alias_matches(hosts, pattern.upper())
+        assert [h.alias for h in matched_hosts] == [
+            n.upper() for n in names if re.match(pattern.upper(), n.upper())
+        ]
+
+    host_matches = [BIHostSearchMatch(host, ()) for host in hosts]
+    for _round in range(2):
+        service_matches = bi_searcher.get_service_description_matches(
+            host_matches, "Interface (1|3)"
+        )
+        assert len(service_matches) == 2 * len(hosts)
+        assert {m.match_groups for m in service_matches} == {("1",), ("3",)}
+
+
+def test_searcher_set_hosts_resets_indexes(bi_searcher: BISearcher) -> None:
+    bi_searcher.set_hosts({"web-1": _host_data("web-1", "Web", ["CPU"])})
+    matched_hosts, _groups = bi_searcher.get_host_name_matches(
+        list(bi_searcher.hosts.values()), "web-.*"
+    )
+    assert [h.name for h in matched_hosts] == ["web-1"]
+
+    bi_searcher.set_hosts({"web-2": _host_data("web-2", "Web", ["CPU"])})
+    hosts = list(bi_searcher.hosts.values())
+    matched_hosts, _groups = bi_searcher.get_host_name_matches(hosts, "web-.*")
+    assert [h.name for h in matched_hosts] == ["web-2"]
+    matched_hosts, groups = bi_searcher.get_host_alias_matches(hosts, "(W)eb")
+    assert groups == {"web-2": ("W",)}
+
+
+def _changed_sample_hosts(bi_structure_fetcher: BIStructureFetcher) -> dict[str, dict]:
+    hosts = bi_structure_fetcher.hosts
+    heute_clone = hosts[HostName("heute_clone")]
+    return {
+        "new service": {
+            "heute_clone": heute_clone._replace(
+                services={**heute_clone.services, "Interface 6": BIServiceData(set(), {})}
+            )
+        },
+        "new host": {"heute_copy": hosts[HostName("heute")]._replace(name=HostName("heute_copy"))},
+        "unrelated host": {"printer": _host_data("printer", "printer", ["Toner"])},
+    }
+
+
+def test_search_dependencies(
+    bi_packs_sample_config: BIAggregationPacks,
+    bi_structure_fetcher: BIStructureFetcher,
+    bi_searcher: BISearcher,
+) -> None:
+    bi_structure_fetcher.add_site_data(SiteId("heute"), sample_config.bi_structure_states)
+    original_hosts = dict(bi_structure_fetcher.hosts)
+    bi_searcher.set_hosts(original_hosts)
+
+    compiled = {}
+    for aggregation in bi_packs_sample_config.get_all_aggregations():
+        with bi_searcher.record_dependencies() as dependencies:
+            compiled[aggregation.id] = (aggregation.compile(bi_searcher).serialize(), dependencies)
+    assert all(dependencies.hosts for _result, dependencies in compiled.values())
+
+    affected = {}
+    for change, changed_hosts in _changed_sample_hosts(bi_structure_fetcher).items():
+        changed_hosts_searcher = BISearcher()
+        changed_hosts_searcher.set_hosts(changed_hosts)
+        bi_searcher.set_hosts({**original_hosts, **changed_hosts})
+        for aggregation in bi_packs_sample_config.get_all_aggregations():
+            result, dependencies = compiled[aggregation.id]
+            affected[change, aggregation.id] = dependencies.affected_by(
+                set(changed_hosts), changed_hosts_searcher
+            )
+            if not affected[change, aggregation.id]:
+                # Skipping the compilation of unaffected aggregations must not change anything
+                assert aggregation.compile(bi_searcher).serialize() == result
+
+    assert affected == {
+        ("new service", "default_aggregation"): True,
+        ("new host", "default_aggregation"): True,
+        ("unrelated host", "default_aggregation"): False,
+    }
@@ -10,6 +10,7 @@ import os
 import queue
 import stat
 import threading
+import time
 import types
 from collections.abc import Callable, Generator, Iterator, Sequence
 from multiprocessing.pool import ThreadPool
@@ -769,3 +770,110 @@ def test_non_blocking_decorated_locking_while_already_locked(
         assert result is False
         assert store.have_lock(path) is False
     assert store.have_lock(path) is False
+
+
+def _exec_code(code: types.CodeType) -> dict[str, object]:
+    namespace: dict[str, object] = {}
+    exec(code, namespace, namespace)  # nosec B102 # BNS:aee528
+    return namespace
+
+
+def _write_mk_file(path: Path, content: str, age: float) -> None:
+    path.write_text(content)
+    mtime = path.stat().st_mtime - age
+    os.utime(path, (mtime, mtime))
+
+
+def test_load_code_from_compiled_files_cache(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    root_dir = tmp_path / "root"
+    temp_dir = tmp_path / "tmp"
+    mk_file = root_dir / "etc/rules.mk"
+    cache_file = temp_dir / "compiled_files_cache/etc/rules.mk.code"
+    mk_file.parent.mkdir(parents=True)
+    _write_mk_file(mk_file, "value = 1\n", age=10)
+
+    code = store.load_code_from_compiled_files_cache(mk_file, temp_dir=temp_dir, root_dir=root_dir)
+    assert code.co_filename == str(mk_file)
+    assert _exec_code(code)["value"] == 1
+    assert cache_file.exists()
+
+    with monkeypatch.context() as m:
+        m.setattr("builtins.compile", lambda *args: pytest.fail("unexpected compilation"))
+        code = store.load_code_from_compiled_files_cache(
+            mk_file, temp_dir=temp_dir, root_dir=root_dir
+        )
+    assert _exec_code(code)["value"] == 1
+
+    _write_mk_file(mk_file, "value = 3\n", age=5)
+    code = store.load_code_from_compiled_files_cache(mk_file, temp_dir=temp_dir, root_dir=root_dir)
+    assert _exec_code(code)["value"] == 3
+
+    store.clear_compiled_files_cache(temp_dir)
+    assert not cache_file.exists()
+
+
+def test_load_code_from_compiled_files_cache_recently_modified(tmp_path: Path) -> None:
+    mk_file = tmp_path / "rules.mk"
+    _write_mk_file(mk_file, "value = 1\n", age=0)
+
+    code = store.load_code_from_compiled_files_cache(mk_file, temp_dir=tmp_path, root_dir=tmp_path)
+    assert _exec_code(code)["value"] == 1
+    assert not (tmp_path / "compiled_files_cache").exists()
+
+
+def test_load_code_from_compiled_files_cache_broken(tmp_path: Path) -> None:
+    mk_file = tmp_path / "rules.mk"
+    _write_mk_file(mk_file, "value = 1\n", age=10)
+    store.load_code_from_compiled_files_cache(mk_file, temp_dir=tmp_path, root_dir=tmp_path)
+    cache_file = tmp_path / "compiled_files_cache/rules.mk.code"
+    cache_file.write_bytes(cache_file.read_bytes()[:40])
+
+    code = store.load_code_from_compiled_files_cache(mk_file, temp_dir=tmp_path, root_dir=tmp_path)
+    assert _exec_code(code)["value"] == 1
+
+
+def test_prune_compiled_files_cache(tmp_path: Path) -> None:
+    root_dir = tmp_path / "root"
+    temp_dir = tmp_path / "tmp"
+    kept = root_dir / "etc/wato/kept/rules.mk"
+    removed = root_dir / "etc/wato/removed/rules.mk"
+    for mk_file in (kept, removed):
+        mk_file.parent.mkdir(parents=True)
+        _write_mk_file(mk_file, "value = 1\n", age=10)
+        store.load_code_from_compiled_files_cache(mk_file, temp_dir=temp_dir, root_dir=root_dir)
+    removed.unlink()
+    removed.parent.rmdir()
+
+    store.prune_compiled_files_cache(temp_dir=temp_dir, root_dir=root_dir)
+
+    cache_dir = temp_dir / "compiled_files_cache"
+    assert [p.relative_to(cache_dir) for p in cache_dir.rglob("*")] == [
+        Path("etc"),
+        Path("etc/wato"),
+        Path("etc/wato/kept"),
+        Path("etc/wato/kept/rules.mk.code"),
+    ]
+
+    # Pruned just now by some process
+    kept.unlink()
+    store.prune_compiled_files_cache(temp_dir=temp_dir, root_dir=root_dir)
+    assert (cache_dir / "etc/wato/kept/rules.mk.code").exists()
+
+    stamp_path = temp_dir / "compiled_files_cache.pruned"
+    os.utime(stamp_path, (time.time() - 3601,) * 2)
+    store.prune_compiled_files_cache(temp_dir=temp_dir, root_dir=root_dir)
+    assert not list(cache_dir.rglob("*"))
+
+
+def test_load_code_from_compiled_files_cache_not_writable(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    mk_file = tmp_path / "rules.mk"
+    _write_mk_file(mk_file, "value = 1\n", age=10)
+
+    def write_obj(*args: object, **kwargs: object) -> None:
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(store.ObjectStore, "write_obj", write_obj)
+    code = store.load_code_from_compiled_files_cache(mk_file, temp_dir=tmp_path, root_dir=tmp_path)
+    assert _exec_code(code)["value"] == 1
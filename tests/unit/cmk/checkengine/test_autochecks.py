@@ -16,7 +16,12 @@ import cmk.utils.paths
 from cmk.utils.hostaddress import HostName
 
 from cmk.checkengine.checking import CheckPluginName
-from cmk.checkengine.discovery import AutocheckEntry, AutocheckServiceWithNodes, AutochecksStore
+from cmk.checkengine.discovery import (
+    AutocheckEntry,
+    AutocheckServiceWithNodes,
+    AutochecksIndex,
+    AutochecksStore,
+)
 from cmk.checkengine.discovery._autochecks import _AutochecksSerializer as AutochecksSerializer
 from cmk.checkengine.discovery._autochecks import _consolidate_autochecks_of_real_hosts
 from cmk.checkengine.discovery._utils import DiscoveredItem
@@ -73,6 +78,63 @@ class TestAutochecksStore:
         assert store.read() == _entries()
 
 
+class TestAutochecksIndex:
+    def test_load_all(self, tmp_path: Path) -> None:
+        AutochecksStore(HostName("herbert")).write(_entries())
+        AutochecksStore(HostName("hugo")).write([])
+        (tmp_path / "broken.mk").write_text("[{")
+
+        index = AutochecksIndex.default()
+        generation, autochecks = index.load_all()
+
+        assert autochecks == {HostName("herbert"): _entries(), HostName("hugo"): []}
+        assert index.changed_since(generation) == (generation, set())
+
+    def test_changed_since(self, tmp_path: Path) -> None:
+        index = AutochecksIndex.default()
+        AutochecksStore(HostName("herbert")).write(_entries())
+        AutochecksStore(HostName("hugo")).write(_entries())
+        generation, _autochecks = index.load_all()
+
+        assert index.changed_since(generation) == (generation, set())
+        assert index.changed_since(0) == (generation, {HostName("herbert"), HostName("hugo")})
+
+        AutochecksStore(HostName("herbert")).write(
+            [AutocheckEntry(CheckPluginName("norris"), "xyz", {}, {})]
+        )
+        AutochecksStore(HostName("hugo")).clear()
+        new_generation, changed = index.changed_since(generation)
+
+        assert new_generation > generation
+        assert changed == {HostName("herbert"), HostName("hugo")}
+        assert index.load_all() == (
+            new_generation,
+            {HostName("herbert"): [AutocheckEntry(CheckPluginName("norris"), "xyz", {}, {})]},
+        )
+        assert index.changed_since(new_generation) == (new_generation, set())
+
+    def test_load_all_reads_changed_files_only(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        index = AutochecksIndex.default()
+        AutochecksStore(HostName("herbert")).write(_entries())
+        (tmp_path / "broken.mk").write_text("[{")
+        index.load_all()
+
+        read_hosts = []
+        original_read = AutochecksStore.read
+
+        def read(self: AutochecksStore) -> Sequence[AutocheckEntry]:
+            read_hosts.append(self._host_name)
+            return original_read(self)
+
+        monkeypatch.setattr(AutochecksStore, "read", read)
+        AutochecksStore(HostName("hugo")).write(_entries())
+        _generation, autochecks = index.load_all()
+        assert autochecks == {HostName("herbert"): _entries(), HostName("hugo"): _entries()}
+        assert read_hosts == [HostName("hugo")]
+
+
 @pytest.mark.usefixtures("agent_based_plugins")
 @pytest.mark.parametrize(
     "autochecks_content,expected_result",
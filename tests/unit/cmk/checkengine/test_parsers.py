@@ -15,6 +15,8 @@ from pathlib import Path
 
 import pytest
 
+from tests.testlib.repo import repo_path
+
 from cmk.utils.agentdatatype import AgentRawData
 from cmk.utils.hostaddress import HostName
 from cmk.utils.sectionname import SectionName
@@ -26,6 +28,7 @@ from cmk.checkengine.parser import (
     AgentParser,
     AgentRawDataSectionElem,
     NO_SELECTION,
+    SectionNameCollection,
     SectionStore,
     SNMPParser,
 )
@@ -731,6 +734,88 @@ class TestAgentParser:
         }
         assert store.load() == {}
 
+    def test_blank_lines_and_line_endings(
+        self, parser: AgentParser, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(time, "time", lambda: 1000)
+        raw_data = AgentRawData(
+            b"<<<section>>>\r\n  a 1 \r\n\r\n \t \nb 2\r\r\n<<<raw:nostrip():sep(124)>>>\n c|3 \r\n"
+            b"<<<<piggy>>>>\r\n<<<section>>>\r\n d 4\r\n\n<<<<>>>>\r\n<<<section>>>\ne 5"
+        )
+
+        ahs = parser.parse(raw_data, selection=NO_SELECTION)
+
+        assert ahs.sections == {
+            SectionName("section"): [["a", "1"], ["b", "2"], ["e", "5"]],
+            SectionName("raw"): [[" c", "3 "]],
+        }
+        assert ahs.piggybacked_raw_data == {
+            "piggy": [b"<<<section:cached(1000,0)>>>", b" d 4"],
+        }
+
+    def test_selection_parses_same_sections(
+        self, hostname: HostName, store_path: Path, logger: logging.Logger
+    ) -> None:
+        raw_data = AgentRawData(_LINUX_AGENT_OUTPUT.read_bytes())
+        selection = frozenset({SectionName("cpu"), SectionName("df"), SectionName("mem")})
+
+        all_sections = (
+            _make_parser(hostname, store_path / "all", logger)
+            .parse(raw_data, selection=NO_SELECTION)
+            .sections
+        )
+        assert len(all_sections) > 10
+        assert _make_parser(hostname, store_path / "selected", logger).parse(
+            raw_data, selection=selection
+        ).sections == {name: content for name, content in all_sections.items() if name in selection}
+
+    def test_selection_decodes_selected_sections_only(
+        self,
+        hostname: HostName,
+        store_path: Path,
+        logger: logging.Logger,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        raw_data = AgentRawData(
+            _LINUX_AGENT_OUTPUT.read_bytes()
+            + b"<<<logwatch>>>\r\n[[[application]]]\r\n"
+            + b"".join(b"C Jan 01 12:00:00 message %d\r\n" % nr for nr in range(100))
+        )
+        selection = frozenset({SectionName("cpu"), SectionName("uptime")})
+
+        decoded: list[SectionName] = []
+        parse_line = SectionMarker.parse_line
+
+        def counting_parse_line(self: SectionMarker, line: bytes) -> Sequence[str]:
+            decoded.append(self.name)
+            return parse_line(self, line)
+
+        monkeypatch.setattr(SectionMarker, "parse_line", counting_parse_line)
+        sections = (
+            _make_parser(hostname, store_path, logger).parse(raw_data, selection=selection).sections
+        )
+
+        assert set(sections) == selection
+        # Only the lines of the selected sections are split up and decoded
+        assert sorted(decoded) == sorted(
+            name for name, content in sections.items() for _line in content
+        )
+
+
+_LINUX_AGENT_OUTPUT = repo_path() / "tests/integration/cmk/base/test-files/linux-agent-output"
+
+
+def _make_parser(hostname: HostName, store_path: Path, logger: logging.Logger) -> AgentParser:
+    return AgentParser(
+        hostname,
+        SectionStore[Sequence[AgentRawDataSectionElem]](store_path, logger=logger),
+        host_check_interval=0,
+        keep_outdated=True,
+        translation=TranslationOptions(),
+        encoding_fallback="ascii",
+        logger=logger,
+    )
+
 
 class ParserStateAdapter(ParserState):
     def __init__(self, *, translation: TranslationOptions | None = None):
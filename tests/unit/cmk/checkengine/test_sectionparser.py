@@ -3,19 +3,27 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import pickle
 from collections.abc import Callable, Iterable, Sequence
+from unittest import mock
 
 import pytest
 
+import cmk.utils.resulttype as result
+from cmk.utils.agentdatatype import AgentRawData
 from cmk.utils.hostaddress import HostName
 from cmk.utils.sectionname import SectionMap, SectionName
 
 from cmk.checkengine.discovery._host_labels import _all_parsing_results as all_parsing_results
-from cmk.checkengine.fetcher import HostKey, SourceType
+from cmk.snmplib import SNMPRawData
+
+from cmk.checkengine.fetcher import FetcherType, HostKey, SourceInfo, SourceType
 from cmk.checkengine.parser import AgentRawDataSection, AgentRawDataSectionElem, HostSections
 from cmk.checkengine.sectionparser import _ParsingResult as ParsingResult
 from cmk.checkengine.sectionparser import (
+    make_providers,
     ParsedSectionName,
+    ParsedSectionsCache,
     ParsedSectionsResolver,
     ResolvedResult,
     SectionPlugin,
@@ -289,3 +297,139 @@ class TestSectionsParser:
         section_name = SectionName("one")
 
         assert sections_parser.parse(section_name, lambda *args, **kw: None) is None
+
+
+class TestParsedSectionsCache:
+    @staticmethod
+    def _fetched(
+        host_name: str, raw_data: AgentRawData | SNMPRawData
+    ) -> Sequence[tuple[SourceInfo, result.Result[AgentRawData | SNMPRawData, Exception]]]:
+        return [
+            (
+                SourceInfo(HostName(host_name), None, "agent", FetcherType.TCP, SourceType.HOST),
+                result.OK(raw_data),
+            )
+        ]
+
+    @staticmethod
+    def _parse(
+        cache: ParsedSectionsCache,
+        host_name: str,
+        raw_data: AgentRawData,
+        parse_function: Callable[..., object],
+        *,
+        cache_info: tuple[int, int] | None = None,
+    ) -> object:
+        host_key = HostKey(HostName(host_name), SourceType.HOST)
+        providers = make_providers(
+            {
+                host_key: HostSections[AgentRawDataSection](
+                    sections={
+                        SectionName("one"): [
+                            line.split() for line in raw_data.decode().splitlines()
+                        ]
+                    },
+                    cache_info={} if cache_info is None else {SectionName("one"): cache_info},
+                )
+            },
+            {
+                SectionName("one"): SectionPlugin(
+                    supersedes=set(),
+                    parse_function=parse_function,
+                    parsed_section_name=ParsedSectionName("parsed"),
+                )
+            },
+            error_handling=lambda *args, **kw: "error",
+            cache=cache.for_sources(TestParsedSectionsCache._fetched(host_name, raw_data)),
+        )
+        resolved = providers[host_key].resolve(ParsedSectionName("parsed"))
+        return None if resolved is None else resolved.parsed_data
+
+    def test_reuse_parsed_section(self) -> None:
+        cache = ParsedSectionsCache(max_size=1024 * 1024)
+        parse_function = mock.Mock(side_effect=lambda string_table: {"lines": string_table})
+
+        first = self._parse(cache, "host", AgentRawData(b"node1 data\n"), parse_function)
+        assert first == {"lines": [["node1", "data"]]}
+        assert isinstance(first, dict)
+        first["lines"].append("modified by a plugin")
+        second = self._parse(cache, "host", AgentRawData(b"node1 data\n"), parse_function)
+        assert second == {"lines": [["node1", "data"]]}
+        assert second is not first
+        assert parse_function.call_count == 1
+
+        # other raw data, other parse function and other host
+        assert self._parse(cache, "host", AgentRawData(b"node2 data\n"), parse_function) == {
+            "lines": [["node2", "data"]]
+        }
+        assert self._parse(cache, "host", AgentRawData(b"node2 data\n"), lambda x: x) == [
+            ["node2", "data"]
+        ]
+        self._parse(cache, "other-host", AgentRawData(b"node2 data\n"), parse_function)
+        assert parse_function.call_count == 3
+
+    def test_other_cache_info(self) -> None:
+        cache = ParsedSectionsCache(max_size=1024 * 1024)
+        parse_function = mock.Mock(side_effect=lambda string_table: string_table)
+
+        self._parse(cache, "host", AgentRawData(b"data\n"), parse_function, cache_info=(1, 60))
+        self._parse(cache, "host", AgentRawData(b"data\n"), parse_function, cache_info=(1, 60))
+        self._parse(cache, "host", AgentRawData(b"data\n"), parse_function, cache_info=(61, 60))
+        assert parse_function.call_count == 2
+
+    @pytest.mark.usefixtures("disable_debug")
+    def test_parsing_errors_are_not_cached(self) -> None:
+        cache = ParsedSectionsCache(max_size=1024 * 1024)
+
+        def parse_function(string_table: object) -> object:
+            raise ValueError()
+
+        assert self._parse(cache, "host", AgentRawData(b"data\n"), parse_function) is None
+        assert not len(cache)
+
+    def test_unpicklable_results_are_not_cached(self) -> None:
+        cache = ParsedSectionsCache(max_size=1024 * 1024)
+        parse_function = mock.Mock(side_effect=lambda string_table: lambda: string_table)
+
+        self._parse(cache, "host", AgentRawData(b"data\n"), parse_function)
+        self._parse(cache, "host", AgentRawData(b"data\n"), parse_function)
+        assert parse_function.call_count == 2
+        assert not len(cache)
+
+    def test_snmp_data_is_not_cached(self) -> None:
+        cache = ParsedSectionsCache(max_size=1024 * 1024)
+        assert not cache.for_sources(self._fetched("host", {SectionName("one"): [["data"]]}))
+
+    def test_bounded_size(self) -> None:
+        size = len(pickle.dumps("x" * 100, protocol=pickle.HIGHEST_PROTOCOL))
+        cache = ParsedSectionsCache(max_size=2 * size)
+        parse_function = mock.Mock(side_effect=lambda string_table: "x" * 100)
+
+        for host_name in ("a", "b", "a", "c"):
+            self._parse(cache, host_name, AgentRawData(b"data\n"), parse_function)
+        assert len(cache) == 2
+        assert cache.size == 2 * size
+        assert parse_function.call_count == 3
+
+        # "b" has been evicted, "a" has been used more recently
+        self._parse(cache, "a", AgentRawData(b"data\n"), parse_function)
+        assert parse_function.call_count == 3
+        self._parse(cache, "b", AgentRawData(b"data\n"), parse_function)
+        assert parse_function.call_count == 4
+
+    def test_invalidate(self) -> None:
+        cache = ParsedSectionsCache(max_size=1024 * 1024)
+        parse_function = mock.Mock(side_effect=lambda string_table: string_table)
+
+        self._parse(cache, "a", AgentRawData(b"data\n"), parse_function)
+        self._parse(cache, "b", AgentRawData(b"data\n"), parse_function)
+        cache.invalidate(HostName("a"))
+        assert len(cache) == 1
+
+        self._parse(cache, "a", AgentRawData(b"data\n"), parse_function)
+        self._parse(cache, "b", AgentRawData(b"data\n"), parse_function)
+        assert parse_function.call_count == 3
+
+        cache.clear()
+        assert not len(cache)
+        assert not cache.size
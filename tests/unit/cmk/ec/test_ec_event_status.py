@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+from typing import cast
+
+from tests.unit.cmk.ec.helpers import new_event
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.ec.config import Config, Count, EventLimit
+from cmk.ec.event import Event
+from cmk.ec.main import EventServer, EventStatus
+
+
+def _count(*, separate_host: bool, count: int = 3) -> Count:
+    return Count(
+        count=count,
+        period=86400,
+        algorithm="interval",
+        count_duration=None,
+        count_ack=False,
+        separate_host=separate_host,
+        separate_application=False,
+        separate_match_groups=False,
+    )
+
+
+def _counting_event(rule_id: str, host: str) -> Event:
+    return new_event(
+        {
+            "rule_id": rule_id,
+            "host": HostName(host),
+            "core_host": HostName(host),
+            "host_in_downtime": False,
+        }
+    )
+
+
+def test_count_event_separate_host(event_server: EventServer, event_status: EventStatus) -> None:
+    count = _count(separate_host=True)
+    for host in ("a", "b", "a"):
+        event_status.count_event(event_server, _counting_event("r1", host), count)
+
+    assert sorted((e["host"], e["count"]) for e in event_status.events()) == [("a", 2), ("b", 1)]
+    assert event_status.num_existing_events_by_rule == {"r1": 2}
+
+
+def test_count_event_moves_host_index(event_server: EventServer, event_status: EventStatus) -> None:
+    count = _count(separate_host=False)
+    event_status.count_event(event_server, _counting_event("r1", "a"), count)
+    event_status.count_event(event_server, _counting_event("r1", "b"), count)
+
+    (event,) = event_status.events()
+    assert event["host"] == "b"
+    assert event["count"] == 2
+    assert event_status.num_existing_events_by_host == {
+        (HostName("a"), HostName("a")): 0,
+        (HostName("b"), HostName("b")): 1,
+    }
+
+    event_status.remove_oldest_event("by_host", event)
+    assert not event_status.events()
+    assert event_status.num_existing_events == 0
+
+
+def test_count_event_beyond_event_limit(
+    config: Config, event_server: EventServer, event_status: EventStatus
+) -> None:
+    config["event_limit"]["overall"] = EventLimit(action="stop", limit=1)
+    event_status.new_event(_counting_event("r0", "a"))
+    event_status.new_event(_counting_event("r0", "b"))
+
+    rejected = event_status.count_event(
+        event_server, _counting_event("r1", "a"), _count(separate_host=True, count=1)
+    )
+
+    assert rejected is not None
+    assert rejected["phase"] == "open"
+    assert not event_status.has_event(rejected)
+    assert [e["rule_id"] for e in event_status.events()] == ["r0", "r0"]
+
+
+def test_remove_oldest_event(event_status: EventStatus) -> None:
+    for rule_id, host in (("r1", "a"), ("r2", "a"), ("r1", "b"), ("r2", "b")):
+        event_status.new_event(_counting_event(rule_id, host))
+
+    event_status.remove_oldest_event("by_rule", _counting_event("r2", "x"))
+    assert [(e["rule_id"], e["host"]) for e in event_status.events()] == [
+        ("r1", "a"),
+        ("r1", "b"),
+        ("r2", "b"),
+    ]
+
+    event_status.remove_oldest_event("by_host", _counting_event("r2", "b"))
+    assert [(e["rule_id"], e["host"]) for e in event_status.events()] == [
+        ("r1", "a"),
+        ("r2", "b"),
+    ]
+    assert event_status.event(4) is event_status.events()[1]
+    assert event_status.event(3) is None
+
+
+def test_remove_event(event_status: EventStatus) -> None:
+    for num in range(5):
+        event_status.new_event(_counting_event("r1", f"h{num}"))
+    event = event_status.events()[2]
+    event["host"] = HostName("moved")
+    event_status.event_changed(event)
+
+    event_status.remove_event(event_status.events()[1], "DELETE")
+    event_status.remove_oldest_event("overall", event)
+    assert [e["id"] for e in event_status.events()] == [3, 4, 5]
+
+    event_status.remove_event(event, "DELETE")
+    event_status.remove_event(event, "DELETE")  # not present anymore
+    assert [e["id"] for e in event_status.events()] == [4, 5]
+    assert event_status.num_existing_events == 2
+
+
+def test_count_event_examines_events_of_rule_and_host_only(
+    event_server: EventServer, event_status: EventStatus
+) -> None:
+    examined: list[str] = []
+    for num in range(1000):
+        event_status.new_event(_watched_event(examined, f"rule-{num}", f"host-{num}"))
+    event_status.new_event(_watched_event(examined, "counted", "other-host"))
+    examined.clear()
+
+    count = _count(separate_host=True)
+    for num in range(9):
+        event_status.count_event(event_server, _counting_event("counted", f"h-{num % 3}"), count)
+
+    # Unrelated open events are not even looked at
+    assert not examined
+    assert [(e["host"], e["count"]) for e in event_status.events()[1001:]] == [
+        ("h-0", 3),
+        ("h-1", 3),
+        ("h-2", 3),
+    ]
+
+
+class _WatchedEvent(dict[str, object]):
+    def __init__(self, examined: list[str], event: Event) -> None:
+        super().__init__(event)
+        self._examined = examined
+
+    def __getitem__(self, key: str) -> object:
+        self._examined.append(key)
+        return super().__getitem__(key)
+
+
+def _watched_event(examined: list[str], rule_id: str, host: str) -> Event:
+    return cast(Event, _WatchedEvent(examined, _counting_event(rule_id, host)))
@@ -6,7 +6,6 @@
 
 import datetime
 import logging
-import shlex
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
@@ -18,13 +17,14 @@ import cmk.ec.export as ec
 from cmk.ec.config import Config
 from cmk.ec.history import _current_history_period
 from cmk.ec.history_file import (
-    _grep_pipeline,
+    _HistoryFileIndex,
+    _LineFilter,
     convert_history_line,
     FileHistory,
     parse_history_file,
 )
 from cmk.ec.main import StatusTableHistory
-from cmk.ec.query import QueryFilter, QueryGET, StatusTable
+from cmk.ec.query import OperatorName, QueryFilter, QueryGET, StatusTable
 
 
 def test_file_add_get(history: FileHistory) -> None:
@@ -95,17 +95,132 @@ def test_history_parse(tmp_path: Path) -> None:
         predicate=lambda x: True,
         argument="1",
     )
-    tac = f"nl -b a {shlex.quote(str(path))} | tac"
-    cmd = " | ".join([tac] + _grep_pipeline([filter_]))
+    index = _HistoryFileIndex(path)
+    index.update()
 
     new_entries = parse_history_file(
         StatusTableHistory.columns,
         path,
+        index,
+        _LineFilter.from_query_filters([filter_]),
         lambda x: True,
-        cmd,
         None,
         logging.getLogger("cmk.mkeventd"),
     )
 
     assert len(new_entries) == 4
+    assert new_entries[0][0] == 4
     assert new_entries[0][1] == 1666942292.3000507
+    assert (tmp_path / "history_test.idx").exists()
+
+
+def _query_history(history: FileHistory, *filters: str) -> list[tuple[object, object]]:
+    logger = logging.getLogger("cmk.mkeventd")
+
+    def get_table(name: str) -> StatusTable:
+        assert name == "history"
+        return StatusTableHistory(logger, history)
+
+    column_index = get_table("history").column_names.index
+    query = QueryGET(get_table, ["GET history", *filters], logger)
+    return [
+        (row[column_index("event_host")], row[column_index("event_text")])
+        for row in history.get(query)
+    ]
+
+
+def test_file_get_uses_index(history: FileHistory, settings: ec.Settings) -> None:
+    for num in range(10):
+        history.add(
+            ec.Event(host=HostName(f"host{num % 3}"), text=f"text {num}", rule_id=f"rule{num % 2}"),
+            what="NEW",
+        )
+    (log_path,) = settings.paths.history_dir.value.glob("*.log")
+    assert log_path.with_suffix(".idx").exists()
+
+    assert _query_history(history, "Filter: event_host = host1") == [
+        ("host1", "text 7"),
+        ("host1", "text 4"),
+        ("host1", "text 1"),
+    ]
+    assert _query_history(
+        history, "Filter: event_host = host1", "Filter: event_rule_id = rule0"
+    ) == [("host1", "text 4")]
+    assert _query_history(history, "Filter: event_host = host1", "Limit: 1") == [
+        ("host1", "text 7"),
+        ("host1", "text 4"),
+    ]
+    assert not _query_history(history, "Filter: event_host = unknown")
+    assert not _query_history(history, "Filter: history_time < 1000")
+    assert len(_query_history(history, "Filter: history_time > 1000")) == 10
+
+
+def test_file_get_indexes_files_without_index(history: FileHistory, settings: ec.Settings) -> None:
+    for num in range(3):
+        history.add(ec.Event(host=HostName(f"host{num}"), text=f"text {num}"), what="NEW")
+    (log_path,) = settings.paths.history_dir.value.glob("*.log")
+    index_path = log_path.with_suffix(".idx")
+
+    # e.g. written by a previous version
+    index_path.unlink()
+    history.add(ec.Event(host=HostName("host3"), text="text 3"), what="NEW")
+    assert not index_path.exists()
+    assert _query_history(history, "Filter: event_host = host0") == [("host0", "text 0")]
+    assert index_path.exists()
+
+    # damaged index
+    index_path.write_bytes(index_path.read_bytes()[:-3])
+    history.add(ec.Event(host=HostName("host4"), text="text 4"), what="NEW")
+    assert _query_history(history, "Filter: event_host = host4") == [("host4", "text 4")]
+    assert _query_history(history, "Filter: event_host = host3") == [("host3", "text 3")]
+
+
+def test_file_flush_removes_index(history: FileHistory, settings: ec.Settings) -> None:
+    history.add(ec.Event(host=HostName("host"), text="text"), what="NEW")
+    history.flush()
+    assert not list(settings.paths.history_dir.value.iterdir())
+
+
+def test_file_get_prefilters_case_insensitive_and_regex_filters(
+    history: FileHistory,
+) -> None:
+    for host, text in [
+        ("Web01", "Disk failure"),
+        ("web02", "disk FULL"),
+        ("db01", "Übertemperatur"),
+        ("web03", "Link down"),
+    ]:
+        history.add(ec.Event(host=HostName(host), text=text), what="NEW")
+
+    assert _query_history(history, "Filter: event_host =~ WEB01") == [("Web01", "Disk failure")]
+    assert _query_history(history, "Filter: event_text =~ übertemperatur") == [
+        ("db01", "Übertemperatur")
+    ]
+    assert _query_history(history, "Filter: event_host ~ ^web0[12]$") == [("web02", "disk FULL")]
+    assert _query_history(history, "Filter: event_text ~~ ^DISK") == [
+        ("web02", "disk FULL"),
+        ("Web01", "Disk failure"),
+    ]
+    assert _query_history(history, "Filter: event_text ~~ down$", "Filter: event_host ~ web") == [
+        ("web03", "Link down")
+    ]
+    assert not _query_history(history, "Filter: event_text ~ ^Link$")
+
+
+def test_line_filter_case_insensitive_and_regex_filters() -> None:
+    def line_filter(operator_name: OperatorName, argument: str) -> _LineFilter:
+        return _LineFilter.from_query_filters(
+            [QueryFilter("event_text", operator_name, lambda x: True, argument)]
+        )
+
+    line = "1666942292.3\tNEW\t\t\t4\t1\tText\tWeb01\t\n".encode()
+    assert line_filter("=~", "TEXT").accepts(line)
+    assert not line_filter("=~", "other").accepts(line)
+    assert line_filter("~", "^Web0").accepts(line)
+    assert not line_filter("~", "^web0").accepts(line)
+    assert line_filter("~~", "^WEB0").accepts(line)
+    assert not line_filter("~~", "^text$ and more").accepts(line)
+    # Left to the query filters
+    assert not line_filter("~", "(").patterns
+    assert not line_filter("~", "^x?$").patterns
+    assert line_filter("~", "x").accepts(b"\xff invalid UTF-8\n")
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import ast
+import logging
+import socket
+import threading
+from typing import Any
+
+import pytest
+
+from tests.unit.cmk.ec.helpers import new_event
+
+from cmk.utils.hostaddress import HostName
+
+import cmk.ec.export as ec
+import cmk.ec.main
+from cmk.ec.config import Config
+from cmk.ec.event import Event
+from cmk.ec.helpers import ECLock
+from cmk.ec.main import (
+    default_slave_status_sync,
+    EventServer,
+    EventStatus,
+    get_state_from_master,
+    parse_replication_request,
+    replication_send,
+    replication_update_state,
+    SlaveStatus,
+)
+
+
+@pytest.fixture(name="slave")
+def fixture_slave(settings: ec.Settings, event_status: EventStatus) -> EventStatus:
+    settings.paths.master_config_file.value.parent.mkdir(parents=True, exist_ok=True)
+    return EventStatus(
+        settings,
+        event_status._config,  # pylint: disable=protected-access
+        event_status._perfcounters,  # pylint: disable=protected-access
+        event_status._history,  # pylint: disable=protected-access
+        logging.getLogger("cmk.mkeventd.EventStatus"),
+    )
+
+
+@pytest.fixture(name="slave_status_sync")
+def fixture_slave_status_sync() -> SlaveStatus:
+    return default_slave_status_sync()
+
+
+def _open_event(nr: int) -> Event:
+    return new_event(
+        {
+            "host": HostName(f"h{nr}"),
+            "core_host": HostName(f"h{nr}"),
+            "host_in_downtime": False,
+            "text": f"event {nr}",
+        }
+    )
+
+
+def _replicate(
+    settings: ec.Settings,
+    config: Config,
+    lock_configuration: ECLock,
+    master: EventStatus,
+    slave: EventStatus,
+    slave_status: SlaveStatus,
+    event_server: EventServer,
+) -> dict[str, Any]:
+    """Do what master and slave do for a sync, including the transport as repr()"""
+    epoch, sequence = version if (version := slave.replicated_version()) else ("-", 0)
+    argument = f"1 {slave_status.get('config_generation', '-')} {epoch} {sequence}"
+    response = replication_send(
+        config, lock_configuration, master, *parse_replication_request(argument)
+    )
+    new_state: dict[str, Any] = ast.literal_eval(repr(response))
+    replication_update_state(settings, config, slave, event_server, new_state, slave_status)
+    return new_state
+
+
+def _summary(event_status: EventStatus) -> list[tuple[int, str, str]]:
+    return [(e["id"], e["text"], e["phase"]) for e in event_status.events()]
+
+
+def test_legacy_request(
+    config: Config, lock_configuration: ECLock, event_status: EventStatus
+) -> None:
+    event_status.new_event(_open_event(1))
+    last_update, request = parse_replication_request("0")
+    response = replication_send(config, lock_configuration, event_status, last_update, request)
+    assert set(response) == {"status", "rules", "rule_packs", "actions"}
+
+    response = replication_send(
+        config, lock_configuration, event_status, config["last_reload"], None
+    )
+    assert set(response) == {"status"}
+
+
+def test_invalid_request() -> None:
+    with pytest.raises(ValueError):
+        parse_replication_request("1 2 3")
+
+
+def test_get_state_from_former_master(
+    config: Config,
+    lock_configuration: ECLock,
+    event_status: EventStatus,
+    slave: EventStatus,
+    slave_status_sync: SlaveStatus,
+) -> None:
+    event_status.new_event(_open_event(1))
+    requests: list[bytes] = []
+
+    def serve_like_former_master(server: socket.socket) -> None:
+        for _ in range(2):
+            client_socket, _addr = server.accept()
+            with client_socket:
+                request = b""
+                while chunk := client_socket.recv(8192):
+                    request += chunk
+                requests.append(request)
+                try:
+                    last_update = int(request.decode("utf-8").split(None, 1)[1])
+                except ValueError:
+                    continue  # closed without an answer
+                response = replication_send(config, lock_configuration, event_status, last_update)
+                client_socket.sendall((repr(response) + "\n").encode("utf-8"))
+
+    with socket.create_server(("127.0.0.1", 0)) as server:
+        server.settimeout(10)
+        thread = threading.Thread(target=serve_like_former_master, args=(server,))
+        thread.start()
+        new_state = get_state_from_master(
+            config
+            | {
+                "replication": {
+                    "connect_timeout": 10,
+                    "interval": 10,
+                    "master": server.getsockname(),
+                }
+            },
+            slave_status_sync,
+            slave,
+        )
+        thread.join()
+
+    assert requests == [b"REPLICATE 0 - - 0\n", b"REPLICATE 0\n"]
+    assert set(new_state) == {"status", "rules", "rule_packs", "actions"}
+    assert [e["text"] for e in new_state["status"]["events"]] == ["event 1"]
+
+
+def test_delta_replication(
+    settings: ec.Settings,
+    config: Config,
+    lock_configuration: ECLock,
+    event_status: EventStatus,
+    slave: EventStatus,
+    slave_status_sync: SlaveStatus,
+    event_server: EventServer,
+) -> None:
+    def replicate() -> dict[str, Any]:
+        return _replicate(
+            settings,
+            config,
+            lock_configuration,
+            event_status,
+            slave,
+            slave_status_sync,
+            event_server,
+        )
+
+    for nr in range(5):
+        event_status.new_event(_open_event(nr))
+
+    new_state = replicate()
+    assert "status" in new_state
+    assert "rules" in new_state
+    assert slave_status_sync["config_generation"] == config["config_generation"]
+    assert _summary(slave) == _summary(event_status)
+
+    new_state = replicate()
+    assert "rules" not in new_state
+    assert new_state["status_delta"]["events"] == []
+    assert new_state["status_delta"]["removed_event_ids"] == []
+
+    event_status.remove_event(event_status.events()[1], "DELETE")
+    acknowledged = event_status.events()[2]
+    acknowledged["phase"] = "ack"
+    event_status.event_changed(acknowledged)
+    event_status.new_event(_open_event(5))
+    event_status.new_event(_open_event(6))
+    event_status.remove_event(event_status.events()[-1], "DELETE")
+
+    new_state = replicate()
+    delta = new_state["status_delta"]
+    assert [e["id"] for e in delta["events"]] == [4, 6]
+    assert delta["removed_event_ids"] == [2, 7]
+    assert _summary(slave) == _summary(event_status)
+    assert slave.event(4) is slave.events()[2]
+    assert slave.num_existing_events == 5
+    assert slave.get_num_existing_events_by("by_host", _open_event(1)) == 0
+    assert slave.get_num_existing_events_by("by_host", _open_event(5)) == 1
+
+
+def test_full_sync_when_delta_is_unknown(
+    settings: ec.Settings,
+    config: Config,
+    lock_configuration: ECLock,
+    event_status: EventStatus,
+    slave: EventStatus,
+    slave_status_sync: SlaveStatus,
+    event_server: EventServer,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def replicate() -> dict[str, Any]:
+        return _replicate(
+            settings,
+            config,
+            lock_configuration,
+            event_status,
+            slave,
+            slave_status_sync,
+            event_server,
+        )
+
+    for nr in range(5):
+        event_status.new_event(_open_event(nr))
+    replicate()
+
+    # The slave has changed events on its own
+    slave.remove_event(slave.events()[0], "DELETE")
+    assert "status" in replicate()
+    assert _summary(slave) == _summary(event_status)
+    assert "status_delta" in replicate()
+
+    # The master has forgotten about removals the slave has not seen yet
+    monkeypatch.setattr(cmk.ec.main, "MAX_REPLICATED_REMOVALS", 2)
+    for event in event_status.events()[:3]:
+        event_status.remove_event(event, "DELETE")
+    assert "status" in replicate()
+    assert _summary(slave) == _summary(event_status)
+
+    # The master has started over
+    event_status.flush()
+    assert "status" in replicate()
+    assert slave.events() == []
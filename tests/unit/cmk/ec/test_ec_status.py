@@ -129,3 +129,83 @@ def test_mkevent_query_filters(
     status_server.handle_client(status_socket, True, "127.0.0.1")
     response = status_socket.get_response()
     assert (len(response) == 2) is is_match
+
+
+def _add_events(event_status: EventStatus) -> None:
+    for host, application, state in [
+        ("abc", "sshd", 2),
+        ("ABC", "cron", 0),
+        ("xyz", "sshd", 2),
+        ("abc", "kernel", 1),
+    ]:
+        event_status.new_event(
+            new_event(
+                {
+                    "host": HostName(host),
+                    "core_host": HostName(host),
+                    "host_in_downtime": False,
+                    "application": application,
+                    "state": state,
+                }
+            )
+        )
+
+
+@pytest.mark.parametrize(
+    "filters, expected_ids",
+    [
+        (b"Filter: event_host = abc\n", [1, 4]),
+        (b"Filter: event_host =~ abc\n", [1, 2, 4]),
+        (b"Filter: event_host in xyz ABC\n", [1, 2, 3, 4]),
+        (b"Filter: event_host in abc\nFilter: event_application = sshd\n", [1]),
+        (b"Filter: event_host in abc xyz\nFilter: event_phase in open\n", [1, 2, 3]),
+        (b"Filter: event_host in abc xyz\nFilter: event_phase = ack\n", [4]),
+        (b"Filter: event_application ~~ SSH\nFilter: event_phase in ack\n", []),
+        (b"Filter: event_host in nothing\n", []),
+    ],
+)
+def test_indexed_query(
+    event_status: EventStatus,
+    status_server: StatusServer,
+    filters: bytes,
+    expected_ids: list[int],
+) -> None:
+    _add_events(event_status)
+    acknowledged = event_status.events()[3]
+    acknowledged["phase"] = "ack"
+    event_status.event_changed(acknowledged)
+
+    s = FakeStatusSocket(b"GET events\nColumns: event_id\n" + filters)
+    status_server.handle_client(s, True, "127.0.0.1")
+
+    assert s.get_response() == [["event_id"], *([eid] for eid in expected_ids)]
+
+
+def test_stats_query(event_status: EventStatus, status_server: StatusServer) -> None:
+    _add_events(event_status)
+    s = FakeStatusSocket(
+        b"GET events\n"
+        b"Filter: event_host in abc\n"
+        b"Stats: event_state = 2\n"
+        b"Stats: event_phase in open ack\n"
+    )
+    status_server.handle_client(s, True, "127.0.0.1")
+    assert s.get_response() == [["stats_1", "stats_2"], [1, 3]]
+
+    s = FakeStatusSocket(b"GET events\nFilter: event_host in nothing\nStats: event_state = 2\n")
+    status_server.handle_client(s, True, "127.0.0.1")
+    assert s.get_response() == [["stats_1"], [0]]
+
+
+def test_stats_query_grouped(event_status: EventStatus, status_server: StatusServer) -> None:
+    _add_events(event_status)
+    s = FakeStatusSocket(
+        b"GET events\nColumns: event_application\nStats: event_state = 2\nStats: event_state < 2\n"
+    )
+    status_server.handle_client(s, True, "127.0.0.1")
+    assert s.get_response() == [
+        ["event_application", "stats_1", "stats_2"],
+        ["sshd", 2, 0],
+        ["cron", 0, 1],
+        ["kernel", 0, 1],
+    ]
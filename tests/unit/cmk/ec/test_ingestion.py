@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import logging
+import os
+import socket
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from cmk.ec.ingestion import (
+    drain_datagrams,
+    MessageQueue,
+    Receiver,
+    SNMPTrap,
+    SyslogMessage,
+)
+from cmk.ec.main import EventServer
+from cmk.ec.perfcounters import Perfcounters
+
+logger = logging.getLogger("cmk.mkeventd")
+
+
+@pytest.fixture(name="syslog_udp")
+def fixture_syslog_udp() -> Iterator[socket.socket]:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        yield sock
+
+
+@pytest.fixture(name="sender")
+def fixture_sender(syslog_udp: socket.socket) -> Iterator[socket.socket]:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.connect(syslog_udp.getsockname())
+        yield sock
+
+
+def _receiver(
+    queue: MessageQueue, spool_dir: Path, syslog_udp: socket.socket | None = None
+) -> tuple[Receiver, int]:
+    read_fd, write_fd = os.pipe()
+    os.set_blocking(read_fd, False)
+    receiver = Receiver(
+        queue=queue,
+        pipe=read_fd,
+        event_socket=None,
+        syslog_udp=syslog_udp,
+        syslog_tcp=None,
+        snmp_trap_socket=None,
+        spool_dir=spool_dir,
+        logger=logger,
+    )
+    return receiver, write_fd
+
+
+def test_message_queue_drops_when_full() -> None:
+    queue = MessageQueue(2)
+    assert queue.put(SyslogMessage(b"1", None))
+    assert queue.put(SyslogMessage(b"2", None))
+    assert not queue.put(SyslogMessage(b"3", None))
+    assert queue.full()
+    assert queue.take_drops() == 1
+    assert queue.take_drops() == 0
+
+    assert [m.data for m in queue.take(1)] == [b"1"]
+    assert [m.data for m in queue.take(5)] == [b"2"]
+    assert not queue
+
+
+def test_drain_datagrams(syslog_udp: socket.socket, sender: socket.socket) -> None:
+    syslog_udp.setblocking(False)
+    for nr in range(10):
+        sender.send(b"msg %d" % nr)
+
+    assert [m for m, _a in drain_datagrams(syslog_udp, 4096, 4)] == [
+        b"msg 0",
+        b"msg 1",
+        b"msg 2",
+        b"msg 3",
+    ]
+    assert len(list(drain_datagrams(syslog_udp, 4096, 100))) == 6
+    assert not list(drain_datagrams(syslog_udp, 4096, 100))
+
+
+def test_receiver_drains_udp_in_one_wakeup(
+    tmp_path: Path, syslog_udp: socket.socket, sender: socket.socket
+) -> None:
+    queue = MessageQueue(150)
+    receiver, write_fd = _receiver(queue, tmp_path, syslog_udp)
+    with receiver:
+        receiver.receive()  # initial look into the spool directory
+        for nr in range(200):
+            sender.send(b"<13>Jan  1 00:00:00 host app: msg %d" % nr)
+        receiver.receive()
+    os.close(write_fd)
+
+    messages = queue.take(1000)
+    assert len(messages) == 150
+    assert messages[0] == SyslogMessage(
+        b"<13>Jan  1 00:00:00 host app: msg 0", ("127.0.0.1", sender.getsockname()[1])
+    )
+    assert queue.take_drops() == 50
+
+
+def test_receiver_pipe_and_spool_directory(tmp_path: Path) -> None:
+    queue = MessageQueue(100)
+    receiver, write_fd = _receiver(queue, tmp_path)
+    with receiver:
+        os.write(write_fd, b"from pipe 1\nfrom pipe 2\nincomplete")
+        receiver.receive()
+        assert [m.data for m in queue.take(10)] == [b"from pipe 1", b"from pipe 2"]
+
+        receiver.receive()
+        assert not receiver._spool.pending  # pylint: disable=protected-access
+
+        (tmp_path / ".tmp").write_bytes(b"spooled 1\nspooled 2\n")
+        (tmp_path / ".tmp").rename(tmp_path / "spoolfile")
+        receiver.receive()
+        assert [m.data for m in queue.take(10)] == [b"spooled 1", b"spooled 2"]
+        assert not (tmp_path / "spoolfile").exists()
+    os.close(write_fd)
+
+
+def test_process_received_messages(event_server: EventServer, perfcounters: Perfcounters) -> None:
+    event_server.process_received_messages(
+        [
+            SyslogMessage(b"<13>Jan  1 00:00:00 host app: hello", ("127.0.0.1", 514)),
+            SNMPTrap(b"not a trap", ("127.0.0.1", 162)),
+        ]
+    )
+    assert perfcounters._counters["messages"] == 1  # pylint: disable=protected-access
@@ -23,6 +23,20 @@ def test_perfcounters_count() -> None:
     assert not [(k, v) for k, v in c._counters.items() if k != "messages" and v > 0]
 
 
+def test_perfcounters_gauge() -> None:
+    c = Perfcounters(logger)
+    c.set_gauge("ingestion_queue_length", 42)
+    c.set_gauge("ingestion_queue_length", 23)
+    c.do_statistics()
+    assert (
+        dict(zip([n for n, _d in c.status_columns()], c.get_status()))[
+            "status_ingestion_queue_length"
+        ]
+        == 23
+    )
+    assert "ingestion_queue_length" not in c._rates
+
+
 def test_perfcounters_count_time() -> None:
     c = Perfcounters(logger)
     assert "processing" not in c._times
@@ -114,6 +128,9 @@ def test_perfcounters_correct_status_values() -> None:
     for _x in range(2):
         c.count("rule_tries")
 
+    c.count("ingestion_drops", 7)
+    c.set_gauge("ingestion_queue_length", 42)
+
     for column_name, column_value in zip([n for n, _d in c.status_columns()], c.get_status()):
         if column_name.startswith("status_average_") and column_name.endswith("_time"):
             counter_name = column_name.split("_")[-2]
@@ -127,6 +144,9 @@ def test_perfcounters_correct_status_values() -> None:
             counter_name = column_name.split("_")[-2]
             assert column_value == c._rates.get(counter_name, 0.0)
 
+        elif column_name.removeprefix("status_") in c._gauges:
+            assert column_value == c._gauges[column_name.removeprefix("status_")]
+
         elif column_name.startswith("status_"):
             counter_name = "_".join(column_name.split("_")[1:])
             assert (
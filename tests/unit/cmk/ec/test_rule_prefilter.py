@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import random
+from typing import Literal
+
+import pytest
+
+from tests.unit.cmk.ec.helpers import new_event
+
+from cmk.utils.hostaddress import HostName
+
+import cmk.ec.export as ec
+from cmk.ec.config import Config, ServiceLevel
+from cmk.ec.main import EventServer, EventStatus
+from cmk.ec.rule_matcher import compile_matching_value, match
+from cmk.ec.rule_prefilter import LiteralScanner, pattern_literals, rule_literals, RulePrefilter
+
+
+def _literals(pattern: str) -> set[str] | None:
+    compiled = compile_matching_value("match", pattern)
+    assert compiled is not None
+    literals = pattern_literals(compiled)
+    return None if literals is None else set(literals)
+
+
+@pytest.mark.parametrize(
+    "pattern, expected",
+    [
+        ("Out of memory", {"out of memory"}),
+        ("error", {"error"}),
+        ("ab", None),
+        (".*kernel: .*segfault at", {"segfault at"}),
+        (
+            "^sshd\\[[0-9]+\\]: Failed password for (invalid user )?\\S+",
+            {"]: failed password for "},
+        ),
+        ("(Disk failure|RAID degraded) on [a-z]+", {"disk failure", "raid degraded"}),
+        ("(Disk failure|RAID|x) on controller", {" on controller"}),
+        ("(Disk failure|RAID|x)", None),
+        ("link (up|down)", {"link "}),
+        ("(?:temperature ){2,} too high", {"temperature "}),
+        ("(reboot)? required", {" required"}),
+        ("(reboot)*", None),
+        ("(?i)Übertemperatur erreicht", {"bertemperatur erreicht"}),
+        ("^[0-9]+ files? deleted$", {" deleted"}),
+        ("^.*$", None),
+    ],
+)
+def test_pattern_literals(pattern: str, expected: set[str] | None) -> None:
+    assert _literals(pattern) == expected
+
+
+def test_rule_literals() -> None:
+    assert rule_literals(ec.Rule(id="no_message")) is None
+    assert rule_literals(ec.Rule(id="a", match="link down")) == frozenset(["link down"])
+    assert rule_literals(ec.Rule(id="b", match="link down", match_ok="link up")) == frozenset(
+        ["link down", "link up"]
+    )
+    assert rule_literals(ec.Rule(id="c", match="link down", match_ok="up")) is None
+    assert rule_literals(ec.Rule(id="d", match="link down", invert_matching=True)) is None
+
+
+def test_literal_scanner() -> None:
+    scanner = LiteralScanner(["he", "she", "his", "hers", "usher"])
+    assert scanner.scan("ushers") == {"he", "she", "hers", "usher"}
+    assert scanner.scan("hishe") == {"his", "she", "he"}
+    assert scanner.scan("xyz") == set()
+    assert LiteralScanner([]).scan("anything") == set()
+
+
+_PATTERNS = [
+    "kernel",
+    "Disk failure",
+    "link (up|down)",
+    "^sshd.*Failed password for",
+    "(error|warning|failed): .* timeout",
+    "[0-9]+ (files|dirs) deleted",
+    "STRASSE",
+    "kiste",
+    "(?i)IST",
+    "sigma Σ",
+]
+_WORDS = [
+    "kernel",
+    "KERNEL",
+    "Disk",
+    "failure",
+    "link",
+    "up",
+    "down",
+    "sshd",
+    "Failed",
+    "password",
+    "for",
+    "error:",
+    "warning:",
+    "timeout",
+    "42",
+    "files",
+    "deleted",
+    "straße",
+    "Straße",
+    "KİSTE",
+    "kıste",
+    "İST",
+    "ıst",
+    "σ",
+    "ς",
+    "Σ",
+    "sigma",
+    " ",
+    " ",
+    " ",
+]
+
+
+def test_candidates_contain_all_matching_rules() -> None:
+    rules = []
+    for nr, pattern in enumerate(_PATTERNS):
+        compiled = compile_matching_value("match", pattern)
+        assert compiled is not None
+        rules.append(ec.Rule(id=f"r{nr}", match=compiled))
+    prefilter = RulePrefilter(rules)
+    assert prefilter.num_unfiltered == 0
+
+    generator = random.Random(4711)
+    num_matches = 0
+    for _ in range(5000):
+        text = "".join(generator.choices(_WORDS, k=generator.randint(1, 12)))
+        candidates = prefilter.candidates(rules, text)
+        matching = [
+            rule for rule in rules if match(rule["match"], text, complete=False) is not False
+        ]
+        num_matches += len(matching)
+        assert set(map(id, matching)) <= set(map(id, candidates)), text
+    assert num_matches > 1000
+
+
+def test_candidates_keep_rule_order() -> None:
+    rules = [
+        ec.Rule(id="a", match="link down"),
+        ec.Rule(id="b"),
+        ec.Rule(id="c", match="disk failure"),
+        ec.Rule(id="d", match="link"),
+    ]
+    prefilter = RulePrefilter(rules)
+    assert prefilter.num_unfiltered == 1
+    assert [r["id"] for r in prefilter.candidates(rules, "eth0: Link down")] == ["a", "b", "d"]
+    assert [r["id"] for r in prefilter.candidates(rules, "nothing")] == ["b"]
+    # A subsequence of the rules, as from the rule hash
+    subset = rules[2:]
+    assert [r["id"] for r in prefilter.candidates(subset, "Link down, disk failure")] == ["c", "d"]
+    assert prefilter.candidates([], "Link down") == []
+
+
+def _rule(rule_id: str, pattern: str, drop: bool | Literal["skip_pack"] = False) -> ec.Rule:
+    return ec.Rule(
+        id=rule_id,
+        actions=[],
+        actions_in_downtime=True,
+        autodelete=False,
+        cancel_action_phases="always",
+        cancel_actions=[],
+        comment="",
+        description="",
+        disabled=False,
+        docu_url="",
+        invert_matching=False,
+        sl=ServiceLevel(precedence="message", value=0),
+        state=0,
+        match=pattern,
+        drop=drop,
+    )
+
+
+def test_skip_pack_with_prefilter(
+    config: Config, event_server: EventServer, event_status: EventStatus
+) -> None:
+    assert config["rule_optimizer"]
+    event_server.compile_rules(
+        [
+            ec.ECRulePackSpec(
+                id="ssh",
+                title="SSH",
+                disabled=False,
+                rules=[
+                    _rule("skip_sshd", "sshd", drop="skip_pack"),
+                    _rule("session", "session opened"),
+                ],
+            ),
+            ec.ECRulePackSpec(
+                id="catch_all",
+                title="Catch all",
+                disabled=False,
+                rules=[
+                    _rule("session_any", "session (opened|closed)"),
+                    _rule("anything", "^.*$"),
+                ],
+            ),
+        ]
+    )
+
+    for text in [
+        "sshd: session opened for user root",
+        "cron: session opened for user root",
+        "cron: session closed for user root",
+        "sshd: Disconnected",
+    ]:
+        event_server.process_potential_event(
+            new_event({"host": HostName("heute"), "text": text, "facility": 4, "priority": 6})
+        )
+
+    assert [(e["text"], e["rule_id"]) for e in event_status.events()] == [
+        ("sshd: session opened for user root", "session_any"),
+        ("cron: session opened for user root", "session"),
+        ("cron: session closed for user root", "session_any"),
+        ("sshd: Disconnected", "anything"),
+    ]
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import logging
+from pathlib import Path
+
+import pytest
+
+from tests.unit.cmk.ec.helpers import new_event
+
+from cmk.utils.hostaddress import HostName
+
+import cmk.ec.export as ec
+from cmk.ec.event import Event
+from cmk.ec.main import EventServer, EventStatus
+from cmk.ec.status_store import EventStatusStore, JournalRecord, PackedEventStatus
+
+logger = logging.getLogger("cmk.mkeventd")
+
+
+def _event(eid: int, text: str = "") -> Event:
+    return new_event({"id": eid, "text": text or f"event {eid}", "host": HostName(f"h{eid}")})
+
+
+def _status(events: list[Event], next_event_id: int) -> PackedEventStatus:
+    return PackedEventStatus(
+        next_event_id=next_event_id, events=events, rule_stats={"r": 1}, interval_starts={}
+    )
+
+
+def _record(
+    changed: list[Event], removed: list[int], next_event_id: int, hits: int = 1
+) -> JournalRecord:
+    return JournalRecord(
+        next_event_id=next_event_id,
+        rule_stats={"r": hits},
+        interval_starts={},
+        changed_events=changed,
+        removed_event_ids=removed,
+    )
+
+
+@pytest.fixture(name="store")
+def fixture_store(tmp_path: Path) -> EventStatusStore:
+    return EventStatusStore(tmp_path / "status", tmp_path / "status.journal", logger)
+
+
+def _reopen(tmp_path: Path) -> EventStatusStore:
+    return EventStatusStore(tmp_path / "status", tmp_path / "status.journal", logger)
+
+
+def test_nothing_saved(store: EventStatusStore) -> None:
+    assert store.load() is None
+    assert store.needs_snapshot()
+
+
+def test_snapshot_and_journal_roundtrip(tmp_path: Path, store: EventStatusStore) -> None:
+    store.write_snapshot(_status([_event(1), _event(2), _event(3)], 4))
+    assert not store.needs_snapshot()
+    store.append(_record([_event(2, "changed"), _event(4)], [1], 5, hits=2))
+    store.append(_record([_event(5)], [4], 6, hits=3))
+
+    status = _reopen(tmp_path).load()
+    assert status is not None
+    assert [(e["id"], e["text"]) for e in status["events"]] == [
+        (2, "changed"),
+        (3, "event 3"),
+        (5, "event 5"),
+    ]
+    assert status["next_event_id"] == 6
+    assert status["rule_stats"] == {"r": 3}
+    assert isinstance(status["events"][0]["host"], HostName)
+
+
+def test_legacy_status_file(tmp_path: Path, store: EventStatusStore) -> None:
+    (tmp_path / "status").write_text(
+        repr({"next_event_id": 2, "events": [_event(1)], "rule_stats": {}}) + "\n"
+    )
+    status = store.load()
+    assert status is not None
+    assert [e["id"] for e in status["events"]] == [1]
+    assert status["interval_starts"] == {}
+    assert store.needs_snapshot()
+
+
+def test_journal_grows_with_changes_only(tmp_path: Path, store: EventStatusStore) -> None:
+    store.write_snapshot(_status([_event(eid) for eid in range(1, 5001)], 5001))
+    journal = tmp_path / "status.journal"
+    size_before = journal.stat().st_size
+
+    store.append(_record([_event(42, "changed")], [7], 5001))
+
+    assert journal.stat().st_size - size_before < 1000
+    assert not store.needs_snapshot()
+
+
+def test_compaction_when_journal_exceeds_snapshot(store: EventStatusStore) -> None:
+    store.write_snapshot(_status([], 1))
+    big_event = _event(1, "x" * 512 * 1024)
+    store.append(_record([big_event], [], 2))
+    assert not store.needs_snapshot()
+    store.append(_record([big_event], [], 2))
+    assert store.needs_snapshot()
+
+
+def _save_two_generations(store: EventStatusStore) -> tuple[int, int]:
+    """Return the journal sizes after the first and the second record"""
+    store.write_snapshot(_status([_event(1), _event(2)], 3))
+    store.append(_record([_event(3)], [1], 4))
+    first = store._journal_size  # pylint: disable=protected-access
+    store.append(_record([_event(2, "changed"), _event(4)], [3], 5))
+    second = store._journal_size  # pylint: disable=protected-access
+    assert first is not None and second is not None
+    return first, second
+
+
+def _texts(status: PackedEventStatus | None) -> list[str]:
+    assert status is not None
+    return [e["text"] for e in status["events"]]
+
+
+def test_torn_record_restores_previous_save(tmp_path: Path, store: EventStatusStore) -> None:
+    first, second = _save_two_generations(store)
+    journal = tmp_path / "status.journal"
+    complete = journal.read_bytes()
+
+    for size in range(first, second):
+        journal.write_bytes(complete[:size])
+        reopened = _reopen(tmp_path)
+        assert _texts(reopened.load()) == ["event 2", "event 3"]
+        # We must not append after the torn record, otherwise it would hide the new one.
+        assert reopened.needs_snapshot() == (size != first)
+
+
+def test_corrupted_record_restores_previous_save(tmp_path: Path, store: EventStatusStore) -> None:
+    first, _second = _save_two_generations(store)
+    journal = tmp_path / "status.journal"
+    data = bytearray(journal.read_bytes())
+    data[first + 20] ^= 0xFF
+    journal.write_bytes(bytes(data))
+
+    reopened = _reopen(tmp_path)
+    assert _texts(reopened.load()) == ["event 2", "event 3"]
+    assert reopened.needs_snapshot()
+
+
+def test_crash_before_new_journal(tmp_path: Path, store: EventStatusStore) -> None:
+    _save_two_generations(store)
+    old_journal = (tmp_path / "status.journal").read_bytes()
+    store.write_snapshot(_status([_event(7)], 8))
+    # Simulate a crash after renaming the new snapshot, but before creating the new journal
+    (tmp_path / "status.journal").write_bytes(old_journal)
+
+    reopened = _reopen(tmp_path)
+    assert _texts(reopened.load()) == ["event 7"]
+    assert reopened.needs_snapshot()
+
+
+def test_crash_while_writing_snapshot(tmp_path: Path, store: EventStatusStore) -> None:
+    _save_two_generations(store)
+    (tmp_path / "status.new").write_bytes(b"CMKECS01 incomplete garbage")
+
+    assert _texts(_reopen(tmp_path).load()) == ["changed", "event 4"]
+
+
+def test_append_after_recovery(tmp_path: Path, store: EventStatusStore) -> None:
+    _first, second = _save_two_generations(store)
+    journal = tmp_path / "status.journal"
+    journal.write_bytes(journal.read_bytes()[: second - 1])
+
+    reopened = _reopen(tmp_path)
+    status = reopened.load()
+    assert status is not None
+    reopened.write_snapshot(status)
+    reopened.append(_record([_event(5)], [], 6))
+
+    assert _texts(_reopen(tmp_path).load()) == ["event 2", "event 3", "event 5"]
+
+
+def _open_event(nr: int) -> Event:
+    return new_event(
+        {
+            "host": HostName(f"h{nr}"),
+            "core_host": HostName(f"h{nr}"),
+            "host_in_downtime": False,
+            "text": f"event {nr}",
+        }
+    )
+
+
+def test_event_status_saves_changes_to_journal(
+    settings: ec.Settings, event_server: EventServer, event_status: EventStatus
+) -> None:
+    settings.paths.status_file.value.parent.mkdir(parents=True, exist_ok=True)
+    for nr in range(5):
+        event_status.new_event(_open_event(nr))
+    event_status.save_status()  # initial snapshot
+    snapshot = settings.paths.status_file.value.read_bytes()
+
+    event_status.remove_event(event_status.events()[0], "DELETE")
+    changed = event_status.events()[0]
+    changed["text"] = "changed"
+    event_status.event_changed(changed)
+    event_status.new_event(_open_event(5))
+    event_status.save_status()
+
+    assert settings.paths.status_file.value.read_bytes() == snapshot
+    loaded = EventStatus(
+        settings,
+        event_status._config,  # pylint: disable=protected-access
+        event_status._perfcounters,  # pylint: disable=protected-access
+        event_status._history,  # pylint: disable=protected-access
+        logger,
+    )
+    loaded.load_status(event_server)
+    assert [(e["id"], e["text"]) for e in loaded.events()] == [
+        (2, "changed"),
+        (3, "event 2"),
+        (4, "event 3"),
+        (5, "event 4"),
+        (6, "event 5"),
+    ]
+    assert loaded.event(6) is loaded.events()[-1]
+    assert loaded.num_existing_events == 5
@@ -8,6 +8,8 @@ from __future__ import annotations
 
 import os
 import socket
+import threading
+import time
 from collections.abc import Sequence, Sized
 from pathlib import Path
 from typing import Generic, NamedTuple, NoReturn, TypeAlias, TypeVar
@@ -294,6 +296,28 @@ class TestProgramFetcher:
     def test_repr(self, fetcher: ProgramFetcher) -> None:
         assert isinstance(repr(fetcher), str)
 
+    @pytest.mark.parametrize("is_cmc", [True, False])
+    def test_cancel(self, is_cmc: bool) -> None:
+        fetcher = ProgramFetcher(cmdline="exec sleep 600", stdin=None, is_cmc=is_cmc)
+        errors: list[MKFetcherError] = []
+
+        def fetch() -> None:
+            try:
+                fetcher.fetch(Mode.CHECKING)
+            except MKFetcherError as exc:
+                errors.append(exc)
+
+        with fetcher:
+            thread = threading.Thread(target=fetch)
+            thread.start()
+            while fetcher._process is None and thread.is_alive():
+                time.sleep(0.01)
+            fetcher.cancel()
+            thread.join(timeout=60)
+
+        assert not thread.is_alive()
+        assert len(errors) == 1
+
 
 class TestSNMPPluginStore:
     @pytest.fixture
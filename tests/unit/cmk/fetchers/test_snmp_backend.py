@@ -10,7 +10,12 @@ from pathlib import Path
 
 import pytest
 
+from cmk.utils.hostaddress import HostAddress, HostName
+
+from cmk.snmplib import SNMPBackendEnum, SNMPHostConfig, SNMPVersion
+
 import cmk.fetchers.snmp_backend._utils as utils
+from cmk.fetchers.snmp_backend import stored_walk
 from cmk.fetchers.snmp_backend import StoredWalkSNMPBackend
 
 
@@ -29,35 +34,78 @@ def test_strip_snmp_value(value: str, expected: bytes) -> None:
 
 @pytest.mark.usefixtures("create_files")
 class TestStoredWalkSNMPBackend:
-    @pytest.mark.parametrize(
-        "a, b, result",
-        [
-            ("1.2.3", "1.2.3", 0),
-            ("1.2.3", ".1.2.3", 0),
-            (".1.2.3", "1.2.3", 0),
-            (".1.2.3", ".1.2.3", 0),
-            ("1.2.3", "1.2.3.4", 0),
-            ("1.2.3.4", "1.2.3", 1),
-            ("1.2.3", "4.5.6", -1),
-        ],
-    )
-    def test_compare_oids(self, a: str, b: str, result: int) -> None:
-        assert StoredWalkSNMPBackend._compare_oids(a, b) == result
-
-    def test_read_walk_data(self, tmpdir: Path) -> None:
-        assert StoredWalkSNMPBackend.read_walk_from_path(
-            tmpdir / "walkdata" / "1.txt", logging.getLogger("test")
-        ) == [
-            ".1.2.3 foo\n",
-            ".1.2.4 bar\nfoobar\n",
+    def test_walk_continued_lines(self, tmpdir: Path) -> None:
+        assert StoredWalkSNMPBackend(
+            _snmp_config(), logging.getLogger("test"), Path(tmpdir / "walkdata" / "1.txt")
+        ).walk(".1.2", context="") == [
+            (".1.2.3", b"foo"),
+            (".1.2.4", b"bar\nfoobar"),
         ]
-        assert StoredWalkSNMPBackend.read_walk_from_path(
-            tmpdir / "walkdata" / "2.txt", logging.getLogger("test")
-        ) == [
-            ".1.2.3 foo\n\n\n",
-            ".1.2.5 test\n",
+        assert StoredWalkSNMPBackend(
+            _snmp_config(), logging.getLogger("test"), Path(tmpdir / "walkdata" / "2.txt")
+        ).walk(".1.2", context="") == [
+            (".1.2.3", b"foo"),
+            (".1.2.5", b"test"),
         ]
 
+    def test_walk(self, tmpdir: Path) -> None:
+        backend = StoredWalkSNMPBackend(
+            _snmp_config(), logging.getLogger("test"), Path(tmpdir / "walkdata" / "3.txt")
+        )
+        assert backend.walk(".1.2", context="") == [
+            (".1.2.3", b"foo"),
+            (".1.2.4", b"bar\nfoobar"),
+            (".1.2.10", b"baz"),
+        ]
+        assert backend.walk(".1.2.3", context="") == [(".1.2.3", b"foo")]
+        assert backend.walk(".1.2.1", context="") == []
+        assert backend.walk(".1.3", context="") == [(".1.3.1", b"\xb2\xe0")]
+        assert backend.walk(".1.2.*", context="") == [(".1.2.3", b"foo")]
+        assert backend.get(".1.2.4", context="") == b"bar\nfoobar"
+        assert backend.get(".1.2", context="") is None
+
+    def test_walk_reindexes_modified_file(self, tmpdir: Path) -> None:
+        path = Path(tmpdir / "walkdata" / "1.txt")
+        backend = StoredWalkSNMPBackend(_snmp_config(), logging.getLogger("test"), path)
+        assert backend.get(".1.2.3", context="") == b"foo"
+
+        path.write_text(".1.2.3 changed\n.1.2.4 bar\n")
+        assert backend.get(".1.2.3", context="") == b"changed"
+
+    def test_evicted_index_stays_readable(
+        self, tmpdir: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(stored_walk, "_INDEX_CACHE_SIZE", 1)
+        backend = StoredWalkSNMPBackend(
+            _snmp_config(), logging.getLogger("test"), Path(tmpdir / "walkdata" / "3.txt")
+        )
+        index = backend._get_index()
+        StoredWalkSNMPBackend(
+            _snmp_config(), logging.getLogger("test"), Path(tmpdir / "walkdata" / "1.txt")
+        ).walk(".1.2", context="")
+
+        # Another thread may still be walking the evicted index
+        assert backend.path not in stored_walk._INDEX_CACHE
+        assert index.row(index.find_range((1, 3))[0]) == (".1.3.1", b"\xb2\xe0")
+
+
+def _snmp_config() -> SNMPHostConfig:
+    return SNMPHostConfig(
+        is_ipv6_primary=False,
+        hostname=HostName("testhost"),
+        ipaddress=HostAddress("127.0.0.1"),
+        credentials="public",
+        port=161,
+        bulkwalk_enabled=True,
+        snmp_version=SNMPVersion.V2C,
+        bulk_walk_size_of=10,
+        timing={},
+        oid_range_limits={},
+        snmpv3_contexts=[],
+        character_encoding=None,
+        snmp_backend=SNMPBackendEnum.STORED_WALK,
+    )
+
 
 @pytest.fixture
 def create_files(tmpdir):
@@ -66,3 +114,5 @@ def create_files(tmpdir):
     p1.write(".1.2.3 foo\n.1.2.4 bar\nfoobar\n")
     p2 = (tmpdir / "walkdata").join("2.txt")
     p2.write(".1.2.3 foo\n\n\n.1.2.5 test\n")
+    p3 = (tmpdir / "walkdata").join("3.txt")
+    p3.write('.1.2.3 foo\n.1.2.10 baz\n.1.2.4 bar\nfoobar\n.1.3.1 "B2 E0 "\n')
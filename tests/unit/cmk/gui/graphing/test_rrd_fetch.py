@@ -46,9 +46,10 @@ def _setup_livestatus(mock_livestatus: MockLiveStatusConnection) -> Iterator[Non
         )
         mock_live.expect_query(
             """GET services
-Columns: rrddata:temp:temp.max:1681985455:1681999855:20
+Columns: host_name service_description rrddata:temp:temp.max:1681985455:1681999855:20
 Filter: host_name = my-host
 Filter: service_description = Temperature Zone 6
+And: 2
 ColumnHeaders: off
 
             """,
@@ -136,6 +137,72 @@ def test_fetch_rrd_data_for_graph_with_conversion(
         }
 
 
+def test_fetch_rrd_data_for_graph_batches_services(
+    mock_livestatus: MockLiveStatusConnection,
+    request_context: None,
+) -> None:
+    graph_recipe = _GRAPH_RECIPE.model_copy(
+        update={
+            "metrics": [
+                _GRAPH_RECIPE.metrics[0],
+                _GRAPH_RECIPE.metrics[0].model_copy(
+                    update={
+                        "operation": MetricOpRRDSource(
+                            site_id=SiteId("NO_SITE"),
+                            host_name=HostName("my-host"),
+                            service_name="Temperature Zone 7",
+                            metric_name="temp",
+                            consolidation_func_name="max",
+                            scale=1,
+                        )
+                    }
+                ),
+            ]
+        }
+    )
+    with mock_livestatus(expect_status_query=True) as mock_live:
+        mock_live.add_table(
+            "services",
+            [
+                {
+                    "host_name": "my-host",
+                    "service_description": f"Temperature Zone {zone}",
+                    "rrddata:temp:temp.max:1681985455:1681999855:20": [1, 2, 3, zone, None],
+                }
+                for zone in (5, 6, 7)
+            ],
+        )
+        mock_live.expect_query(
+            """GET services
+Columns: host_name service_description rrddata:temp:temp.max:1681985455:1681999855:20
+Filter: host_name = my-host
+Filter: service_description = Temperature Zone 6
+And: 2
+Filter: host_name = my-host
+Filter: service_description = Temperature Zone 7
+And: 2
+Or: 2
+ColumnHeaders: off
+
+            """,
+            sites=["NO_SITE"],
+        )
+        assert fetch_rrd_data_for_graph(graph_recipe, _GRAPH_DATA_RANGE) == {
+            RRDDataKey(
+                SiteId("NO_SITE"),
+                HostName("my-host"),
+                f"Temperature Zone {zone}",
+                "temp",
+                "max",
+                1,
+            ): TimeSeries(
+                [zone, None],
+                time_window=(1, 2, 3),
+            )
+            for zone in (6, 7)
+        }
+
+
 def test_translate_and_merge_rrd_columns() -> None:
     assert translate_and_merge_rrd_columns(
         MetricName("my_metric"),
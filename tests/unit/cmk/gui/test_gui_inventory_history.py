@@ -11,8 +11,16 @@ from cmk.ccc.exceptions import MKGeneralException
 
 import cmk.utils
 from cmk.utils.hostaddress import HostName
-from cmk.utils.structured_data import deserialize_tree, serialize_tree
+from cmk.utils.structured_data import (
+    deserialize_tree,
+    make_meta,
+    MutableTree,
+    SDKey,
+    serialize_tree,
+    TreeOrArchiveStore,
+)
 
+from cmk.gui.inventory import InventoryHousekeeping
 from cmk.gui.inventory._history import get_history, load_delta_tree, load_latest_delta_tree
 
 
@@ -125,6 +133,22 @@ def test_get_history_corrupted_files() -> None:
     assert corrupted_history_files == ["var/check_mk/inventory_archive/inv-host/foo"]
 
 
+def test_inventory_housekeeping_keeps_delta_cache_of_archived_deltas() -> None:
+    hostname = HostName("inv-host")
+    archive_dir = Path(cmk.utils.paths.inventory_archive_dir, hostname)
+    (archive_dir / "objects").mkdir(parents=True)
+    for name in ("100.delta", "200", "200.delta"):
+        (archive_dir / name).touch()
+    delta_cache_dir = Path(cmk.utils.paths.inventory_delta_cache_dir, hostname)
+    delta_cache_dir.mkdir(parents=True)
+    for name in ("None_100", "100_200", "200_300", "objects_200"):
+        (delta_cache_dir / name).touch()
+
+    InventoryHousekeeping().run()
+
+    assert sorted(fp.name for fp in delta_cache_dir.iterdir()) == ["100_200", "None_100"]
+
+
 @pytest.mark.usefixtures("create_inventory_history")
 @pytest.mark.parametrize(
     "search_timestamp, expected_raw_delta_tree",
@@ -221,3 +245,34 @@ def test_load_latest_delta_tree_one_archive_and_no_inv_tree(request_context: Non
     delta_tree = load_latest_delta_tree(hostname)
 
     assert delta_tree is not None
+
+
+def test_get_history_archived_deltas(request_context: None) -> None:
+    hostname = HostName("inv-host")
+    tree_or_archive_store = TreeOrArchiveStore(
+        cmk.utils.paths.inventory_output_dir,
+        cmk.utils.paths.inventory_archive_dir,
+    )
+    # legacy archive file
+    cmk.ccc.store.save_object_to_file(
+        Path(cmk.utils.paths.inventory_archive_dir, hostname, "0"),
+        serialize_tree(deserialize_tree({"inv": "attr-0"})),
+    )
+    for raw_pairs in ({"inv": "attr-1"}, {"inv-2": "attr"}, {"inv": "attr-3"}, {"inv": "attr"}):
+        tree_or_archive_store.archive(host_name=hostname)
+        tree = MutableTree()
+        tree.add(path=(), pairs=[{SDKey(k): v for k, v in raw_pairs.items()}])
+        tree_or_archive_store.save(host_name=hostname, tree=tree, meta=make_meta(do_archive=True))
+
+    history, corrupted_history_files = get_history(hostname)
+
+    assert [(entry.new, entry.changed, entry.removed) for entry in history] == [
+        (1, 0, 0),
+        (0, 1, 0),
+        (1, 0, 1),
+        (1, 0, 1),
+        (0, 1, 0),
+    ]
+    assert not corrupted_history_files
+    # Only the pair of the latest archived and the current tree has been calculated
+    assert len(list(Path(cmk.utils.paths.inventory_delta_cache_dir, hostname).iterdir())) == 2
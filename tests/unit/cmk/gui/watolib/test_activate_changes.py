@@ -287,7 +287,9 @@ def test_get_replication_components(
 
 def test_automation_get_config_sync_state(request_context: None) -> None:
     get_state = activate_changes.AutomationGetConfigSyncState()
-    response = get_state.execute([ReplicationPath("dir", "abc", "etc", [])])
+    response = get_state.execute(
+        activate_changes.GetConfigSyncStateRequest([ReplicationPath("dir", "abc", "etc", [])])
+    )
     assert response == (
         {
             "etc/check_mk/multisite.mk": (
@@ -325,6 +327,93 @@ def test_automation_get_config_sync_state(request_context: None) -> None:
     )
 
 
+def test_automation_get_config_sync_state_identical_directories(request_context: None) -> None:
+    get_state = activate_changes.AutomationGetConfigSyncState()
+    replication_paths = [ReplicationPath("dir", "abc", "etc", [])]
+    file_infos = {
+        k: ConfigSyncFileInfo(*v)
+        for k, v in get_state.execute(
+            activate_changes.GetConfigSyncStateRequest(replication_paths)
+        )[0].items()
+    }
+
+    central_file_infos = {
+        **file_infos,
+        "etc/omd/site.conf": file_infos["etc/omd/site.conf"]._replace(file_hash="differs"),
+    }
+    response = get_state.execute(
+        activate_changes.GetConfigSyncStateRequest(
+            replication_paths,
+            activate_changes._get_config_sync_directory_digests(central_file_infos),
+        )
+    )
+
+    assert len(response) == 3
+    assert sorted(response[0]) == ["etc/htpasswd", "etc/omd/site.conf"]
+    assert response[2] == ["etc/check_mk"]
+    remote_file_infos = {k: ConfigSyncFileInfo(*v) for k, v in response[0].items()}
+    remote_file_infos.update(
+        activate_changes._get_file_infos_below(central_file_infos, response[2])
+    )
+    assert remote_file_infos == file_infos
+
+
+def test_config_sync_directory_digests() -> None:
+    file_info = ConfigSyncFileInfo(33200, 1, None, "abc")
+    central = {
+        "etc/a/x": file_info,
+        "etc/a/b/y": file_info,
+        "etc/c/z": file_info,
+        "top": file_info,
+    }
+    remote = {**central, "etc/c/z": file_info._replace(st_mode=33204)}
+
+    central_digests = activate_changes._get_config_sync_directory_digests(central)
+    remote_digests = activate_changes._get_config_sync_directory_digests(remote)
+    assert sorted(central_digests) == ["", "etc", "etc/a", "etc/a/b", "etc/c"]
+    assert activate_changes._get_identical_directories(remote_digests, central_digests) == {
+        "etc/a",
+        "etc/a/b",
+    }
+    assert activate_changes._get_file_infos_below(central, ["etc/a"]) == {
+        "etc/a/x": file_info,
+        "etc/a/b/y": file_info,
+    }
+    # Moving a file to another directory changes the digests
+    moved = {**central, "etc/a/b/x": file_info}
+    del moved["etc/a/x"]
+    assert (
+        activate_changes._get_config_sync_directory_digests(moved)["etc/a"]
+        != central_digests["etc/a"]
+    )
+
+
+def test_config_sync_hash_cache(tmp_path: Path) -> None:
+    cache_path = tmp_path / "hashes.pickle"
+    file_path = tmp_path / "file"
+    file_path.write_text("abc")
+    os.utime(file_path, (1000, 1000))
+
+    hash_cache = activate_changes.ConfigSyncHashCache.load(cache_path)
+    info = activate_changes._get_config_sync_file_info(str(file_path), hash_cache)
+    assert info == activate_changes._get_config_sync_file_info(str(file_path))
+    hash_cache.save()
+
+    with patch.object(activate_changes, "_create_config_sync_file_hash") as create_hash:
+        hash_cache = activate_changes.ConfigSyncHashCache.load(cache_path)
+        assert activate_changes._get_config_sync_file_info(str(file_path), hash_cache) == info
+        create_hash.assert_not_called()
+
+    file_path.write_text("abd")
+    hash_cache = activate_changes.ConfigSyncHashCache.load(cache_path)
+    assert activate_changes._get_config_sync_file_info(
+        str(file_path), hash_cache
+    ) == activate_changes._get_config_sync_file_info(str(file_path))
+    # Recently modified files are not persisted
+    hash_cache.save()
+    assert not activate_changes.ConfigSyncHashCache.load(cache_path)._loaded
+
+
 def test_get_config_sync_file_infos() -> None:
     base_dir = cmk.utils.paths.omd_root / "replication"
     _create_get_config_sync_file_infos_test_config(base_dir)
@@ -5,13 +5,21 @@
 
 # pylint: disable=protected-access
 
+import logging
 import pprint
+import sqlite3
+import threading
+from collections.abc import Iterator
+from contextlib import closing, contextmanager
+
+import pytest
 
 import cmk.utils.log
 import cmk.utils.paths
 from cmk.utils.hostaddress import HostAddress
 
 from cmk.piggyback import backend
+from cmk.piggyback.backend import _index
 
 _TEST_HOST_NAME = HostAddress("test-host")
 
@@ -224,6 +232,174 @@ def test_get_source_and_piggyback_hosts() -> None:
     }
 
 
+def test_files_changed_behind_the_back_of_the_index() -> None:
+    omd_root = cmk.utils.paths.omd_root
+    backend.store_piggyback_raw_data(
+        HostAddress("source1"),
+        {_TEST_HOST_NAME: _PAYLOAD},
+        message_timestamp=_REF_TIME,
+        contact_timestamp=_REF_TIME,
+        omd_root=omd_root,
+    )
+    assert _get_only_raw_data_element(_TEST_HOST_NAME).meta.source == HostAddress("source1")
+
+    host_folder = omd_root / "tmp/check_mk/piggyback" / _TEST_HOST_NAME
+    (host_folder / "source1").rename(host_folder / "source2")
+    (omd_root / "tmp/check_mk/piggyback_sources/source1").unlink()
+
+    stored = _get_only_raw_data_element(_TEST_HOST_NAME)
+    assert stored.meta.source == HostAddress("source2")
+    assert stored.meta.last_update == _REF_TIME
+    assert stored.meta.last_contact is None
+    assert stored.raw_data == b"pay\nload\n"
+
+    (host_folder / "source2").unlink()
+    host_folder.rmdir()
+    assert not backend.get_messages_for(_TEST_HOST_NAME, omd_root)
+    assert not backend.get_piggybacked_host_with_sources(omd_root)
+
+
+def test_cleanup_piggyback_files() -> None:
+    omd_root = cmk.utils.paths.omd_root
+    backend.store_piggyback_raw_data(
+        HostAddress("source1"),
+        {_TEST_HOST_NAME: _PAYLOAD, HostAddress("test-host2"): _PAYLOAD},
+        message_timestamp=_REF_TIME - 10.0,
+        contact_timestamp=_REF_TIME - 10.0,
+        omd_root=omd_root,
+    )
+    backend.store_piggyback_raw_data(
+        HostAddress("source2"),
+        {_TEST_HOST_NAME: _PAYLOAD},
+        message_timestamp=_REF_TIME,
+        contact_timestamp=_REF_TIME,
+        omd_root=omd_root,
+    )
+
+    backend.cleanup_piggyback_files(_REF_TIME - 5.0, omd_root)
+
+    assert not (omd_root / "tmp/check_mk/piggyback/test-host2").exists()
+    assert not (omd_root / "tmp/check_mk/piggyback_sources/source1").exists()
+    assert backend.get_piggybacked_host_with_sources(omd_root) == {
+        _TEST_HOST_NAME: [
+            backend.PiggybackMetaData(
+                source=HostAddress("source2"),
+                piggybacked=_TEST_HOST_NAME,
+                last_update=int(_REF_TIME),
+                last_contact=int(_REF_TIME),
+            ),
+        ],
+    }
+
+
+def test_corrupted_index_is_rebuilt() -> None:
+    omd_root = cmk.utils.paths.omd_root
+    backend.store_piggyback_raw_data(
+        HostAddress("source1"),
+        {_TEST_HOST_NAME: _PAYLOAD},
+        message_timestamp=_REF_TIME,
+        contact_timestamp=_REF_TIME,
+        omd_root=omd_root,
+    )
+    (omd_root / "tmp/check_mk/piggyback_index.sqlite").write_bytes(b"garbage" * 1000)
+
+    stored = _get_only_raw_data_element(_TEST_HOST_NAME)
+    assert stored.meta.source == HostAddress("source1")
+    assert stored.meta.last_contact == _REF_TIME
+
+
+def test_locked_index_is_not_recreated(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    omd_root = cmk.utils.paths.omd_root
+    path = omd_root / "tmp/check_mk/piggyback_index.sqlite"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    monkeypatch.setattr(_index, "_LOCK_TIMEOUT", 0.01)
+
+    # Not even the journal mode can be set while another process holds this lock
+    with closing(sqlite3.connect(path, isolation_level=None)) as connection:
+        connection.execute("BEGIN EXCLUSIVE")
+        inode = path.stat().st_ino
+        with caplog.at_level(logging.WARNING):
+            backend.store_piggyback_raw_data(
+                HostAddress("source1"),
+                {_TEST_HOST_NAME: _PAYLOAD},
+                message_timestamp=_REF_TIME,
+                contact_timestamp=_REF_TIME,
+                omd_root=omd_root,
+            )
+            locked = backend.get_messages_for(_TEST_HOST_NAME, omd_root)
+        assert path.stat().st_ino == inode
+        connection.execute("ROLLBACK")
+
+    assert "without index" in caplog.text
+    assert "Recreating" not in caplog.text
+    assert [m.meta.source for m in locked] == [HostAddress("source1")]
+    assert backend.get_messages_for(_TEST_HOST_NAME, omd_root) == locked
+
+
+@contextmanager
+def _locked_index() -> Iterator[None]:
+    path = cmk.utils.paths.omd_root / "tmp/check_mk/piggyback_index.sqlite"
+    with closing(sqlite3.connect(path, isolation_level=None)) as connection:
+        connection.execute("BEGIN IMMEDIATE")
+        yield
+        connection.execute("ROLLBACK")
+
+
+def test_store_writes_payload_before_locking_the_index() -> None:
+    omd_root = cmk.utils.paths.omd_root
+    payload_file = omd_root / "tmp/check_mk/piggyback" / _TEST_HOST_NAME / "source1"
+    # Create the index
+    assert not backend.get_messages_for(_TEST_HOST_NAME, omd_root)
+
+    with _locked_index():
+        store = threading.Thread(
+            target=backend.store_piggyback_raw_data,
+            args=(HostAddress("source1"), {_TEST_HOST_NAME: _PAYLOAD}, _REF_TIME, _REF_TIME),
+            kwargs={"omd_root": omd_root},
+        )
+        store.start()
+        for _attempt in range(1000):
+            if payload_file.exists():
+                break
+            store.join(0.01)
+        assert payload_file.read_bytes() == b"pay\nload\n"
+        assert store.is_alive()
+    store.join()
+
+    assert _get_only_raw_data_element(_TEST_HOST_NAME).meta.last_contact == _REF_TIME
+
+
+def test_locked_index_is_bypassed(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    omd_root = cmk.utils.paths.omd_root
+    backend.store_piggyback_raw_data(
+        HostAddress("source1"),
+        {_TEST_HOST_NAME: _PAYLOAD},
+        message_timestamp=_REF_TIME,
+        contact_timestamp=_REF_TIME,
+        omd_root=omd_root,
+    )
+    monkeypatch.setattr(_index, "_LOCK_TIMEOUT", 0.01)
+
+    with _locked_index(), caplog.at_level(logging.WARNING):
+        backend.store_piggyback_raw_data(
+            HostAddress("source2"),
+            {_TEST_HOST_NAME: _PAYLOAD},
+            message_timestamp=_REF_TIME,
+            contact_timestamp=_REF_TIME,
+            omd_root=omd_root,
+        )
+        locked = backend.get_messages_for(_TEST_HOST_NAME, omd_root)
+        assert list(backend.get_piggybacked_host_with_sources(omd_root)) == [_TEST_HOST_NAME]
+    assert "without index" in caplog.text
+
+    assert [m.meta.source for m in locked] == [HostAddress("source1"), HostAddress("source2")]
+    assert backend.get_messages_for(_TEST_HOST_NAME, omd_root) == locked
+
+
 class TestPiggybackMetaData:
     def test_serialization_roundtrip(self) -> None:
         pmd = backend.PiggybackMetaData(
@@ -14,10 +14,12 @@ from pytest import MonkeyPatch
 from tests.testlib.base import Scenario
 
 from cmk.utils.hostaddress import HostName
-from cmk.utils.labels import BuiltinHostLabelsStore
+from cmk.utils.labels import BuiltinHostLabelsStore, LabelGroups
+from cmk.utils.rulesets import ruleset_matcher
 from cmk.utils.rulesets.ruleset_matcher import (
     LabelManager,
     matches_tag_condition,
+    PreprocessedPattern,
     RuleConditionsSpec,
     RulesetMatcher,
     RulesetMatchObject,
@@ -889,3 +891,107 @@ def test_matches_tag_condition(
         )
         is expected_result
     )
+
+
+def _make_plain_ruleset_matcher(hosts: Sequence[HostName]) -> RulesetMatcher:
+    return RulesetMatcher(
+        host_tags={host: {} for host in hosts},
+        host_paths={},
+        label_manager=LabelManager(
+            explicit_host_labels={},
+            host_label_rules=(),
+            service_label_rules=(),
+            discovered_labels_of_service=lambda *args, **kw: {},
+        ),
+        all_configured_hosts=frozenset(hosts),
+        clusters_of={},
+        nodes_of={},
+        builtin_host_labels_store=BuiltinHostLabelsStore(),
+    )
+
+
+def test_get_service_ruleset_values_keeps_rule_order() -> None:
+    hosts = [HostName("host1"), HostName("host2"), HostName("host3"), HostName("host4")]
+    matcher = _make_plain_ruleset_matcher(hosts)
+    service_ruleset: Sequence[RuleSpec[str]] = [
+        {"id": "1", "value": "all", "condition": {}},
+        {"id": "2", "value": "host2", "condition": {"host_name": ["host2"]}},
+        {
+            "id": "3",
+            "value": "host1 cpu",
+            "condition": {"host_name": ["host1"], "service_description": [{"$regex": "CPU"}]},
+        },
+        {"id": "4", "value": "all mem", "condition": {"service_description": [{"$regex": "Mem"}]}},
+        {"id": "5", "value": "disabled", "condition": {}, "options": {"disabled": True}},
+    ]
+
+    def values(host: str, service: str) -> list[str]:
+        return list(
+            matcher.get_service_ruleset_values(
+                RulesetMatchObject(HostName(host), service, {}), service_ruleset
+            )
+        )
+
+    assert values("host1", "CPU load") == ["all", "host1 cpu"]
+    assert values("host1", "Memory") == ["all", "all mem"]
+    assert values("host2", "CPU load") == ["all", "host2"]
+    assert values("host3", "Memory") == ["all", "all mem"]
+    assert not values("unknown", "CPU load")
+
+    index = matcher.ruleset_optimizer.get_service_ruleset_index(service_ruleset, False)
+    # hosts with the same candidate rules share them
+    assert index[HostName("host3")] is index[HostName("host4")]
+    assert matcher.ruleset_optimizer.get_service_ruleset_index(service_ruleset, False) is index
+
+
+def test_get_service_ruleset_values_skips_rules_of_other_hosts(monkeypatch: MonkeyPatch) -> None:
+    hosts = [HostName(f"host{n}") for n in range(200)]
+    matcher = _make_plain_ruleset_matcher(hosts)
+    service_ruleset: Sequence[RuleSpec[int]] = [
+        {
+            "id": str(n),
+            "value": n,
+            "condition": {
+                "host_name": [hosts[n]],
+                "service_description": [{"$regex": f"Service {n}$"}],
+            },
+        }
+        for n in range(len(hosts))
+    ]
+
+    evaluated: list[tuple[str, str]] = []
+    matches_service_conditions = ruleset_matcher.matches_service_conditions
+
+    def counting_matches_service_conditions(
+        service_description_condition: PreprocessedPattern,
+        service_labels_condition: LabelGroups,
+        match_object: RulesetMatchObject,
+    ) -> bool:
+        evaluated.append((match_object.host_name, str(match_object.service_description)))
+        return matches_service_conditions(
+            service_description_condition, service_labels_condition, match_object
+        )
+
+    monkeypatch.setattr(
+        ruleset_matcher, "matches_service_conditions", counting_matches_service_conditions
+    )
+
+    def values(host: str, service: str) -> list[int]:
+        return list(
+            matcher.get_service_ruleset_values(
+                RulesetMatchObject(HostName(host), service, {}), service_ruleset
+            )
+        )
+
+    assert values("host7", "Service 7") == [7]
+    assert values("host7", "Service 8") == []
+    assert values("host8", "Service 8") == [8]
+    assert values("unknown", "Service 8") == []
+    # Only the single rule of the host is looked at, never the 199 rules of the other hosts
+    index = matcher.ruleset_optimizer.get_service_ruleset_index(service_ruleset, False)
+    assert [len(index[host]) for host in hosts[7:9]] == [1, 1]
+    assert evaluated == [
+        ("host7", "Service 7"),
+        ("host7", "Service 8"),
+        ("host8", "Service 8"),
+    ]
@@ -5,6 +5,7 @@
 
 import ast
 import gzip
+import os
 import shutil
 from collections.abc import Iterable, Mapping, Sequence
 from pathlib import Path
@@ -14,6 +15,8 @@ import pytest
 
 from tests.testlib.repo import repo_path
 
+from cmk.ccc import store
+
 from cmk.utils.hostaddress import HostName
 from cmk.utils.structured_data import (
     _deserialize_retention_interval,
@@ -43,6 +46,7 @@ from cmk.utils.structured_data import (
     SDRetentionFilterChoices,
     serialize_delta_tree,
     serialize_tree,
+    TreeOrArchiveStore,
     TreeStore,
     UpdateResult,
 )
@@ -969,6 +973,147 @@ def test_save_tree(tmp_path: Path) -> None:
     assert meta_and_raw_tree["raw_tree"]["Nodes"] == expected_raw_tree["Nodes"]
 
 
+def _save_and_archive(
+    tree_or_archive_store: TreeOrArchiveStore, host_name: HostName, tree: ImmutableTree
+) -> None:
+    tree_or_archive_store.archive(host_name=host_name)
+    tree_or_archive_store.save(
+        host_name=host_name, tree=_make_mutable_tree(tree), meta=make_meta(do_archive=True)
+    )
+
+
+def test_archive_stores_deltas(tmp_path: Path) -> None:
+    host_name = HostName("heute")
+    tree_or_archive_store = TreeOrArchiveStore(tmp_path / "inventory", tmp_path / "archive")
+    tree_a = deserialize_tree({"inv": "a"})
+    tree_b = deserialize_tree({"inv": "b", "hardware": {"cpu": {"cores": 2}}})
+    tree_c = deserialize_tree({"inv": "c"})
+    for tree in (tree_a, tree_b, tree_c):
+        _save_and_archive(tree_or_archive_store, host_name, tree)
+
+    (ts_a, ts_b) = sorted(int(fp.stem) for fp in (tmp_path / "archive" / host_name).glob("*.delta"))
+    # Only the most recent archived tree is kept in full
+    assert sorted(fp.name for fp in (tmp_path / "archive" / host_name).iterdir()) == [
+        f"{ts_a}.delta",
+        str(ts_b),
+        f"{ts_b}.delta",
+        "objects",
+    ]
+
+    archived_delta = tree_or_archive_store.load_archived_delta(host_name=host_name, timestamp=ts_a)
+    assert archived_delta.previous_timestamp is None
+    assert serialize_delta_tree(archived_delta.delta_tree) == serialize_delta_tree(
+        tree_a.difference(ImmutableTree())
+    )
+
+    archived_delta = tree_or_archive_store.load_archived_delta(host_name=host_name, timestamp=ts_b)
+    assert archived_delta.previous_timestamp == ts_a
+    assert serialize_delta_tree(archived_delta.delta_tree) == serialize_delta_tree(
+        tree_b.difference(tree_a)
+    )
+    assert archived_delta.delta_tree.get_tree((SDNodeName("hardware"), SDNodeName("cpu"))).path == (
+        SDNodeName("hardware"),
+        SDNodeName("cpu"),
+    )
+
+    assert tree_or_archive_store.load_previous(host_name=host_name) == tree_c
+    tree_or_archive_store.remove(host_name=host_name)
+    assert tree_or_archive_store.load_previous(host_name=host_name) == tree_b
+
+
+def test_archive_keeps_legacy_trees(tmp_path: Path) -> None:
+    host_name = HostName("heute")
+    tree_or_archive_store = TreeOrArchiveStore(tmp_path / "inventory", tmp_path / "archive")
+    store.save_object_to_file(
+        tmp_path / "archive" / host_name / "100", serialize_tree(deserialize_tree({"inv": "a"}))
+    )
+    _save_and_archive(tree_or_archive_store, host_name, deserialize_tree({"inv": "b"}))
+    _save_and_archive(tree_or_archive_store, host_name, deserialize_tree({"inv": "c"}))
+
+    (ts_b,) = (int(fp.stem) for fp in (tmp_path / "archive" / host_name).glob("*.delta"))
+    assert (tmp_path / "archive" / host_name / "100").exists()
+    assert (tmp_path / "archive" / host_name / str(ts_b)).exists()
+
+    archived_delta = tree_or_archive_store.load_archived_delta(host_name=host_name, timestamp=ts_b)
+    assert archived_delta.previous_timestamp == 100
+    assert archived_delta.delta_tree.get_stats() == {"changed": 1}
+
+
+def test_archive_deduplicates_subtrees(tmp_path: Path) -> None:
+    host_name = HostName("heute")
+    tree_or_archive_store = TreeOrArchiveStore(tmp_path / "inventory", tmp_path / "archive")
+    packages = [{"name": f"package-{nr}", "version": "1.0"} for nr in range(100)]
+    tree_few = deserialize_tree({"software": {"packages": packages[:50]}})
+    tree_many = deserialize_tree({"software": {"packages": packages}})
+
+    def _num_objects() -> int:
+        return len(list((tmp_path / "archive" / host_name / "objects").iterdir()))
+
+    for tree in (tree_few, tree_many, tree_few, tree_many):
+        _save_and_archive(tree_or_archive_store, host_name, tree)
+    num_objects = _num_objects()
+
+    for tree in (tree_few, tree_many, tree_few, tree_many):
+        _save_and_archive(tree_or_archive_store, host_name, tree)
+
+    assert _num_objects() == num_objects
+
+
+def test_prune_objects(tmp_path: Path) -> None:
+    host_name = HostName("heute")
+    tree_or_archive_store = TreeOrArchiveStore(tmp_path / "inventory", tmp_path / "archive")
+    for tree in (
+        deserialize_tree({"inv": "a", "hardware": {"cpu": {"cores": 2}}}),
+        deserialize_tree({"inv": "b", "hardware": {"cpu": {"cores": 4}}}),
+        deserialize_tree({"inv": "c"}),
+    ):
+        _save_and_archive(tree_or_archive_store, host_name, tree)
+    archive_dir = tmp_path / "archive" / host_name
+    (ts_a, ts_b) = sorted(int(fp.stem) for fp in archive_dir.glob("*.delta"))
+
+    def _age_objects() -> list[str]:
+        for object_file in (object_files := list((archive_dir / "objects").iterdir())):
+            os.utime(object_file, (0, 0))
+        return sorted(fp.name for fp in object_files)
+
+    all_objects = _age_objects()
+    tree_or_archive_store.prune_objects(host_name=host_name)
+    assert sorted(fp.name for fp in (archive_dir / "objects").iterdir()) == all_objects
+
+    (archive_dir / f"{ts_a}.delta").unlink()
+    all_objects = _age_objects()
+    _save_and_archive(tree_or_archive_store, host_name, deserialize_tree({"inv": "d"}))
+    (archive_dir / "objects" / "being-archived").write_text("{}")
+    tree_or_archive_store.prune_objects(host_name=host_name)
+
+    remaining_objects = {fp.name for fp in (archive_dir / "objects").iterdir()}
+    # Only the nodes of the removed delta are gone, recently written nodes are kept
+    assert len(set(all_objects) - remaining_objects) == 3
+    assert "being-archived" in remaining_objects
+    timestamps = sorted(int(fp.stem) for fp in archive_dir.glob("*.delta"))
+    assert timestamps[0] == ts_b
+    # The remaining deltas are complete
+    assert [
+        tree_or_archive_store.load_archived_delta(
+            host_name=host_name, timestamp=timestamp
+        ).previous_timestamp
+        for timestamp in timestamps
+    ] == [ts_a, *timestamps[:-1]]
+
+
+def test_archive_same_second(tmp_path: Path) -> None:
+    host_name = HostName("heute")
+    tree_or_archive_store = TreeOrArchiveStore(tmp_path / "inventory", tmp_path / "archive")
+    for nr in range(4):
+        _save_and_archive(tree_or_archive_store, host_name, deserialize_tree({"inv": nr}))
+        os.utime(tmp_path / "inventory" / host_name, (0, 0))
+    tree_or_archive_store.archive(host_name=host_name)
+
+    assert sorted(
+        int(fp.stem) for fp in (tmp_path / "archive" / host_name).glob("*.delta")
+    ) == list(range(4))
+
+
 @pytest.mark.parametrize(
     "raw, expected",
     [
@@ -9,7 +9,9 @@ import pytest
 from pydantic import BaseModel
 
 from cmk.ccc import store
+from cmk.ccc.exceptions import MKGeneralException
 
+import cmk.utils.paths
 from cmk.utils.host_storage import (
     get_hosts_file_variables,
     get_standard_hosts_storage,
@@ -98,6 +100,23 @@ def tests_standard_format_loader():
     assert variables["all_hosts"] == ["test"]
 
 
+def test_standard_format_loader_read_and_apply(tmp_path: Path) -> None:
+    standard_loader = StandardStorageLoader(get_standard_hosts_storage())
+    hosts_mk = Path(cmk.utils.paths.omd_root, "etc/check_mk/conf.d/wato/hosts.mk")
+    hosts_mk.parent.mkdir(parents=True, exist_ok=True)
+    hosts_mk.write_text(_hosts_mk_test_data)
+    try:
+        variables = get_hosts_file_variables()
+        assert standard_loader.read_and_apply(hosts_mk.with_suffix(""), variables)
+        assert variables["all_hosts"] == ["test"]
+
+        hosts_mk.chmod(0o666)
+        with pytest.raises(MKGeneralException, match="world writable"):
+            standard_loader.read_and_apply(hosts_mk.with_suffix(""), get_hosts_file_variables())
+    finally:
+        hosts_mk.unlink()
+
+
 def test_pydantic_store_serialization(tmp_path: Path) -> None:
     store_path = tmp_path / "MyModel"
 
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import os
+import random
+from pathlib import Path
+
+from cmk.utils.notification_backlog import (
+    load_notification_backlog,
+    load_notification_backlog_entry,
+    SLOT_SIZE,
+    store_notification_backlog,
+)
+
+from cmk.events.event_context import EventContext
+
+
+def _context(nr: int) -> EventContext:
+    return EventContext({"HOSTNAME": f"host-{nr}", "MICROTIME": str(nr)})
+
+
+def test_backlog_keeps_most_recent_entries(tmp_path: Path) -> None:
+    for nr in range(7):
+        store_notification_backlog(tmp_path, _context(nr), backlog_size=3)
+
+    assert load_notification_backlog(tmp_path) == [_context(6), _context(5), _context(4)]
+    assert load_notification_backlog_entry(tmp_path, 0) == _context(6)
+    assert load_notification_backlog_entry(tmp_path, 2) == _context(4)
+    assert load_notification_backlog_entry(tmp_path, 3) is None
+    assert load_notification_backlog_entry(tmp_path, -1) is None
+
+
+def test_backlog_file_is_preallocated(tmp_path: Path) -> None:
+    store_notification_backlog(tmp_path, _context(0), backlog_size=5)
+    size = os.stat(tmp_path / "backlog.ring").st_size
+
+    for nr in range(1, 20):
+        store_notification_backlog(tmp_path, _context(nr), backlog_size=5)
+
+    assert os.stat(tmp_path / "backlog.ring").st_size == size
+
+
+def test_backlog_resize(tmp_path: Path) -> None:
+    for nr in range(5):
+        store_notification_backlog(tmp_path, _context(nr), backlog_size=5)
+
+    store_notification_backlog(tmp_path, _context(5), backlog_size=2)
+    assert load_notification_backlog(tmp_path) == [_context(5), _context(4)]
+
+    store_notification_backlog(tmp_path, _context(6), backlog_size=4)
+    assert load_notification_backlog(tmp_path) == [_context(6), _context(5), _context(4)]
+
+
+def test_backlog_disabled(tmp_path: Path) -> None:
+    store_notification_backlog(tmp_path, _context(0), backlog_size=5)
+    store_notification_backlog(tmp_path, _context(1), backlog_size=0)
+
+    assert not load_notification_backlog(tmp_path)
+    assert load_notification_backlog_entry(tmp_path, 0) is None
+
+
+def test_backlog_large_context(tmp_path: Path) -> None:
+    compressible = EventContext({"LONGSERVICEOUTPUT": "x" * 2 * SLOT_SIZE})
+    uncompressible = EventContext({"LONGSERVICEOUTPUT": random.randbytes(2 * SLOT_SIZE).hex()})
+
+    store_notification_backlog(tmp_path, compressible, backlog_size=5)
+    store_notification_backlog(tmp_path, uncompressible, backlog_size=5)
+
+    assert load_notification_backlog(tmp_path) == [compressible]
+
+
+def test_backlog_migrates_legacy_file(tmp_path: Path) -> None:
+    (tmp_path / "backlog.mk").write_text(repr([_context(1), _context(0)]))
+    assert load_notification_backlog_entry(tmp_path, 1) == _context(0)
+
+    store_notification_backlog(tmp_path, _context(2), backlog_size=5)
+
+    assert not (tmp_path / "backlog.mk").exists()
+    assert load_notification_backlog(tmp_path) == [_context(2), _context(1), _context(0)]
@@ -8,9 +8,11 @@
 # pylint: disable=redefined-outer-name
 
 import errno
+import json
 import socket
 import ssl
-from collections.abc import Sequence
+import threading
+from collections.abc import Iterator, Sequence
 from contextlib import closing
 from pathlib import Path
 
@@ -261,6 +263,124 @@ def test_local_connection(patch_omd_site: None, mock_livestatus: MockLiveStatusC
         livestatus.LocalConnection().query_value("GET status\nColumns: program_start")
 
 
+def _json_rows_response(rows: Sequence[Sequence[object]]) -> bytes:
+    # Livestatus puts every row on a line of its own
+    return ("[" + ",\n".join(json.dumps(row) for row in rows) + "]\n").encode("utf-8")
+
+
+@pytest.fixture
+def site_connection() -> Iterator[tuple[livestatus.SingleSiteConnection, socket.socket]]:
+    client, server = socket.socketpair()
+    live = livestatus.SingleSiteConnection("unix:/not/existing")
+    live.socket = client
+    with closing(server):
+        yield live, server
+    live.disconnect()
+
+
+def _send_response(
+    server: socket.socket,
+    payload: bytes,
+    code: int = 200,
+    chunk_size: int = 4096,
+    wait_after: int | None = None,
+    proceed: threading.Event | None = None,
+) -> threading.Thread:
+    def send() -> None:
+        query = b""
+        while not query.endswith(b"\n\n"):
+            query += server.recv(4096)
+        data = f"{code:<3} {len(payload):>11}\n".encode("ascii") + payload
+        for offset in range(0, len(data), chunk_size):
+            if wait_after is not None and proceed is not None and offset >= wait_after:
+                proceed.wait(5)
+            server.sendall(data[offset : offset + chunk_size])
+
+    thread = threading.Thread(target=send)
+    thread.start()
+    return thread
+
+
+_JSON_QUERY = livestatus.Query(livestatus.QuerySpecification("hosts", ["name", "alias"]))
+
+
+def test_query_receives_chunked_response(
+    site_connection: tuple[livestatus.SingleSiteConnection, socket.socket],
+) -> None:
+    live, server = site_connection
+    rows = [[f"host-{i}", f"Häst {i}"] for i in range(20000)]
+    thread = _send_response(server, _json_rows_response(rows), chunk_size=1000)
+
+    assert live.query(_JSON_QUERY) == rows
+    thread.join()
+
+
+def test_iter_query_yields_rows_while_receiving(
+    site_connection: tuple[livestatus.SingleSiteConnection, socket.socket],
+) -> None:
+    live, server = site_connection
+    rows = [[f"host-{i}", f"Häst {i}"] for i in range(1000)]
+    proceed = threading.Event()
+    thread = _send_response(
+        server, _json_rows_response(rows), chunk_size=100, wait_after=1000, proceed=proceed
+    )
+
+    received = live.iter_query(_JSON_QUERY)
+    assert next(received) == rows[0]
+    proceed.set()
+    assert [rows[0], *received] == rows
+    thread.join()
+    assert live.socket is not None
+
+
+def test_iter_query_error(
+    site_connection: tuple[livestatus.SingleSiteConnection, socket.socket],
+) -> None:
+    live, server = site_connection
+    thread = _send_response(server, b"Invalid GET request, no such table 'hosts'", code=404)
+
+    with pytest.raises(livestatus.MKLivestatusTableNotFoundError):
+        list(live.iter_query(_JSON_QUERY))
+    thread.join()
+
+
+def test_iter_query_stopped_early(
+    site_connection: tuple[livestatus.SingleSiteConnection, socket.socket],
+) -> None:
+    live, server = site_connection
+    rows = [[f"host-{i}", ""] for i in range(1000)]
+    thread = _send_response(server, _json_rows_response(rows))
+
+    received = live.iter_query(_JSON_QUERY)
+    assert next(received) == rows[0]
+    received.close()
+    # The rest of the response must not be read by the next query
+    assert live.socket is None
+    thread.join()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+def test_json_row_parser(chunk_size: int) -> None:
+    rows = [["häst", 1, 2.5, None, [1, 2], {"ä": "ö"}], ["b\n]", 0, 0.0, True, [], {}]]
+    payload = _json_rows_response(rows)
+
+    parser = livestatus.JSONRowParser()
+    parsed = []
+    for offset in range(0, len(payload), chunk_size):
+        parsed.extend(parser.feed(memoryview(payload)[offset : offset + chunk_size]))
+    parsed.extend(parser.feed(b"", final=True))
+
+    assert parsed == rows
+
+
+@pytest.mark.parametrize("payload", [b"", b"[[1],\n[2", b"[[1]]\n[", b"{}"])
+def test_json_row_parser_malformed(payload: bytes) -> None:
+    parser = livestatus.JSONRowParser()
+    with pytest.raises(livestatus.MKLivestatusQueryError):
+        parser.feed(payload)
+        parser.feed(b"", final=True)
+
+
 # Regression test for Werk 14384
 @pytest.mark.parametrize(
     "user_id,allowed",